@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+基准测试: CLI 启动延迟 (直接启动 + stdin 写线程 vs 临时文件 + shell 重定向)
+
+在临时目录生成一个假的 `claude` 可执行脚本 (读完 stdin 后立即输出 init/result 事件)，
+放到 PATH 最前面，分别用两种 launch_mode 调用 CLIAdapter.execute，
+统计从调用开始到收到第一个 stream-json 事件的时间以及总耗时。
+
+用法:
+    python benchmarks/bench_cli_launch.py [--runs 30] [--prompt-kb 64]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.cli_adapter import CLIAdapter, CLIConfig  # noqa: E402
+
+FAKE_CLI = '''#!{python} -SE
+import json, sys
+if "--version" in sys.argv:
+    print("0.0.0 (bench)")
+    sys.exit(0)
+prompt = sys.stdin.buffer.read()
+print(json.dumps({{"type": "system", "subtype": "init", "model": "bench", "tools": []}}), flush=True)
+print(json.dumps({{"type": "result", "result": str(len(prompt)), "session_id": "bench", "total_cost_usd": 0}}), flush=True)
+'''
+
+
+class TimedAdapter(CLIAdapter):
+    """记录第一个事件到达时间"""
+
+    def __init__(self, config: CLIConfig):
+        super().__init__(config)
+        self.first_event_at = None
+
+    def _handle_stream_event(self, event):
+        if self.first_event_at is None:
+            self.first_event_at = time.perf_counter()
+        super()._handle_stream_event(event)
+
+
+def measure(launch_mode: str, prompt: str, runs: int) -> tuple:
+    adapter = TimedAdapter(CLIConfig(timeout=60, launch_mode=launch_mode))
+    first_event, total = [], []
+    for _ in range(runs):
+        adapter.first_event_at = None
+        start = time.perf_counter()
+        result = adapter.execute(prompt)
+        end = time.perf_counter()
+        if not result.success or result.output != str(len(prompt.encode("utf-8"))):
+            raise RuntimeError(f"unexpected result: {result.error or result.output}")
+        first_event.append(adapter.first_event_at - start)
+        total.append(end - start)
+    return first_event, total
+
+
+def report(label: str, latencies: list) -> None:
+    print(f"{label:<22} median={statistics.median(latencies) * 1000:7.2f}ms  "
+          f"mean={statistics.mean(latencies) * 1000:7.2f}ms  "
+          f"min={min(latencies) * 1000:7.2f}ms  max={max(latencies) * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 启动延迟基准")
+    parser.add_argument("--runs", type=int, default=30, help="每种方式的调用次数")
+    parser.add_argument("--prompt-kb", type=int, default=64, help="prompt 大小 (KB)")
+    args = parser.parse_args()
+
+    prompt = ("swagger: " + "x" * 1023) * args.prompt_kb
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fake = Path(tmp) / "claude"
+        fake.write_text(FAKE_CLI.format(python=sys.executable))
+        fake.chmod(0o755)
+        os.environ["PATH"] = f"{tmp}{os.pathsep}{os.environ.get('PATH', '')}"
+
+        results = {mode: measure(mode, prompt, args.runs) for mode in ("shell", "exec")}
+
+    print(f"CLI 调用 x{args.runs} (prompt {args.prompt_kb} KB)")
+    for mode, (first_event, total) in results.items():
+        report(f"{mode} first-event", first_event)
+        report(f"{mode} total", total)
+    speedup = statistics.median(results["shell"][0]) / statistics.median(results["exec"][0])
+    print(f"first-event median speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
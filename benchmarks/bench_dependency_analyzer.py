@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+基准测试: 静态依赖分析耗时 (合成的大规模 Swagger 规范)
+
+每个资源生成 5 个接口 (列表/创建/详情/更新/删除)，创建接口的请求体引用上一个资源的 ID，
+路径参数和请求体字段都会产生依赖候选。分别统计完整分析耗时和其中拓扑排序的耗时。
+
+用法:
+    python benchmarks/bench_dependency_analyzer.py [--endpoints 10000] [--runs 3] [--max-deps 1000000]
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.dependency_analyzer import DependencyAnalyzer  # noqa: E402
+from src.models import SwaggerSpec  # noqa: E402
+
+
+def build_spec(endpoints: int) -> SwaggerSpec:
+    """合成规范: endpoints / 5 个资源，每个资源 5 个接口"""
+    eps = []
+    for i in range(max(1, endpoints // 5)):
+        res, key = f"res{i}", f"res{i}Id"
+        path_param = {"name": key, "in": "path", "required": True}
+        props = {"name": {"type": "string"}, "ownerId": {"type": "string"}}
+        if i:
+            props[f"res{i - 1}Id"] = {"type": "string"}
+        body = {"content": {"application/json": {"schema": {
+            "type": "object",
+            "required": [f"res{i - 1}Id"] if i else [],
+            "properties": props
+        }}}}
+        eps.extend([
+            {"path": f"/{res}", "method": "get", "parameters": [{"name": "pageNo", "in": "query"}]},
+            {"path": f"/{res}", "method": "post", "requestBody": body},
+            {"path": f"/{res}/{{{key}}}", "method": "get", "parameters": [path_param]},
+            {"path": f"/{res}/{{{key}}}", "method": "put", "parameters": [path_param], "requestBody": body},
+            {"path": f"/{res}/{{{key}}}", "method": "delete", "parameters": [path_param]},
+        ])
+    return SwaggerSpec(raw_content="", title="bench", endpoints=eps)
+
+
+def measure(spec: SwaggerSpec, max_deps: int, runs: int) -> tuple:
+    analyzer = DependencyAnalyzer(max_dependencies=max_deps)
+    totals, sorts = [], []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = analyzer.analyze(spec)
+        totals.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        analyzer._topological_sort(spec.endpoints, result.dependencies)
+        sorts.append(time.perf_counter() - start)
+    return statistics.median(totals), statistics.median(sorts), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="静态依赖分析耗时基准")
+    parser.add_argument("--endpoints", type=int, default=10000, help="最大接口数 (按 1/10、1/4、1/2、1 倍递增测量)")
+    parser.add_argument("--runs", type=int, default=3, help="每个规模的重复次数 (取中位数)")
+    parser.add_argument("--max-deps", type=int, default=1000000, help="DependencyAnalyzer.max_dependencies")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)    # 合成规范的循环依赖告警
+
+    print(f"{'endpoints':>10} {'deps':>8} {'analyze':>10} {'topo sort':>10} {'per endpoint':>14}")
+    for size in sorted({max(5, args.endpoints * k // 20) for k in (2, 5, 10, 20)}):
+        spec = build_spec(size)
+        total, topo, result = measure(spec, args.max_deps, args.runs)
+        print(f"{spec.endpoint_count:>10} {len(result.dependencies):>8} {total * 1000:>8.1f}ms "
+              f"{topo * 1000:>8.1f}ms {total / spec.endpoint_count * 1e6:>11.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+基准测试: 规范与依赖分析结果的常驻内存 (合成的 5000 接口规范)
+
+规范模拟代码生成工具的输出: 每个接口内联响应包装 (code/message/data)、分页参数和请求体 schema，
+没有使用 $ref。分别测量两种表示在解析 + 依赖分析后仍被引用的内存 (tracemalloc):
+
+- before: 原先的表示 (保留原文 raw_content，接口定义直接引用 json 解析出的各自独立的子树，
+  依赖模型为带 __dict__ 的普通 dataclass，每个依赖各自持有 FieldRef)
+- after:  当前的表示 (原文按需读取，内容相同的子树共享，路径/方法驻留，接口与依赖均为 __slots__ 模型，字段共享)
+
+用法:
+    python benchmarks/bench_model_memory.py [--operations 5000]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.dependency_analyzer import DependencyAnalyzer  # noqa: E402
+from src.core.input_parser import InputParser  # noqa: E402
+from src.models import SwaggerSpec  # noqa: E402
+
+HTTP_METHODS = ("get", "post", "put", "delete", "patch", "options", "head")
+
+
+# ---------- 原先的模型 (普通 dataclass) ----------
+
+@dataclass
+class LegacyFieldRef:
+    name: str
+    location: str
+    required: bool = False
+    description: str = ""
+
+
+@dataclass
+class LegacyEndpointRef:
+    path: str
+    method: str
+    summary: str = ""
+
+
+@dataclass
+class LegacyResourceInfo:
+    name: str
+    primary_keys: List[str] = field(default_factory=list)
+    endpoints: List[LegacyEndpointRef] = field(default_factory=list)
+
+
+@dataclass
+class LegacyDependencyLink:
+    consumer: LegacyEndpointRef
+    field: LegacyFieldRef
+    producers: List[LegacyEndpointRef] = field(default_factory=list)
+    normalized_id: Optional[str] = None
+    confidence: str = "中"
+    reason: str = ""
+
+
+def legacy_endpoints(spec_dict: dict) -> list:
+    """原先的接口提取: 直接引用文档中的子树"""
+    endpoints = []
+    for path, methods in spec_dict.get("paths", {}).items():
+        for method, details in methods.items():
+            if method.lower() not in HTTP_METHODS or not isinstance(details, dict):
+                continue
+            endpoint = {
+                "path": path,
+                "method": method.upper(),
+                "operationId": details.get("operationId", f"{method}_{path}"),
+                "summary": details.get("summary", ""),
+                "description": details.get("description", ""),
+                "tags": details.get("tags", []),
+                "parameters": details.get("parameters", []),
+            }
+            if details.get("requestBody"):
+                endpoint["requestBody"] = details["requestBody"]
+            endpoint["responses"] = details.get("responses", {})
+            endpoints.append(endpoint)
+    return endpoints
+
+
+def legacy_analysis(analysis, endpoints: list) -> tuple:
+    """转换为原先的对象结构: 每个接口一个 EndpointRef，每个依赖各自的 FieldRef"""
+    refs = {}
+
+    def ref(ep):
+        if ep.index not in refs:
+            source = endpoints[ep.index]
+            refs[ep.index] = LegacyEndpointRef(path=source["path"], method=source["method"], summary=ep.summary)
+        return refs[ep.index]
+
+    resources = {
+        name: LegacyResourceInfo(name=name, primary_keys=list(res.primary_keys), endpoints=[ref(e) for e in res.endpoints])
+        for name, res in analysis.resources.items()
+    }
+    producer_lists = {}
+    dependencies = []
+    for dep in analysis.dependencies:
+        if id(dep.producers) not in producer_lists:
+            producer_lists[id(dep.producers)] = [ref(p) for p in dep.producers]
+        f = dep.field
+        dependencies.append(LegacyDependencyLink(
+            consumer=ref(dep.consumer),
+            field=LegacyFieldRef(f.name, f.location, f.required, f.description),
+            producers=producer_lists[id(dep.producers)],
+            normalized_id=dep.normalized_id,
+            confidence=dep.confidence,
+            reason=dep.reason
+        ))
+    layers = [list(layer) for layer in analysis.layers]
+    return resources, dependencies, analysis.sorted_endpoints, layers
+
+
+# ---------- 合成规范 ----------
+
+def build_document(operations: int) -> dict:
+    def envelope(data: dict) -> dict:
+        return {"200": {"description": "OK", "content": {"application/json": {"schema": {
+            "type": "object",
+            "properties": {
+                "code": {"type": "integer", "format": "int32", "description": "业务状态码"},
+                "message": {"type": "string", "description": "提示信息"},
+                "data": data
+            }
+        }}}}, "401": {"description": "Unauthorized"}, "403": {"description": "Forbidden"}}
+
+    paths = {}
+    for i in range(max(1, operations // 5)):
+        res, key = f"res{i}", f"res{i}Id"
+        entity = {"type": "object", "properties": {
+            "id": {"type": "string", "description": "主键"},
+            "name": {"type": "string", "description": "名称"},
+            "status": {"type": "string", "enum": ["ACTIVE", "DISABLED"]},
+            "createdAt": {"type": "string", "format": "date-time"},
+            "ownerId": {"type": "string", "description": "所属用户 ID"},
+            **({f"res{i - 1}Id": {"type": "string", "description": "上级资源 ID"}} if i else {})
+        }}
+        body = {"required": True, "content": {"application/json": {"schema": {
+            "type": "object",
+            "required": ["name"] + ([f"res{i - 1}Id"] if i else []),
+            "properties": {k: v for k, v in entity["properties"].items() if k not in ("id", "createdAt")}
+        }}}}
+        page = [
+            {"name": "pageNo", "in": "query", "schema": {"type": "integer", "default": 1}},
+            {"name": "pageSize", "in": "query", "schema": {"type": "integer", "default": 20}},
+        ]
+        path_param = [{"name": key, "in": "path", "required": True, "schema": {"type": "string"}}]
+        page_data = {"type": "object", "properties": {
+            "total": {"type": "integer"}, "records": {"type": "array", "items": entity}
+        }}
+        paths[f"/api/{res}"] = {
+            "get": {"tags": [res], "summary": f"分页查询 {res}", "parameters": page, "responses": envelope(page_data)},
+            "post": {"tags": [res], "summary": f"新建 {res}", "requestBody": body, "responses": envelope(entity)},
+        }
+        paths[f"/api/{res}/{{{key}}}"] = {
+            "get": {"tags": [res], "summary": f"{res} 详情", "parameters": path_param, "responses": envelope(entity)},
+            "put": {"tags": [res], "summary": f"修改 {res}", "parameters": path_param, "requestBody": body,
+                    "responses": envelope(entity)},
+            "delete": {"tags": [res], "summary": f"删除 {res}", "parameters": path_param,
+                       "responses": envelope({"type": "boolean"})},
+        }
+    return {"openapi": "3.0.1", "info": {"title": "bench-memory", "version": "1.0"}, "paths": paths}
+
+
+# ---------- 测量 ----------
+
+def measure(build) -> tuple:
+    """build() 返回的对象保持引用时占用的内存 (MB) 和峰值 (MB)"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return (current - baseline) / 1e6, (peak - baseline) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="规范与依赖模型内存基准")
+    parser.add_argument("--operations", type=int, default=5000, help="接口数")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    spec_file = Path(tempfile.mkdtemp(prefix="bench_memory_")) / "spec.json"
+    spec_file.write_text(json.dumps(build_document(args.operations), ensure_ascii=False), encoding="utf-8")
+
+    def before():
+        raw_content = spec_file.read_text(encoding="utf-8")
+        endpoints = legacy_endpoints(json.loads(raw_content))
+        swagger = SwaggerSpec(raw_content=raw_content, title="bench-memory", endpoints=endpoints)
+        analysis = DependencyAnalyzer(max_dependencies=10 ** 6).analyze(swagger)
+        return swagger, legacy_analysis(analysis, endpoints)
+
+    def after():
+        swagger = InputParser(spec_cache=False).parse(str(spec_file), "http://localhost").swagger
+        return swagger, DependencyAnalyzer(max_dependencies=10 ** 6).analyze(swagger)
+
+    swagger, analysis = after()
+    print(f"spec: {spec_file.stat().st_size / 1e6:.1f} MB, {swagger.endpoint_count} operations, "
+          f"{len(analysis.dependencies)} dependencies")
+    del swagger, analysis
+
+    results = {name: measure(build) for name, build in (("before", before), ("after", after))}
+    print(f"{'':>8} {'retained':>10} {'peak':>10}")
+    for name, (retained, peak) in results.items():
+        print(f"{name:>8} {retained:>8.1f}MB {peak:>8.1f}MB")
+    print(f"retained memory: {results['after'][0] / results['before'][0]:.0%} of before")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+基准测试: 单用例重跑延迟 (冷启动 subprocess vs 常驻 pytest worker)
+
+在临时目录生成与 SkeletonWriter 结构相近的测试项目 (conftest 导入 requests 并加载 explored_data.json)，
+分别用两种方式重复执行同一个测试函数，每轮之间修改测试文件以触发模块重载。
+
+用法:
+    python benchmarks/bench_pytest_worker.py [--runs 10] [--tests 50]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.pytest_runner import PytestRunner, PytestConfig  # noqa: E402
+
+CONFTEST = '''
+import json
+from pathlib import Path
+
+import pytest
+import requests
+
+EXPLORED_DATA = json.loads((Path(__file__).parent / "explored_data.json").read_text())
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    return requests.Session()
+
+
+@pytest.fixture(scope="session")
+def explored_data():
+    return EXPLORED_DATA
+'''
+
+PYTEST_INI = '''[pytest]
+testpaths = tests
+'''
+
+
+def build_project(root: Path, tests: int) -> Path:
+    """生成测试项目，返回测试文件路径"""
+    tests_dir = root / "tests"
+    tests_dir.mkdir(parents=True)
+    (tests_dir / "pytest.ini").write_text(PYTEST_INI)
+    (tests_dir / "conftest.py").write_text(CONFTEST)
+    explored = {"extracted_values": {f"/v1/items/{i}": {"id": i} for i in range(2000)}}
+    (tests_dir / "explored_data.json").write_text(json.dumps(explored))
+
+    body = []
+    for i in range(tests):
+        body.append(f"# TestCase: TC-{i + 1:03d}\n"
+                    f"def test_case_{i}(api_client, explored_data):\n"
+                    f"    assert explored_data[\"extracted_values\"][\"/v1/items/{i}\"][\"id\"] == {i}\n")
+    test_file = tests_dir / "test_items_api.py"
+    test_file.write_text("\n\n".join(body))
+    return test_file
+
+
+def measure(runner: PytestRunner, test_file: Path, output_dir: Path, runs: int) -> list:
+    latencies = []
+    for i in range(runs):
+        # 模拟自愈修改文件
+        test_file.write_text(test_file.read_text() + f"\n# run {i}\n")
+        start = time.perf_counter()
+        result = runner.run_single_test(str(test_file), "test_case_0", str(output_dir))
+        latencies.append(time.perf_counter() - start)
+        if not result.passed:
+            raise RuntimeError(f"unexpected result: {result.status} {result.error_info}")
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    print(f"{label:<10} first={latencies[0] * 1000:8.1f}ms  "
+          f"median={statistics.median(latencies) * 1000:8.1f}ms  "
+          f"mean={statistics.mean(latencies) * 1000:8.1f}ms  "
+          f"min={min(latencies) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单用例重跑延迟基准")
+    parser.add_argument("--runs", type=int, default=10, help="每种方式的重跑次数")
+    parser.add_argument("--tests", type=int, default=50, help="测试文件中的用例数量")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        test_file = build_project(root, args.tests)
+        output_dir = root / "reports"
+        output_dir.mkdir()
+
+        cold = measure(PytestRunner(PytestConfig(verbose=False)), test_file, output_dir, args.runs)
+
+        warm_runner = PytestRunner(PytestConfig(verbose=False, warm_worker=True))
+        try:
+            warm = measure(warm_runner, test_file, output_dir, args.runs)
+        finally:
+            warm_runner.close()
+
+    print(f"单用例重跑 x{args.runs} (测试文件 {args.tests} 个用例)")
+    report("cold", cold)
+    report("warm", warm)
+    print(f"median speedup: {statistics.median(cold) / statistics.median(warm):.1f}x "
+          f"(warm first 含 worker 启动)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from .cli_adapter import (
     CLIAdapter, CLISession, CLIConfig,
     ExecutionMode, create_adapter
 )
+from .async_cli_adapter import AsyncCLIAdapter, AsyncCLISession, set_cli_concurrency
 from .input_parser import InputParser, InputParseError, parse_inputs
 from .prompt_builder import PromptBuilder, PromptPackage, create_prompt_builder
 from .pytest_runner import PytestRunner, PytestConfig, run_pytest
@@ -15,6 +16,7 @@ __all__ = [
     # CLI Adapter
     "CLIAdapter", "CLISession", "CLIConfig",
     "ExecutionMode", "create_adapter",
+    "AsyncCLIAdapter", "AsyncCLISession", "set_cli_concurrency",
     # Input Parser
     "InputParser", "InputParseError", "parse_inputs",
     # Prompt Builder
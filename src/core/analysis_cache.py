@@ -0,0 +1,349 @@
+"""
+AnalysisCache - 依赖分析结果缓存
+
+同一份 Swagger 重复执行 (CLI 多次运行、Web 多个任务) 时复用静态依赖分析结果。
+
+- 缓存键: sha256(分析版本 + 规范化后的接口列表 + components)，与 JSON 格式/键顺序无关
+- 命中: 直接由缓存重建 DependencyAnalysisResult，并复制已序列化的 dependency_analysis.json，不再分析
+  (条目以接口序号存储，同一 ID 的生产者列表只存一份)
+- 部分复用: 未命中时取同名规范最近一次的缓存条目，若 components 未变 (字段提取会跟随 $ref)，
+  接口定义未变的接口沿用其已提取的字段，
+  只对新增/变更的接口提取字段；资源主键、依赖解析和拓扑排序涉及全部接口，重新计算 (线性时间)
+- 淘汰: 按最近访问时间保留 max_entries 个条目
+
+目录结构:
+    <cache_dir>/<key>.json              条目 (紧凑的分析结果 + 各接口字段)，mtime 即最近访问时间
+    <cache_dir>/<key>.analysis.json     运行目录中 dependency_analysis.json 的内容
+    <cache_dir>/latest/<title_hash>     同名规范最近一次的缓存键
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from ..models import SwaggerSpec
+from ..models.dependency import (
+    DependencyAnalysisResult, DependencyLink, EndpointRef, FieldRef, ResourceInfo
+)
+from .dependency_analyzer import DependencyAnalyzer
+from .response_cache import _atomic_write
+from .ref_resolver import RefResolver
+
+logger = logging.getLogger(__name__)
+
+# 分析逻辑或条目格式变化时递增，使旧条目失效
+ANALYSIS_CACHE_VERSION = 3
+ANALYSIS_FILE = "dependency_analysis.json"
+
+HIT = "hit"
+PARTIAL = "partial"
+MISS = "miss"
+
+
+def _digest(data: Any) -> str:
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def endpoint_digest(endpoint: Dict[str, Any]) -> str:
+    """单个接口定义的摘要 (字段提取依赖接口自身定义和其引用的 components)"""
+    return _digest(dict(endpoint))[:16]
+
+
+@dataclass
+class AnalysisCacheStats:
+    """一次分析的缓存情况"""
+    status: str = MISS
+    key: str = ""
+    seconds: float = 0.0            # 本次获取分析结果的耗时
+    saved_seconds: float = 0.0      # 命中时原分析耗时
+    reused_endpoints: int = 0       # 部分复用: 沿用字段的接口数
+    analyzed_endpoints: int = 0     # 重新提取字段的接口数
+
+    def summary(self) -> str:
+        if self.status == HIT:
+            return f"依赖分析缓存命中 ({self.seconds:.2f}s，原分析 {self.saved_seconds:.2f}s)"
+        if self.status == PARTIAL:
+            return (f"依赖分析缓存部分复用: 沿用 {self.reused_endpoints} 个接口，"
+                    f"重新分析 {self.analyzed_endpoints} 个接口 ({self.seconds:.2f}s)")
+        return f"依赖分析缓存未命中 ({self.seconds:.2f}s)"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cache": self.status,
+            "key": self.key[:16],
+            "seconds": round(self.seconds, 3),
+            "saved_seconds": round(self.saved_seconds, 3),
+            "reused_endpoints": self.reused_endpoints,
+            "analyzed_endpoints": self.analyzed_endpoints
+        }
+
+
+class AnalysisCache:
+    """依赖分析缓存 (线程安全，多个进程共享目录时依赖原子写入)
+
+    使用方式:
+        cache = AnalysisCache("output/.cache/analysis")
+        analysis, stats = cache.analyze(DependencyAnalyzer(), swagger, output_dir)
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 50):
+        self.cache_dir = Path(cache_dir)
+        self.latest_dir = self.cache_dir / "latest"
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def spec_key(
+        self,
+        swagger: SwaggerSpec,
+        analyzer: DependencyAnalyzer,
+        digests: Optional[List[str]] = None,
+        components: Optional[str] = None
+    ) -> str:
+        """规范的缓存键 (接口按文档顺序，拓扑排序的同级次序依赖该顺序)
+
+        Args:
+            digests / components: 已计算的各接口摘要和 components 摘要 (避免重复序列化)
+        """
+        return _digest({
+            "version": ANALYSIS_CACHE_VERSION,
+            "max_dependencies": analyzer.max_dependencies,
+            "endpoints": digests if digests is not None else [endpoint_digest(ep) for ep in swagger.endpoints],
+            "components": components if components is not None else _digest(swagger.components)
+        })
+
+    def analyze(
+        self,
+        analyzer: DependencyAnalyzer,
+        swagger: SwaggerSpec,
+        output_dir: Optional[str] = None
+    ) -> Tuple[DependencyAnalysisResult, AnalysisCacheStats]:
+        """获取分析结果: 命中则重建，否则 (部分复用字段后) 分析并写入缓存
+
+        Args:
+            output_dir: 运行目录，同时写入 dependency_analysis.json (命中时直接复制缓存的文件)
+        """
+        start = time.time()
+        digests = [endpoint_digest(ep) for ep in swagger.endpoints]
+        components = _digest(swagger.components)
+        key = self.spec_key(swagger, analyzer, digests, components)
+        stats = AnalysisCacheStats(key=key)
+
+        entry = self._load(key)
+        if entry is not None:
+            try:
+                analysis = _expand(entry["analysis"], swagger.endpoints)
+                if output_dir and entry.get("analysis_file", True):
+                    shutil.copyfile(self._analysis_path(key), Path(output_dir) / ANALYSIS_FILE)
+                elif output_dir:
+                    analysis.save(output_dir)
+                stats.status = HIT
+                stats.saved_seconds = entry.get("duration", 0.0)
+                stats.seconds = time.time() - start
+                self._touch(key)
+                return analysis, stats
+            except (KeyError, TypeError, IndexError, OSError) as e:
+                logger.debug(f"Unusable analysis cache entry {key[:16]}: {e}")
+
+        # 部分复用: 同名规范最近一次的条目中，定义未变的接口沿用已提取的字段
+        known: Dict[str, List[Dict[str, Any]]] = {}
+        base_key = self._latest_key(swagger.title)
+        base = self._load(base_key) if base_key else None
+        if base is not None and base.get("components") == components:
+            known = base.get("endpoint_fields", {})
+
+        resolver = RefResolver(swagger.components)
+        fields: List[List[FieldRef]] = []
+        for ep, digest in zip(swagger.endpoints, digests):
+            if digest in known:
+                fields.append([analyzer.field_ref(**f) for f in known[digest]])
+                stats.reused_endpoints += 1
+            else:
+                fields.append(analyzer.extract_fields(ep, resolver))
+                stats.analyzed_endpoints += 1
+
+        analysis = analyzer.analyze(swagger, fields=fields)
+        analysis_file = analysis.save(output_dir) if output_dir else None
+        stats.status = PARTIAL if stats.reused_endpoints else MISS
+        stats.seconds = time.time() - start
+
+        self._store(key, swagger.title, {
+            "version": ANALYSIS_CACHE_VERSION,
+            "key": key,
+            "title": swagger.title,
+            "created": time.time(),
+            "duration": stats.seconds,
+            "components": components,
+            "endpoint_fields": {
+                digest: [f.to_dict() for f in ep_fields] for digest, ep_fields in zip(digests, fields)
+            },
+            "analysis": _compact(analysis, swagger.endpoints)
+        }, analysis_file)
+        return analysis, stats
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self.cache_dir.glob("*.json"):
+                self._remove(path)
+            if self.latest_dir.is_dir():
+                for path in self.latest_dir.iterdir():
+                    self._remove(path)
+
+    # ---------- 存储 ----------
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _analysis_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.analysis.json"
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Corrupted analysis cache entry {path.name}: {e}")
+            return None
+        if entry.get("version") != ANALYSIS_CACHE_VERSION:
+            return None
+        return entry
+
+    def _store(self, key: str, title: str, entry: Dict[str, Any], analysis_file: Optional[str]) -> None:
+        try:
+            with self._lock:
+                self.latest_dir.mkdir(parents=True, exist_ok=True)
+                if analysis_file:
+                    _atomic_write(self._analysis_path(key), Path(analysis_file).read_bytes())
+                else:
+                    entry["analysis_file"] = False
+                _atomic_write(self._entry_path(key), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+                _atomic_write(self.latest_dir / self._title_hash(title), key.encode("utf-8"))
+                self._prune()
+        except OSError as e:
+            logger.warning(f"Failed to write analysis cache: {e}")
+
+    def _latest_key(self, title: str) -> Optional[str]:
+        try:
+            return (self.latest_dir / self._title_hash(title)).read_text(encoding="utf-8").strip() or None
+        except OSError:
+            return None
+
+    def _touch(self, key: str) -> None:
+        try:
+            self._entry_path(key).touch()
+        except OSError:
+            pass
+
+    def _prune(self) -> None:
+        """按最近访问时间保留 max_entries 个条目"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries = [e for e in entries if not e[1].name.endswith(".analysis.json")]
+        entries.sort(key=lambda e: e[0], reverse=True)
+        for _, path in entries[self.max_entries:]:
+            self._remove(path)
+            self._remove(path.with_name(path.stem + ".analysis.json"))
+
+    @staticmethod
+    def _title_hash(title: str) -> str:
+        return hashlib.sha256((title or "").encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _compact(analysis: DependencyAnalysisResult, endpoints: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """紧凑格式: 接口以序号引用，共享的生产者列表只存一份"""
+    refs: List[EndpointRef] = []
+    ref_index: Dict[int, int] = {}
+
+    def ref(ep: EndpointRef) -> int:
+        if id(ep) not in ref_index:
+            ref_index[id(ep)] = len(refs)
+            refs.append(ep)
+        return ref_index[id(ep)]
+
+    resources = [[r.name, r.primary_keys, [ref(ep) for ep in r.endpoints]] for r in analysis.resources.values()]
+    producer_lists: List[List[int]] = []
+    list_index: Dict[int, int] = {}
+    dependencies = []
+    for dep in analysis.dependencies:
+        if id(dep.producers) not in list_index:
+            list_index[id(dep.producers)] = len(producer_lists)
+            producer_lists.append([ref(p) for p in dep.producers])
+        f = dep.field
+        dependencies.append([
+            ref(dep.consumer), f.name, f.location, f.required, f.description,
+            dep.normalized_id, dep.confidence, dep.reason, list_index[id(dep.producers)]
+        ])
+    position = {id(ep): i for i, ep in enumerate(endpoints)}
+    return {
+        "refs": [[r.path, r.method, r.summary, r.index] for r in refs],
+        "resources": resources,
+        "producers": producer_lists,
+        "dependencies": dependencies,
+        "sorted": [position[id(ep)] for ep in analysis.sorted_endpoints],
+        "layers": analysis.layers,
+        "cycles": analysis.cycles,
+        "generated_by": analysis.generated_by
+    }
+
+
+def _expand(data: Dict[str, Any], endpoints: List[Dict[str, Any]]) -> DependencyAnalysisResult:
+    """由紧凑格式重建 (sorted_endpoints 指向当前规范的接口对象)"""
+    refs = [
+        EndpointRef(path=path, method=method, summary=summary, index=index)
+        for path, method, summary, index in data["refs"]
+    ]
+    producer_lists = [[refs[i] for i in items] for items in data["producers"]]
+    field_refs: Dict[Tuple[str, str, bool, str], FieldRef] = {}
+
+    def field_ref(name: str, location: str, required: bool, description: str) -> FieldRef:
+        key = (name, location, required, description)
+        if key not in field_refs:
+            field_refs[key] = FieldRef(name=name, location=location, required=required, description=description)
+        return field_refs[key]
+
+    return DependencyAnalysisResult(
+        resources={
+            name: ResourceInfo(name=name, primary_keys=keys, endpoints=[refs[i] for i in items])
+            for name, keys, items in data["resources"]
+        },
+        dependencies=[
+            DependencyLink(
+                consumer=refs[consumer],
+                field=field_ref(name, location, required, description),
+                producers=producer_lists[producers],
+                normalized_id=normalized_id,
+                confidence=confidence,
+                reason=reason
+            )
+            for consumer, name, location, required, description, normalized_id, confidence, reason, producers
+            in data["dependencies"]
+        ],
+        sorted_endpoints=[endpoints[i] for i in data["sorted"]],
+        layers=data["layers"],
+        cycles=data["cycles"],
+        generated_by=data.get("generated_by", "static-analyzer")
+    )
+
+
+def default_analysis_cache_dir(output_dir: str) -> str:
+    """默认缓存目录: 输出根目录下的 .cache/analysis (多次执行、多个 Web 任务共享)"""
+    return str(Path(output_dir).resolve().parent / ".cache" / "analysis")
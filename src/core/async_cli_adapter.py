@@ -0,0 +1,446 @@
+"""
+AsyncCLIAdapter - 基于 asyncio 的 Claude Code CLI 适配器
+
+与 CLIAdapter 保持相同的 CLIResult 契约 (命令构建、事件解析、结果构建完全复用)，另外提供:
+- 异步迭代器: 逐个产出 stream-json 事件
+- 可等待的取消: 立即终止整个进程组
+- 全局并发限制: 所有异步适配器共享一个信号量
+- 同步接口: execute() 在后台事件循环中运行，CLISession / WorkflowEngine 无需修改
+  (响应缓存只作用于同步接口 execute())
+
+使用方式:
+    adapter = AsyncCLIAdapter(CLIConfig(...))
+
+    async for event in adapter.stream("生成测试代码..."):
+        ...
+    result = adapter.last_result
+
+    result = await adapter.execute_async("...")
+    await adapter.cancel()
+
+    result = adapter.execute("...")     # 同步调用
+"""
+
+import asyncio
+import os
+import signal
+import threading
+import time
+import logging
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator
+
+from ..models import CLIResult
+from .cli_adapter import (
+    CLIAdapter, CLIConfig, ExecutionMode, _StreamState, READ_CHUNK
+)
+from .stream_io import LineFramer, NdjsonTranscript
+from .response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# 默认全局并发上限 (同时运行的 CLI 进程数)
+DEFAULT_CONCURRENCY = 4
+# cancel_event (threading.Event) 的轮询间隔
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class _ConcurrencyLimiter:
+    """全局并发限制
+
+    asyncio.Semaphore 绑定事件循环，因此按事件循环各建一个，上限相同。
+    同步接口的调用都在同一个后台事件循环中执行，共享同一个信号量。
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def set_limit(self, limit: int) -> None:
+        """修改上限 (之后新建的信号量生效，已在等待的调用不受影响)"""
+        with self._lock:
+            self.limit = max(1, limit)
+            self._semaphores = weakref.WeakKeyDictionary()
+
+    @asynccontextmanager
+    async def slot(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = semaphore
+        async with semaphore:
+            yield
+
+
+_limiter = _ConcurrencyLimiter(DEFAULT_CONCURRENCY)
+
+
+def set_cli_concurrency(limit: int) -> None:
+    """设置异步 CLI 调用的全局并发上限"""
+    _limiter.set_limit(limit)
+
+
+class _LoopThread:
+    """后台事件循环线程 (同步接口使用，进程内单例)"""
+
+    _instance: Optional["_LoopThread"] = None
+    _guard = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self._run, name="async-cli-loop", daemon=True
+        )
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @classmethod
+    def get(cls) -> "_LoopThread":
+        with cls._guard:
+            if cls._instance is None or not cls._instance.thread.is_alive():
+                cls._instance = cls()
+            return cls._instance
+
+    def run(self, coro):
+        """在后台事件循环中执行协程并等待结果 (阻塞调用线程)"""
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError("Cannot call the synchronous API from the async CLI loop; await it instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+class AsyncCLIAdapter(CLIAdapter):
+    """基于 asyncio 的 Claude Code CLI 适配器
+
+    同一个适配器同一时间只运行一个 CLI 进程；并发调用请使用 fork() 派生。
+    """
+
+    def __init__(
+        self,
+        config: Optional[CLIConfig] = None,
+        cache: Optional[ResponseCache] = None
+    ):
+        super().__init__(config, cache)
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._cancel_requested = False
+        # 最近一次 stream() 的结果
+        self.last_result: Optional[CLIResult] = None
+
+    async def stream(
+        self,
+        prompt: str,
+        mode: ExecutionMode = ExecutionMode.SINGLE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """执行 CLI 并逐个产出 stream-json 事件
+
+        迭代结束后 self.last_result 为本次调用的 CLIResult。
+        生成器被关闭 (aclose() / 任务取消) 时立即终止 CLI 进程组；
+        提前 break 时请显式调用 aclose()。
+        """
+        async with _limiter.slot():
+            events = self._run(prompt, mode)
+            try:
+                async for event in events:
+                    yield event
+            finally:
+                # 显式关闭内层生成器，保证提前退出时立即终止进程
+                await events.aclose()
+
+    async def execute_async(
+        self,
+        prompt: str,
+        mode: ExecutionMode = ExecutionMode.SINGLE
+    ) -> CLIResult:
+        """执行 CLI 并返回 CLIResult (与 CLIAdapter.execute 相同的契约)"""
+        async for _ in self.stream(prompt, mode):
+            pass
+        return self.last_result
+
+    def _invoke(
+        self,
+        prompt: str,
+        mode: ExecutionMode = ExecutionMode.SINGLE
+    ) -> CLIResult:
+        """同步接口 (execute) 的实际调用: 在后台事件循环中执行，供 CLISession / WorkflowEngine 直接使用"""
+        return _LoopThread.get().run(self.execute_async(prompt, mode))
+
+    async def cancel(self) -> None:
+        """取消当前调用: 立即终止 CLI 进程组并等待其退出"""
+        self._cancel_requested = True
+        process = self._process
+        if process is not None:
+            await self._kill(process)
+
+    def cancel_threadsafe(self) -> None:
+        """从任意线程取消当前调用 (不等待进程退出)"""
+        self._cancel_requested = True
+        process = self._process
+        if process is not None:
+            self._killpg(process)
+
+    async def _run(
+        self,
+        prompt: str,
+        mode: ExecutionMode
+    ) -> AsyncIterator[Dict[str, Any]]:
+        cmd = self.build_command(mode)
+
+        # 重置 todo 追踪状态
+        self._last_todos = []
+        self._cancel_requested = False
+        self.last_result = None
+
+        # 日志只显示命令前缀，不暴露完整 prompt
+        logger.info(f"Executing CLI (async): claude -p ... (mode={mode.value}, prompt_len={len(prompt)})")
+
+        start_time = time.time()
+        state = _StreamState(
+            recent_events=deque(maxlen=max(1, self.config.event_history)),
+            stderr_tail=deque(maxlen=max(1, self.config.stderr_tail_lines))
+        )
+        self.recent_events = state.recent_events
+        transcript = NdjsonTranscript(self.config.transcript_path) if self.config.transcript_path else None
+        process = None
+        tasks: List[asyncio.Future] = []
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.config.working_dir,
+                start_new_session=True  # 独立进程组，取消时整组终止
+            )
+            self._process = process
+
+            # prompt 写入、stderr 读取与 stdout 解析并行，任何一端写满管道都不会阻塞另一端
+            tasks = [
+                asyncio.ensure_future(self._feed_stdin(process, prompt)),
+                asyncio.ensure_future(self._drain_stderr(process, state)),
+                asyncio.ensure_future(self._watch(process, start_time + self.config.timeout, state)),
+            ]
+
+            framer = LineFramer()
+            while True:
+                data = await process.stdout.read(READ_CHUNK)
+                if data:
+                    lines = framer.feed(data)
+                else:
+                    rest = framer.flush()
+                    lines = [rest] if rest else []
+                for line in lines:
+                    event = self._handle_stdout_line(line, state, transcript)
+                    if event is not None:
+                        yield event
+                if not data:
+                    break
+
+            return_code = await process.wait()
+            await tasks[1]
+            if self._cancel_requested:
+                state.cancelled = True
+            self.last_result = self._build_result(state, return_code, time.time() - start_time)
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # 迭代被提前关闭或任务被取消: 立即终止进程组
+            if process is not None:
+                await self._kill(process)
+            raise
+        except Exception as e:
+            logger.error(f"Command execution failed: {str(e)}")
+            if process is not None:
+                await self._kill(process)
+            self.last_result = CLIResult(
+                success=False,
+                error=str(e),
+                exit_code=-1,
+                execution_time=time.time() - start_time
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+            if transcript:
+                transcript.close()
+            self._process = None
+
+    @staticmethod
+    async def _feed_stdin(process: asyncio.subprocess.Process, prompt: str) -> None:
+        """写入 prompt 后关闭 stdin"""
+        try:
+            process.stdin.write(prompt.encode("utf-8"))
+            await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("CLI closed stdin before the prompt was fully written")
+        finally:
+            try:
+                process.stdin.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _drain_stderr(process: asyncio.subprocess.Process, state: _StreamState) -> None:
+        """持续读取 stderr，只保留尾部"""
+        framer = LineFramer()
+        while True:
+            data = await process.stderr.read(READ_CHUNK)
+            if data:
+                lines = framer.feed(data)
+            else:
+                rest = framer.flush()
+                lines = [rest] if rest else []
+            for line in lines:
+                text = line.decode("utf-8", errors="replace").rstrip()
+                state.stderr_tail.append(text)
+                logger.debug(f"[cli stderr] {text[:200]}")
+            if not data:
+                return
+
+    async def _watch(
+        self,
+        process: asyncio.subprocess.Process,
+        deadline: float,
+        state: _StreamState
+    ) -> None:
+        """超时及 cancel_event (threading.Event) 监视"""
+        cancel_event = getattr(self.config, "cancel_event", None)
+        while process.returncode is None:
+            if cancel_event and getattr(cancel_event, "is_set", lambda: False)():
+                self._cancel_requested = True
+                if self.config.on_output:
+                    self.config.on_output("→ 任务取消，正在终止 CLI 进程...")
+                await self._kill(process)
+                return
+            if time.time() > deadline:
+                state.timed_out = True
+                await self._kill(process)
+                return
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+
+    @staticmethod
+    def _killpg(process: asyncio.subprocess.Process) -> None:
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except Exception:
+            try:
+                process.kill()
+            except Exception:
+                pass
+
+    async def _kill(self, process: asyncio.subprocess.Process) -> None:
+        """终止 CLI 进程组并回收"""
+        self._killpg(process)
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except Exception:
+            pass
+
+    def fork(self, tag: Optional[str] = None) -> "AsyncCLIAdapter":
+        """派生独立的适配器 (见 CLIAdapter.fork)，不共享进程状态"""
+        child = super().fork(tag)
+        child._process = None
+        child._cancel_requested = False
+        child.last_result = None
+        return child
+
+
+class AsyncCLISession:
+    """异步 CLI 会话管理器 (CLISession 的异步版本)
+
+    使用方式:
+        session = AsyncCLISession(adapter)
+        result = await session.start("生成测试代码...")
+        result = await session.send("修复上面的错误...")
+
+        async for event in session.stream("继续..."):
+            ...
+
+        session.end()
+    """
+
+    def __init__(self, adapter: AsyncCLIAdapter):
+        self.adapter = adapter
+        self.history: List[Dict[str, Any]] = []
+        self.is_active = False
+        self.total_cost: float = 0.0
+
+    async def start(self, initial_prompt: str) -> CLIResult:
+        """启动新会话"""
+        logger.info("Starting new async CLI session...")
+        self.adapter.reset_session()
+        self.history = []
+        self.total_cost = 0.0
+        return await self._turn(initial_prompt, ExecutionMode.SINGLE)
+
+    async def send(self, message: str) -> CLIResult:
+        """发送后续消息 (继续当前会话)"""
+        if not self.is_active:
+            logger.warning("No active session, starting new one...")
+            return await self.start(message)
+        return await self._turn(message, ExecutionMode.SESSION)
+
+    async def stream(self, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """发送消息并逐个产出事件，结束后记录本轮结果"""
+        mode = ExecutionMode.SESSION if self.is_active else ExecutionMode.SINGLE
+        if mode == ExecutionMode.SINGLE:
+            self.adapter.reset_session()
+        events = self.adapter.stream(message, mode)
+        try:
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
+        self._after_turn(message, mode, self.adapter.last_result)
+
+    async def cancel(self) -> None:
+        """取消当前调用"""
+        await self.adapter.cancel()
+
+    async def _turn(self, message: str, mode: ExecutionMode) -> CLIResult:
+        result = await self.adapter.execute_async(message, mode)
+        self._after_turn(message, mode, result)
+        return result
+
+    def _after_turn(self, message: str, mode: ExecutionMode, result: Optional[CLIResult]) -> None:
+        if result is None:
+            return
+        if mode == ExecutionMode.SINGLE and result.success:
+            self.is_active = True
+        self.history.append({
+            "role": "user",
+            "content": message,
+            "result": result.to_dict(),
+            "timestamp": time.time()
+        })
+        self.total_cost += result.cost_usd
+
+    def end(self) -> None:
+        """结束会话"""
+        logger.info(f"Ending async session. Total cost: ${self.total_cost:.4f}")
+        self.is_active = False
+        self.adapter.reset_session()
+
+    def get_history(self) -> List[Dict[str, Any]]:
+        """获取会话历史"""
+        return self.history.copy()
+
+    def fork(self, tag: Optional[str] = None) -> "AsyncCLISession":
+        """从当前会话分叉出独立会话"""
+        child = AsyncCLISession(self.adapter.fork(tag))
+        child.is_active = self.is_active and child.adapter.session_id is not None
+        return child
+
+    @property
+    def session_id(self) -> Optional[str]:
+        """获取当前会话 ID"""
+        return self.adapter.session_id
@@ -4,6 +4,9 @@ CLIAdapter - Claude Code CLI 调用适配器
 封装 Claude Code CLI 的调用，支持:
 - 单次调用模式
 - 会话模式 (保持上下文用于自愈循环)
+- 会话分叉 (基于同一上下文并发执行多个调用)
+- 流式读取: selector 同时读取 stdout/stderr，内存有界，可选 NDJSON 记录
+- 响应缓存: 可缓存阶段的 Prompt 命中缓存时直接返回结果并恢复产物文件
 - 自动重试机制
 """
 
@@ -13,15 +16,24 @@ import time
 import logging
 import tempfile
 import os
-import select
-from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any, Callable
+import selectors
+import signal
+import threading
+import copy
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Optional, List, Dict, Any, Callable, Deque
 from enum import Enum
 
 from ..models import CLIResult
+from .stream_io import LineFramer, NdjsonTranscript
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# 单次从管道读取的最大字节数
+READ_CHUNK = 64 * 1024
+
 
 class ExecutionMode(Enum):
     """执行模式"""
@@ -46,6 +58,29 @@ class CLIConfig:
     on_todo_update: Optional[Callable[[List[Dict[str, Any]]], None]] = None
     # 取消事件（由上层注入），用于中断长时间的 CLI 调用
     cancel_event: Optional[Any] = None
+    # 流式读取: 只保留最近的事件和 stderr 尾部，内存占用与会话时长无关
+    event_history: int = 50                 # 保留最近 N 个 stream-json 事件 (调试用)
+    stderr_tail_lines: int = 200            # 保留 stderr 最后 N 行
+    transcript_path: Optional[str] = None   # 完整事件记录 (NDJSON 追加写入，可选)
+    # 启动方式: "exec" 直接启动并通过 stdin 写入 prompt；"shell" 经临时文件 + shell 重定向 (旧方式，作为回退)
+    launch_mode: str = "exec"
+    # 响应缓存: 当前阶段 (PromptPackage.phase) 及 CLI 写入产物的目录
+    phase: str = ""
+    artifact_dir: Optional[str] = None
+
+
+@dataclass
+class _StreamState:
+    """单次 execute 的流式读取状态"""
+    recent_events: Deque[Dict[str, Any]]
+    stderr_tail: Deque[str]
+    final_result: Optional[Dict[str, Any]] = None
+    cancelled: bool = False
+    timed_out: bool = False
+
+    @property
+    def stderr_text(self) -> str:
+        return "\n".join(self.stderr_tail)
 
 
 class CLIAdapter:
@@ -55,11 +90,24 @@ class CLIAdapter:
     支持单次调用和会话模式。
     """
 
-    def __init__(self, config: Optional[CLIConfig] = None):
+    def __init__(
+        self,
+        config: Optional[CLIConfig] = None,
+        cache: Optional[ResponseCache] = None
+    ):
         self.config = config or CLIConfig()
+        self.cache = cache
         self.session_id: Optional[str] = None
         # 追踪上一次 todos 状态，用于检测变化
         self._last_todos: List[Dict[str, Any]] = []
+        # 分叉待定: 下一次 SESSION 调用附带 --fork-session，生成新的会话 ID
+        self._fork_pending = False
+        # 最近一次调用的事件 (有界，仅用于调试)
+        self.recent_events: Deque[Dict[str, Any]] = deque(maxlen=max(1, self.config.event_history))
+        # 会话上下文链: 上一轮的缓存键 ("" 为新会话，None 表示上下文无法复现，不再使用缓存)
+        self._cache_key: Optional[str] = ""
+        # 当前会话 ID 来自缓存 (CLI 端可能已不存在该会话)
+        self._cached_session = False
         self._validate_cli_available()
 
     def _validate_cli_available(self) -> None:
@@ -111,6 +159,8 @@ class CLIAdapter:
         # 会话模式
         if mode == ExecutionMode.SESSION and self.session_id:
             cmd.extend(["--resume", self.session_id])
+            if self._fork_pending:
+                cmd.append("--fork-session")
 
         # Prompt 通过 stdin 传递，不再作为命令行参数
 
@@ -389,7 +439,10 @@ class CLIAdapter:
         prompt: str,
         mode: ExecutionMode = ExecutionMode.SINGLE
     ) -> CLIResult:
-        """执行 Claude Code CLI (流式输出版本)
+        """执行 Claude Code CLI
+
+        启用响应缓存且当前阶段可缓存时，先按 Prompt 指纹查找缓存，
+        命中则恢复产物文件并直接返回；未命中则调用 CLI 并保存结果。
 
         Args:
             prompt: 发送给 Claude 的 Prompt
@@ -398,6 +451,59 @@ class CLIAdapter:
         Returns:
             CLIResult 包含执行结果
         """
+        cache = self.cache
+        parent_key = "" if mode == ExecutionMode.SINGLE else self._cache_key
+        if cache is None or not cache.accepts(self.config.phase) or parent_key is None:
+            result = self._invoke_resumable(prompt, mode)
+            # 上下文已包含未缓存的对话，后续轮次无法复现
+            self._cache_key = None
+            return result
+
+        artifact_dir = self.config.artifact_dir
+        key = cache.make_key(prompt, self.config.allowed_tools, self.config.phase, artifact_dir, parent_key)
+        hit = cache.get(key, artifact_dir)
+        if hit is not None:
+            logger.info(f"Response cache hit: phase={self.config.phase}, key={key[:12]}, files={len(hit.files)}")
+            if self.config.on_output:
+                self.config.on_output(f"→ 命中响应缓存: 跳过 CLI 调用，恢复文件 {len(hit.files)} 个")
+            self.session_id = hit.result.session_id
+            self._fork_pending = False
+            self._cached_session = True
+            self._cache_key = key
+            return replace(hit.result, cost_usd=0.0, execution_time=0.0, cached=True)
+
+        before = cache.snapshot(artifact_dir) if artifact_dir else None
+        result = self._invoke_resumable(prompt, mode)
+        if result.success:
+            cache.put(key, result, artifact_dir, before, phase=self.config.phase)
+            self._cache_key = key
+        else:
+            self._cache_key = None
+        return result
+
+    def _invoke_resumable(self, prompt: str, mode: ExecutionMode) -> CLIResult:
+        """调用 CLI；会话来自缓存且无法恢复时改为新会话重新执行
+
+        各阶段 Prompt 通过文件路径引用上一阶段产物 (缓存命中时已恢复)，不依赖会话上下文也能完成。
+        """
+        result = self._invoke(prompt, mode)
+        if (not result.success and result.exit_code != -2
+                and mode == ExecutionMode.SESSION and self._cached_session):
+            logger.warning("Cached session could not be resumed, retrying as a new session")
+            if self.config.on_output:
+                self.config.on_output("→ 缓存的会话无法恢复，以新会话重新执行")
+            self.session_id = None
+            self._fork_pending = False
+            result = self._invoke(prompt, ExecutionMode.SINGLE)
+        self._cached_session = False
+        return result
+
+    def _invoke(
+        self,
+        prompt: str,
+        mode: ExecutionMode = ExecutionMode.SINGLE
+    ) -> CLIResult:
+        """实际调用 Claude Code CLI (流式输出版本)"""
         cmd = self.build_command(mode)
 
         # 重置 todo 追踪状态
@@ -407,164 +513,249 @@ class CLIAdapter:
         logger.info(f"Executing CLI: claude -p ... (mode={mode.value}, prompt_len={len(prompt)})")
 
         start_time = time.time()
-        final_result = None
-        all_events = []
-        stderr_output = ""
-        cancelled = False
-        cancel_event = getattr(self.config, "cancel_event", None)
 
-        # 创建临时文件存储 prompt，避免管道缓冲区问题
         prompt_file = None
+        writer = None
+        transcript = None
         try:
-            # 写入 prompt 到临时文件
-            prompt_file = tempfile.NamedTemporaryFile(
-                mode='w',
-                suffix='.txt',
-                delete=False,
-                encoding='utf-8'
+            if self.config.transcript_path:
+                transcript = NdjsonTranscript(self.config.transcript_path)
+
+            if self.config.launch_mode == "shell":
+                process, prompt_file = self._spawn_shell(cmd, prompt)
+            else:
+                process, writer = self._spawn_exec(cmd, prompt)
+
+            stream = self._pump(process, start_time + self.config.timeout, transcript)
+
+            if stream.timed_out:
+                raise subprocess.TimeoutExpired(cmd, self.config.timeout)
+
+            # 两个管道都已 EOF，进程应即将退出
+            try:
+                return_code = process.wait(timeout=max(1.0, start_time + self.config.timeout - time.time()))
+            except subprocess.TimeoutExpired:
+                self._terminate(process)
+                raise
+
+            return self._build_result(stream, return_code, time.time() - start_time)
+
+        except subprocess.TimeoutExpired:
+            execution_time = time.time() - start_time
+            logger.error(f"Command timed out after {self.config.timeout}s")
+            return CLIResult(
+                success=False,
+                error=f"Timeout after {self.config.timeout} seconds",
+                exit_code=-1,
+                execution_time=execution_time
+            )
+        except Exception as e:
+            execution_time = time.time() - start_time
+            logger.error(f"Command execution failed: {str(e)}")
+            return CLIResult(
+                success=False,
+                error=str(e),
+                exit_code=-1,
+                execution_time=execution_time
             )
+        finally:
+            if writer:
+                # 进程已退出/被终止，写端会因管道关闭而结束
+                writer.join(timeout=1)
+            if transcript:
+                transcript.close()
+            # 清理临时文件
+            if prompt_file and os.path.exists(prompt_file):
+                try:
+                    os.unlink(prompt_file)
+                except Exception:
+                    pass
+
+    def _spawn_exec(self, cmd: List[str], prompt: str):
+        """直接启动 CLI，由写线程将 prompt 写入 stdin
+
+        与读取 stdout/stderr 并行写入，prompt 超过管道缓冲区也不会阻塞。
+        返回 (process, writer_thread)
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            cwd=self.config.working_dir,
+            start_new_session=True  # 创建新进程组，防止信号传播导致父进程终止
+        )
+        writer = threading.Thread(
+            target=self._write_stdin,
+            args=(process.stdin, prompt.encode("utf-8")),
+            name="cli-stdin",
+            daemon=True
+        )
+        writer.start()
+        return process, writer
+
+    @staticmethod
+    def _write_stdin(pipe, data: bytes) -> None:
+        """分块写入 prompt 后关闭 stdin (CLI 提前退出时忽略管道错误)"""
+        try:
+            view = memoryview(data)
+            while view:
+                # 无缓冲管道可能只写入部分数据
+                written = pipe.write(view[:READ_CHUNK])
+                view = view[written:]
+        except (BrokenPipeError, OSError) as e:
+            logger.debug(f"CLI stdin closed early: {e}")
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def _spawn_shell(self, cmd: List[str], prompt: str):
+        """旧的启动方式: prompt 写入临时文件，通过 shell 重定向传给 CLI
+
+        返回 (process, prompt_file_path)
+        """
+        prompt_file = tempfile.NamedTemporaryFile(
+            mode='w',
+            suffix='.txt',
+            delete=False,
+            encoding='utf-8'
+        )
+        try:
             prompt_file.write(prompt)
+        finally:
             prompt_file.close()
 
-            # 使用 shell 重定向从文件读取
-            shell_cmd = f"{' '.join(cmd)} < {prompt_file.name}"
-            logger.debug(f"Shell command: claude -p ... < {prompt_file.name}")
+        shell_cmd = f"{' '.join(cmd)} < {prompt_file.name}"
+        logger.debug(f"Shell command: claude -p ... < {prompt_file.name}")
 
+        try:
             process = subprocess.Popen(
                 shell_cmd,
                 shell=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
+                bufsize=0,
                 cwd=self.config.working_dir,
-                start_new_session=True  # 创建新进程组，防止信号传播导致父进程终止
+                start_new_session=True
             )
+        except Exception:
+            os.unlink(prompt_file.name)
+            raise
+        return process, prompt_file.name
 
-            # 逐行读取 stream-json 输出（可取消）
-            stdout = process.stdout
-            buffer = ""
-            while True:
+    def _pump(
+        self,
+        process: subprocess.Popen,
+        deadline: float,
+        transcript: Optional[NdjsonTranscript] = None
+    ) -> "_StreamState":
+        """同时读取 stdout/stderr 直到两者 EOF、取消或超时
+
+        - stdout: 按行解析 stream-json 事件，只保留最近 event_history 个事件和最终 result
+        - stderr: 只保留最后 stderr_tail_lines 行，持续读取避免管道写满导致子进程阻塞
+        内存占用与会话时长无关。
+        """
+        state = _StreamState(
+            recent_events=deque(maxlen=max(1, self.config.event_history)),
+            stderr_tail=deque(maxlen=max(1, self.config.stderr_tail_lines))
+        )
+        self.recent_events = state.recent_events
+        cancel_event = getattr(self.config, "cancel_event", None)
+        framers = {"stdout": LineFramer(), "stderr": LineFramer()}
+
+        selector = selectors.DefaultSelector()
+        selector.register(process.stdout, selectors.EVENT_READ, "stdout")
+        selector.register(process.stderr, selectors.EVENT_READ, "stderr")
+
+        try:
+            while selector.get_map():
                 # 检查取消信号
                 if cancel_event and getattr(cancel_event, "is_set", lambda: False)():
-                    cancelled = True
+                    state.cancelled = True
                     if self.config.on_output:
                         self.config.on_output("→ 任务取消，正在终止 CLI 进程...")
-                    try:
-                        process.kill()
-                    except Exception:
-                        pass
+                    self._terminate(process)
                     break
 
-                # 若子进程已退出且缓冲为空，结束循环
-                if process.poll() is not None and not buffer:
+                if time.time() > deadline:
+                    state.timed_out = True
+                    self._terminate(process)
                     break
 
-                # 使用 select 轮询，避免阻塞
-                ready, _, _ = select.select([stdout], [], [], 0.2)
-                if not ready:
-                    continue
-
-                chunk = stdout.readline()
-                if not chunk:
-                    continue
-
-                buffer += chunk
-                # 按行处理
-                while "\n" in buffer:
-                    line, buffer = buffer.split("\n", 1)
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        event = json.loads(line)
-                        if isinstance(event, dict):
-                            all_events.append(event)
-                            # 处理关键节点回调
-                            self._handle_stream_event(event)
-                            # 保存最终结果
-                            if event.get("type") == "result":
-                                final_result = event
+                for key, _ in selector.select(timeout=0.2):
+                    name = key.data
+                    data = os.read(key.fd, READ_CHUNK)
+                    if data:
+                        lines = framers[name].feed(data)
+                    else:
+                        # EOF: 取出最后不完整的一行并停止监听该管道
+                        selector.unregister(key.fileobj)
+                        rest = framers[name].flush()
+                        lines = [rest] if rest else []
+
+                    for line in lines:
+                        if name == "stdout":
+                            self._handle_stdout_line(line, state, transcript)
                         else:
-                            logger.debug(f"Ignored non-dict event: {line[:80]}")
-                    except json.JSONDecodeError:
-                        logger.debug(f"Non-JSON line: {line[:100]}")
-                        # 透传原始输出，兼容 CLI 输出格式变化
-                        if self.config.on_output:
-                            preview = line[:400]
-                            self.config.on_output(f"→ CLI: {preview}")
-
-            # 读取 stderr
-            stderr_output = process.stderr.read()
-
-            # 若在循环外收到取消信号，再次尝试终止
-            if cancel_event and getattr(cancel_event, "is_set", lambda: False)():
-                cancelled = True
-                if process.poll() is None:
-                    try:
-                        process.kill()
-                    except Exception:
-                        pass
-
-            # 等待进程结束，带超时
-            try:
-                return_code = process.wait(timeout=self.config.timeout)
-            except subprocess.TimeoutExpired:
-                process.kill()
-                raise
+                            text = line.decode("utf-8", errors="replace").rstrip()
+                            state.stderr_tail.append(text)
+                            logger.debug(f"[cli stderr] {text[:200]}")
+        finally:
+            selector.close()
 
-            execution_time = time.time() - start_time
+        # 若在循环外收到取消信号，再次尝试终止
+        if cancel_event and getattr(cancel_event, "is_set", lambda: False)():
+            state.cancelled = True
+            if process.poll() is None:
+                self._terminate(process)
 
-            if cancelled:
-                if self.config.on_output:
-                    self.config.on_output("→ CLI 已终止")
-                return CLIResult(
-                    success=False,
-                    error="任务已取消",
-                    exit_code=-2,
-                    execution_time=execution_time,
-                    session_id=self.session_id
-                )
+        return state
 
-            # 解析最终结果
-            if final_result:
-                actual_result = final_result.get("result", "")
-                is_error = final_result.get("is_error", False)
-                session_id = final_result.get("session_id")
-                cost_usd = final_result.get("total_cost_usd", final_result.get("cost_usd", 0.0))
-
-                if session_id:
-                    self.session_id = session_id
-
-                # 提取更有用的错误信息
-                error_msg = None
-                if is_error:
-                    error_msg = actual_result or final_result.get("error") or stderr_output
-                    # 兜底使用返回码描述
-                    if not error_msg and return_code != 0:
-                        error_msg = f"CLI exited with code {return_code}"
-
-                return CLIResult(
-                    success=return_code == 0 and not is_error,
-                    output=actual_result,
-                    parsed_output=final_result,
-                    error=error_msg if error_msg else (stderr_output if return_code != 0 else None),
-                    exit_code=return_code,
-                    execution_time=execution_time,
-                    session_id=self.session_id,
-                    cost_usd=cost_usd
-                )
-            else:
-                # 没有收到 result 事件
-                return CLIResult(
-                    success=False,
-                    output="",
-                    error=stderr_output or "No result received from CLI",
-                    exit_code=return_code,
-                    execution_time=execution_time
-                )
-
-        except subprocess.TimeoutExpired:
-            execution_time = time.time() - start_time
+    def _handle_stdout_line(
+        self,
+        raw: bytes,
+        state: "_StreamState",
+        transcript: Optional[NdjsonTranscript]
+    ) -> Optional[Dict[str, Any]]:
+        """解析一行 stream-json 输出，返回事件 (非 JSON/非对象返回 None)"""
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line:
+            return None
+        if transcript:
+            transcript.write(raw)
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            logger.debug(f"Non-JSON line: {line[:100]}")
+            # 透传原始输出，兼容 CLI 输出格式变化
+            if self.config.on_output:
+                preview = line[:400]
+                self.config.on_output(f"→ CLI: {preview}")
+            return None
+
+        if not isinstance(event, dict):
+            logger.debug(f"Ignored non-dict event: {line[:80]}")
+            return None
+
+        state.recent_events.append(event)
+        # 处理关键节点回调
+        self._handle_stream_event(event)
+        # 保存最终结果
+        if event.get("type") == "result":
+            state.final_result = event
+        return event
+
+    def _build_result(
+        self,
+        stream: "_StreamState",
+        return_code: int,
+        execution_time: float
+    ) -> CLIResult:
+        """根据流式读取状态构建 CLIResult (同步/异步适配器共用)"""
+        if stream.timed_out:
             logger.error(f"Command timed out after {self.config.timeout}s")
             return CLIResult(
                 success=False,
@@ -572,22 +763,74 @@ class CLIAdapter:
                 exit_code=-1,
                 execution_time=execution_time
             )
-        except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"Command execution failed: {str(e)}")
+
+        if stream.cancelled:
+            if self.config.on_output:
+                self.config.on_output("→ CLI 已终止")
             return CLIResult(
                 success=False,
-                error=str(e),
-                exit_code=-1,
-                execution_time=execution_time
+                error="任务已取消",
+                exit_code=-2,
+                execution_time=execution_time,
+                session_id=self.session_id
             )
-        finally:
-            # 清理临时文件
-            if prompt_file and os.path.exists(prompt_file.name):
-                try:
-                    os.unlink(prompt_file.name)
-                except Exception:
-                    pass
+
+        final_result = stream.final_result
+        stderr_output = stream.stderr_text
+
+        # 解析最终结果
+        if final_result:
+            actual_result = final_result.get("result", "")
+            is_error = final_result.get("is_error", False)
+            session_id = final_result.get("session_id")
+            cost_usd = final_result.get("total_cost_usd", final_result.get("cost_usd", 0.0))
+
+            if session_id:
+                self.session_id = session_id
+                self._fork_pending = False
+
+            # 提取更有用的错误信息
+            error_msg = None
+            if is_error:
+                error_msg = actual_result or final_result.get("error") or stderr_output
+                # 兜底使用返回码描述
+                if not error_msg and return_code != 0:
+                    error_msg = f"CLI exited with code {return_code}"
+
+            return CLIResult(
+                success=return_code == 0 and not is_error,
+                output=actual_result,
+                parsed_output=final_result,
+                error=error_msg if error_msg else (stderr_output if return_code != 0 else None),
+                exit_code=return_code,
+                execution_time=execution_time,
+                session_id=self.session_id,
+                cost_usd=cost_usd
+            )
+
+        # 没有收到 result 事件
+        return CLIResult(
+            success=False,
+            output="",
+            error=stderr_output or "No result received from CLI",
+            exit_code=return_code,
+            execution_time=execution_time
+        )
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen) -> None:
+        """终止 CLI 进程组 (CLI 及其子进程，shell 模式下包括 shell) 并回收"""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except Exception:
+            try:
+                process.kill()
+            except Exception:
+                pass
+        try:
+            process.wait(timeout=5)
+        except Exception:
+            pass
 
     def execute_with_retry(
         self,
@@ -621,8 +864,37 @@ class CLIAdapter:
     def reset_session(self) -> None:
         """重置会话状态"""
         self.session_id = None
+        self._fork_pending = False
+        self._cache_key = ""
+        self._cached_session = False
         logger.info("Session reset")
 
+    def fork(self, tag: Optional[str] = None) -> "CLIAdapter":
+        """派生独立的适配器，供并发调用使用
+
+        新适配器拥有独立的配置和会话状态；若当前存在会话，
+        首次调用时以 --fork-session 从该会话分叉，互不干扰。
+
+        Args:
+            tag: 日志前缀 (如 "h1")，用于区分并发输出
+        """
+        child = copy.copy(self)
+        on_output = self.config.on_output
+        if tag and on_output:
+            def tagged_output(msg: str, _emit=on_output, _tag=tag) -> None:
+                _emit(f"[{_tag}] {msg}")
+            on_output = tagged_output
+        child.config = replace(
+            self.config,
+            allowed_tools=list(self.config.allowed_tools),
+            on_output=on_output,
+            on_todo_update=None  # 并发调用的 Todo 会互相覆盖，仅主会话推送
+        )
+        child._last_todos = []
+        child.recent_events = deque(maxlen=max(1, child.config.event_history))
+        child._fork_pending = self.session_id is not None
+        return child
+
 
 class CLISession:
     """CLI 会话管理器
@@ -695,6 +967,12 @@ class CLISession:
         """获取会话历史"""
         return self.history.copy()
 
+    def fork(self, tag: Optional[str] = None) -> "CLISession":
+        """从当前会话分叉出独立会话 (共享已有上下文，后续对话互不影响)"""
+        child = CLISession(self.adapter.fork(tag))
+        child.is_active = self.is_active and child.adapter.session_id is not None
+        return child
+
     @property
     def session_id(self) -> Optional[str]:
         """获取当前会话 ID"""
@@ -5,7 +5,9 @@ DependencyAnalyzer - 静态依赖分析器
 旨在提供可复用的分析结果给 Prompt 和代码生成阶段，减少对大模型"自觉执行"指令的依赖。
 """
 
+import heapq
 import logging
+import sys
 from collections import defaultdict, deque
 from typing import Dict, List, Any, Optional, Tuple, Set
 
@@ -21,6 +23,7 @@ from ..models.dependency import (
     _is_id_like,
     _normalize_id
 )
+from .ref_resolver import RefResolver
 
 logger = logging.getLogger(__name__)
 
@@ -41,17 +44,34 @@ class DependencyAnalyzer:
 
     def __init__(self, max_dependencies: int = 200):
         self.max_dependencies = max_dependencies
+        # 内容相同的 FieldRef 共享实例 (大规范中同名字段在各接口重复出现)，每次分析结束后清空
+        self._field_pool: Dict[Tuple[str, str, bool, str], FieldRef] = {}
 
-    def analyze(self, swagger: SwaggerSpec) -> DependencyAnalysisResult:
-        """执行静态依赖分析"""
+    def analyze(
+        self,
+        swagger: SwaggerSpec,
+        fields: Optional[List[List[FieldRef]]] = None
+    ) -> DependencyAnalysisResult:
+        """执行静态依赖分析
+
+        两遍扫描:
+        1. 收集资源、主键和各接口的字段，建立 归一化 ID -> 生产者接口 的倒排索引
+        2. 逐个 ID 类字段查索引确定生产者 (O(1))，结果与接口顺序无关
+
+        Args:
+            fields: 预先提取的各接口字段 (与 swagger.endpoints 一一对应，由分析缓存复用未变更接口的字段)
+        """
         resources: Dict[str, ResourceInfo] = {}
-        dependencies: List[DependencyLink] = []
+        parsed: List[Tuple[EndpointRef, str, List[FieldRef]]] = []
+        resolver = RefResolver(swagger.components) if fields is None else None
 
-        for ep in swagger.endpoints:
+        # 第一遍: 资源、主键、字段
+        for i, ep in enumerate(swagger.endpoints):
             endpoint_ref = EndpointRef(
                 path=ep.get("path", ""),
                 method=ep.get("method", "").upper(),
-                summary=ep.get("summary", "")
+                summary=ep.get("summary", ""),
+                index=i
             )
 
             resource_name = self._infer_resource_name(endpoint_ref.path)
@@ -60,49 +80,61 @@ class DependencyAnalyzer:
             resources[resource_name].endpoints.append(endpoint_ref)
 
             # 提取字段
-            fields = self._extract_fields(ep)
+            ep_fields = fields[i] if fields is not None else self.extract_fields(ep, resolver)
+            parsed.append((endpoint_ref, resource_name, ep_fields))
 
             # 主键候选
-            for f in fields:
+            for f in ep_fields:
                 if f.location == "path" and _is_id_like(f.name):
                     norm = f.normalized_id or f.name
                     if norm not in resources[resource_name].primary_keys:
                         resources[resource_name].primary_keys.append(norm)
 
-            # 依赖候选
-            for f in fields:
+        producer_index = self._build_producer_index(resources)
+
+        # 第二遍: 依赖候选 (max_dependencies 为全局上限)
+        dependencies: List[DependencyLink] = []
+        truncated = False
+        for endpoint_ref, resource_name, ep_fields in parsed:
+            for f in ep_fields:
                 if not _is_id_like(f.name):
                     continue
+                if len(dependencies) >= self.max_dependencies:
+                    truncated = True
+                    break
                 norm_id = f.normalized_id or f.name
-                producers = self._find_producers(resources, norm_id)
 
                 dependencies.append(
                     DependencyLink(
                         consumer=endpoint_ref,
                         field=f,
-                        producers=producers,
+                        producers=producer_index.get(norm_id, []),
                         normalized_id=norm_id,
                         confidence=self._confidence_for(f),
                         reason=self._reason_for(f, resource_name)
                     )
                 )
-
-                if len(dependencies) >= self.max_dependencies:
-                    logger.warning("Dependency count hit max limit, truncating...")
-                    break
+            if truncated:
+                logger.warning(f"Dependency count hit max limit ({self.max_dependencies}), truncating...")
+                break
 
         # 拓扑排序接口列表
-        sorted_endpoints = self._topological_sort(swagger.endpoints, dependencies)
+        sorted_endpoints, layers, cycles = self._topological_sort(swagger.endpoints, dependencies)
 
         result = DependencyAnalysisResult(
             resources=resources,
             dependencies=dependencies,
             sorted_endpoints=sorted_endpoints,
+            layers=layers,
+            cycles=cycles,
             generated_by="static-analyzer"
         )
 
+        self._field_pool.clear()
+
         logger.info(
-            f"Dependency analysis: resources={len(resources)}, dependencies={len(dependencies)}, sorted_endpoints={len(sorted_endpoints)}"
+            f"Dependency analysis: resources={len(resources)}, dependencies={len(dependencies)}, "
+            f"sorted_endpoints={len(sorted_endpoints)}, layers={len(layers)}, cycles={len(cycles)}"
         )
         return result
 
@@ -114,58 +146,95 @@ class DependencyAnalyzer:
         # 取最后一个非参数段作为资源名
         return parts[-1].replace("-", "_")
 
-    def _extract_fields(self, ep: Dict[str, Any]) -> List[FieldRef]:
-        """从 endpoint 定义中抽取字段"""
+    def extract_fields(self, ep: Dict[str, Any], resolver: Optional[RefResolver] = None) -> List[FieldRef]:
+        """从 endpoint 定义中抽取字段 (参数和请求体属性)
+
+        Args:
+            resolver: 解析参数和请求体 schema 中的 $ref (同一次分析共享，引用目标只查找一次)
+        """
         fields: List[FieldRef] = []
+        resolver = resolver or RefResolver()
 
-        # parameters 数组
+        # parameters 数组 (Swagger 2.x 的 body 参数由 requestBody 展开)
         for p in ep.get("parameters", []) or []:
-            if not isinstance(p, dict):
+            p = resolver.deref(p)[0]
+            if not isinstance(p, dict) or p.get("in") == "body":
                 continue
             name = p.get("name", "")
             location = p.get("in", "query")
             required = bool(p.get("required", False))
             desc = p.get("description", "")
-            fields.append(FieldRef(name=name, location=location, required=required, description=desc))
+            fields.append(self.field_ref(name, location, required, desc))
 
-        # requestBody (OpenAPI3)
-        rb = ep.get("requestBody")
+        # requestBody (OpenAPI3: content.*.schema；Swagger 2.x: body 参数的 schema)
+        rb = resolver.deref(ep.get("requestBody"))[0]
         if isinstance(rb, dict):
-            content = rb.get("content", {})
-            for media in content.values():
+            if "schema" in rb:
+                fields.extend(self._extract_schema_fields(rb["schema"], location="body", resolver=resolver))
+            for media in (rb.get("content") or {}).values():
                 if not isinstance(media, dict):
                     continue
                 schema = media.get("schema", {})
-                fields.extend(self._extract_schema_fields(schema, location="body"))
+                fields.extend(self._extract_schema_fields(schema, location="body", resolver=resolver))
                 break  # 仅取第一个 content
 
         return fields
 
-    def _extract_schema_fields(self, schema: Dict[str, Any], location: str) -> List[FieldRef]:
-        """从 schema properties 提取字段"""
-        fields: List[FieldRef] = []
-        if not isinstance(schema, dict):
-            return fields
-
-        props = schema.get("properties", {})
-        required_list = schema.get("required", []) or []
+    def _extract_schema_fields(
+        self,
+        schema: Dict[str, Any],
+        location: str,
+        resolver: Optional[RefResolver] = None
+    ) -> List[FieldRef]:
+        """从 schema properties 提取字段 (跟随 $ref，合并 allOf 各部分的属性)"""
+        resolver = resolver or RefResolver()
+        properties: Dict[str, Any] = {}
+        required_list: Set[str] = set()
+        pending = [schema]
+        seen: Set[int] = set()
+        while pending:
+            node = resolver.deref(pending.pop(0))[0]
+            if not isinstance(node, dict) or id(node) in seen:
+                continue
+            seen.add(id(node))
+            for name, prop in (node.get("properties") or {}).items():
+                properties.setdefault(name, prop)
+            required_list.update(r for r in node.get("required") or [] if isinstance(r, str))
+            pending.extend(node.get("allOf") or [])
 
-        for name, prop in props.items():
+        fields: List[FieldRef] = []
+        for name, prop in properties.items():
+            prop = resolver.deref(prop)[0]
             desc = prop.get("description", "") if isinstance(prop, dict) else ""
             required = name in required_list
-            fields.append(FieldRef(name=name, location=location, required=required, description=desc))
+            fields.append(self.field_ref(name, location, required, desc))
 
         return fields
 
-    def _find_producers(self, resources: Dict[str, ResourceInfo], norm_id: str) -> List[EndpointRef]:
-        """寻找可能生成该 ID 的接口"""
-        producers: List[EndpointRef] = []
+    def field_ref(self, name: str, location: str, required: bool = False, description: str = "") -> FieldRef:
+        """构造单个字段 (内容相同的字段在本次分析中共享同一实例)
+
+        分析缓存复用未变更接口的字段时，用缓存的 FieldRef.to_dict() 内容调用本方法重建。
+        """
+        key = (name, location, required, description)
+        ref = self._field_pool.get(key)
+        if ref is None:
+            ref = self._field_pool[key] = FieldRef(
+                name=name, location=location, required=required, description=description
+            )
+        return ref
+
+    def _build_producer_index(self, resources: Dict[str, ResourceInfo]) -> Dict[str, List[EndpointRef]]:
+        """倒排索引: 归一化 ID -> 可能生成该 ID 的接口 (以该 ID 为主键的资源的 POST/PUT/PATCH/GET 接口)
+
+        同一 ID 的所有依赖共享同一个生产者列表 (只读)。
+        """
+        index: Dict[str, List[EndpointRef]] = defaultdict(list)
         for res in resources.values():
-            if norm_id in res.primary_keys:
-                for ep in res.endpoints:
-                    if ep.method in ("POST", "PUT", "PATCH", "GET"):
-                        producers.append(ep)
-        return producers
+            producing = [ep for ep in res.endpoints if ep.method in ("POST", "PUT", "PATCH", "GET")]
+            for norm_id in res.primary_keys:
+                index[norm_id].extend(producing)
+        return dict(index)
 
     def _confidence_for(self, field: FieldRef) -> str:
         """根据字段位置简单评估置信度"""
@@ -187,76 +256,179 @@ class DependencyAnalyzer:
         self,
         endpoints: List[Dict[str, Any]],
         dependencies: List[DependencyLink]
-    ) -> List[Dict[str, Any]]:
+    ) -> Tuple[List[Dict[str, Any]], List[List[str]], List[List[str]]]:
         """拓扑排序接口列表，确保生产者在消费者之前
 
         使用 Kahn 算法：
         1. 构建依赖图（邻接表）
-        2. 找出所有入度为 0 的节点
-        3. BFS 遍历，依次移除入度为 0 的节点
-        4. 同层级按 HTTP 方法优先级排序
+        2. 入度为 0 的节点放入小顶堆，按 (HTTP 方法优先级, 入队顺序) 出堆
+        3. 依次移除堆顶节点，邻居入度降为 0 时入堆
+        4. 堆为空但仍有节点时说明存在循环依赖: 用 Tarjan 算法求强连通分量，
+           在无外部前驱的分量中选 (方法优先级, 原始顺序) 最小的节点强制出堆，断开循环
+
+        Returns:
+            (排序后的接口列表, 拓扑层级, 循环依赖)
+            层级为 "METHOD /path" 列表，同层接口之间无依赖；循环依赖为节点数 > 1 的强连通分量
         """
         if not endpoints:
-            return []
+            return [], [], []
 
         # 构建依赖图
         graph, in_degree = self._build_dependency_graph(endpoints, dependencies)
 
-        # 构建 endpoint key -> endpoint 的映射
+        # 构建 endpoint key -> endpoint 的映射 / 首次出现的位置
         ep_map: Dict[Tuple[str, str], Dict[str, Any]] = {}
-        for ep in endpoints:
+        position: Dict[Tuple[str, str], int] = {}
+        for i, ep in enumerate(endpoints):
             key = (ep.get("path", ""), ep.get("method", "").upper())
             ep_map[key] = ep
+            position.setdefault(key, i)
+
+        heap: List[Tuple[int, int, Dict[str, Any]]] = []
+        counter = 0
 
-        # 初始化队列（入度为 0 的节点）
-        queue: List[Dict[str, Any]] = []
+        def push(ep: Dict[str, Any]) -> None:
+            nonlocal counter
+            heapq.heappush(heap, (METHOD_PRIORITY.get(ep.get("method", "").upper(), 99), counter, ep))
+            counter += 1
+
+        # 初始化堆（入度为 0 的节点）
         for ep in endpoints:
             key = (ep.get("path", ""), ep.get("method", "").upper())
             if in_degree.get(key, 0) == 0:
-                queue.append(ep)
-
-        # 按 HTTP 方法优先级排序
-        queue.sort(key=lambda x: METHOD_PRIORITY.get(x.get("method", "").upper(), 99))
+                push(ep)
 
         sorted_endpoints: List[Dict[str, Any]] = []
         visited: Set[Tuple[str, str]] = set()
+        level: Dict[Tuple[str, str], int] = defaultdict(int)
+        components: List[List[Tuple[str, str]]] = []
+        component_of: Dict[Tuple[str, str], int] = {}
+        external_in: List[int] = []     # 各强连通分量来自未访问外部节点的边数
+        breakable: List[Tuple[int, int, Tuple[str, str]]] = []    # 无外部前驱的分量中的节点 (断环候选)
+
+        def release(component: int) -> None:
+            for node in components[component]:
+                heapq.heappush(breakable, (METHOD_PRIORITY.get(node[1], 99), position[node], node))
+
+        while len(visited) < len(ep_map):
+            while heap:
+                ep = heapq.heappop(heap)[2]
+                key = (ep.get("path", ""), ep.get("method", "").upper())
+
+                if key in visited:
+                    continue
+                visited.add(key)
+                sorted_endpoints.append(ep)
+
+                # 更新邻居入度和层级
+                for neighbor_key in graph.get(key, []):
+                    if neighbor_key in visited:
+                        continue
+                    level[neighbor_key] = max(level[neighbor_key], level[key] + 1)
+                    if component_of and component_of[neighbor_key] != component_of[key]:
+                        external_in[component_of[neighbor_key]] -= 1
+                        if external_in[component_of[neighbor_key]] == 0:
+                            release(component_of[neighbor_key])
+                    in_degree[neighbor_key] -= 1
+                    if in_degree[neighbor_key] == 0:
+                        neighbor_ep = ep_map.get(neighbor_key)
+                        if neighbor_ep:
+                            push(neighbor_ep)
+
+            if len(visited) >= len(ep_map):
+                break
+
+            # 存在循环依赖: 首次遇到时对剩余节点求强连通分量
+            if not component_of:
+                remaining = sorted((k for k in ep_map if k not in visited), key=position.__getitem__)
+                components = self._strongly_connected_components(remaining, graph)
+                for index, component in enumerate(components):
+                    for node in component:
+                        component_of[node] = index
+                external_in = [0] * len(components)
+                for node in remaining:
+                    for neighbor_key in graph.get(node, []):
+                        if neighbor_key not in visited and component_of[neighbor_key] != component_of[node]:
+                            external_in[component_of[neighbor_key]] += 1
+                for index, count in enumerate(external_in):
+                    if count == 0:
+                        release(index)
+                cyclic = [c for c in components if len(c) > 1]
+                logger.warning(
+                    f"检测到 {len(cyclic)} 个循环依赖（强连通分量，共 {sum(len(c) for c in cyclic)} 个接口），"
+                    f"按方法优先级断开: {' -> '.join(f'{m} {p}' for p, m in cyclic[0][:4]) if cyclic else ''}"
+                )
+
+            # 在无外部前驱的分量中选择 (方法优先级, 原始顺序) 最小的节点，强制入堆
+            forced = heapq.heappop(breakable)[2]
+            while forced in visited:
+                forced = heapq.heappop(breakable)[2]
+            push(ep_map[forced])
 
-        while queue:
-            # 取出队首
-            ep = queue.pop(0)
+        # 层级: 每个接口位于其所有已排序前驱的下一层
+        layer_count = max((level[k] for k in visited), default=-1) + 1
+        layers: List[List[str]] = [[] for _ in range(layer_count)]
+        for ep in sorted_endpoints:
             key = (ep.get("path", ""), ep.get("method", "").upper())
+            layers[level[key]].append(sys.intern(f"{key[1]} {key[0]}"))
 
-            if key in visited:
+        cycles = [
+            [f"{method} {path}" for path, method in sorted(c, key=position.__getitem__)]
+            for c in components if len(c) > 1
+        ]
+        return sorted_endpoints, layers, cycles
+
+    @staticmethod
+    def _strongly_connected_components(
+        nodes: List[Tuple[str, str]],
+        graph: Dict[Tuple[str, str], List[Tuple[str, str]]]
+    ) -> List[List[Tuple[str, str]]]:
+        """Tarjan 算法求强连通分量 (迭代实现，避免大规范下递归过深)，只考虑 nodes 之间的边"""
+        node_set = set(nodes)
+        index: Dict[Tuple[str, str], int] = {}
+        lowlink: Dict[Tuple[str, str], int] = {}
+        on_stack: Set[Tuple[str, str]] = set()
+        stack: List[Tuple[str, str]] = []
+        components: List[List[Tuple[str, str]]] = []
+
+        for root in nodes:
+            if root in index:
                 continue
-            visited.add(key)
-            sorted_endpoints.append(ep)
-
-            # 更新邻居入度
-            for neighbor_key in graph.get(key, []):
-                if neighbor_key in visited:
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph.get(root, [])))]
+            while work:
+                node, neighbors = work[-1]
+                advanced = False
+                for neighbor in neighbors:
+                    if neighbor not in node_set:
+                        continue
+                    if neighbor not in index:
+                        index[neighbor] = lowlink[neighbor] = len(index)
+                        stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(graph.get(neighbor, []))))
+                        advanced = True
+                        break
+                    if neighbor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[neighbor])
+                if advanced:
                     continue
-                in_degree[neighbor_key] -= 1
-                if in_degree[neighbor_key] == 0:
-                    neighbor_ep = ep_map.get(neighbor_key)
-                    if neighbor_ep:
-                        queue.append(neighbor_ep)
-
-            # 保持队列按优先级排序
-            queue.sort(key=lambda x: METHOD_PRIORITY.get(x.get("method", "").upper(), 99))
-
-        # 处理未被排序的节点（可能存在循环依赖或孤立节点）
-        if len(sorted_endpoints) < len(endpoints):
-            remaining = [
-                ep for ep in endpoints
-                if (ep.get("path", ""), ep.get("method", "").upper()) not in visited
-            ]
-            if remaining:
-                logger.warning(f"检测到 {len(remaining)} 个未排序节点（可能存在循环依赖），追加到末尾")
-                # 按优先级排序后追加
-                remaining.sort(key=lambda x: METHOD_PRIORITY.get(x.get("method", "").upper(), 99))
-                sorted_endpoints.extend(remaining)
-
-        return sorted_endpoints
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
 
     def _build_dependency_graph(
         self,
@@ -277,7 +449,8 @@ class DependencyAnalyzer:
             key = (ep.get("path", ""), ep.get("method", "").upper())
             in_degree[key] = 0
 
-        # 根据依赖关系构建边
+        # 根据依赖关系构建边 (邻接表保持插入顺序，用集合去重)
+        edges: Set[Tuple[Tuple[str, str], Tuple[str, str]]] = set()
         for dep in dependencies:
             consumer_key = (dep.consumer.path, dep.consumer.method.upper())
 
@@ -289,45 +462,97 @@ class DependencyAnalyzer:
                     continue
 
                 # producer -> consumer（producer 必须在 consumer 之前）
-                if consumer_key not in graph[producer_key]:
+                if (producer_key, consumer_key) not in edges:
+                    edges.add((producer_key, consumer_key))
                     graph[producer_key].append(consumer_key)
                     in_degree[consumer_key] += 1
 
         return graph, in_degree
 
 
-def load_dependency_analysis(path: str) -> Optional[DependencyAnalysisResult]:
-    """读取已保存的依赖分析结果"""
+def load_dependency_analysis(
+    path: str,
+    endpoints: Optional[List[Dict[str, Any]]] = None
+) -> Optional[DependencyAnalysisResult]:
+    """读取已保存的依赖分析结果 (dependency_analysis.json)"""
     import json
     if not Path(path).exists():
         return None
     try:
         data = json.loads(Path(path).read_text(encoding="utf-8"))
-        # 轻量重建，仅用于 prompt 展示
-        resources = {
-            name: ResourceInfo(
-                name=name,
-                primary_keys=info.get("primary_keys", []),
-                endpoints=[EndpointRef(**ep) for ep in info.get("endpoints", [])]
-            )
-            for name, info in data.get("resources", {}).items()
-        }
-        deps = [
-            DependencyLink(
-                consumer=EndpointRef(**d.get("consumer", {})),
-                field=FieldRef(**d.get("field", {})),
-                producers=[EndpointRef(**p) for p in d.get("producers", [])],
-                normalized_id=d.get("normalized_id"),
-                confidence=d.get("confidence", "中"),
-                reason=d.get("reason", "")
-            )
-            for d in data.get("dependencies", [])
-        ]
-        return DependencyAnalysisResult(
-            resources=resources,
-            dependencies=deps,
-            generated_by=data.get("generated_by", "static-analyzer")
-        )
+        return analysis_from_dict(data, endpoints)
     except Exception as exc:
         logger.warning(f"Failed to load dependency analysis: {exc}")
         return None
+
+
+def analysis_from_dict(
+    data: Dict[str, Any],
+    endpoints: Optional[List[Dict[str, Any]]] = None
+) -> DependencyAnalysisResult:
+    """由 DependencyAnalysisResult.to_dict() 的结果重建
+
+    Args:
+        endpoints: 当前规范的接口列表，sorted_endpoints 中的接口按 (path, method) 换回这些对象
+    """
+    positions: Dict[Tuple[str, str], int] = {}
+    for i, ep in enumerate(endpoints or []):
+        positions.setdefault((ep.get("path", ""), ep.get("method", "").upper()), i)
+
+    # 同一接口只建一个 EndpointRef，内容相同的生产者列表和字段共享实例
+    refs: Dict[Tuple[str, str], EndpointRef] = {}
+    producer_lists: Dict[Tuple[Tuple[str, str], ...], List[EndpointRef]] = {}
+    field_refs: Dict[Tuple[Any, ...], FieldRef] = {}
+
+    def endpoint_ref(item: Dict[str, Any]) -> EndpointRef:
+        key = (item.get("path", ""), item.get("method", "").upper())
+        if key not in refs:
+            refs[key] = EndpointRef(**item, index=positions.get(key, -1))
+        return refs[key]
+
+    def producers(items: List[Dict[str, Any]]) -> List[EndpointRef]:
+        key = tuple((p.get("path", ""), p.get("method", "").upper()) for p in items)
+        if key not in producer_lists:
+            producer_lists[key] = [endpoint_ref(p) for p in items]
+        return producer_lists[key]
+
+    def field_ref(item: Dict[str, Any]) -> FieldRef:
+        key = tuple(sorted(item.items()))
+        if key not in field_refs:
+            field_refs[key] = FieldRef(**item)
+        return field_refs[key]
+
+    resources = {
+        name: ResourceInfo(
+            name=name,
+            primary_keys=info.get("primary_keys", []),
+            endpoints=[endpoint_ref(ep) for ep in info.get("endpoints", [])]
+        )
+        for name, info in data.get("resources", {}).items()
+    }
+    deps = [
+        DependencyLink(
+            consumer=endpoint_ref(d.get("consumer", {})),
+            field=field_ref(d.get("field", {})),
+            producers=producers(d.get("producers", [])),
+            normalized_id=d.get("normalized_id"),
+            confidence=d.get("confidence", "中"),
+            reason=d.get("reason", "")
+        )
+        for d in data.get("dependencies", [])
+    ]
+    sorted_endpoints = data.get("sorted_endpoints", [])
+    if endpoints is not None:
+        restored = []
+        for ep in sorted_endpoints:
+            key = (ep.get("path", ""), ep.get("method", "").upper())
+            restored.append(endpoints[positions[key]] if key in positions else ep)
+        sorted_endpoints = restored
+    return DependencyAnalysisResult(
+        resources=resources,
+        dependencies=deps,
+        sorted_endpoints=sorted_endpoints,
+        layers=data.get("layers", []),
+        cycles=data.get("cycles", []),
+        generated_by=data.get("generated_by", "static-analyzer")
+    )
@@ -3,21 +3,50 @@ DependencyExplorer - 轻量级依赖探测器
 
 基于静态依赖分析结果，尝试调用无依赖或低依赖的接口，提取可用的 ID。
 默认不启用，需在 WorkflowConfig.enable_exploration 打开。
+
+- 复用同一个连接池 Session (keep-alive)，在有界线程池上并发探测
+- 列表接口按分页信息 (Link 头、next 链接、游标、页码) 继续翻页以获取更多 ID
+- 按拓扑顺序逐层 (跳) 探测: 用前几层已提取的 ID 填充路径参数，探测 /users/{userId}、
+  /orders/{orderId}/items 这类嵌套接口，同一层内并发
+- 达到最大深度、请求数上限或全局时间预算后停止
+- explored_data.json 输出 extracted_resources (供 conftest 的 get_explored_id 使用)
 """
 
 import logging
 import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from ..models import TaskContext
-from ..models.dependency import DependencyAnalysisResult, EndpointRef
+from ..models.dependency import DependencyAnalysisResult, EndpointRef, FieldRef, ResourceInfo
+from ..utils.http_headers import clean_header_value
 
 logger = logging.getLogger(__name__)
 
+PATH_PARAM_PATTERN = re.compile(r"\{([^}]+)\}")
+
+# 分页信息: 下一页链接 / 游标 (游标字段 -> 查询参数名) / 当前页 / 总页数 / 是否还有下一页
+NEXT_LINK_KEYS = ("next", "nextUrl", "next_url", "nextPageUrl", "next_page_url")
+NEXT_CURSOR_KEYS = {
+    "nextCursor": "cursor", "next_cursor": "cursor",
+    "nextPageToken": "pageToken", "next_page_token": "page_token"
+}
+PAGE_KEYS = ("page", "pageNum", "pageNo", "page_num", "currentPage", "current")
+TOTAL_PAGE_KEYS = ("totalPages", "total_pages", "pages", "pageCount")
+BUDGET_MESSAGE = "超出探测预算"
+
+HAS_MORE_KEYS = ("hasMore", "has_more", "hasNext", "has_next")
+PAGE_CONTAINER_KEYS = ("pagination", "page_info", "pageInfo", "meta", "data")
+
 
 @dataclass
 class ExplorationStep:
@@ -29,6 +58,9 @@ class ExplorationStep:
     success: bool = False
     message: str = ""
     extracted: Dict[str, List[Any]] = field(default_factory=dict)
+    pages: int = 0              # 实际请求的页数
+    resource: str = ""
+    depth: int = 0              # 探测层级 (0 为无路径参数的接口)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -39,6 +71,8 @@ class ExplorationStep:
             "status": self.status,
             "success": self.success,
             "message": self.message,
+            "pages": self.pages,
+            "depth": self.depth,
             "extracted": self.extracted
         }
 
@@ -48,12 +82,43 @@ class ExplorationResult:
     steps: List[ExplorationStep] = field(default_factory=list)
     extracted_values: Dict[str, List[Any]] = field(default_factory=dict)
     overall_success: bool = False
+    duration: float = 0.0
+    budget_exhausted: bool = False      # 时间预算或请求数用尽，部分接口未探测
+    depth: int = 0                      # 实际探测到的最大层级
+    # 按 ID 名称归类的真实 ID: {"userId": [...], "orderId": [...]}
+    extracted_resources: Dict[str, List[Any]] = field(default_factory=dict)
+
+    @property
+    def request_count(self) -> int:
+        return sum(s.pages for s in self.steps)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "overall_success": self.overall_success,
+            "duration": round(self.duration, 2),
+            "budget_exhausted": self.budget_exhausted,
+            "depth": self.depth,
+            "requests": self.request_count,
             "steps": [s.to_dict() for s in self.steps],
-            "extracted_values": self.extracted_values
+            "extracted_values": self.extracted_values,
+            "extracted_resources": self.extracted_resources
+        }
+
+    def to_data(self, samples: int = 5) -> Dict[str, Any]:
+        """explored_data.json 内容 (conftest 的 EXPLORED_DATA)"""
+        explored = [s for s in self.steps if s.success]
+        notes = [
+            f"探测 {len(self.steps)} 个接口 (成功 {len(explored)})，{self.request_count} 次请求，"
+            f"最大层级 {self.depth}，耗时 {self.duration:.1f}s"
+        ]
+        if self.budget_exhausted:
+            notes.append("探测预算用尽，部分接口未探测")
+        return {
+            "overall_success": self.overall_success,
+            "extracted_resources": self.extracted_resources,
+            "field_patterns": {k: v[:samples] for k, v in self.extracted_values.items()},
+            "explored_endpoints": [f"{s.method} {s.endpoint}" for s in explored],
+            "exploration_notes": notes
         }
 
     def save(self, output_dir: str) -> Dict[str, str]:
@@ -63,19 +128,19 @@ class ExplorationResult:
         with open(log_path, "w", encoding="utf-8") as f:
             json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
         with open(data_path, "w", encoding="utf-8") as f:
-            json.dump(self.extracted_values, f, ensure_ascii=False, indent=2)
+            json.dump(self.to_data(), f, ensure_ascii=False, indent=2)
         paths["log"] = log_path
         paths["data"] = data_path
         return paths
 
     def to_prompt_block(self, limit: int = 5) -> str:
-        lines = [f"- 探测步骤: {len(self.steps)}, 提取字段: {len(self.extracted_values)}"]
+        lines = [f"- 探测步骤: {len(self.steps)}, 最大层级: {self.depth}, 提取字段: {len(self.extracted_values)}"]
         for step in self.steps[:limit]:
             status = step.status or "N/A"
             ok = "✓" if step.success else "✗"
             lines.append(f"- {ok} {step.method} {step.endpoint} ({status}) {step.message}")
-        if self.extracted_values:
-            items = list(self.extracted_values.items())[:limit]
+        if self.extracted_values or self.extracted_resources:
+            items = list((self.extracted_resources or self.extracted_values).items())[:limit]
             lines.append("### 已提取ID示例")
             for k, vals in items:
                 preview = ", ".join(map(str, vals[:3]))
@@ -84,67 +149,342 @@ class ExplorationResult:
 
 
 class DependencyExplorer:
-    """简单的依赖探测"""
+    """并发依赖探测
 
-    def __init__(self, timeout: int = 5, max_endpoints: int = 10):
+    使用方式:
+        explorer = DependencyExplorer(timeout=5, concurrency=8, time_budget=30, max_depth=3)
+        result = explorer.explore(context, analysis)
+        result.save(output_dir)
+    """
+
+    def __init__(
+        self,
+        timeout: float = 5,
+        max_endpoints: int = 0,
+        concurrency: int = 8,
+        time_budget: float = 30.0,
+        max_pages: int = 3,
+        max_depth: int = 3,
+        max_requests: int = 500
+    ):
+        """
+        Args:
+            timeout: 单个请求超时 (秒)
+            max_endpoints: 最多探测的资源数 (0 表示不限制)
+            concurrency: 并发请求数 (同时也是连接池大小)
+            time_budget: 全局时间预算 (秒)，用尽后不再发起新请求
+            max_pages: 列表接口最多翻页数
+            max_depth: 最大探测层级 (0 只探测无路径参数的接口)
+            max_requests: 请求总数上限 (含翻页，0 表示不限制)
+        """
         self.timeout = timeout
         self.max_endpoints = max_endpoints
+        self.concurrency = max(1, concurrency)
+        self.time_budget = time_budget
+        self.max_pages = max(1, max_pages)
+        self.max_depth = max(0, max_depth)
+        self.max_requests = max_requests
+        self._deadline = 0.0
+        self._requests = 0
+        self._lock = threading.Lock()
 
     def explore(self, context: TaskContext, analysis: DependencyAnalysisResult) -> ExplorationResult:
         """
-        仅对无路径参数的 GET 接口做轻量探测，尝试提取 ID。
+        仅对 GET 接口做轻量探测，尝试提取 ID。
         更复杂的创建/更新不自动执行，避免破坏性操作。
         """
+        start = time.time()
+        self._deadline = start + self.time_budget
+        self._requests = 0
         result = ExplorationResult()
-        headers = {
+        resources = list(analysis.resources.values())
+        if self.max_endpoints:
+            resources = resources[: self.max_endpoints]
+        candidates = self._get_endpoints(resources, analysis)
+
+        session = self._create_session(context)
+        try:
+            # 第 0 层: 每个资源一个无路径参数的 GET 接口
+            targets, seen_resources = [], set()
+            for res_name, ep in candidates:
+                if "{" not in ep.path and res_name not in seen_resources:
+                    seen_resources.add(res_name)
+                    targets.append((res_name, ep, self._build_url(context.config.base_url, ep.path)))
+            probed = {(ep.method, ep.path) for _, ep, _ in targets}
+            self._run_wave(session, targets, result, depth=0)
+
+            # 第 1..N 层: 用前面各层提取的 ID 填充路径参数，直到没有可填充的新接口
+            for depth in range(1, self.max_depth + 1):
+                if self._exhausted():
+                    result.budget_exhausted = True
+                    break
+                resource_ids = self._resource_ids(result.steps, analysis)
+                targets = []
+                for res_name, ep in candidates:
+                    if "{" not in ep.path or (ep.method, ep.path) in probed:
+                        continue
+                    path = self._fill_path(
+                        ep.path, analysis.resources[res_name], analysis, resource_ids, result.extracted_values
+                    )
+                    if path:
+                        targets.append((res_name, ep, self._build_url(context.config.base_url, path)))
+                if not targets:
+                    break
+                probed.update((ep.method, ep.path) for _, ep, _ in targets)
+                self._run_wave(session, targets, result, depth=depth)
+        finally:
+            session.close()
+
+        result.extracted_resources = self._group_by_id_name(result.steps, analysis, result.extracted_values)
+        result.depth = max((s.depth for s in result.steps if s.success), default=0)
+        result.overall_success = any(s.success for s in result.steps)
+        result.duration = time.time() - start
+        logger.info(
+            f"Exploration: {len(result.steps)} endpoints, {result.request_count} requests, "
+            f"depth {result.depth}, {len(result.extracted_resources)} id names in {result.duration:.1f}s"
+        )
+        return result
+
+    # ---------- 请求 ----------
+
+    def _create_session(self, context: TaskContext) -> requests.Session:
+        """连接池大小与并发数一致，所有探测复用 keep-alive 连接"""
+        session = requests.Session()
+        session.headers.update({
             "Content-Type": "application/json",
             "Accept": "application/json"
-        }
+        })
         if context.config.auth_token:
-            headers["Authorization"] = context.config.auth_token
-        headers.update(context.config.extra_headers or {})
-
-        step_idx = 1
-        for res in list(analysis.resources.values())[: self.max_endpoints]:
-            get_candidates = [
-                ep for ep in res.endpoints
-                if ep.method == "GET" and "{" not in ep.path
-            ]
-            if not get_candidates:
-                continue
+            session.headers["Authorization"] = clean_header_value(context.config.auth_token)
+        session.headers.update(context.config.extra_headers or {})
+        session.verify = False
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
-            ep = get_candidates[0]
-            url = self._build_url(context.config.base_url, ep.path)
-            step = ExplorationStep(
-                step=step_idx,
-                endpoint=ep.path,
-                method=ep.method,
-                url=url
-            )
-            step_idx += 1
+    def _run_wave(
+        self,
+        session: requests.Session,
+        targets: List[Tuple[str, EndpointRef, str]],
+        result: ExplorationResult,
+        depth: int = 0
+    ) -> None:
+        """并发探测同一层的接口，按提交顺序合并结果"""
+        if not targets:
+            return
+        workers = min(self.concurrency, len(targets))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="explorer") as pool:
+            steps = list(pool.map(lambda target: self._probe(session, *target), targets))
+        for step in steps:
+            step.step = len(result.steps) + 1
+            step.depth = depth
+            if step.status is None and step.message == BUDGET_MESSAGE:
+                result.budget_exhausted = True
+            self._merge_extracted(result.extracted_values, step.extracted)
+            result.steps.append(step)
 
+    def _probe(self, session: requests.Session, resource: str, ep: EndpointRef, url: str) -> ExplorationStep:
+        """请求一个接口，列表接口按分页信息继续翻页"""
+        step = ExplorationStep(step=0, endpoint=ep.path, method=ep.method, url=url, resource=resource)
+        seen = set()
+        next_url: Optional[str] = url
+        while next_url and step.pages < self.max_pages and next_url not in seen:
+            remaining = self._deadline - time.time()
+            if remaining <= 0 or not self._reserve_request():
+                if not step.pages:
+                    step.message = BUDGET_MESSAGE
+                break
+            seen.add(next_url)
             try:
-                resp = requests.get(url, headers=headers, timeout=self.timeout, verify=False)
-                step.status = resp.status_code
-
-                if resp.status_code == 200:
-                    payload = self._safe_json(resp)
-                    extracted = self._extract_ids(payload)
-                    step.extracted = extracted
-                    step.success = True
-                    step.message = f"提取 {sum(len(v) for v in extracted.values())} 个字段值"
-                    self._merge_extracted(result.extracted_values, extracted)
-                else:
-                    step.success = False
-                    step.message = f"状态码 {resp.status_code}"
+                resp = session.get(next_url, timeout=min(self.timeout, remaining))
             except Exception as exc:
-                step.success = False
-                step.message = f"请求失败: {exc}"
+                if not step.pages:
+                    step.message = f"请求失败: {exc}"
+                break
+            step.pages += 1
+            if resp.status_code != 200:
+                if not step.success:
+                    step.status = resp.status_code
+                    step.message = f"状态码 {resp.status_code}"
+                break
+            step.status = 200
+            step.success = True
+            payload = self._safe_json(resp)
+            self._merge_extracted(step.extracted, self._extract_ids(payload))
+            next_url = self._next_page_url(next_url, payload, resp)
 
-            result.steps.append(step)
+        if step.success:
+            step.message = f"提取 {sum(len(v) for v in step.extracted.values())} 个字段值"
+            if step.pages > 1:
+                step.message += f" ({step.pages} 页)"
+        return step
 
-        result.overall_success = any(s.success for s in result.steps)
-        return result
+    def _next_page_url(self, url: str, payload: Any, resp) -> Optional[str]:
+        """从 Link 头或响应体的分页信息推断下一页 URL"""
+        link = (getattr(resp, "links", None) or {}).get("next", {}).get("url")
+        if link:
+            return urljoin(url, link)
+        if not isinstance(payload, dict):
+            return None
+
+        containers = [payload] + [payload[k] for k in PAGE_CONTAINER_KEYS if isinstance(payload.get(k), dict)]
+        for links in (payload.get("links"), payload.get("_links")):
+            if isinstance(links, dict):
+                containers.append(links)
+        for obj in containers:
+            for key in NEXT_LINK_KEYS:
+                value = obj.get(key)
+                if isinstance(value, dict):
+                    value = value.get("href")
+                if isinstance(value, str) and value:
+                    return urljoin(url, value)
+            for key, param in NEXT_CURSOR_KEYS.items():
+                value = obj.get(key)
+                if isinstance(value, (str, int)) and value != "":
+                    return self._with_query(url, param, value)
+
+        for obj in containers:
+            page_key = next((k for k in PAGE_KEYS if isinstance(obj.get(k), int)), None)
+            if page_key is None:
+                continue
+            page = obj[page_key]
+            total = next((obj[k] for k in TOTAL_PAGE_KEYS if isinstance(obj.get(k), int)), None)
+            has_more = next((obj[k] for k in HAS_MORE_KEYS if isinstance(obj.get(k), bool)), None)
+            if (total is not None and page < total) or (total is None and has_more):
+                param = "page" if page_key in ("current", "currentPage") else page_key
+                return self._with_query(url, param, page + 1)
+            return None
+        return None
+
+    def _reserve_request(self) -> bool:
+        """占用一次请求配额 (多线程共享)"""
+        with self._lock:
+            if self.max_requests and self._requests >= self.max_requests:
+                return False
+            self._requests += 1
+            return True
+
+    def _exhausted(self) -> bool:
+        return time.time() >= self._deadline or bool(self.max_requests and self._requests >= self.max_requests)
+
+    @staticmethod
+    def _with_query(url: str, name: str, value: Any) -> str:
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != name]
+        query.append((name, str(value)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    # ---------- 路径参数填充 ----------
+
+    @staticmethod
+    def _get_endpoints(
+        resources: List[ResourceInfo],
+        analysis: DependencyAnalysisResult
+    ) -> List[Tuple[str, EndpointRef]]:
+        """待探测的 GET 接口 (资源名, 接口)，按拓扑排序顺序 (生产者在前)"""
+        owner = {(ep.method, ep.path): (res.name, ep) for res in resources for ep in res.endpoints if ep.method == "GET"}
+        ordered = []
+        for item in analysis.sorted_endpoints:
+            key = (item.get("method", "").upper(), item.get("path", ""))
+            if key in owner:
+                ordered.append(owner.pop(key))
+        return ordered + list(owner.values())
+
+    @staticmethod
+    def _id_name(resource: ResourceInfo) -> str:
+        """资源自身主键的 ID 名称
+
+        primary_keys 包含上级资源的参数 (/users/{userId}/orders 的 userId)，
+        因此取以 /{param} 结尾的接口的末尾参数，否则由资源名推断 (order_items -> orderItemId)。
+        """
+        for ep in resource.endpoints:
+            match = re.search(r"/\{([^}]+)\}/?$", ep.path)
+            if match:
+                norm = FieldRef(name=match.group(1), location="path").normalized_id or match.group(1)
+                if norm != "id":
+                    return norm
+        singular = resource.name[:-1] if resource.name.endswith("s") else resource.name
+        parts = singular.split("_")
+        return parts[0] + "".join(p[:1].upper() + p[1:] for p in parts[1:]) + "Id"
+
+    def _group_by_id_name(
+        self,
+        steps: List[ExplorationStep],
+        analysis: DependencyAnalysisResult,
+        extracted: Dict[str, List[Any]]
+    ) -> Dict[str, List[Any]]:
+        """按 ID 名称归类: 各资源主键值 + 响应体中的具名 ID 字段 (orderId、owner_id 等)"""
+        grouped: Dict[str, List[Any]] = {}
+        for res_name, values in self._resource_ids(steps, analysis).items():
+            self._merge_extracted(grouped, {self._id_name(analysis.resources[res_name]): values})
+        for key, values in extracted.items():
+            if key.lower() == "id":
+                continue
+            usable = [v for v in values if isinstance(v, (str, int)) and not isinstance(v, bool)]
+            if usable:
+                self._merge_extracted(grouped, {key: usable})
+        return grouped
+
+    def _resource_ids(self, steps: List[ExplorationStep], analysis: DependencyAnalysisResult) -> Dict[str, List[Any]]:
+        """各资源已探测到的主键值 (id 或资源自身的 ID 字段)"""
+        ids: Dict[str, List[Any]] = {}
+        for step in steps:
+            if not step.success or not step.resource:
+                continue
+            res = analysis.resources.get(step.resource)
+            keys = ["id", self._id_name(res)] if res else ["id"]
+            for key in keys:
+                values = [v for v in step.extracted.get(key, []) if isinstance(v, (str, int))]
+                if values:
+                    self._merge_extracted(ids, {step.resource: values})
+                    break
+        return ids
+
+    def _fill_path(
+        self,
+        path: str,
+        resource: ResourceInfo,
+        analysis: DependencyAnalysisResult,
+        resource_ids: Dict[str, List[Any]],
+        extracted: Dict[str, List[Any]]
+    ) -> Optional[str]:
+        """用已提取的 ID 填充路径参数，任一参数无法填充时返回 None"""
+        filled = path
+        for name in PATH_PARAM_PATTERN.findall(path):
+            value = self._lookup_id(name, resource, analysis, resource_ids, extracted)
+            if value is None:
+                return None
+            # ID 中的 / ? # 等字符需转义，否则会改变请求的路径
+            filled = filled.replace("{" + name + "}", quote(str(value), safe=""), 1)
+        return filled
+
+    def _lookup_id(
+        self,
+        name: str,
+        resource: ResourceInfo,
+        analysis: DependencyAnalysisResult,
+        resource_ids: Dict[str, List[Any]],
+        extracted: Dict[str, List[Any]]
+    ) -> Optional[Any]:
+        norm = FieldRef(name=name, location="path").normalized_id or name
+        # {id} 指当前资源自身的主键
+        if norm == "id":
+            values = resource_ids.get(resource.name)
+            return values[0] if values else None
+        # 其他资源的主键: /users/{userId}/orders 的 userId 来自 users 的探测结果
+        for res in analysis.resources.values():
+            if norm.lower() == self._id_name(res).lower() and resource_ids.get(res.name):
+                return resource_ids[res.name][0]
+        # 响应体中同名字段
+        for key, values in extracted.items():
+            if (FieldRef(name=key, location="path").normalized_id or key) == norm:
+                usable = [v for v in values if isinstance(v, (str, int))]
+                if usable:
+                    return usable[0]
+        return None
+
+    # ---------- 工具 ----------
 
     def _build_url(self, base_url: str, path: str) -> str:
         return f"{base_url.rstrip('/')}/{path.lstrip('/')}"
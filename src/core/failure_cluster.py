@@ -0,0 +1,246 @@
+"""
+FailureCluster - 失败聚类
+
+Token 过期、basePath 错误等环境问题会让大量用例以同一原因失败。按归一化后的失败签名
+(错误类型 + 异常类型 + 状态码 + 接口 + 消息) 将失败用例聚类，每个簇只挑一个代表用例
+判定/自愈，判定结果应用到整个簇。
+
+接口优先取失败信息中的 URL；生成的用例通常只有 "assert 500 == 200" 而没有 URL，
+此时取用例所属的接口 (testcases.md 章节)，再退回到测试文件，避免不同接口的失败被合并。
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import PurePath
+from typing import Optional, List, Dict, Any
+from urllib.parse import urlsplit
+
+from ..models import TestCaseResult, ErrorInfo, ErrorType
+
+logger = logging.getLogger(__name__)
+
+# 与具体接口无关的状态码 (鉴权/网关问题)，签名中不区分接口
+ENVIRONMENT_STATUSES = {401, 403, 407, 502, 503, 504}
+
+# 连接类异常 (用例执行阶段抛出时 pytest 报告为普通失败，按异常名归为连接错误)
+CONNECTION_EXCEPTIONS = {
+    "ConnectionError", "ConnectTimeout", "NewConnectionError", "MaxRetryError",
+    "ProxyError", "SSLError", "ConnectionRefusedError", "ConnectionResetError"
+}
+
+EXCEPTION_PATTERN = re.compile(r"\b((?:[A-Za-z_]\w*\.)*[A-Z]\w*(?:Error|Exception|Timeout|Exit))\b")
+STATUS_PATTERNS = [
+    re.compile(r"(?:status(?:_code)?|\bHTTP(?:/[\d.]+)?\b|状态码|响应码)\D{0,12}?\b([1-5]\d{2})\b", re.IGNORECASE),
+    re.compile(r"\bassert\s+([1-5]\d{2})\s*(?:==|!=|in)\s"),
+    re.compile(r"\b([1-5]\d{2})\s+(?:Client|Server)\s+Error\b"),
+]
+URL_PATTERN = re.compile(r"https?://[^\s'\"<>)]+")
+PATH_TOKEN_PATTERN = re.compile(r"(?<![\w/<])/[\w\-./{}]+")
+HOST_PATTERN = re.compile(r"host='([^']+)'")
+UUID_PATTERN = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+HEX_PATTERN = re.compile(r"\b0x[0-9a-fA-F]+\b")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+ID_SEGMENT_PATTERN = re.compile(r"^(?:\d+|[0-9a-fA-F]{16,}|[0-9a-fA-F-]{36})$")
+
+MESSAGE_LIMIT = 160
+
+
+@dataclass
+class FailureCluster:
+    """同一签名的失败用例 (第一个为代表用例)"""
+    signature: str
+    error_type: ErrorType
+    exception: str = ""
+    status: Optional[int] = None
+    endpoint: str = ""
+    results: List[TestCaseResult] = field(default_factory=list)
+
+    @property
+    def representative(self) -> TestCaseResult:
+        return self.results[0]
+
+    @property
+    def members(self) -> List[TestCaseResult]:
+        """除代表用例外的其他用例"""
+        return self.results[1:]
+
+    @property
+    def size(self) -> int:
+        return len(self.results)
+
+    @property
+    def host_wide(self) -> bool:
+        """按主机聚合的簇 (连接错误、鉴权/网关类状态码)，与具体接口和测试文件无关"""
+        return self.error_type == ErrorType.CONNECTION or self.status in ENVIRONMENT_STATUSES
+
+    @property
+    def label(self) -> str:
+        parts = [self.exception or self.error_type.value]
+        if self.status:
+            parts.append(str(self.status))
+        if self.endpoint:
+            parts.append(self.endpoint)
+        return f"{' '.join(parts)} x{self.size}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "signature": self.signature,
+            "error_type": self.error_type.value,
+            "exception": self.exception,
+            "status": self.status,
+            "endpoint": self.endpoint,
+            "size": self.size,
+            "representative": self.representative.testcase_id,
+            "testcase_ids": [r.testcase_id for r in self.results]
+        }
+
+
+class FailureClusterer:
+    """失败聚类器
+
+    使用方式:
+        clusterer = FailureClusterer()
+        for cluster in clusterer.cluster(failed_results):
+            judge(cluster.representative) ...
+    """
+
+    def cluster(
+        self,
+        results: List[TestCaseResult],
+        group: bool = True,
+        endpoints: Optional[Dict[str, str]] = None
+    ) -> List[FailureCluster]:
+        """按失败签名聚类 (保持首次出现的顺序)
+
+        Args:
+            group: 为 False 时每个用例单独成簇 (关闭聚类)
+            endpoints: 用例 ID -> 所属接口 ("METHOD /path")，失败信息中没有 URL 时用于区分接口
+        """
+        clusters: Dict[str, FailureCluster] = {}
+        for index, result in enumerate(results):
+            info = result.error_info
+            if info is None or not group:
+                key = f"#{index}"
+                clusters[key] = FailureCluster(
+                    signature=self.signature(info, endpoints, result.testcase_id) if info else key,
+                    error_type=self.error_type(info) if info else ErrorType.UNKNOWN,
+                    results=[result]
+                )
+                continue
+            key = self.signature(info, endpoints, result.testcase_id)
+            if key not in clusters:
+                exception, status, endpoint, _ = self._features(info, endpoints, result.testcase_id)
+                clusters[key] = FailureCluster(
+                    signature=key,
+                    error_type=self.error_type(info),
+                    exception=exception,
+                    status=status,
+                    endpoint=endpoint
+                )
+            clusters[key].results.append(result)
+        return list(clusters.values())
+
+    def signature(
+        self,
+        info: ErrorInfo,
+        endpoints: Optional[Dict[str, str]] = None,
+        testcase_id: Optional[str] = None
+    ) -> str:
+        exception, status, endpoint, message = self._features(info, endpoints, testcase_id)
+        return "|".join([self.error_type(info).value, exception, str(status or ""), endpoint, message])
+
+    def error_type(self, info: ErrorInfo) -> ErrorType:
+        """错误类型 (连接类异常即使被报告为断言失败也归为连接错误)"""
+        if info.error_type != ErrorType.CONNECTION and self._exception(info) in CONNECTION_EXCEPTIONS:
+            return ErrorType.CONNECTION
+        return info.error_type
+
+    # ---------- 特征提取 ----------
+
+    def _features(
+        self,
+        info: ErrorInfo,
+        endpoints: Optional[Dict[str, str]] = None,
+        testcase_id: Optional[str] = None
+    ):
+        text = f"{info.message}\n{info.traceback}"
+        exception = self._exception(info)
+        # 状态码只从错误消息和 traceback 的 E 行中提取 (不匹配源码行)
+        error_lines = [l for l in (info.traceback or "").splitlines() if l.startswith("E ")]
+        status = None if exception in CONNECTION_EXCEPTIONS else \
+            self._status(info, "\n".join([info.message or ""] + error_lines))
+
+        # 鉴权/网关类状态码和连接错误与具体接口无关: 按主机聚合
+        if self.error_type(info) == ErrorType.CONNECTION or status in ENVIRONMENT_STATUSES:
+            endpoint = self._host(text)
+        else:
+            endpoint = self._endpoint(text) or self._own_endpoint(info, endpoints, testcase_id)
+
+        message = self._normalize(self._first_line(info.message))
+        return exception, status, endpoint, message
+
+    @staticmethod
+    def _first_line(text: str) -> str:
+        for line in (text or "").splitlines():
+            if line.strip():
+                return line.strip()
+        return ""
+
+    def _exception(self, info: ErrorInfo) -> str:
+        """异常类名 (去掉模块前缀)；消息中没有时取 traceback 中最后一个 E 行"""
+        match = EXCEPTION_PATTERN.search(self._first_line(info.message))
+        if not match:
+            error_lines = [l for l in (info.traceback or "").splitlines() if l.startswith("E ")]
+            match = EXCEPTION_PATTERN.search(error_lines[-1]) if error_lines else None
+        return match.group(1).rsplit(".", 1)[-1] if match else ""
+
+    @staticmethod
+    def _status(info: ErrorInfo, text: str) -> Optional[int]:
+        if info.actual and info.actual.strip().isdigit() and len(info.actual.strip()) == 3:
+            return int(info.actual.strip())
+        for pattern in STATUS_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                return int(match.group(1))
+        return None
+
+    @staticmethod
+    def _endpoint(text: str) -> str:
+        """失败信息中第一个 URL 的路径 (ID 类路径段归一化为 {})"""
+        match = URL_PATTERN.search(text)
+        if not match:
+            return ""
+        path = urlsplit(match.group(0).rstrip(".,;:")).path or "/"
+        segments = ["{}" if ID_SEGMENT_PATTERN.match(s) else s for s in path.split("/")]
+        return "/".join(segments)
+
+    @staticmethod
+    def _own_endpoint(
+        info: ErrorInfo,
+        endpoints: Optional[Dict[str, str]],
+        testcase_id: Optional[str]
+    ) -> str:
+        """用例自身所属的接口 (testcases.md 章节)，未知时为测试文件名"""
+        for key in (info.testcase_id, testcase_id):
+            if key and endpoints and endpoints.get(key):
+                return endpoints[key]
+        return PurePath(info.file).name if info.file else ""
+
+    @staticmethod
+    def _host(text: str) -> str:
+        match = HOST_PATTERN.search(text)
+        if match:
+            return match.group(1)
+        match = URL_PATTERN.search(text)
+        return urlsplit(match.group(0)).netloc if match else ""
+
+    @staticmethod
+    def _normalize(message: str) -> str:
+        """去掉消息中随用例变化的部分 (URL、路径、UUID、地址、数字)"""
+        message = URL_PATTERN.sub("<url>", message)
+        message = PATH_TOKEN_PATTERN.sub("<path>", message)
+        message = UUID_PATTERN.sub("<uuid>", message)
+        message = HEX_PATTERN.sub("<addr>", message)
+        message = NUMBER_PATTERN.sub("#", message)
+        return message[:MESSAGE_LIMIT]
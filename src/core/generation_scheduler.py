@@ -0,0 +1,246 @@
+"""
+GenerationScheduler - 分文件并行生成测试代码
+
+负责:
+- 按资源将 testcases.md 的接口章节划分为生成单元，每个单元对应一个测试文件
+- 在有界线程池上并发执行各单元的生成调用，失败的文件单独重试
+- 生成结果先写入暂存目录，用 ast.parse 校验通过后才放入测试目录
+- 记录每个文件的生成耗时和尝试次数
+"""
+
+import ast
+import logging
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterable
+
+from ..models import SwaggerSpec
+from .plan_chunker import (
+    CASE_ROW_PATTERN, endpoint_groups, pack_groups, path_resource, split_testcase_sections
+)
+from .spec_diff import endpoint_identity
+
+logger = logging.getLogger(__name__)
+
+# 单元用例文档 (位于各单元暂存目录下)
+UNIT_TESTCASES_FILE = "testcases.md"
+
+
+@dataclass
+class GenerationUnit:
+    """生成单元: 一个测试文件及其负责的接口章节"""
+    index: int                  # 从 1 开始
+    name: str
+    file_name: str              # test_xxx.py
+    endpoints: List[str] = field(default_factory=list)       # "METHOD /path"
+    testcase_ids: List[str] = field(default_factory=list)
+    sections: str = ""          # 本单元的 testcases.md 章节
+    staging_dir: str = ""       # 暂存目录 (CLI 在此写入测试文件)
+    attempts: int = 0
+    success: bool = False
+    duration: float = 0.0
+    error: str = ""
+    last_error: str = ""        # 上次尝试的失败原因 (重试时供生成函数使用)
+
+    @property
+    def label(self) -> str:
+        return f"{self.file_name} ({len(self.testcase_ids)} 个用例)"
+
+    @property
+    def staging_file(self) -> Path:
+        return Path(self.staging_dir) / self.file_name
+
+    @property
+    def testcases_file(self) -> Path:
+        return Path(self.staging_dir) / UNIT_TESTCASES_FILE
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "file": self.file_name,
+            "endpoints": len(self.endpoints),
+            "testcases": len(self.testcase_ids),
+            "attempts": self.attempts,
+            "duration": round(self.duration, 2),
+            "success": self.success,
+            "error": self.error
+        }
+
+
+class GenerationScheduler:
+    """分文件生成调度器
+
+    使用方式:
+        scheduler = GenerationScheduler(concurrency=4, max_retries=1, unit_size=8)
+        units = scheduler.build_units(testcases_text, swagger, analysis, staging_root, tests_dir)
+        failed = scheduler.run(units, gen_fn, tests_dir)     # gen_fn(unit, attempt) -> bool
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        max_retries: int = 1,
+        unit_size: int = 8,
+        should_stop: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Args:
+            concurrency: 并发生成的文件数
+            max_retries: 单个文件失败后的重试次数 (只重试该文件)
+            unit_size: 每个文件最多包含的接口数
+            should_stop: 取消检查函数，返回 True 时不再启动新的调用
+        """
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.unit_size = max(1, unit_size)
+        self.should_stop = should_stop
+
+    # ---------- 划分 ----------
+
+    def build_units(
+        self,
+        testcases_content: str,
+        swagger: SwaggerSpec,
+        analysis: Optional[Any],
+        staging_root: str,
+        tests_dir: str,
+        only_ids: Optional[Iterable[str]] = None,
+        prefix: str = "test_"
+    ) -> List[GenerationUnit]:
+        """按资源划分生成单元
+
+        Args:
+            only_ids: 只为包含这些用例的接口章节生成 (增量模式)
+            prefix: 文件名前缀，文件名与测试目录中已有文件冲突时追加序号
+        """
+        # 章节标题与规范中的接口按身份对应 (路径参数名可能不同)
+        group_of = endpoint_groups(swagger, analysis)
+        spec_key = {endpoint_identity(key): key for key in group_of}
+        wanted = set(only_ids) if only_ids is not None else None
+
+        groups: Dict[str, List[tuple]] = {}
+        for key, section in split_testcase_sections(testcases_content)[1]:
+            ids = list(dict.fromkeys(CASE_ROW_PATTERN.findall(section)))
+            if wanted is not None:
+                ids = [i for i in ids if i in wanted]
+            if not ids:
+                continue
+            key = spec_key.get(endpoint_identity(key), key)
+            group = group_of.get(key) or path_resource(key.partition(" ")[2])
+            groups.setdefault(group, []).append((key, section, ids))
+
+        taken = {p.name for p in Path(tests_dir).glob("*.py")} if Path(tests_dir).is_dir() else set()
+        units = []
+        for index, (name, members) in enumerate(pack_groups(groups, self.unit_size), 1):
+            file_name = self._file_name(prefix, name, index, taken)
+            taken.add(file_name)
+            units.append(GenerationUnit(
+                index=index,
+                name=name,
+                file_name=file_name,
+                endpoints=[key for key, _, _ in members],
+                testcase_ids=[i for _, _, ids in members for i in ids],
+                sections="".join(section for _, section, _ in members),
+                staging_dir=str(Path(staging_root) / f"part_{index:02d}")
+            ))
+        return units
+
+    @staticmethod
+    def _file_name(prefix: str, name: str, index: int, taken: set) -> str:
+        """由资源名生成合法的模块名 (非 ASCII 名称使用序号)"""
+        first = name.split(",")[0].strip()
+        slug = re.sub(r"[^0-9a-zA-Z]+", "_", re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", first)).strip("_").lower()
+        base = f"{prefix}{slug or f'part_{index:02d}'}"
+        file_name = f"{base}.py"
+        suffix = 2
+        while file_name in taken:
+            file_name = f"{base}_{suffix}.py"
+            suffix += 1
+        return file_name
+
+    # ---------- 执行 ----------
+
+    def run(
+        self,
+        units: List[GenerationUnit],
+        gen_fn: Callable[[GenerationUnit, int], bool],
+        tests_dir: str
+    ) -> List[GenerationUnit]:
+        """并发生成所有文件，校验通过的文件移入测试目录
+
+        Args:
+            gen_fn: 生成函数 (unit, attempt) -> 调用是否成功，attempt 从 1 开始；
+                重试时 unit.last_error 为上次失败原因
+
+        Returns:
+            失败的单元 (重试用尽或已取消)
+        """
+        for unit in units:
+            Path(unit.staging_dir).mkdir(parents=True, exist_ok=True)
+            unit.testcases_file.write_text(
+                "# 测试用例文档 (本文件负责的部分)\n\n" + unit.sections, encoding="utf-8"
+            )
+
+        workers = min(self.concurrency, len(units))
+        logger.info(f"Generating {len(units)} test files with {workers} workers")
+        if workers <= 1:
+            for unit in units:
+                self._run_unit(unit, gen_fn, tests_dir)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generator") as pool:
+                for future in [pool.submit(self._run_unit, unit, gen_fn, tests_dir) for unit in units]:
+                    future.result()
+        return [u for u in units if not u.success]
+
+    def _run_unit(
+        self,
+        unit: GenerationUnit,
+        gen_fn: Callable[[GenerationUnit, int], bool],
+        tests_dir: str
+    ) -> None:
+        """生成单个文件，失败时只重试该文件"""
+        start = time.time()
+        for attempt in range(1, self.max_retries + 2):
+            if self._stopped():
+                unit.error = "已取消"
+                break
+            unit.attempts = attempt
+            # 每次尝试重新记录失败原因，避免生成函数未设置时沿用上次的错误
+            unit.last_error, unit.error = unit.error, ""
+            try:
+                ok = bool(gen_fn(unit, attempt))
+                unit.error = self.validate(unit) if ok else (unit.error or "CLI 调用失败")
+            except Exception as e:
+                logger.error(f"Generation failed: {unit.label}: {e}")
+                unit.error = str(e)
+            if not unit.error:
+                shutil.copy2(unit.staging_file, Path(tests_dir) / unit.file_name)
+                unit.success = True
+                break
+            logger.warning(f"Generation {unit.label} attempt {attempt} failed: {unit.error}")
+        unit.duration = time.time() - start
+
+    @staticmethod
+    def validate(unit: GenerationUnit) -> str:
+        """校验暂存文件，返回错误描述 (通过时为空字符串)"""
+        path = unit.staging_file
+        if not path.exists():
+            return f"未生成文件 {unit.file_name}"
+        source = path.read_text(encoding="utf-8")
+        try:
+            tree = ast.parse(source, filename=unit.file_name)
+        except SyntaxError as e:
+            return f"语法错误 (第 {e.lineno} 行): {e.msg}"
+        has_test = any(
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test")
+            for node in ast.walk(tree)
+        )
+        if not has_test:
+            return "文件中没有测试函数"
+        return ""
+
+    def _stopped(self) -> bool:
+        return bool(self.should_stop and self.should_stop())
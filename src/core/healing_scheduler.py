@@ -0,0 +1,172 @@
+"""
+HealingScheduler - 自愈调度器
+
+负责:
+- 将需要自愈的失败用例按 (测试文件, 自愈类型) 分批，每批只发送一次合并 Prompt
+- 在有界线程池上并发执行相互独立的批次，每个线程使用独立的分叉 CLI 会话
+- 按文件加锁，保证同一文件不会被两个自愈任务同时编辑
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Tuple, Callable
+
+from ..models import TestCaseResult, JudgeResult, HealingType
+from .cli_adapter import CLISession
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HealingBatch:
+    """自愈批次: 同一文件、同一自愈类型的失败用例"""
+    file_path: str
+    healing_type: HealingType
+    results: List[TestCaseResult] = field(default_factory=list)
+    duration: float = 0.0
+    success: bool = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.file_path} [{self.healing_type.value} x{len(self.results)}]"
+
+
+class HealingScheduler:
+    """自愈调度器
+
+    使用方式:
+        scheduler = HealingScheduler(concurrency=4, session_factory=session.fork)
+        batches = scheduler.build_batches(items)
+        scheduler.run(batches, heal_fn, main_session)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 1,
+        session_factory: Optional[Callable[[str], CLISession]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Args:
+            concurrency: 并发自愈数 (1 = 串行，使用主会话)
+            session_factory: 为工作线程创建分叉会话的工厂函数，参数为日志标签
+            should_stop: 取消检查函数，返回 True 时不再启动新的批次
+        """
+        self.concurrency = max(1, concurrency)
+        self.session_factory = session_factory
+        self.should_stop = should_stop
+        self.sessions: List[CLISession] = []   # 已创建的分叉会话 (用于汇总费用)
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._local = threading.local()
+
+    def build_batches(
+        self,
+        items: List[Tuple[TestCaseResult, JudgeResult]]
+    ) -> List[HealingBatch]:
+        """按 (文件, 自愈类型) 分批，保持失败用例的原始顺序"""
+        batches: Dict[Tuple[str, HealingType], HealingBatch] = {}
+        for result, judge_result in items:
+            if not judge_result.need_healing or judge_result.healing_type is None:
+                continue
+            key = (result.file_path, judge_result.healing_type)
+            if key not in batches:
+                batches[key] = HealingBatch(
+                    file_path=result.file_path,
+                    healing_type=judge_result.healing_type
+                )
+            batches[key].results.append(result)
+        return list(batches.values())
+
+    def run(
+        self,
+        batches: List[HealingBatch],
+        heal_fn: Callable[[HealingBatch, CLISession], bool],
+        main_session: CLISession
+    ) -> List[HealingBatch]:
+        """执行所有批次
+
+        Args:
+            batches: 待执行批次
+            heal_fn: 自愈函数 (batch, session) -> 是否成功
+            main_session: 主会话 (串行模式直接使用)
+
+        Returns:
+            已执行的批次 (含耗时和结果)
+        """
+        if self.concurrency <= 1 or len(batches) <= 1 or self.session_factory is None:
+            done = []
+            for batch in batches:
+                if self._stopped():
+                    break
+                self._run_batch(batch, heal_fn, main_session)
+                done.append(batch)
+            return done
+
+        workers = min(self.concurrency, len(batches))
+        logger.info(f"Healing {len(batches)} batches with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="healer") as pool:
+            futures = [
+                pool.submit(self._run_in_worker, batch, heal_fn)
+                for batch in self._interleave(batches)
+            ]
+            done = [f.result() for f in futures]
+        return [b for b in done if b is not None]
+
+    def _run_in_worker(
+        self,
+        batch: HealingBatch,
+        heal_fn: Callable[[HealingBatch, CLISession], bool]
+    ) -> Optional[HealingBatch]:
+        """工作线程入口: 每个线程复用自己的分叉会话"""
+        if self._stopped():
+            return None
+        session = getattr(self._local, "session", None)
+        if session is None:
+            tag = threading.current_thread().name.replace("healer_", "h")
+            session = self.session_factory(tag)
+            self._local.session = session
+            with self._locks_guard:
+                self.sessions.append(session)
+        self._run_batch(batch, heal_fn, session)
+        return batch
+
+    def _run_batch(
+        self,
+        batch: HealingBatch,
+        heal_fn: Callable[[HealingBatch, CLISession], bool],
+        session: CLISession
+    ) -> None:
+        """在文件锁保护下执行单个批次并记录耗时"""
+        with self._lock_for(batch.file_path):
+            start = time.time()
+            try:
+                batch.success = bool(heal_fn(batch, session))
+            except Exception as e:
+                logger.error(f"Healing batch failed: {batch.label}: {e}")
+                batch.success = False
+            batch.duration = time.time() - start
+
+    @staticmethod
+    def _interleave(batches: List[HealingBatch]) -> List[HealingBatch]:
+        """按文件轮转排列批次，避免同一文件的批次相邻而让工作线程空等文件锁"""
+        per_file: Dict[str, List[HealingBatch]] = {}
+        for batch in batches:
+            per_file.setdefault(batch.file_path, []).append(batch)
+        ordered: List[HealingBatch] = []
+        rounds = max(len(v) for v in per_file.values())
+        for i in range(rounds):
+            ordered.extend(v[i] for v in per_file.values() if i < len(v))
+        return ordered
+
+    def _lock_for(self, file_path: str) -> threading.Lock:
+        with self._locks_guard:
+            if file_path not in self._file_locks:
+                self._file_locks[file_path] = threading.Lock()
+            return self._file_locks[file_path]
+
+    def _stopped(self) -> bool:
+        return bool(self.should_stop and self.should_stop())
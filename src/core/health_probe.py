@@ -0,0 +1,275 @@
+"""
+HealthProbe - 执行前的环境健康检查
+
+目标服务不可用或 Token 失效时，完整执行会让每个用例都等到超时才失败。
+Phase 3 之前并发请求少量无副作用的 GET 接口，测量延迟和鉴权状态，数秒内给出结论:
+- healthy: 正常执行
+- degraded: 部分接口出错或响应过慢，只执行冒烟子集 (每个接口一个用例)
+- down / auth_failed: 目标不可达或鉴权失败，跳过执行
+"""
+
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+import requests
+
+from ..models import EnvConfig, SwaggerSpec
+from ..models.dependency import DependencyAnalysisResult
+from ..utils.http_headers import clean_header_value
+from .plan_chunker import CASE_ROW_PATTERN, split_testcase_sections
+from .spec_diff import endpoint_identity
+from .test_id_index import TestIdIndex
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+DOWN = "down"
+AUTH_FAILED = "auth_failed"
+
+# 不执行测试的状态
+ABORT_STATUSES = {DOWN, AUTH_FAILED}
+
+AUTH_STATUSES = {401, 403, 407}
+
+
+@dataclass
+class ProbeResult:
+    """单个探测请求的结果"""
+    endpoint: str                   # "GET /path"；未找到可探测接口时为 "GET /"
+    url: str
+    status: Optional[int] = None    # HTTP 状态码 (请求失败时为 None)
+    latency: float = 0.0            # 秒
+    error: str = ""
+
+    @property
+    def reachable(self) -> bool:
+        return self.status is not None
+
+    @property
+    def auth_failed(self) -> bool:
+        return self.status in AUTH_STATUSES
+
+    @property
+    def server_error(self) -> bool:
+        return self.status is not None and self.status >= 500
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "url": self.url,
+            "status": self.status,
+            "latency_ms": round(self.latency * 1000),
+            "error": self.error
+        }
+
+
+@dataclass
+class HealthReport:
+    """健康检查结论"""
+    status: str = HEALTHY
+    reason: str = ""
+    probes: List[ProbeResult] = field(default_factory=list)
+    duration: float = 0.0
+    smoke_cases: int = 0            # degraded 时执行的冒烟用例数
+
+    @property
+    def aborted(self) -> bool:
+        return self.status in ABORT_STATUSES
+
+    @property
+    def median_latency(self) -> float:
+        latencies = [p.latency for p in self.probes if p.reachable]
+        return statistics.median(latencies) if latencies else 0.0
+
+    @property
+    def failed_endpoints(self) -> List[str]:
+        """出错或超时的接口"""
+        return [p.endpoint for p in self.probes if not p.reachable or p.server_error]
+
+    def summary(self) -> str:
+        reachable = sum(1 for p in self.probes if p.reachable)
+        text = (
+            f"环境健康检查: {self.status} - 探测 {len(self.probes)} 个接口, 可达 {reachable}, "
+            f"延迟中位数 {self.median_latency * 1000:.0f}ms ({self.duration:.1f}s)"
+        )
+        return f"{text}; {self.reason}" if self.reason else text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "aborted": self.aborted,
+            "reason": self.reason,
+            "duration": round(self.duration, 2),
+            "median_latency_ms": round(self.median_latency * 1000),
+            "smoke_cases": self.smoke_cases,
+            "probes": [p.to_dict() for p in self.probes]
+        }
+
+
+class HealthProbe:
+    """环境健康探测
+
+    使用方式:
+        probe = HealthProbe(timeout=3, sample_size=8)
+        health = probe.check(context.config, context.swagger, context.dependency_analysis)
+        if health.aborted: ...
+    """
+
+    def __init__(
+        self,
+        timeout: float = 3.0,
+        sample_size: int = 8,
+        concurrency: int = 8,
+        slow_threshold: float = 2.0
+    ):
+        """
+        Args:
+            timeout: 单个请求的连接/读取超时 (秒)
+            sample_size: 最多探测的接口数
+            concurrency: 并发请求数
+            slow_threshold: 延迟中位数超过该值 (秒) 视为 degraded
+        """
+        self.timeout = timeout
+        self.sample_size = max(1, sample_size)
+        self.concurrency = max(1, concurrency)
+        self.slow_threshold = slow_threshold
+
+    def check(
+        self,
+        config: EnvConfig,
+        swagger: Optional[SwaggerSpec] = None,
+        analysis: Optional[DependencyAnalysisResult] = None
+    ) -> HealthReport:
+        start = time.time()
+        targets = self.sample(swagger, analysis) or ["/"]
+        headers = {"Accept": "application/json"}
+        if config.auth_token:
+            headers["authorization"] = clean_header_value(config.auth_token)
+        headers.update(config.extra_headers or {})
+
+        workers = min(self.concurrency, len(targets))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="health") as pool:
+            probes = list(pool.map(lambda path: self._probe(config.base_url, path, headers), targets))
+
+        report = HealthReport(probes=probes)
+        report.status, report.reason = self.evaluate(probes, auth_checked=targets != ["/"])
+        report.duration = time.time() - start
+        return report
+
+    def sample(
+        self,
+        swagger: Optional[SwaggerSpec],
+        analysis: Optional[DependencyAnalysisResult]
+    ) -> List[str]:
+        """选取可安全探测的 GET 接口路径 (无路径参数、无必填参数)，尽量覆盖不同资源"""
+        buckets: Dict[str, List[str]] = {}
+        if analysis is not None:
+            for name, res in analysis.resources.items():
+                for ep in res.endpoints:
+                    if ep.method.upper() == "GET" and "{" not in ep.path:
+                        buckets.setdefault(name, []).append(ep.path)
+        required = self._required_params(swagger)
+        if not buckets and swagger is not None:
+            for ep in swagger.endpoints:
+                path = ep.get("path", "")
+                if ep.get("method", "").upper() == "GET" and "{" not in path:
+                    buckets.setdefault(path.strip("/").split("/")[0], []).append(path)
+
+        # 每个资源轮流取一个，优先没有必填参数的接口
+        queues = [sorted(dict.fromkeys(paths), key=lambda p: p in required) for paths in buckets.values()]
+        selected: List[str] = []
+        while len(selected) < self.sample_size and any(queues):
+            for queue in queues:
+                if queue and len(selected) < self.sample_size:
+                    selected.append(queue.pop(0))
+        return selected
+
+    def evaluate(self, probes: List[ProbeResult], auth_checked: bool = True) -> Tuple[str, str]:
+        """根据探测结果给出 (状态, 原因)"""
+        reachable = [p for p in probes if p.reachable]
+        if not reachable:
+            errors = sorted({p.error.split(":", 1)[0] for p in probes if p.error})
+            return DOWN, f"目标不可达 ({probes[0].url}): {', '.join(errors)}"
+        if auth_checked and all(p.auth_failed for p in reachable):
+            return AUTH_FAILED, f"鉴权失败: {len(reachable)} 个接口均返回 {sorted({p.status for p in reachable})}"
+
+        failed = [p for p in probes if not p.reachable or p.server_error]
+        if failed:
+            return DEGRADED, f"{len(failed)}/{len(probes)} 个接口出错或超时: {', '.join(p.endpoint for p in failed[:5])}"
+        median = statistics.median(p.latency for p in reachable)
+        if median > self.slow_threshold:
+            return DEGRADED, f"响应过慢: 延迟中位数 {median * 1000:.0f}ms"
+        return HEALTHY, ""
+
+    def _probe(self, base_url: str, path: str, headers: Dict[str, str]) -> ProbeResult:
+        url = f"{base_url.rstrip('/')}/{path.lstrip('/')}"
+        result = ProbeResult(endpoint=f"GET {path}", url=url)
+        start = time.time()
+        try:
+            resp = requests.get(
+                url, headers=headers, timeout=(self.timeout, self.timeout),
+                verify=False, allow_redirects=False, stream=True
+            )
+            result.status = resp.status_code
+            resp.close()     # 只关心状态码和首字节延迟，不读取响应体
+        except Exception as e:
+            # 请求异常之外 (如请求头编码错误) 同样记为探测失败，不中断整个检查
+            result.error = f"{type(e).__name__}: {str(e)[:200]}"
+        result.latency = time.time() - start
+        return result
+
+    @staticmethod
+    def _required_params(swagger: Optional[SwaggerSpec]) -> set:
+        """有必填 query/header 参数的 GET 接口路径 (探测时可能直接返回 400，排在后面)"""
+        paths = set()
+        if swagger is None:
+            return paths
+        for ep in swagger.endpoints:
+            if ep.get("method", "").upper() != "GET":
+                continue
+            for param in ep.get("parameters") or []:
+                if isinstance(param, dict) and param.get("required") and param.get("in") in ("query", "header"):
+                    paths.add(ep.get("path", ""))
+                    break
+        return paths
+
+
+def select_smoke_nodes(
+    tests_dir: str,
+    testcases_content: str,
+    skip_endpoints: Optional[List[str]] = None,
+    index: Optional[TestIdIndex] = None
+) -> List[str]:
+    """冒烟子集: 每个接口章节的第一个有测试函数的用例
+
+    Args:
+        skip_endpoints: 探测出错的接口 ("GET /path")，不纳入冒烟子集
+
+    Returns:
+        pytest 节点 ID (相对于测试目录的父目录，如 tests/test_x.py::TestX::test_y)
+    """
+    tests_path = Path(tests_dir)
+    index = index or TestIdIndex()
+    nodes_by_id: Dict[str, str] = {}
+    for path in sorted(tests_path.rglob("test_*.py")):
+        rel = path.relative_to(tests_path.parent).as_posix()
+        for func in index.functions(path):
+            if func.testcase_id and func.name.startswith("test"):
+                nodes_by_id.setdefault(func.testcase_id, f"{rel}::{func.qualname.replace('.', '::')}")
+
+    skipped = {endpoint_identity(e) for e in skip_endpoints or []}
+    nodes: List[str] = []
+    for key, section in split_testcase_sections(testcases_content)[1]:
+        if endpoint_identity(key) in skipped:
+            continue
+        for testcase_id in CASE_ROW_PATTERN.findall(section):
+            if testcase_id in nodes_by_id:
+                nodes.append(nodes_by_id[testcase_id])
+                break
+    return list(dict.fromkeys(nodes))
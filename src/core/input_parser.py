@@ -11,12 +11,15 @@ InputParser - 输入解析器
 
 import json
 import logging
+import sys
 from pathlib import Path
 from typing import Optional, Dict, Any, Union, List
 
-from ..models import TaskContext, EnvConfig, SwaggerSpec
+from ..models import TaskContext, EnvConfig, SwaggerSpec, Endpoint
 from .prd_parser import PRDParser
 from .data_loader import DataLoader
+from .spec_loader import SpecParseCache, StructureSharer, default_spec_cache_dir, load_yaml
+from .ref_resolver import RefResolver
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +35,15 @@ class InputParser:
     将用户提供的各种输入统一解析为 TaskContext
     """
 
+    def __init__(self, spec_cache: bool = True, spec_cache_dir: Optional[str] = None):
+        """
+        Args:
+            spec_cache: 是否缓存 Swagger 解析结果 (按内容哈希)
+            spec_cache_dir: 缓存目录，默认为输出根目录下的 .cache/spec
+        """
+        self.spec_cache = spec_cache
+        self.spec_cache_dir = spec_cache_dir
+
     def parse(
         self,
         swagger_input: Union[str, Path, Dict],
@@ -66,7 +78,7 @@ class InputParser:
             TaskContext 实例
         """
         # 解析 Swagger
-        swagger = self._parse_swagger(swagger_input)
+        swagger = self._parse_swagger(swagger_input, output_dir)
 
         # 构建环境配置
         config = EnvConfig(
@@ -244,23 +256,26 @@ class InputParser:
 
         return valid_files
 
-    def _parse_swagger(self, input_source: Union[str, Path, Dict]) -> SwaggerSpec:
+    def _parse_swagger(
+        self,
+        input_source: Union[str, Path, Dict],
+        output_dir: Optional[str] = None
+    ) -> SwaggerSpec:
         """解析 Swagger/OpenAPI 规范
 
         支持:
         - 文件路径 (JSON/YAML)
         - JSON 字符串
         - 已解析的 dict
-        """
-        raw_content: str
-        spec_dict: Dict[str, Any]
 
+        文件和 JSON 字符串的规范化结果按内容哈希缓存 (见 SpecParseCache)；
+        文件/dict 输入不保留原文副本，需要时由 SwaggerSpec.raw_text 按需读取或序列化。
+        """
         if isinstance(input_source, dict):
             # 已经是解析后的 dict
-            spec_dict = input_source
-            raw_content = json.dumps(input_source, ensure_ascii=False)
+            return self._build_swagger_spec("", input_source, document=input_source)
 
-        elif isinstance(input_source, Path) or (
+        if isinstance(input_source, Path) or (
             isinstance(input_source, str) and
             (input_source.endswith('.json') or input_source.endswith('.yaml') or input_source.endswith('.yml'))
         ):
@@ -268,27 +283,66 @@ class InputParser:
             path = Path(input_source)
             if not path.exists():
                 raise InputParseError(f"Swagger file not found: {path}")
-
-            raw_content = path.read_text(encoding='utf-8')
-            spec_dict = self._parse_spec_content(raw_content, path.suffix)
-
+            data = path.read_bytes()
+            suffix = path.suffix.lower()
+            raw_content, source_path = "", str(path.resolve())
         else:
             # 假设是 JSON 字符串
-            raw_content = input_source
-            try:
-                spec_dict = json.loads(input_source)
-            except json.JSONDecodeError as e:
-                raise InputParseError(f"Invalid JSON content: {e}")
+            data = input_source.encode('utf-8')
+            suffix = '.json'
+            raw_content, source_path = input_source, None
+
+        cache = self._spec_cache(output_dir)
+        key = cache.key(data, suffix) if cache else ""
+        cached = cache.load(key) if cache else None
+        if cached is not None:
+            logger.info(
+                f"Parsed Swagger (cached): {cached['title']} v{cached['version']}, "
+                f"{len(cached['endpoints'])} endpoints"
+            )
+            return SwaggerSpec(
+                raw_content=raw_content,
+                title=cached['title'],
+                version=cached['version'],
+                base_path=cached['base_path'],
+                endpoints=[Endpoint.from_dict(ep) for ep in cached['endpoints']],
+                components=cached['components'],
+                source_path=source_path
+            )
 
-        # 提取关键信息
-        return self._build_swagger_spec(raw_content, spec_dict)
+        try:
+            content = data.decode('utf-8-sig')
+        except UnicodeDecodeError as e:
+            raise InputParseError(f"Swagger content is not valid UTF-8: {e}")
+        del data
+        spec_dict = self._parse_spec_content(content, suffix)
+        del content
+        if not isinstance(spec_dict, dict):
+            raise InputParseError("Swagger content must be a JSON/YAML object")
+
+        swagger = self._build_swagger_spec(raw_content, spec_dict, source_path=source_path)
+        if cache:
+            cache.store(key, {
+                "title": swagger.title,
+                "version": swagger.version,
+                "base_path": swagger.base_path,
+                "endpoints": [ep.to_dict() for ep in swagger.endpoints],
+                "components": swagger.components
+            })
+        return swagger
+
+    def _spec_cache(self, output_dir: Optional[str]) -> Optional[SpecParseCache]:
+        if not self.spec_cache:
+            return None
+        cache_dir = self.spec_cache_dir or (default_spec_cache_dir(output_dir) if output_dir else None)
+        return SpecParseCache(cache_dir) if cache_dir else None
 
     def _parse_spec_content(self, content: str, suffix: str) -> Dict[str, Any]:
-        """根据文件类型解析内容"""
+        """根据文件类型解析内容 (YAML 优先使用 libyaml)"""
         if suffix in ['.yaml', '.yml']:
             try:
                 import yaml
-                return yaml.safe_load(content)
+                return load_yaml(content)
             except ImportError:
                 raise InputParseError("PyYAML not installed. Run: pip install pyyaml")
             except yaml.YAMLError as e:
@@ -299,16 +353,22 @@ class InputParser:
             except json.JSONDecodeError as e:
                 raise InputParseError(f"Invalid JSON content: {e}")
 
-    def _build_swagger_spec(self, raw_content: str, spec_dict: Dict) -> SwaggerSpec:
+    def _build_swagger_spec(
+        self,
+        raw_content: str,
+        spec_dict: Dict,
+        source_path: Optional[str] = None,
+        document: Optional[Dict[str, Any]] = None
+    ) -> SwaggerSpec:
         """从 OpenAPI/Swagger dict 构建 SwaggerSpec"""
 
         # 判断版本 (OpenAPI 3.x vs Swagger 2.x)
-        is_openapi3 = spec_dict.get('openapi', '').startswith('3.')
+        is_openapi3 = str(spec_dict.get('openapi', '')).startswith('3.')
 
         # 提取基本信息
         info = spec_dict.get('info', {})
         title = info.get('title', 'API')
-        version = info.get('version', '1.0')
+        version = str(info.get('version', '1.0'))
 
         # 提取基础路径
         if is_openapi3:
@@ -317,8 +377,16 @@ class InputParser:
         else:
             base_path = spec_dict.get('basePath', '')
 
+        # $ref 指向的顶层定义 (JSON Pointer 相对文档根，保留原键名)；与接口定义共享相同的子树
+        sharer = StructureSharer()
+        components = {
+            key: sharer.share(spec_dict[key])
+            for key in ('components', 'definitions', 'parameters', 'responses')
+            if isinstance(spec_dict.get(key), dict)
+        }
+
         # 提取端点列表
-        endpoints = self._extract_endpoints(spec_dict, is_openapi3)
+        endpoints = self._extract_endpoints(spec_dict, is_openapi3, RefResolver(components), sharer)
 
         logger.info(
             f"Parsed Swagger: {title} v{version}, "
@@ -330,17 +398,39 @@ class InputParser:
             title=title,
             version=version,
             base_path=base_path,
-            endpoints=endpoints
+            endpoints=endpoints,
+            components=components,
+            source_path=source_path,
+            document=document
         )
 
-    def _extract_endpoints(self, spec_dict: Dict, is_openapi3: bool) -> list:
-        """提取所有 API 端点"""
+    def _extract_endpoints(
+        self,
+        spec_dict: Dict,
+        is_openapi3: bool,
+        resolver: Optional[RefResolver] = None,
+        sharer: Optional[StructureSharer] = None
+    ) -> List[Endpoint]:
+        """提取所有 API 端点
+
+        参数规范化: 路径级 parameters 合并到各方法 (同名同位置以方法级为准)，
+        参数的 $ref 就地展开 (解析结果由 resolver 缓存，循环引用保持原样)。
+        接口为 __slots__ 的 Endpoint，路径和方法字符串驻留，参数/请求体/响应中内容相同的子树共享 (只读)。
+        """
         endpoints = []
         paths = spec_dict.get('paths', {})
+        resolver = resolver or RefResolver()
+        sharer = sharer or StructureSharer()
+
+        def resolve_params(params: Any) -> List[Any]:
+            if not isinstance(params, list):
+                return []
+            return [resolver.deref(p)[0] if isinstance(p, dict) else p for p in params]
 
         for path, methods in paths.items():
             if not isinstance(methods, dict):
                 continue
+            shared_params = resolve_params(methods.get('parameters'))
 
             for method, details in methods.items():
                 # 跳过非 HTTP 方法的键 (如 parameters, summary 等)
@@ -350,34 +440,42 @@ class InputParser:
                 if not isinstance(details, dict):
                     continue
 
+                parameters = resolve_params(details.get('parameters', []))
+                if shared_params:
+                    own = {(p.get('name'), p.get('in')) for p in parameters if isinstance(p, dict)}
+                    parameters = [
+                        p for p in shared_params
+                        if not isinstance(p, dict) or (p.get('name'), p.get('in')) not in own
+                    ] + parameters
+
                 endpoint = {
-                    'path': path,
-                    'method': method.upper(),
-                    'operationId': details.get('operationId', f"{method}_{path}"),
-                    'summary': details.get('summary', ''),
-                    'description': details.get('description', ''),
-                    'tags': details.get('tags', []),
-                    'parameters': details.get('parameters', []),
+                    'path': sys.intern(path),
+                    'method': sys.intern(method.upper()),
+                    'operationId': sharer.share(details.get('operationId', f"{method}_{path}")),
+                    'summary': sharer.share(details.get('summary', '')),
+                    'description': sharer.share(details.get('description', '')),
+                    'tags': sharer.share(details.get('tags', [])),
+                    'parameters': sharer.share(parameters),
                 }
 
                 # 请求体 (OpenAPI 3.x vs Swagger 2.x)
                 if is_openapi3:
                     request_body = details.get('requestBody', {})
                     if request_body:
-                        endpoint['requestBody'] = request_body
+                        endpoint['requestBody'] = sharer.share(request_body)
                 else:
                     # Swagger 2.x 在 parameters 里有 body 类型
                     body_params = [
-                        p for p in details.get('parameters', [])
+                        p for p in endpoint['parameters']
                         if isinstance(p, dict) and p.get('in') == 'body'
                     ]
                     if body_params:
                         endpoint['requestBody'] = body_params[0]
 
                 # 响应定义
-                endpoint['responses'] = details.get('responses', {})
+                endpoint['responses'] = sharer.share(details.get('responses', {}))
 
-                endpoints.append(endpoint)
+                endpoints.append(Endpoint(**endpoint))
 
         return endpoints
 
@@ -0,0 +1,356 @@
+"""
+PlanChunker - 大规模 Swagger 的分块规划 (map-reduce)
+
+负责:
+- 按资源 (Swagger tags / 依赖分析的资源名) 将接口划分为大小受限的分块
+- 在有界线程池上并发执行各分块的规划调用，失败的分块单独重试
+- 将各分块的 testcases.md 按固定顺序合并，并统一重新编号 API / TC 用例 ID
+"""
+
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Tuple, TypeVar
+
+from ..models import SwaggerSpec
+from .spec_slicer import endpoint_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 分块用例文档文件名 (位于各分块目录下)
+CHUNK_TESTCASES_FILE = "testcases.md"
+
+# 与 TestCaseParser 保持一致的接口标题 / 用例行格式
+API_HEADER_PATTERN = re.compile(r'^###\s+(?:API-\d+[:\s]+)?(\w+)\s+(/\S+)', re.MULTILINE)
+API_NUMBER_PATTERN = re.compile(r'^(###\s+)API-\d+', re.MULTILINE)
+CASE_ROW_PATTERN = re.compile(r'^\|\s*(TC-\d+)\s*\|', re.MULTILINE)
+CASE_ID_PATTERN = re.compile(r'\bTC-\d+\b')
+
+
+@dataclass
+class PlanChunk:
+    """规划分块: 一组同资源的接口"""
+    index: int                  # 从 1 开始
+    name: str
+    endpoints: List[str] = field(default_factory=list)   # "METHOD /path"
+    output_dir: str = ""        # 分块输出目录 (CLI 在此写入 testcases.md)
+    attempts: int = 0
+    success: bool = False
+    duration: float = 0.0
+    error: str = ""
+
+    @property
+    def label(self) -> str:
+        return f"#{self.index:02d} {self.name} ({len(self.endpoints)} 个接口)"
+
+    @property
+    def testcases_file(self) -> Path:
+        return Path(self.output_dir) / CHUNK_TESTCASES_FILE
+
+
+@dataclass
+class MergeStats:
+    """合并结果统计"""
+    chunks: int = 0
+    apis: int = 0
+    cases: int = 0
+    duplicate_apis: int = 0     # 多个分块重复规划而被去除的接口章节
+    new_case_ids: List[str] = field(default_factory=list)   # 本次新规划的用例 ID (重新编号后)
+
+    def summary(self) -> str:
+        text = f"合并 {self.chunks} 个分块: 接口 {self.apis} 个, 用例 {self.cases} 个"
+        if self.duplicate_apis:
+            text += f", 去除重复接口 {self.duplicate_apis} 个"
+        return text
+
+
+def endpoint_groups(swagger: SwaggerSpec, analysis: Optional[Any] = None) -> Dict[str, str]:
+    """接口 ("METHOD /path") -> 资源分组名，按规范中的接口顺序
+
+    优先使用 Swagger tags，其次使用依赖分析的资源名，都没有时取路径中的资源段。
+    """
+    resource_of: Dict[str, str] = {}
+    for name, info in (getattr(analysis, "resources", None) or {}).items():
+        for ref in info.endpoints:
+            resource_of.setdefault(f"{ref.method.upper()} {ref.path}", name)
+
+    groups: Dict[str, str] = {}
+    for ep in swagger.endpoints:
+        key = endpoint_key(ep)
+        tags = ep.get("tags") or []
+        groups[key] = str(tags[0]) if tags else resource_of.get(key) or path_resource(ep.get("path", ""))
+    return groups
+
+
+def path_resource(path: str) -> str:
+    """路径中第一个非版本、非参数的段"""
+    for seg in path.strip("/").split("/"):
+        if seg and not seg.startswith("{") and not re.fullmatch(r"v\d+|api", seg, re.IGNORECASE):
+            return seg
+    return "root"
+
+
+def pack_groups(groups: Dict[str, List[T]], size: int) -> List[Tuple[str, List[T]]]:
+    """按分组装箱: 同组成员尽量放在一起，小组合并，超过 size 的组按原顺序拆分
+
+    Returns:
+        [(分块名称, 成员)]，顺序只取决于输入顺序
+    """
+    size = max(1, size)
+    packed: List[Tuple[str, List[T]]] = []
+    names: List[str] = []
+    items: List[T] = []
+
+    def close() -> None:
+        if items:
+            unique = list(dict.fromkeys(names))
+            name = ", ".join(unique) if len(unique) <= 3 else ", ".join(unique[:3]) + f" 等 {len(unique)} 个资源"
+            packed.append((name, list(items)))
+            names.clear()
+            items.clear()
+
+    for group, members in groups.items():
+        if items and len(items) + len(members) > size:
+            close()
+        for start in range(0, len(members), size):
+            part = members[start:start + size]
+            if items and len(items) + len(part) > size:
+                close()
+            names.append(group)
+            items.extend(part)
+    close()
+    return packed
+
+
+class PlanChunker:
+    """分块规划调度器
+
+    使用方式:
+        chunker = PlanChunker(chunk_size=40, concurrency=3, max_retries=1)
+        chunks = chunker.partition(swagger, analysis, work_dir)
+        chunker.run(chunks, plan_fn)                 # plan_fn(chunk, attempt) -> bool
+        stats = chunker.merge(chunks, "output/testcases.md")
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 40,
+        concurrency: int = 1,
+        max_retries: int = 1,
+        should_stop: Optional[Callable[[], bool]] = None
+    ):
+        """
+        Args:
+            chunk_size: 每个分块的最大接口数
+            concurrency: 并发规划的分块数
+            max_retries: 单个分块失败后的重试次数 (只重试该分块)
+            should_stop: 取消检查函数，返回 True 时不再启动新的调用
+        """
+        self.chunk_size = max(1, chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.should_stop = should_stop
+
+    # ---------- 划分 ----------
+
+    def partition(
+        self,
+        swagger: SwaggerSpec,
+        analysis: Optional[Any] = None,
+        work_dir: Optional[str] = None,
+        only: Optional[List[str]] = None
+    ) -> List[PlanChunk]:
+        """按资源划分分块
+
+        同一资源的接口尽量放在同一分块；资源按在规范中首次出现的顺序装箱，
+        小资源合并到同一分块，超过 chunk_size 的资源按原顺序拆分。
+        结果只取决于规范内容，多次运行划分一致。
+
+        Args:
+            analysis: 依赖分析结果 (提供资源名)，接口无 tags 时使用
+            work_dir: 分块输出目录的根目录 (各分块使用 part_NN 子目录)
+            only: 只划分指定接口 ("METHOD /path"，增量规划时使用)
+        """
+        group_of = endpoint_groups(swagger, analysis)
+        wanted = set(only) if only is not None else None
+        groups: Dict[str, List[str]] = {}
+        for key, group in group_of.items():
+            if wanted is None or key in wanted:
+                groups.setdefault(group, []).append(key)
+
+        chunks = [
+            PlanChunk(index=i, name=name, endpoints=keys)
+            for i, (name, keys) in enumerate(pack_groups(groups, self.chunk_size), 1)
+        ]
+        if work_dir:
+            for chunk in chunks:
+                chunk.output_dir = str(Path(work_dir) / f"part_{chunk.index:02d}")
+        return chunks
+
+    # ---------- 执行 ----------
+
+    def run(
+        self,
+        chunks: List[PlanChunk],
+        plan_fn: Callable[[PlanChunk, int], bool]
+    ) -> List[PlanChunk]:
+        """并发执行所有分块
+
+        Args:
+            plan_fn: 规划函数 (chunk, attempt) -> 是否成功，attempt 从 1 开始
+
+        Returns:
+            失败的分块 (重试用尽或已取消)
+        """
+        workers = min(self.concurrency, len(chunks))
+        logger.info(f"Planning {len(chunks)} chunks with {workers} workers")
+        if workers <= 1:
+            for chunk in chunks:
+                self._run_chunk(chunk, plan_fn)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner") as pool:
+                for future in [pool.submit(self._run_chunk, chunk, plan_fn) for chunk in chunks]:
+                    future.result()
+        return [c for c in chunks if not c.success]
+
+    def _run_chunk(self, chunk: PlanChunk, plan_fn: Callable[[PlanChunk, int], bool]) -> None:
+        """执行单个分块，失败时只重试该分块"""
+        start = time.time()
+        for attempt in range(1, self.max_retries + 2):
+            if self._stopped():
+                chunk.error = "已取消"
+                break
+            chunk.attempts = attempt
+            chunk.error = ""
+            try:
+                chunk.success = bool(plan_fn(chunk, attempt)) and self._has_cases(chunk)
+                if not chunk.success and not chunk.error:
+                    chunk.error = "未生成有效的用例文档"
+            except Exception as e:
+                logger.error(f"Planning chunk failed: {chunk.label}: {e}")
+                chunk.success = False
+                chunk.error = str(e)
+            if chunk.success:
+                break
+            logger.warning(f"Planning chunk {chunk.label} attempt {attempt} failed: {chunk.error}")
+        chunk.duration = time.time() - start
+
+    @staticmethod
+    def _has_cases(chunk: PlanChunk) -> bool:
+        path = chunk.testcases_file
+        if not path.exists():
+            return False
+        return CASE_ROW_PATTERN.search(path.read_text(encoding="utf-8")) is not None
+
+    def _stopped(self) -> bool:
+        return bool(self.should_stop and self.should_stop())
+
+    # ---------- 合并 ----------
+
+    def merge(
+        self,
+        chunks: List[PlanChunk],
+        output_file: str,
+        carried: Optional[List[Tuple[str, str]]] = None
+    ) -> MergeStats:
+        """按分块顺序合并用例文档
+
+        - API-NN 标题按合并后的顺序连续编号
+        - TC 用例 ID 全局连续编号 (每个分块内按首次出现的顺序映射，分块内的交叉引用同步替换)
+        - 同一接口被多个分块规划时只保留所属分块的章节 (不属于任何分块时保留第一次出现的)
+
+        Args:
+            carried: 增量规划时沿用的上次接口章节 [(接口标识, 章节)]，放在最前面且保留原用例 ID，
+                新用例 ID 从其中最大编号之后开始
+        """
+        stats = MergeStats(chunks=len(chunks))
+        carried = carried or []
+        owner = {key: chunk.index for chunk in chunks for key in chunk.endpoints}
+        seen = {key for key, _ in carried}
+        parts: List[Tuple[PlanChunk, str, List[str]]] = []
+
+        for chunk in chunks:
+            preamble, sections = split_testcase_sections(chunk.testcases_file.read_text(encoding="utf-8"))
+            kept = []
+            for key, section in sections:
+                # 属于其他分块的接口以该分块的规划为准
+                if key in seen or owner.get(key, chunk.index) != chunk.index:
+                    stats.duplicate_apis += 1
+                    continue
+                seen.add(key)
+                kept.append(section)
+            parts.append((chunk, preamble, kept))
+
+        carried_ids = list(dict.fromkeys(CASE_ROW_PATTERN.findall("".join(s for _, s in carried))))
+        next_id = max((int(c[3:]) for c in carried_ids), default=0)
+        total_cases = next_id + sum(
+            len(dict.fromkeys(CASE_ROW_PATTERN.findall("".join(kept)))) for _, _, kept in parts
+        )
+        width = max(3, len(str(total_cases)))
+
+        def renumber_api(match: "re.Match") -> str:
+            stats.apis += 1
+            return f"{match.group(1)}API-{stats.apis:02d}"
+
+        body: List[str] = []
+        if carried:
+            text = API_NUMBER_PATTERN.sub(renumber_api, "".join(s for _, s in carried))
+            stats.cases += len(carried_ids)
+            body.append(f"## 沿用上次规划 ({len(carried)} 个未变更接口)\n\n{text.strip()}\n")
+
+        for chunk, preamble, kept in parts:
+            text = preamble + "".join(kept)
+            mapping: Dict[str, str] = {}
+            for case_id in CASE_ROW_PATTERN.findall("".join(kept)):
+                if case_id not in mapping:
+                    next_id += 1
+                    mapping[case_id] = f"TC-{next_id:0{width}d}"
+            stats.cases += len(mapping)
+            stats.new_case_ids.extend(mapping.values())
+            text = CASE_ID_PATTERN.sub(lambda m: mapping.get(m.group(0), m.group(0)), text)
+            text = API_NUMBER_PATTERN.sub(renumber_api, text)
+            body.append(f"## 分块 {chunk.index:02d}: {chunk.name} ({len(chunk.endpoints)} 个接口)\n\n{text.strip()}\n")
+
+        if carried:
+            method = f"增量规划 (沿用 {len(carried)} 个未变更接口的用例，新规划 {len(stats.new_case_ids)} 个用例)"
+        else:
+            method = f"分块规划 ({stats.chunks} 个分块合并，用例 ID 已统一重新编号)"
+        header = (
+            "# 测试用例文档\n\n"
+            f"> 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"> 接口数量: {stats.apis}\n"
+            f"> 用例总数: {stats.cases}\n"
+            f"> 规划方式: {method}\n\n"
+            "---\n\n"
+        )
+        Path(output_file).write_text(header + "\n---\n\n".join(body), encoding="utf-8")
+        logger.info(stats.summary())
+        return stats
+
+
+def split_testcase_sections(content: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """将用例文档拆分为 (前言, [(接口标识, 接口章节)])
+
+    前言为首个接口标题之前的内容 (去掉文档标题和元信息)，
+    最后一个章节包含其后的全部内容。接口标识为 "METHOD /path"。
+    """
+    matches = list(API_HEADER_PATTERN.finditer(content))
+    head = content[:matches[0].start()] if matches else content
+    # 去掉文档自身的一级标题、"> " 元信息和分隔线
+    preamble_lines = [
+        line for line in head.splitlines(keepends=True)
+        if not line.startswith("# ") and not line.startswith(">") and line.strip() != "---"
+    ]
+    preamble = "".join(preamble_lines).strip()
+    sections = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        key = f"{match.group(1).upper()} {match.group(2)}"
+        sections.append((key, content[match.start():end]))
+    return (preamble + "\n\n" if preamble else ""), sections
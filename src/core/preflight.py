@@ -0,0 +1,468 @@
+"""
+PreflightValidator - 执行前的本地静态预检
+
+在生成阶段和执行阶段之间对测试文件做纯本地检查，避免为语法类问题跑一轮 pytest 再走 LLM 自愈:
+- ast.parse 语法检查
+- import 检查: 模块可导入，from conftest import 的名称在骨架中存在
+- 测试函数参数必须是可用的 fixture (骨架 conftest / 文件内定义 / pytest 内置 / parametrize)
+- 未定义名称检查
+- # TestCase: 注释中的用例 ID 必须存在于 testcases.md
+
+可确定修复的问题直接在本地修复 (去掉 Markdown 代码围栏、Tab 缩进、补常用 import 等)，
+其余问题的文件由调用方合并为一次 LLM 修复请求。
+"""
+
+import ast
+import builtins
+import importlib.util
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Iterable, Tuple
+
+from .test_id_index import TESTCASE_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# pytest 内置 fixture
+BUILTIN_FIXTURES = {
+    "request", "pytestconfig", "cache", "capsys", "capsysbinary", "capfd", "capfdbinary",
+    "caplog", "monkeypatch", "recwarn", "tmp_path", "tmp_path_factory", "tmpdir",
+    "tmpdir_factory", "record_property", "record_xml_attribute", "record_testsuite_property",
+    "doctest_namespace", "subtests"
+}
+
+# 未定义时可以直接补 import 的标准库/依赖模块
+KNOWN_MODULES = {
+    "json", "time", "uuid", "re", "random", "string", "datetime", "os", "sys", "copy",
+    "math", "base64", "hashlib", "pytest", "requests", "urllib3", "itertools", "functools"
+}
+
+FENCE_PATTERN = re.compile(r"^\s*```[\w-]*\s*$")
+
+# match 语句 (Python 3.10+) 中绑定名称的模式节点，旧版本的 ast 中不存在
+MATCH_NAMED = tuple(getattr(ast, name) for name in ("MatchAs", "MatchStar") if hasattr(ast, name))
+MATCH_MAPPING = tuple(getattr(ast, name) for name in ("MatchMapping",) if hasattr(ast, name))
+
+# 问题类型
+SYNTAX = "syntax"
+IMPORT = "import"
+FIXTURE = "fixture"
+UNDEFINED = "undefined"
+TESTCASE_ID = "testcase_id"
+
+# 需要修复才能执行的问题 (用例 ID 问题只影响报告关联，不阻塞执行)
+BLOCKING_KINDS = {SYNTAX, IMPORT, FIXTURE, UNDEFINED}
+
+
+@dataclass
+class PreflightIssue:
+    """预检问题"""
+    kind: str
+    line: int
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "line": self.line, "message": self.message}
+
+    def __str__(self) -> str:
+        return f"第 {self.line} 行 [{self.kind}] {self.message}"
+
+
+@dataclass
+class FileCheck:
+    """单个文件的预检结果"""
+    path: str
+    issues: List[PreflightIssue] = field(default_factory=list)
+    fixes: List[str] = field(default_factory=list)      # 已在本地自动修复的问题描述
+    testcase_ids: Dict[str, int] = field(default_factory=dict)   # 用例 ID -> 注释所在行
+
+    @property
+    def blocking(self) -> List[PreflightIssue]:
+        return [i for i in self.issues if i.kind in BLOCKING_KINDS]
+
+    @property
+    def broken(self) -> bool:
+        return bool(self.blocking)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "issues": [i.to_dict() for i in self.issues],
+            "fixes": self.fixes
+        }
+
+
+@dataclass
+class PreflightResult:
+    """预检汇总"""
+    files: List[FileCheck] = field(default_factory=list)
+    uncovered_ids: List[str] = field(default_factory=list)   # testcases.md 中没有测试函数的用例
+    duration: float = 0.0
+
+    @property
+    def broken_files(self) -> List[FileCheck]:
+        return [f for f in self.files if f.broken]
+
+    @property
+    def fixed_count(self) -> int:
+        return sum(len(f.fixes) for f in self.files)
+
+    def summary(self) -> str:
+        issues = sum(len(f.issues) for f in self.files)
+        text = (
+            f"预检 {len(self.files)} 个文件: 自动修复 {self.fixed_count} 处, "
+            f"剩余问题 {issues} 个, 待修复文件 {len(self.broken_files)} 个"
+        )
+        if self.uncovered_ids:
+            text += f", 未覆盖用例 {len(self.uncovered_ids)} 个"
+        return text + f" ({self.duration * 1000:.0f}ms)"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files": len(self.files),
+            "auto_fixed": self.fixed_count,
+            "broken_files": [f.path for f in self.broken_files],
+            "issues": [f.to_dict() for f in self.files if f.issues or f.fixes],
+            "uncovered_ids": self.uncovered_ids,
+            "duration": round(self.duration, 3)
+        }
+
+
+@dataclass
+class SkeletonNames:
+    """conftest.py 提供的名称和 fixture"""
+    exports: Set[str] = field(default_factory=set)
+    fixtures: Set[str] = field(default_factory=set)
+
+
+class PreflightValidator:
+    """测试文件本地预检
+
+    使用方式:
+        validator = PreflightValidator(tests_dir, known_ids=testcase_map.keys())
+        result = validator.run(fix=True)
+        for check in result.broken_files: ...
+    """
+
+    def __init__(self, tests_dir: str, known_ids: Optional[Iterable[str]] = None):
+        """
+        Args:
+            tests_dir: 测试目录 (包含骨架 conftest.py)
+            known_ids: testcases.md 中的用例 ID；为 None 时不检查用例 ID
+        """
+        self.tests_dir = Path(tests_dir)
+        self.known_ids = set(known_ids) if known_ids is not None else None
+        self._skeleton = load_skeleton(str(self.tests_dir))
+        self._module_cache: Dict[str, bool] = {}
+
+    def run(self, fix: bool = True, files: Optional[Iterable[str]] = None) -> PreflightResult:
+        """检查测试目录中的所有 test_*.py (或指定文件)
+
+        Args:
+            fix: 是否在本地自动修复可确定的问题 (直接改写文件)
+        """
+        import time
+        start = time.time()
+        paths = [Path(p) for p in files] if files is not None else sorted(self.tests_dir.rglob("test_*.py"))
+        result = PreflightResult()
+        seen_ids: Dict[str, str] = {}
+        for path in paths:
+            check = self.check_file(path, fix=fix)
+            for testcase_id, line in check.testcase_ids.items():
+                other = seen_ids.setdefault(testcase_id, check.path)
+                if other != check.path:
+                    check.issues.append(PreflightIssue(
+                        TESTCASE_ID, line, f"用例 ID {testcase_id} 同时出现在 {Path(other).name}"
+                    ))
+            result.files.append(check)
+        if self.known_ids is not None and files is None:
+            result.uncovered_ids = sorted(self.known_ids - set(seen_ids))
+        result.duration = time.time() - start
+        return result
+
+    # ---------- 单文件检查 ----------
+
+    def check_file(self, path: Path, fix: bool = True) -> FileCheck:
+        check = FileCheck(path=str(path))
+        original = path.read_text(encoding="utf-8-sig", errors="replace")
+        source = original
+
+        if fix:
+            source = self._fix_text(source, check)
+        tree, issue = self._parse(source)
+        if tree is None and fix and issue is not None and "tab" in issue.message.lower():
+            # 按 Tab 宽度 8 展开，与 Python 2 对混用缩进的解释一致
+            source = source.expandtabs(8)
+            check.fixes.append("Tab 缩进替换为空格")
+            tree, issue = self._parse(source)
+
+        if tree is not None:
+            issues = self._analyze(tree, source, check)
+            if fix:
+                fixed = self._fix_names(source, tree, issues, check)
+                if fixed != source:
+                    source = fixed
+                    tree, issue = self._parse(source)
+                    check.testcase_ids = {}
+                    issues = self._analyze(tree, source, check) if tree is not None else []
+            check.issues.extend(issues)
+        if issue is not None:
+            check.issues.insert(0, issue)
+
+        if fix and source != original:
+            path.write_text(source, encoding="utf-8")
+            logger.info(f"Preflight auto-fixed {path.name}: {', '.join(check.fixes)}")
+        return check
+
+    @staticmethod
+    def _parse(source: str) -> Tuple[Optional[ast.Module], Optional[PreflightIssue]]:
+        try:
+            return ast.parse(source), None
+        except SyntaxError as e:
+            return None, PreflightIssue(SYNTAX, e.lineno or 0, f"{type(e).__name__}: {e.msg}")
+
+    @staticmethod
+    def _fix_text(source: str, check: FileCheck) -> str:
+        """文本级修复: 去掉 Markdown 代码围栏"""
+        lines = source.split("\n")
+        kept = [line for line in lines if not FENCE_PATTERN.match(line)]
+        if len(kept) != len(lines):
+            source = "\n".join(kept)
+            check.fixes.append(f"去掉 Markdown 代码围栏 {len(lines) - len(kept)} 行")
+        return source
+
+    def _analyze(self, tree: ast.Module, source: str, check: FileCheck) -> List[PreflightIssue]:
+        issues: List[PreflightIssue] = []
+        defined, star_import = self._defined_names(tree)
+
+        # import
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if not self._module_exists(alias.name):
+                        issues.append(PreflightIssue(IMPORT, node.lineno, f"无法导入模块 {alias.name}"))
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                if node.module == "conftest":
+                    for alias in node.names:
+                        if alias.name != "*" and alias.name not in self._skeleton.exports:
+                            issues.append(PreflightIssue(IMPORT, node.lineno, f"conftest 中没有 {alias.name}"))
+                elif not self._module_exists(node.module):
+                    issues.append(PreflightIssue(IMPORT, node.lineno, f"无法导入模块 {node.module}"))
+
+        # fixture
+        fixtures = self._skeleton.fixtures | BUILTIN_FIXTURES | self._local_fixtures(tree)
+        for func in self._test_functions(tree):
+            params = self._parametrized(func)
+            args = func.args.args + func.args.kwonlyargs
+            required = args[:len(args) - len(func.args.defaults)] if func.args.defaults else args
+            for arg in required:
+                if arg.arg in ("self", "cls") or arg.arg in fixtures or arg.arg in params:
+                    continue
+                issues.append(PreflightIssue(FIXTURE, func.lineno, f"{func.name} 使用了不存在的 fixture: {arg.arg}"))
+
+        # 未定义名称 (有 import * 时无法判断)
+        if not star_import:
+            reported: Set[str] = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                    if node.id not in defined and node.id not in reported:
+                        reported.add(node.id)
+                        issues.append(PreflightIssue(UNDEFINED, node.lineno, f"未定义的名称: {node.id}"))
+
+        # 用例 ID
+        lines = source.split("\n")
+        for number, line in enumerate(lines, 1):
+            match = TESTCASE_PATTERN.search(line)
+            if not match:
+                continue
+            testcase_id = match.group(1)
+            check.testcase_ids.setdefault(testcase_id, number)
+            if self.known_ids is not None and testcase_id not in self.known_ids:
+                issues.append(PreflightIssue(TESTCASE_ID, number, f"用例 ID {testcase_id} 不在 testcases.md 中"))
+        return issues
+
+    def _fix_names(
+        self,
+        source: str,
+        tree: ast.Module,
+        issues: List[PreflightIssue],
+        check: FileCheck
+    ) -> str:
+        """名称级修复: 未定义的常用模块 / conftest 名称补 import，删除未使用且不存在的 conftest 导入"""
+        to_import: List[str] = []
+        for issue in issues:
+            if issue.kind != UNDEFINED:
+                continue
+            name = issue.message.rsplit(": ", 1)[-1]
+            if name in KNOWN_MODULES and self._module_exists(name):
+                to_import.append(f"import {name}")
+            elif name in self._skeleton.exports:
+                to_import.append(f"from conftest import {name}")
+
+        lines = source.split("\n")
+        used = {n.id for n in ast.walk(tree) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+        for node in tree.body:
+            if not (isinstance(node, ast.ImportFrom) and node.module == "conftest" and node.level == 0):
+                continue
+            if node.lineno != node.end_lineno:
+                continue
+            keep = [a for a in node.names if a.name == "*" or a.name in self._skeleton.exports or (a.asname or a.name) in used]
+            if len(keep) == len(node.names):
+                continue
+            removed = [a.name for a in node.names if a not in keep]
+            names = ", ".join(f"{a.name} as {a.asname}" if a.asname else a.name for a in keep)
+            indent = lines[node.lineno - 1][:node.col_offset]
+            lines[node.lineno - 1] = f"{indent}from conftest import {names}" if keep else ""
+            check.fixes.append(f"删除 conftest 中不存在且未使用的导入: {', '.join(removed)}")
+
+        if to_import:
+            at = import_insert_line(tree)
+            lines[at:at] = to_import
+            check.fixes.append(f"补充导入: {'; '.join(to_import)}")
+        return "\n".join(lines)
+
+    # ---------- 名称与 fixture ----------
+
+    @staticmethod
+    def _defined_names(tree: ast.Module) -> Tuple[Set[str], bool]:
+        """文件中任何位置定义的名称 (保守: 不区分作用域，只用于发现完全未定义的名称)"""
+        defined = set(dir(builtins)) | {"__file__", "__name__", "__doc__", "__builtins__"}
+        star_import = False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+                defined.add(node.id)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                defined.add(node.name)
+            elif isinstance(node, ast.arg):
+                defined.add(node.arg)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                for alias in node.names:
+                    if alias.name == "*":
+                        star_import = True
+                    else:
+                        defined.add(alias.asname or alias.name.split(".")[0])
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                defined.add(node.name)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                defined.update(node.names)
+            elif isinstance(node, MATCH_NAMED) and node.name:
+                defined.add(node.name)
+            elif isinstance(node, MATCH_MAPPING) and node.rest:
+                defined.add(node.rest)
+        return defined, star_import
+
+    @staticmethod
+    def _is_fixture(decorator: ast.expr) -> bool:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute):
+            return target.attr == "fixture"
+        return isinstance(target, ast.Name) and target.id == "fixture"
+
+    def _local_fixtures(self, tree: ast.Module) -> Set[str]:
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for decorator in node.decorator_list:
+                    if self._is_fixture(decorator):
+                        names.add(self._fixture_name(decorator) or node.name)
+        return names
+
+    @staticmethod
+    def _fixture_name(decorator: ast.expr) -> Optional[str]:
+        """@pytest.fixture(name="x") 的名称"""
+        if isinstance(decorator, ast.Call):
+            for keyword in decorator.keywords:
+                if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                    return str(keyword.value.value)
+        return None
+
+    @staticmethod
+    def _test_functions(tree: ast.Module) -> List[ast.FunctionDef]:
+        functions = []
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+                functions.append(node)
+            elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+                functions.extend(
+                    item for item in node.body
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test")
+                )
+        return functions
+
+    @staticmethod
+    def _parametrized(func: ast.FunctionDef) -> Set[str]:
+        """@pytest.mark.parametrize 提供的参数名 (无法静态解析时返回全部参数，跳过检查)"""
+        names: Set[str] = set()
+        for decorator in func.decorator_list:
+            if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                    and decorator.func.attr == "parametrize" and decorator.args):
+                continue
+            spec = decorator.args[0]
+            if isinstance(spec, ast.Constant) and isinstance(spec.value, str):
+                names.update(n.strip() for n in spec.value.split(",") if n.strip())
+            elif isinstance(spec, (ast.List, ast.Tuple)):
+                names.update(e.value for e in spec.elts if isinstance(e, ast.Constant) and isinstance(e.value, str))
+            else:
+                names.update(a.arg for a in func.args.args)
+        return names
+
+    # ---------- 模块 ----------
+
+    def _module_exists(self, name: str) -> bool:
+        top = name.split(".")[0]
+        if top not in self._module_cache:
+            local = (self.tests_dir / f"{top}.py").exists() or (self.tests_dir / top).is_dir()
+            found = local or top in sys.builtin_module_names
+            if not found:
+                try:
+                    found = importlib.util.find_spec(top) is not None
+                except (ImportError, ValueError):
+                    found = False
+            self._module_cache[top] = found
+        return self._module_cache[top]
+
+
+def load_skeleton(tests_dir: str) -> SkeletonNames:
+    """读取测试目录中 conftest.py 的模块级名称和 fixture"""
+    skeleton = SkeletonNames()
+    conftest = Path(tests_dir) / "conftest.py"
+    if not conftest.exists():
+        return skeleton
+    try:
+        tree = ast.parse(conftest.read_text(encoding="utf-8"))
+    except SyntaxError as e:
+        logger.warning(f"Failed to parse {conftest}: {e}")
+        return skeleton
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            skeleton.exports.add(node.name)
+            if not isinstance(node, ast.ClassDef):
+                for decorator in node.decorator_list:
+                    if PreflightValidator._is_fixture(decorator):
+                        skeleton.fixtures.add(PreflightValidator._fixture_name(decorator) or node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            skeleton.exports.update(t.id for t in targets if isinstance(t, ast.Name))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            skeleton.exports.update((a.asname or a.name.split(".")[0]) for a in node.names if a.name != "*")
+    return skeleton
+
+
+def import_insert_line(tree: ast.Module) -> int:
+    """新 import 插入位置 (0-based 行号): 最后一个模块级 import 之后，否则模块文档字符串之后"""
+    last = 0
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            last = node.end_lineno
+        elif last:
+            break
+    if last:
+        return last
+    body = tree.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        return body[0].end_lineno
+    return 0
@@ -7,12 +7,14 @@ PromptBuilder - Prompt 构建器
 import logging
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from collections import defaultdict
 
 from ..models import TaskContext, TestMode, ErrorInfo
 from .data_loader import DataLoader
+from .test_id_index import TestIdIndex
+from .spec_slicer import SpecSlicer, SliceStats
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,7 @@ class PromptPackage:
     prompt: str                                    # 主 Prompt 内容
     allowed_tools: List[str] = field(default_factory=list)  # 允许的工具
     phase: str = ""                                # 当前阶段名称
+    slice_stats: Optional[SliceStats] = None       # Swagger 切片统计 (未切片时为 None)
 
 
 class PromptBuilder:
@@ -38,9 +41,46 @@ class PromptBuilder:
     读取模板文件并填充动态变量
     """
 
-    def __init__(self, templates_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        templates_dir: Optional[Path] = None,
+        test_index: Optional[TestIdIndex] = None,
+        slice_swagger: bool = True
+    ):
         self.templates_dir = templates_dir or TEMPLATES_DIR
         self._templates_cache: Dict[str, str] = {}
+        # 测试函数索引: 自愈 Prompt 中标注函数所在行，便于 CLI 只读取相关片段
+        self.test_index = test_index or TestIdIndex()
+        # Swagger 切片: 用紧凑接口视图代替 raw_content (关闭时内嵌原文)
+        self.slice_swagger = slice_swagger
+        self._slicer: Optional[SpecSlicer] = None
+
+    def _swagger_content(
+        self,
+        context: TaskContext,
+        phase: str,
+        endpoints: Optional[List[Any]] = None,
+        resources: Optional[List[str]] = None
+    ) -> Tuple[str, Optional[SliceStats]]:
+        """Prompt 中的 Swagger 内容
+
+        Args:
+            endpoints / resources: 只包含指定接口或资源 (及其依赖的提供者接口)，均为空时包含全部接口
+        """
+        swagger = context.swagger
+        if not self.slice_swagger or not swagger.endpoints:
+            return swagger.raw_text, None
+
+        if self._slicer is None or self._slicer.swagger is not swagger:
+            self._slicer = SpecSlicer(swagger)
+        spec_slice = self._slicer.slice(
+            phase,
+            endpoints=endpoints,
+            resources=resources,
+            analysis=getattr(context, "dependency_analysis", None)
+        )
+        logger.debug(spec_slice.stats.summary())
+        return spec_slice.text, spec_slice.stats
 
     def _load_template(self, name: str) -> str:
         """加载模板文件"""
@@ -55,23 +95,67 @@ class PromptBuilder:
         self._templates_cache[name] = content
         return content
 
-    def build_plan_prompt(self, context: TaskContext) -> PromptPackage:
+    def build_plan_prompt(
+        self,
+        context: TaskContext,
+        endpoints: Optional[List[Any]] = None
+    ) -> PromptPackage:
         """构建规划阶段 Prompt (Phase 1)
 
         根据测试模式自动选择:
         - INTERFACE: 使用 plan_prompt.txt (接口测试)
         - BUSINESS/COMPLETE: 使用 business_plan_prompt.txt (业务测试)
+
+        Args:
+            endpoints: 只规划指定接口 (分块规划时使用)，默认全部接口
         """
         # 业务测试模式使用专用 Prompt
         if context.test_mode in (TestMode.BUSINESS, TestMode.COMPLETE):
-            return self._build_business_plan_prompt(context)
+            return self._build_business_plan_prompt(context, endpoints)
 
         # 接口测试模式使用原有 Prompt
-        return self._build_interface_plan_prompt(context)
+        return self._build_interface_plan_prompt(context, endpoints)
+
+    def build_plan_chunk_prompt(
+        self,
+        context: TaskContext,
+        chunk: Any,
+        chunk_count: int
+    ) -> PromptPackage:
+        """构建分块规划 Prompt (接口测试模式，接口数量较多时按资源分块并发规划)
+
+        在接口测试 Prompt 的基础上只包含分块内的接口 (及其依赖的提供者接口)，
+        输出目录指向分块目录，合并由 PlanChunker 完成。
+
+        Args:
+            chunk: PlanChunk
+            chunk_count: 分块总数
+        """
+        package = self._build_interface_plan_prompt(context, chunk.endpoints, output_dir=chunk.output_dir)
+        note = self._load_template("plan_chunk_note").format(
+            chunk_index=chunk.index,
+            chunk_count=chunk_count,
+            chunk_name=chunk.name,
+            endpoint_count=len(chunk.endpoints),
+            endpoint_list="\n".join(f"  - {key}" for key in chunk.endpoints),
+            output_dir=chunk.output_dir
+        )
+        package.prompt = f"{package.prompt}\n\n{note}"
+        return package
 
-    def _build_interface_plan_prompt(self, context: TaskContext) -> PromptPackage:
-        """构建接口测试模式 Prompt (原有逻辑)"""
+    def _build_interface_plan_prompt(
+        self,
+        context: TaskContext,
+        endpoints: Optional[List[Any]] = None,
+        output_dir: Optional[str] = None
+    ) -> PromptPackage:
+        """构建接口测试模式 Prompt (原有逻辑)
+
+        Args:
+            output_dir: 覆盖输出目录 (分块规划时使用分块目录)
+        """
         template = self._load_template("plan_prompt")
+        swagger_content, slice_stats = self._swagger_content(context, "planning", endpoints)
 
         # 根据模式决定内容
         is_complete = context.test_mode == TestMode.COMPLETE
@@ -98,10 +182,10 @@ class PromptBuilder:
 
         format_args = {
             "requirements_section": requirements_section,
-            "swagger_content": context.swagger.raw_content,
+            "swagger_content": swagger_content,
             "requirements_content": requirements_content,
             "data_content": data_content,
-            "output_dir": context.output_dir,
+            "output_dir": output_dir or context.output_dir,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "mode_note": mode_note,
             "base_url": context.config.base_url,
@@ -127,10 +211,15 @@ class PromptBuilder:
         return PromptPackage(
             prompt=prompt,
             allowed_tools=STANDARD_TOOLS,
-            phase="planning"
+            phase="planning",
+            slice_stats=slice_stats
         )
 
-    def _build_business_plan_prompt(self, context: TaskContext) -> PromptPackage:
+    def _build_business_plan_prompt(
+        self,
+        context: TaskContext,
+        endpoints: Optional[List[Any]] = None
+    ) -> PromptPackage:
         """构建业务测试模式 Prompt (BUSINESS / COMPLETE)
 
         从 PRD 文档识别业务场景和规则，匹配测试数据。
@@ -141,7 +230,9 @@ class PromptBuilder:
         prd_content = context.prd_document or context.requirements or ""
         if not prd_content:
             logger.warning("业务测试模式但未提供 PRD 文档，回退到接口测试模式")
-            return self._build_interface_plan_prompt(context)
+            return self._build_interface_plan_prompt(context, endpoints)
+
+        swagger_content, slice_stats = self._swagger_content(context, "planning_business", endpoints)
 
         # 测试数据部分
         test_data_section = ""
@@ -185,7 +276,7 @@ class PromptBuilder:
 
         format_args = {
             "prd_content": prd_content[:15000],  # 限制 PRD 长度
-            "swagger_content": context.swagger.raw_content,
+            "swagger_content": swagger_content,
             "test_data_section": test_data_section,
             "base_url": context.config.base_url,
             "auth_token": context.config.auth_token or "",
@@ -199,14 +290,26 @@ class PromptBuilder:
         return PromptPackage(
             prompt=prompt,
             allowed_tools=STANDARD_TOOLS,
-            phase="planning_business"
+            phase="planning_business",
+            slice_stats=slice_stats
         )
 
-    def build_generate_prompt(self, context: TaskContext) -> PromptPackage:
-        """构建生成阶段 Prompt (Phase 2)"""
+    def build_generate_prompt(
+        self,
+        context: TaskContext,
+        endpoints: Optional[List[Any]] = None,
+        testcases_file: Optional[str] = None
+    ) -> PromptPackage:
+        """构建生成阶段 Prompt (Phase 2)
+
+        Args:
+            endpoints: 只生成指定接口的测试 (分资源生成时使用)，默认全部接口
+            testcases_file: 用例文档路径 (分文件生成时为该文件负责的部分)，默认 testcases.md
+        """
         template = self._load_template("generate_prompt")
+        swagger_content, slice_stats = self._swagger_content(context, "generation", endpoints)
 
-        testcases_file = f"{context.output_dir}/testcases.md"
+        testcases_file = testcases_file or f"{context.output_dir}/testcases.md"
 
         requirements_content = ""
         if context.test_mode == TestMode.COMPLETE and context.requirements:
@@ -337,7 +440,7 @@ class PromptBuilder:
 
         format_args = {
             "testcases_file": testcases_file,
-            "swagger_content": context.swagger.raw_content,
+            "swagger_content": swagger_content,
             "requirements_content": requirements_content,
             "data_content": data_content,
             "base_url": context.config.base_url,
@@ -371,9 +474,65 @@ class PromptBuilder:
         return PromptPackage(
             prompt=prompt,
             allowed_tools=STANDARD_TOOLS,
-            phase="generation"
+            phase="generation",
+            slice_stats=slice_stats
         )
 
+    def build_incremental_generate_prompt(
+        self,
+        context: TaskContext,
+        endpoints: List[str],
+        testcase_ids: List[str]
+    ) -> PromptPackage:
+        """构建增量生成 Prompt: 只为指定用例生成测试，已沿用的测试文件保持不变
+
+        Args:
+            endpoints: 新增/变更的接口 ("METHOD /path")
+            testcase_ids: 需要生成测试的用例 ID
+        """
+        package = self.build_generate_prompt(context, endpoints)
+        note = self._load_template("generate_incremental_note").format(
+            case_count=len(testcase_ids),
+            testcase_ids=", ".join(testcase_ids),
+            endpoint_list="\n".join(f"  - {key}" for key in endpoints),
+            output_dir=context.output_dir
+        )
+        package.prompt = f"{package.prompt}\n\n{note}"
+        return package
+
+    def build_generate_unit_prompt(
+        self,
+        context: TaskContext,
+        unit: Any,
+        unit_count: int,
+        incremental: bool = False
+    ) -> PromptPackage:
+        """构建分文件生成 Prompt: 只生成一个测试文件，写入暂存目录等待校验
+
+        Args:
+            unit: GenerationUnit (重试时 unit.last_error 为上次失败原因)
+            unit_count: 单元总数
+            incremental: 增量模式 (测试目录中已有沿用的测试文件)
+        """
+        package = self.build_generate_prompt(context, unit.endpoints, str(unit.testcases_file))
+        retry_note = ""
+        if unit.attempts > 1 and unit.last_error:
+            retry_note = f"\n5. 上次生成的文件未通过校验: {unit.last_error}。请重新完整生成该文件"
+        note = self._load_template("generate_unit_note").format(
+            unit_index=unit.index,
+            unit_count=unit_count,
+            unit_name=unit.name,
+            case_count=len(unit.testcase_ids),
+            testcase_ids=", ".join(unit.testcase_ids),
+            testcases_file=unit.testcases_file,
+            target_file=unit.staging_file,
+            tests_dir=f"{context.output_dir}/tests",
+            existing_note="，其中已有沿用自上次运行的测试文件，不要修改" if incremental else "",
+            retry_note=retry_note
+        )
+        package.prompt = f"{package.prompt}\n\n{note}"
+        return package
+
     def build_heal_syntax_prompt(self, error_info: ErrorInfo) -> PromptPackage:
         """构建语法自愈 Prompt (Phase 3 - Syntax)"""
         template = self._load_template("heal_syntax_prompt")
@@ -382,7 +541,7 @@ class PromptBuilder:
             error_type=error_info.error_type.value,
             file_path=error_info.file,
             function_name=error_info.function,
-            line_number=error_info.line or "未知",
+            line_number=self._line_text(error_info),
             testcase_id=error_info.testcase_id or "未知",
             error_message=error_info.message,
             traceback=error_info.traceback
@@ -418,7 +577,7 @@ class PromptBuilder:
         prompt = template.format(
             testcase_id=error_info.testcase_id or "未知",
             file_path=error_info.file,
-            function_name=error_info.function,
+            function_name=self._function_text(error_info),
             assertion=error_info.assertion or "未知",
             expected=error_info.expected or "未知",
             actual=error_info.actual or "未知",
@@ -433,6 +592,129 @@ class PromptBuilder:
             phase="healing_logic"
         )
 
+    def build_heal_batch_syntax_prompt(
+        self,
+        file_path: str,
+        error_infos: List[ErrorInfo]
+    ) -> PromptPackage:
+        """构建批量语法自愈 Prompt (同一文件的多个错误合并为一次调用)"""
+        if len(error_infos) == 1:
+            return self.build_heal_syntax_prompt(error_infos[0])
+
+        template = self._load_template("heal_batch_syntax_prompt")
+
+        sections = []
+        for i, info in enumerate(error_infos, 1):
+            sections.append(
+                f"### {i}. {self._function_text(info)} ({info.testcase_id or '未知'})\n"
+                f"- 错误类型: {info.error_type.value}\n"
+                f"- 行号: {self._line_text(info)}\n\n"
+                f"错误详情:\n```\n{info.message}\n```\n\n"
+                f"Traceback:\n```\n{self._truncate(info.traceback)}\n```"
+            )
+
+        prompt = template.format(
+            file_path=file_path,
+            error_count=len(error_infos),
+            error_sections="\n\n".join(sections)
+        )
+
+        return PromptPackage(
+            prompt=prompt,
+            allowed_tools=EDIT_TOOLS,
+            phase="healing_syntax"
+        )
+
+    def build_preflight_fix_prompt(self, files: List[Tuple[str, List[Any]]]) -> PromptPackage:
+        """构建预检修复 Prompt (多个文件的静态问题合并为一次调用)
+
+        Args:
+            files: [(文件路径, 预检问题列表)]
+        """
+        template = self._load_template("preflight_fix_prompt")
+
+        sections = []
+        for i, (file_path, issues) in enumerate(files, 1):
+            lines = "\n".join(f"- {issue}" for issue in issues)
+            sections.append(f"### {i}. {file_path}\n{lines}")
+
+        prompt = template.format(
+            file_count=len(files),
+            file_sections="\n\n".join(sections)
+        )
+
+        return PromptPackage(
+            prompt=prompt,
+            allowed_tools=EDIT_TOOLS,
+            phase="healing_syntax"
+        )
+
+    def build_heal_batch_logic_prompt(
+        self,
+        file_path: str,
+        error_infos: List[ErrorInfo],
+        requirements: Optional[str] = None
+    ) -> PromptPackage:
+        """构建批量逻辑自愈 Prompt (同一文件的多个断言失败合并为一次调用)"""
+        if len(error_infos) == 1:
+            return self.build_heal_logic_prompt(error_infos[0], requirements)
+
+        import json
+        template = self._load_template("heal_batch_logic_prompt")
+
+        sections = []
+        for i, info in enumerate(error_infos, 1):
+            response_body = "无"
+            if info.response_body:
+                response_body = json.dumps(info.response_body, indent=2, ensure_ascii=False)
+            sections.append(
+                f"### {i}. {self._function_text(info)} ({info.testcase_id or '未知'})\n"
+                f"- 断言: {info.assertion or '未知'}\n"
+                f"- 期望值: {info.expected or '未知'}\n"
+                f"- 实际值: {info.actual or '未知'}\n\n"
+                f"API响应:\n```json\n{self._truncate(response_body)}\n```"
+            )
+
+        requirements_section = ""
+        if requirements:
+            requirements_section = f"\n## 业务规则\n{requirements}"
+
+        prompt = template.format(
+            file_path=file_path,
+            error_count=len(error_infos),
+            error_sections="\n\n".join(sections),
+            requirements_section=requirements_section
+        )
+
+        return PromptPackage(
+            prompt=prompt,
+            allowed_tools=EDIT_TOOLS,
+            phase="healing_logic"
+        )
+
+    def _function_text(self, info: ErrorInfo) -> str:
+        """函数名 + 所在行范围: test_create (第 12-30 行)"""
+        line_range = self.test_index.line_range(info.file, info.function) if info.file else None
+        if not line_range:
+            return info.function
+        return f"{info.function} (第 {line_range[0]}-{line_range[1]} 行)"
+
+    def _line_text(self, info: ErrorInfo) -> str:
+        """出错行号; 未知时给出函数所在行范围"""
+        if info.line:
+            return str(info.line)
+        line_range = self.test_index.line_range(info.file, info.function) if info.file else None
+        if line_range:
+            return f"未知 (函数位于第 {line_range[0]}-{line_range[1]} 行)"
+        return "未知"
+
+    @staticmethod
+    def _truncate(text: str, limit: int = 3000) -> str:
+        """截断过长的 traceback/响应，避免批量 Prompt 过大"""
+        if not text or len(text) <= limit:
+            return text or ""
+        return text[:limit] + f"\n... (已截断，共 {len(text)} 字符)"
+
     def build_finalize_prompt(
         self,
         context: TaskContext,
@@ -0,0 +1,11 @@
+"""
+pytest 插件与辅助脚本
+
+这些文件运行在 pytest 子进程中，只依赖标准库和 pytest，
+不能导入 src 包内的其它模块。
+"""
+
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).parent
+WORKER_SERVER = PLUGIN_DIR / "worker_server.py"
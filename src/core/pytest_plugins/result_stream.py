@@ -0,0 +1,173 @@
+"""
+result_stream - 结构化结果收集插件
+
+每个测试节点 teardown 完成后输出一条 NDJSON 记录，运行过程中即可实时读取:
+    {"event": "result", "nodeid": "test_a.py::TestX::test_y",
+     "node_id": "/abs/tests/test_a.py::TestX::test_y", "path": "/abs/tests/test_a.py",
+     "name": "test_y", "testcase_id": "TC-001",
+     "outcome": "passed|failed|error|skipped", "when": "setup|call|teardown|collect",
+     "duration": 0.12, "message": "...", "longrepr": "...", "expected": "...", "actual": "..."}
+
+用例 ID 在收集阶段从 `# TestCase: TC-XXX` 注释提取 (每个文件只读取一次)。
+
+使用方式:
+- PytestRunner 通过 `-p result_stream` 注入，管道写端 fd 由环境变量 PYTEST_RESULT_STREAM_FD 指定
+- 常驻 worker 直接以插件对象传入 pytest.main，执行结束后读取 records
+只依赖标准库和 pytest。
+"""
+
+import json
+import os
+import re
+
+STREAM_FD_ENV = "PYTEST_RESULT_STREAM_FD"
+PLUGIN_NAME = "result_stream_plugin"
+
+TESTCASE_PATTERN = re.compile(r'#\s*TestCase:\s*(TC-\d+)')
+# pytest 断言重写后的消息: assert <actual> == <expected>
+ASSERT_EQ_PATTERN = re.compile(r'^assert\s+(.+?)\s*==\s*(.+)$')
+
+
+class ResultStreamPlugin:
+    """收集每个测试节点的结构化结果，可选写入 NDJSON 流"""
+
+    def __init__(self, stream=None, rootpath=""):
+        self.stream = stream
+        self.rootpath = rootpath
+        self.records = []       # 已完成的记录 (按完成顺序)
+        self._items = {}        # nodeid -> (文件路径, 用例 ID)
+        self._pending = {}      # nodeid -> 未完成的记录
+        self._sources = {}      # 文件路径 -> 源码行
+
+    def pytest_configure(self, config):
+        self.rootpath = str(config.rootpath)
+
+    def pytest_itemcollected(self, item):
+        path = str(item.path)
+        self._items[item.nodeid] = (path, self._testcase_id(item, path))
+
+    def pytest_collectreport(self, report):
+        if not report.failed:
+            return
+        path = os.path.join(self.rootpath, report.nodeid.split("::")[0])
+        self._emit({
+            "event": "result",
+            "nodeid": report.nodeid,
+            "node_id": path,
+            "path": path,
+            "name": "",
+            "testcase_id": None,
+            "outcome": "error",
+            "when": "collect",
+            "duration": 0.0,
+            "message": _crash_message(report),
+            "longrepr": report.longreprtext
+        })
+
+    def pytest_runtest_logreport(self, report):
+        record = self._pending.get(report.nodeid)
+        if record is None:
+            path, testcase_id = self._items.get(report.nodeid, (None, None))
+            parts = report.nodeid.split("::")
+            path = path or os.path.join(self.rootpath, parts[0])
+            record = {
+                "event": "result",
+                "nodeid": report.nodeid,
+                "node_id": "::".join([path] + parts[1:]),
+                "path": path,
+                "name": parts[-1],
+                "testcase_id": testcase_id,
+                "outcome": "passed",
+                "when": "call",
+                "duration": 0.0,
+                "message": "",
+                "longrepr": ""
+            }
+            self._pending[report.nodeid] = record
+
+        record["duration"] += report.duration
+
+        # 只保留第一个失败 (call 失败后 teardown 报错不覆盖)
+        if report.failed and record["outcome"] in ("passed", "skipped"):
+            record["outcome"] = "failed" if report.when == "call" else "error"
+            record["when"] = report.when
+            record["message"] = _crash_message(report)
+            record["longrepr"] = report.longreprtext
+            match = ASSERT_EQ_PATTERN.match(record["message"].split("\n", 1)[0])
+            if match:
+                record["actual"] = match.group(1).strip()
+                record["expected"] = match.group(2).strip()
+        elif report.skipped and record["outcome"] == "passed":
+            record["outcome"] = "skipped"
+            record["when"] = report.when
+            if isinstance(report.longrepr, tuple) and len(report.longrepr) == 3:
+                record["message"] = str(report.longrepr[2])
+
+        if report.when == "teardown":
+            self._emit(self._pending.pop(report.nodeid))
+
+    def _emit(self, record):
+        self.records.append(record)
+        if self.stream is not None:
+            self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.stream.flush()
+
+    def _testcase_id(self, item, path):
+        """在函数定义行上方 4 行内查找 # TestCase 注释 (跳过装饰器)"""
+        lineno = item.location[1]
+        if lineno is None:
+            return None
+        lines = self._source_lines(path)
+        name = getattr(item, "originalname", None) or item.name.split("[")[0]
+
+        # location 对被装饰的函数指向第一个装饰器，向下找到 def 行
+        def_idx = lineno
+        for i in range(lineno, min(lineno + 20, len(lines))):
+            stripped = lines[i].lstrip()
+            if stripped.startswith(("def " + name, "async def " + name)):
+                def_idx = i
+                break
+
+        for j in range(def_idx - 1, max(lineno - 5, -1), -1):
+            match = TESTCASE_PATTERN.search(lines[j])
+            if match:
+                return match.group(1)
+        return None
+
+    def _source_lines(self, path):
+        if path not in self._sources:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._sources[path] = f.read().split("\n")
+            except OSError:
+                self._sources[path] = []
+        return self._sources[path]
+
+
+def _crash_message(report):
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is not None:
+        return crash.message
+    text = (report.longreprtext or "").strip()
+    return text.splitlines()[-1] if text else ""
+
+
+def pytest_configure(config):
+    """通过 -p result_stream 加载时，将结果写入环境变量指定的管道"""
+    fd = os.environ.pop(STREAM_FD_ENV, None)
+    if not fd:
+        return
+    try:
+        stream = os.fdopen(int(fd), "w", buffering=1, encoding="utf-8")
+    except (ValueError, OSError):
+        return
+    config.pluginmanager.register(
+        ResultStreamPlugin(stream, str(config.rootpath)), PLUGIN_NAME
+    )
+
+
+def pytest_unconfigure(config):
+    plugin = config.pluginmanager.get_plugin(PLUGIN_NAME)
+    if plugin is not None and plugin.stream is not None:
+        plugin.stream.close()
+        plugin.stream = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+常驻 pytest worker (由 PytestWorker 启动)
+
+进程内循环调用 pytest.main，省去每次重跑的解释器启动、插件加载和 conftest 导入。
+
+协议 (每行一个 JSON):
+    stdin  请求: {"id": 1, "nodes": ["/abs/tests/test_a.py::test_x"], "args": ["--timeout=45"]}
+                 {"cmd": "exit"} 结束进程
+    stdout 响应: {"ready": true, "pid": 123}  启动完成
+                 {"id": 1, "exit_code": 1, "duration": 0.3, "results": [...], "reloaded": [...]}
+
+pytest 自身的输出全部重定向到 stderr，stdout 只用于协议。
+结果由 result_stream 插件收集。
+每次执行前，工作目录下自上次执行以来被修改过的模块会从 sys.modules 中移除，
+以便重新导入自愈后的测试文件和 conftest。
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from result_stream import ResultStreamPlugin   # 与本脚本同目录 (作为脚本运行时位于 sys.path[0])
+
+
+class ModuleTracker:
+    """跟踪工作目录下已导入模块的文件状态，移除已修改的模块"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root) + os.sep
+        self.stats = {}     # 文件路径 -> (mtime_ns, size)
+
+    def evict_changed(self):
+        """移除自上次 record() 以来文件发生变化的模块，返回被移除的模块名"""
+        evicted = []
+        for name, module in list(sys.modules.items()):
+            path = self._module_file(module)
+            if path is None or path not in self.stats:
+                continue
+            if _file_stat(path) != self.stats[path]:
+                del sys.modules[name]
+                evicted.append(name)
+        return evicted
+
+    def record(self):
+        """记录当前已导入模块的文件状态"""
+        self.stats = {}
+        for module in list(sys.modules.values()):
+            path = self._module_file(module)
+            if path is not None:
+                self.stats[path] = _file_stat(path)
+
+    def _module_file(self, module):
+        path = getattr(module, "__file__", None)
+        if not path:
+            return None
+        path = os.path.abspath(path)
+        return path if path.startswith(self.root) else None
+
+
+def _file_stat(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
+
+    # 复制原 stdout 作为协议通道，fd 1 指向 stderr，防止测试输出混入协议
+    channel = os.fdopen(os.dup(1), "w", buffering=1, encoding="utf-8")
+    os.dup2(2, 1)
+
+    def send(payload):
+        channel.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        channel.flush()
+
+    tracker = ModuleTracker(root)
+    send({"ready": True, "pid": os.getpid(), "pytest": pytest.__version__})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            send({"error": f"invalid request: {e}"})
+            continue
+        if request.get("cmd") == "exit":
+            break
+
+        reloaded = tracker.evict_changed()
+        collector = ResultStreamPlugin()
+        # 某个文件导入失败时继续执行其他节点 (否则 pytest 中断，只返回收集错误)
+        args = list(request.get("args", [])) + [
+            "-p", "no:cacheprovider", "--continue-on-collection-errors"
+        ] + list(request.get("nodes", []))
+
+        start = time.time()
+        error = ""
+        try:
+            exit_code = int(pytest.main(args, plugins=[collector]))
+        except BaseException as e:  # pytest.main 内部的 SystemExit 等也要兜住
+            exit_code = -1
+            error = f"{type(e).__name__}: {e}"
+        tracker.record()
+
+        send({
+            "id": request.get("id"),
+            "exit_code": exit_code,
+            "duration": time.time() - start,
+            "results": collector.records,
+            "reloaded": reloaded,
+            "error": error
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -3,27 +3,49 @@ PytestRunner - Pytest 执行器
 
 负责:
 - 通过 subprocess 调用 pytest
-- 解析 JUnit XML 结果
+- 通过 result_stream 插件实时接收结构化结果 (NDJSON 管道)，JUnit XML 仅作为报告产物/回退
 - 提取测试用例 ID (从 # TestCase: TC-XXX 注释)
 - 返回结构化的测试结果
+- 并行模式: 按调度分组启动多个 pytest worker，合并各 worker 的 JUnit XML
+- 增量验证: 按节点 ID 在一次调用中只重跑指定用例
+- 常驻 worker: 单用例重跑/增量验证可复用已预热的 pytest 进程
 """
 
+import os
+import json
 import subprocess
 import xml.etree.ElementTree as ET
 import re
 import logging
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Tuple, Callable
+from typing import Optional, List, Dict, Any, Tuple, Callable
 
 from ..models import (
     PytestResult, TestCaseResult, TestStatus,
     ErrorInfo, ErrorType
 )
+from ..models.dependency import DependencyAnalysisResult
+from .test_scheduler import TestScheduler
+from .pytest_worker import PytestWorker
+from .test_id_index import TestIdIndex
+from .pytest_plugins import PLUGIN_DIR
+from .pytest_plugins.result_stream import STREAM_FD_ENV
 
 logger = logging.getLogger(__name__)
 
+# 结果流通过继承的管道 fd 传递 (pass_fds 仅 POSIX 可用，其它平台使用 JUnit XML)
+STREAM_SUPPORTED = os.name == "posix"
+
+# 有用例失败时 pytest 的退出码 (pytest.ExitCode.TESTS_FAILED)
+TESTS_FAILED = 1
+
+# 显式节点所在文件收集失败时 pytest 的退出码 (pytest.ExitCode.USAGE_ERROR)
+COLLECTION_ABORTED = 4
+
 
 @dataclass
 class PytestConfig:
@@ -33,8 +55,12 @@ class PytestConfig:
     html_report: str = "report.html"    # HTML 报告文件名
     verbose: bool = True                # 详细输出
     capture: str = "no"                 # 不捕获输出 (-s)
+    workers: int = 1                    # 并行 worker 数 (1 = 串行)
+    warm_worker: bool = False           # 单用例重跑/增量验证使用常驻 pytest worker
+    keep_junit_xml: bool = True         # 是否输出 JUnit XML 报告 (结果解析已改用结果流)
     # 日志回调
     on_output: Optional[Callable[[str], None]] = None
+    on_result: Optional[Callable[[TestCaseResult], None]] = None  # 单个用例完成时回调 (实时)
 
 
 class PytestRunner:
@@ -43,16 +69,25 @@ class PytestRunner:
     通过 subprocess 调用 pytest 并解析结果
     """
 
-    def __init__(self, config: Optional[PytestConfig] = None):
+    def __init__(
+        self,
+        config: Optional[PytestConfig] = None,
+        test_index: Optional[TestIdIndex] = None
+    ):
         self.config = config or PytestConfig()
-        # 用例 ID 正则
-        self._testcase_pattern = re.compile(r'#\s*TestCase:\s*(TC-\d+)')
+        # 测试函数索引 (用例 ID / classname 解析)，可与 PromptBuilder 共享
+        self.test_index = test_index or TestIdIndex()
+        # 常驻 worker (按工作目录复用)
+        self._workers: Dict[str, PytestWorker] = {}
+        self._workers_lock = threading.Lock()
 
     def run(
         self,
         test_dir: str,
         output_dir: str,
-        test_file: Optional[str] = None
+        test_file: Optional[str] = None,
+        analysis: Optional[DependencyAnalysisResult] = None,
+        targets: Optional[List[str]] = None
     ) -> PytestResult:
         """执行 pytest
 
@@ -60,6 +95,8 @@ class PytestRunner:
             test_dir: 测试文件目录
             output_dir: 输出目录 (存放报告)
             test_file: 指定测试文件 (可选，不指定则运行整个目录)
+            analysis: 依赖分析结果 (可选，并行模式下用于按接口分组调度)
+            targets: 只执行这些节点 (相对于测试目录的父目录，如冒烟子集)，不分片
 
         Returns:
             PytestResult 包含执行结果
@@ -68,79 +105,463 @@ class PytestRunner:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
+        if self.config.workers > 1 and not test_file and not targets:
+            shards = TestScheduler(analysis).plan(test_path, self.config.workers)
+            if len(shards) > 1:
+                return self._run_parallel(test_path, output_path, shards)
+
         # 构建命令
-        cmd = self._build_command(test_path, output_path, test_file)
-        logger.info(f"Running pytest: {' '.join(cmd)}")
+        cmd = self._build_command(test_path, output_path, test_file, targets=targets)
 
         start_time = time.time()
+        code, output, records = self._stream_command(cmd, test_path.parent)
+        duration = time.time() - start_time
+
+        if code < 0 and not records:
+            return PytestResult(exit_code=code, duration=duration, stdout="", stderr=output)
+
+        # 优先使用结果流，插件未加载时回退到 JUnit XML (路径相对于 cwd)
+        junit_path = test_path.parent / output_path.name / self.config.junit_xml
+        test_results = self._collect_results(records, junit_path, test_path)
+
+        return self._summarize(
+            code, test_results, duration,
+            stdout=output if code >= 0 else "",
+            stderr=output if code < 0 else ""
+        )
+
+    def _run_parallel(
+        self,
+        test_path: Path,
+        output_path: Path,
+        shards: List[List[str]]
+    ) -> PytestResult:
+        """并行执行: 每个 shard 启动一个 pytest 进程，结束后合并结果"""
+        logger.info(f"Running pytest in parallel: {len(shards)} workers")
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            futures = [
+                pool.submit(self._run_shard, idx, files, test_path, output_path)
+                for idx, files in enumerate(shards, 1)
+            ]
+            shard_results = [f.result() for f in futures]
+
+        duration = time.time() - start_time
+
+        # 合并各 worker 的 JUnit XML 为统一的 results.xml (仍作为报告产物保留)
+        merged_path = test_path.parent / output_path.name / self.config.junit_xml
+        if self.config.keep_junit_xml:
+            self._merge_junit_xml([xml for _, _, xml, _ in shard_results], merged_path)
+
+        records = [rec for _, _, _, shard_records in shard_results for rec in shard_records]
+        test_results = self._collect_results(records, merged_path, test_path)
+
+        return self._summarize(
+            self._merge_exit_codes([code for code, _, _, _ in shard_results]),
+            test_results,
+            duration,
+            stdout="".join(out for code, out, _, _ in shard_results if code >= 0),
+            stderr="\n".join(out for code, out, _, _ in shard_results if code < 0)
+        )
+
+    @staticmethod
+    def _merge_exit_codes(exit_codes: List[int]) -> int:
+        """合并各 shard 的退出码: 任一 shard 有用例失败即为失败，
+        避免 "未收集到用例" (5) 等更大的退出码掩盖真实失败；否则负数 (进程异常) 优先，再取最大值"""
+        if TESTS_FAILED in exit_codes:
+            return TESTS_FAILED
+        return max(exit_codes) if min(exit_codes) >= 0 else min(exit_codes)
+
+    def _run_shard(
+        self,
+        worker: int,
+        files: List[str],
+        test_path: Path,
+        output_path: Path
+    ) -> Tuple[int, str, Path, List[Dict[str, Any]]]:
+        """执行单个 worker 的测试文件，输出行带 [wN] 前缀
+
+        Returns:
+            (退出码, 输出内容, JUnit XML 路径, 结果记录)；异常时退出码为 -1，输出为错误信息
+        """
+        suffix = f"w{worker}"
+        targets = [f"{test_path.name}/{f}" for f in files]
+        cmd = self._build_command(test_path, output_path, targets=targets, suffix=suffix)
+        xml_path = test_path.parent / output_path.name / self._suffixed(self.config.junit_xml, suffix)
+        code, output, records = self._stream_command(cmd, test_path.parent, f"[w{worker}]")
+        return code, output, xml_path, records
+
+    def _stream_command(
+        self,
+        cmd: List[str],
+        cwd: Path,
+        tag: str = ""
+    ) -> Tuple[int, str, List[Dict[str, Any]]]:
+        """执行 pytest 子进程: 实时转发输出 (带 tag 前缀)，并通过管道接收结构化结果
+
+        Returns:
+            (退出码, 输出内容, 结果记录)；异常时退出码为 -1，输出为错误信息
+        """
+        logger.info(f"{tag + ' ' if tag else ''}Running pytest: {' '.join(cmd)}")
+
+        records: List[Dict[str, Any]] = []
+        read_fd = write_fd = None
+        env = None
+        if STREAM_SUPPORTED:
+            read_fd, write_fd = os.pipe()
+            env = self._plugin_env(write_fd)
 
+        process = None
+        reader = None
         try:
-            # 使用 Popen 实现实时输出
             process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 text=True,
                 bufsize=1,  # 行缓冲
-                cwd=str(test_path.parent)
+                cwd=str(cwd),
+                env=env,
+                pass_fds=(write_fd,) if write_fd is not None else ()
             )
 
-            # 实时读取并输出
+            if write_fd is not None:
+                # 父进程关闭写端，子进程退出后读端才能读到 EOF
+                os.close(write_fd)
+                write_fd = None
+                reader = threading.Thread(
+                    target=self._read_result_stream, args=(read_fd, records),
+                    name="pytest-result-stream", daemon=True
+                )
+                reader.start()
+                read_fd = None  # 由读取线程负责关闭
+
             stdout_lines = []
             for line in process.stdout:
-                stdout_lines.append(line)
-                logger.info(f"[pytest] {line.rstrip()}")
+                tagged = f"{tag} {line}" if tag else line
+                stdout_lines.append(tagged)
+                logger.info(f"[pytest]{tag} {line.rstrip()}")
                 if self.config.on_output:
-                    self.config.on_output(line)
+                    self.config.on_output(tagged)
 
             process.wait(timeout=self.config.timeout * 100)
-            stdout_content = ''.join(stdout_lines)
-
-            duration = time.time() - start_time
-
-            # 解析结果 - JUnit XML 路径相对于 cwd
-            junit_path = test_path.parent / output_path.name / self.config.junit_xml
-            test_results = self._parse_junit_xml(junit_path, test_path)
-
-            # 统计
-            passed = sum(1 for r in test_results if r.status == TestStatus.PASS)
-            failed = sum(1 for r in test_results if r.status == TestStatus.FAIL)
-            errors = sum(1 for r in test_results if r.status == TestStatus.ERROR)
-            skipped = sum(1 for r in test_results if r.status == TestStatus.SKIP)
-
-            return PytestResult(
-                exit_code=process.returncode,
-                total=len(test_results),
-                passed=passed,
-                failed=failed,
-                errors=errors,
-                skipped=skipped,
-                duration=duration,
-                test_results=test_results,
-                stdout=stdout_content,
-                stderr=""
-            )
+            if reader is not None:
+                reader.join(timeout=5)
+            return process.returncode, "".join(stdout_lines), records
 
         except subprocess.TimeoutExpired:
             process.kill()
-            duration = time.time() - start_time
-            logger.error(f"Pytest execution timed out after {duration:.1f}s")
-            return PytestResult(
-                exit_code=-1,
-                duration=duration,
-                stdout="",
-                stderr=f"Timeout after {self.config.timeout * 100}s"
-            )
+            logger.error(f"{tag + ' ' if tag else ''}Pytest execution timed out")
+            return -1, f"{tag + ' ' if tag else ''}Timeout after {self.config.timeout * 100}s", records
 
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(f"Pytest execution failed: {e}")
-            return PytestResult(
-                exit_code=-1,
-                duration=duration,
-                stdout="",
-                stderr=str(e)
-            )
+            if process and process.poll() is None:
+                process.kill()
+            logger.error(f"{tag + ' ' if tag else ''}Pytest execution failed: {e}")
+            return -1, f"{tag + ' ' if tag else ''}{e}", records
+
+        finally:
+            for fd in (read_fd, write_fd):
+                if fd is not None:
+                    os.close(fd)
+
+    @staticmethod
+    def _plugin_env(write_fd: int) -> Dict[str, str]:
+        """子进程环境: 插件目录加入 PYTHONPATH，并告知结果流的管道 fd"""
+        env = os.environ.copy()
+        pythonpath = env.get("PYTHONPATH")
+        env["PYTHONPATH"] = str(PLUGIN_DIR) + (os.pathsep + pythonpath if pythonpath else "")
+        env[STREAM_FD_ENV] = str(write_fd)
+        return env
+
+    def _read_result_stream(self, fd: int, records: List[Dict[str, Any]]) -> None:
+        """读取插件输出的 NDJSON 结果流 (运行期间逐条到达)"""
+        with os.fdopen(fd, "r", encoding="utf-8", errors="replace") as stream:
+            for line in stream:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Invalid result stream line: {line[:200]}")
+                    continue
+                records.append(record)
+                if self.config.on_result and record.get("when") != "collect":
+                    self.config.on_result(self._record_to_result(record))
+
+    def _collect_results(
+        self,
+        records: List[Dict[str, Any]],
+        junit_path: Path,
+        test_path: Path,
+        node_ids: Optional[List[str]] = None
+    ) -> List[TestCaseResult]:
+        """结果流优先; 没有收到任何记录时回退解析 JUnit XML"""
+        if records:
+            return self._results_from_records(records, node_ids)
+        if junit_path.exists():
+            if STREAM_SUPPORTED:
+                logger.warning("Result stream is empty, falling back to JUnit XML")
+            return self._parse_junit_xml(junit_path, test_path)
+        return []
+
+    def _summarize(
+        self,
+        exit_code: int,
+        test_results: List[TestCaseResult],
+        duration: float,
+        stdout: str = "",
+        stderr: str = ""
+    ) -> PytestResult:
+        """统计用例结果，构建 PytestResult"""
+        return PytestResult(
+            exit_code=exit_code,
+            total=len(test_results),
+            passed=sum(1 for r in test_results if r.status == TestStatus.PASS),
+            failed=sum(1 for r in test_results if r.status == TestStatus.FAIL),
+            errors=sum(1 for r in test_results if r.status == TestStatus.ERROR),
+            skipped=sum(1 for r in test_results if r.status == TestStatus.SKIP),
+            duration=duration,
+            test_results=test_results,
+            stdout=stdout,
+            stderr=stderr
+        )
+
+    def run_nodes(
+        self,
+        node_ids: List[str],
+        test_dir: str,
+        output_dir: str
+    ) -> PytestResult:
+        """在一次 pytest 调用中批量执行指定节点 (用于自愈后的增量验证)
+
+        Args:
+            node_ids: pytest 节点 ID 列表 (path::Class::test_xxx)
+            test_dir: 测试文件目录
+            output_dir: 输出目录 (验证报告写入 results.verify.xml)
+
+        Returns:
+            PytestResult 仅包含所选节点的结果
+        """
+        node_ids = [n for n in node_ids if n]
+        if not node_ids:
+            return PytestResult(exit_code=0)
+
+        test_path = Path(test_dir)
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        # 节点路径转为绝对路径，与 cwd 无关; 保持顺序并去重
+        originals = {self._absolute_node_id(n): n for n in node_ids}
+        pending = list(originals)
+
+        # 显式指定的节点所在文件导入失败时，pytest 报 "found no collectors" 并中断整次调用
+        # (退出码 4，即使使用 --continue-on-collection-errors)，只返回收集错误:
+        # 去掉已得到结果的节点后重跑其余节点，直到没有新的收集错误
+        code, test_results, duration, output = 0, [], 0.0, ""
+        while pending:
+            code, results, elapsed, output = self._execute_nodes(pending, test_path, output_path)
+            test_results.extend(results)
+            duration += elapsed
+            done = {r.node_id for r in results}
+            remaining = [n for n in pending if n not in done]
+            if code != COLLECTION_ABORTED or not results or len(remaining) == len(pending):
+                break
+            logger.warning(f"{len(pending) - len(remaining)} 个节点收集失败，重新执行其余 {len(remaining)} 个节点")
+            pending = remaining
+
+        self._restore_node_ids(test_results, originals)
+        return self._summarize(
+            code, test_results, duration,
+            stdout=output if code >= 0 else "",
+            stderr=output if code < 0 else ""
+        )
+
+    def _execute_nodes(
+        self,
+        targets: List[str],
+        test_path: Path,
+        output_path: Path
+    ) -> Tuple[int, List[TestCaseResult], float, str]:
+        """执行一批节点 (绝对路径)，优先使用常驻 worker
+
+        Returns:
+            (退出码, 用例结果, 耗时, 输出)
+        """
+        if self.config.warm_worker:
+            warm = self._run_warm(targets, test_path.parent)
+            if warm is not None:
+                code, test_results, duration = warm
+                return code, test_results, duration, ""
+            logger.warning("Warm pytest worker unavailable, falling back to subprocess")
+
+        suffix = "verify"
+        cmd = self._build_command(test_path, output_path, targets=targets, suffix=suffix)
+        xml_path = test_path.parent / output_path.name / self._suffixed(self.config.junit_xml, suffix)
+        if xml_path.exists():
+            xml_path.unlink()   # 避免上一轮验证的残留结果被误读
+
+        start_time = time.time()
+        code, output, records = self._stream_command(cmd, test_path.parent, "[verify]")
+        duration = time.time() - start_time
+
+        test_results = self._collect_results(records, xml_path, test_path, targets)
+        return code, test_results, duration, output
+
+    @staticmethod
+    def _absolute_node_id(node_id: str) -> str:
+        """path::Class::test -> /abs/path::Class::test"""
+        file_part, sep, rest = node_id.partition("::")
+        return f"{Path(file_part).resolve()}{sep}{rest}"
+
+    def _restore_node_ids(self, results: List[TestCaseResult], originals: Dict[str, str]) -> None:
+        """将结果的 node_id 还原为调用方传入的形式，便于按 node_id 合并"""
+        for result in results:
+            if result.node_id:
+                result.node_id = originals.get(
+                    self._absolute_node_id(result.node_id), result.node_id
+                )
+
+    def _get_worker(self, cwd: Path) -> PytestWorker:
+        key = str(cwd.resolve())
+        with self._workers_lock:
+            if key not in self._workers:
+                self._workers[key] = PytestWorker(key, on_output=self.config.on_output)
+            return self._workers[key]
+
+    def _run_warm(
+        self,
+        node_ids: List[str],
+        cwd: Path
+    ) -> Optional[Tuple[int, List[TestCaseResult], float]]:
+        """通过常驻 worker 执行节点
+
+        Returns:
+            (退出码, 用例结果, 耗时)；worker 不可用或超时返回 None
+        """
+        args = [f"--timeout={self.config.timeout}"]
+        if self.config.verbose:
+            args.append("-v")
+        if self.config.capture == "no":
+            args.append("-s")
+
+        response = self._get_worker(cwd).run(
+            node_ids, args, timeout=self.config.timeout * max(len(node_ids), 1) + 30
+        )
+        if response is None:
+            return None
+
+        results = self._results_from_records(response.get("results", []), node_ids)
+        return int(response.get("exit_code", -1)), results, float(response.get("duration", 0.0))
+
+    def _results_from_records(
+        self,
+        records: List[Dict[str, Any]],
+        node_ids: Optional[List[str]] = None
+    ) -> List[TestCaseResult]:
+        """result_stream 记录 -> TestCaseResult 列表
+
+        收集失败的文件没有用例级记录: 指定了 node_ids 时为该文件下请求的每个节点生成 ERROR 结果，
+        否则为整个文件生成一条 ERROR 结果。
+        """
+        results: List[TestCaseResult] = []
+        collect_errors: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            if record.get("when") == "collect":
+                collect_errors[record["path"]] = record
+            else:
+                results.append(self._record_to_result(record))
+
+        if not collect_errors:
+            return results
+
+        if node_ids:
+            seen = {r.node_id for r in results}
+            for node_id in node_ids:
+                record = collect_errors.get(node_id.partition("::")[0])
+                if record is None or node_id in seen:
+                    continue
+                name = node_id.rsplit("::", 1)[-1]
+                results.append(self._record_to_result(
+                    dict(record, node_id=node_id, name=name)
+                ))
+        else:
+            for path, record in collect_errors.items():
+                results.append(self._record_to_result(dict(record, name=Path(path).stem)))
+        return results
+
+    def _record_to_result(self, record: Dict[str, Any]) -> TestCaseResult:
+        """result_stream 记录 -> TestCaseResult"""
+        file_path = record.get("path", "")
+        name = record.get("name", "")
+        if "testcase_id" in record:
+            testcase_id = record["testcase_id"]
+        else:
+            testcase_id = self._extract_testcase_id(Path(file_path), name)
+        outcome = record.get("outcome")
+        message = record.get("message", "")
+        traceback = record.get("longrepr", "")
+
+        if outcome == "failed":
+            status = TestStatus.FAIL
+            error_info = self._failure_info(message, traceback, file_path, name, testcase_id)
+            first_line = message.split("\n", 1)[0]
+            if first_line.startswith("assert"):
+                error_info.assertion = first_line
+            error_info.expected = record.get("expected")
+            error_info.actual = record.get("actual")
+        elif outcome == "error":
+            status = TestStatus.ERROR
+            error_info = self._error_info(message, traceback, file_path, name, testcase_id)
+        elif outcome == "skipped":
+            status = TestStatus.SKIP
+            error_info = None
+        else:
+            status = TestStatus.PASS
+            error_info = None
+
+        return TestCaseResult(
+            testcase_id=testcase_id or "UNKNOWN",
+            function_name=name,
+            file_path=file_path,
+            status=status,
+            duration=float(record.get("duration", 0.0)),
+            error_info=error_info,
+            node_id=record.get("node_id", "")
+        )
+
+    def close(self) -> None:
+        """关闭常驻 worker"""
+        with self._workers_lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def _merge_junit_xml(self, xml_paths: List[Path], dest: Path) -> None:
+        """合并多个 JUnit XML 为一个 <testsuites> 文档"""
+        merged = ET.Element("testsuites")
+        for xml_path in xml_paths:
+            if not xml_path.exists():
+                logger.warning(f"Worker JUnit XML not found: {xml_path}")
+                continue
+            try:
+                root = ET.parse(xml_path).getroot()
+            except ET.ParseError as e:
+                logger.error(f"Failed to parse worker JUnit XML {xml_path}: {e}")
+                continue
+            if root.tag == "testsuites":
+                merged.extend(list(root))
+            else:
+                merged.append(root)
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        ET.ElementTree(merged).write(dest, encoding="utf-8", xml_declaration=True)
+
+    @staticmethod
+    def _suffixed(filename: str, suffix: str) -> str:
+        """results.xml + w1 -> results.w1.xml"""
+        path = Path(filename)
+        return f"{path.stem}.{suffix}{path.suffix}"
 
     def run_single_test(
         self,
@@ -175,6 +596,32 @@ class PytestRunner:
 
         logger.info(f"Running single test: {function_name}")
 
+        if self.config.warm_worker:
+            node_id = self._absolute_node_id(test_spec)
+            warm = self._run_warm([node_id], test_path.resolve().parent.parent)
+            if warm is not None:
+                _, results, duration = warm
+                for result in results:
+                    if result.node_id == node_id:
+                        result.file_path = str(test_file)
+                        return result
+                testcase_id = self._extract_testcase_id(test_path, function_name)
+                return TestCaseResult(
+                    testcase_id=testcase_id or "UNKNOWN",
+                    function_name=function_name,
+                    file_path=str(test_file),
+                    status=TestStatus.ERROR,
+                    duration=duration,
+                    error_info=ErrorInfo(
+                        error_type=ErrorType.UNKNOWN,
+                        file=str(test_file),
+                        function=function_name,
+                        testcase_id=testcase_id,
+                        message=f"Test not found: {test_spec}"
+                    )
+                )
+            logger.warning("Warm pytest worker unavailable, falling back to subprocess")
+
         start_time = time.time()
 
         try:
@@ -232,22 +679,47 @@ class PytestRunner:
         self,
         test_path: Path,
         output_path: Path,
-        test_file: Optional[str] = None
+        test_file: Optional[str] = None,
+        targets: Optional[List[str]] = None,
+        suffix: Optional[str] = None
     ) -> List[str]:
-        """构建 pytest 命令"""
+        """构建 pytest 命令
+
+        Args:
+            targets: 显式指定的执行目标 (并行 worker 使用，按顺序执行)
+            suffix: 报告文件后缀 (并行 worker 使用，避免多个进程写同一报告)
+        """
         cmd = ["pytest"]
 
         # 测试目标 - 使用相对于 cwd (test_path.parent) 的路径
-        if test_file:
+        if targets:
+            cmd.extend(targets)
+        elif test_file:
             cmd.append(f"{test_path.name}/{test_file}")
         else:
             cmd.append(test_path.name)  # 只用目录名 "tests"
 
+        junit_xml = self.config.junit_xml
+        html_report = self.config.html_report
+        if suffix:
+            junit_xml = self._suffixed(junit_xml, suffix)
+            html_report = self._suffixed(html_report, suffix)
+            # 多进程同时写 .pytest_cache 会产生竞争
+            cmd.extend(["-p", "no:cacheprovider"])
+
+        # 某个文件导入失败时继续执行其他文件 (否则 pytest 中断，只返回收集错误)
+        cmd.append("--continue-on-collection-errors")
+
+        # 结构化结果流插件
+        if STREAM_SUPPORTED:
+            cmd.extend(["-p", "result_stream"])
+
         # JUnit XML 报告 - 使用相对于 cwd (test_path.parent) 的路径
-        cmd.append(f"--junitxml={output_path.name}/{self.config.junit_xml}")
+        if self.config.keep_junit_xml or not STREAM_SUPPORTED:
+            cmd.append(f"--junitxml={output_path.name}/{junit_xml}")
 
         # HTML 报告
-        cmd.append(f"--html={output_path.name}/{self.config.html_report}")
+        cmd.append(f"--html={output_path.name}/{html_report}")
         cmd.append("--self-contained-html")
 
         # 超时
@@ -284,8 +756,8 @@ class PytestRunner:
                 classname = testcase.get('classname', '')
                 time_str = testcase.get('time', '0')
 
-                # 提取文件名
-                file_path = self._classname_to_filepath(classname, test_dir)
+                # 提取文件名和类名部分
+                file_path, class_parts = self._resolve_classname(classname, test_dir)
 
                 # 提取用例 ID
                 testcase_id = self._extract_testcase_id(
@@ -317,7 +789,8 @@ class PytestRunner:
                     file_path=file_path or classname,
                     status=status,
                     duration=float(time_str),
-                    error_info=error_info
+                    error_info=error_info,
+                    node_id="::".join([file_path] + class_parts + [name]) if file_path else ""
                 ))
 
         except ET.ParseError as e:
@@ -327,47 +800,27 @@ class PytestRunner:
 
     def _classname_to_filepath(self, classname: str, test_dir: Path) -> Optional[str]:
         """将 classname 转换为文件路径"""
-        # classname 格式: tests.test_order_api.TestOrderAPI
-        parts = classname.split('.')
+        return self._resolve_classname(classname, test_dir)[0]
 
-        # 尝试找到测试文件
-        for i in range(len(parts)):
-            potential_file = '/'.join(parts[:i+1]) + '.py'
-            full_path = test_dir / potential_file
-            if full_path.exists():
-                return str(full_path)
+    def _resolve_classname(
+        self,
+        classname: str,
+        test_dir: Path
+    ) -> Tuple[Optional[str], List[str]]:
+        """将 classname 拆分为 (文件路径, 类名列表)
 
-        return None
+        classname 格式: tests.test_order_api.TestOrderAPI
+        -> (tests/test_order_api.py, ["TestOrderAPI"])
+        """
+        return self.test_index.resolve_classname(classname, test_dir)
 
     def _extract_testcase_id(
         self,
         file_path: Path,
         function_name: str
     ) -> Optional[str]:
-        """从测试文件中提取用例 ID"""
-        if not file_path.exists():
-            return None
-
-        try:
-            content = file_path.read_text(encoding='utf-8')
-            lines = content.split('\n')
-
-            # 找到函数定义行
-            func_pattern = re.compile(rf'def\s+{re.escape(function_name)}\s*\(')
-
-            for i, line in enumerate(lines):
-                if func_pattern.search(line):
-                    # 向上查找 # TestCase: TC-XXX 注释
-                    for j in range(i - 1, max(i - 5, -1), -1):
-                        match = self._testcase_pattern.search(lines[j])
-                        if match:
-                            return match.group(1)
-                    break
-
-        except Exception as e:
-            logger.warning(f"Failed to extract testcase ID: {e}")
-
-        return None
+        """从测试文件中提取用例 ID (索引按文件缓存，每个文件只解析一次)"""
+        return self.test_index.testcase_id(file_path, function_name)
 
     def _parse_failure(
         self,
@@ -439,9 +892,35 @@ class PytestRunner:
         testcase_id: Optional[str]
     ) -> ErrorInfo:
         """解析 XML 中的 failure 元素"""
-        message = failure_elem.get('message', '')
-        traceback = failure_elem.text or ''
+        return self._failure_info(
+            failure_elem.get('message', ''),
+            failure_elem.text or '',
+            file_path, function_name, testcase_id
+        )
 
+    def _parse_xml_error(
+        self,
+        error_elem: ET.Element,
+        file_path: str,
+        function_name: str,
+        testcase_id: Optional[str]
+    ) -> ErrorInfo:
+        """解析 XML 中的 error 元素"""
+        return self._error_info(
+            error_elem.get('message', ''),
+            error_elem.text or '',
+            file_path, function_name, testcase_id
+        )
+
+    def _failure_info(
+        self,
+        message: str,
+        traceback: str,
+        file_path: str,
+        function_name: str,
+        testcase_id: Optional[str]
+    ) -> ErrorInfo:
+        """用例执行阶段失败 -> 断言错误"""
         return ErrorInfo(
             error_type=ErrorType.ASSERTION,
             file=file_path,
@@ -451,18 +930,15 @@ class PytestRunner:
             traceback=traceback
         )
 
-    def _parse_xml_error(
+    def _error_info(
         self,
-        error_elem: ET.Element,
+        message: str,
+        traceback: str,
         file_path: str,
         function_name: str,
         testcase_id: Optional[str]
     ) -> ErrorInfo:
-        """解析 XML 中的 error 元素"""
-        message = error_elem.get('message', '')
-        traceback = error_elem.text or ''
-
-        # 判断错误类型
+        """setup/teardown/收集阶段出错 -> 按消息判断错误类型"""
         if 'SyntaxError' in message or 'NameError' in message:
             error_type = ErrorType.SYNTAX
         elif 'Connection' in message or 'Timeout' in message:
@@ -484,9 +960,10 @@ class PytestRunner:
 def run_pytest(
     test_dir: str,
     output_dir: str,
-    timeout: int = 45
+    timeout: int = 45,
+    workers: int = 1
 ) -> PytestResult:
     """运行 pytest 的便捷函数"""
-    config = PytestConfig(timeout=timeout)
+    config = PytestConfig(timeout=timeout, workers=workers)
     runner = PytestRunner(config)
     return runner.run(test_dir, output_dir)
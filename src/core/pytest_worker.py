@@ -0,0 +1,211 @@
+"""
+PytestWorker - 常驻 pytest worker 客户端
+
+负责:
+- 启动并维持一个常驻的 pytest 子进程 (pytest_plugins/worker_server.py)
+- 通过 stdin/stdout 的 NDJSON 协议发送节点 ID，接收结构化结果
+- 超时或进程异常时结束 worker，下次调用自动重启
+
+单用例重跑不再重复支付解释器启动、插件加载和 conftest 导入的开销。
+"""
+
+import json
+import logging
+import queue
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable
+
+from .pytest_plugins import WORKER_SERVER
+
+logger = logging.getLogger(__name__)
+
+
+class PytestWorker:
+    """常驻 pytest worker 客户端
+
+    使用方式:
+        worker = PytestWorker(cwd="output/tests/..")
+        response = worker.run(["/abs/tests/test_a.py::test_x"], ["--timeout=45"], timeout=60)
+        worker.close()
+    """
+
+    def __init__(
+        self,
+        cwd: str,
+        python: Optional[str] = None,
+        startup_timeout: float = 60,
+        on_output: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Args:
+            cwd: worker 工作目录 (该目录下被修改的模块会在下次执行前重新导入)
+            python: Python 解释器路径 (默认当前解释器)
+            startup_timeout: 启动超时 (秒)
+            on_output: pytest 输出回调 (worker 的 stderr 逐行转发)
+        """
+        self.cwd = str(Path(cwd).resolve())
+        self.python = python or sys.executable
+        self.startup_timeout = startup_timeout
+        self.on_output = on_output
+        self.process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self) -> bool:
+        """启动 worker 并等待就绪信号"""
+        if self.alive:
+            return True
+
+        cmd = [self.python, str(WORKER_SERVER), self.cwd]
+        logger.info(f"Starting pytest worker: {' '.join(cmd)}")
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                cwd=self.cwd
+            )
+        except Exception as e:
+            logger.error(f"Failed to start pytest worker: {e}")
+            self.process = None
+            return False
+
+        self._responses = queue.Queue()
+        threading.Thread(
+            target=self._read_stdout, args=(self.process, self._responses),
+            name="pytest-worker-stdout", daemon=True
+        ).start()
+        threading.Thread(
+            target=self._read_stderr, args=(self.process,),
+            name="pytest-worker-stderr", daemon=True
+        ).start()
+
+        ready = self._next_message(time.time() + self.startup_timeout)
+        if not ready or not ready.get("ready"):
+            logger.error("Pytest worker failed to become ready")
+            self._kill()
+            return False
+
+        logger.info(f"Pytest worker ready: pid={ready.get('pid')}, pytest {ready.get('pytest')}")
+        return True
+
+    def run(
+        self,
+        node_ids: List[str],
+        args: Optional[List[str]] = None,
+        timeout: float = 300
+    ) -> Optional[Dict[str, Any]]:
+        """执行指定节点
+
+        Args:
+            node_ids: pytest 节点 ID (建议使用绝对路径)
+            args: 额外的 pytest 参数
+            timeout: 本次执行的总超时 (秒)
+
+        Returns:
+            worker 响应 (exit_code / duration / results / reloaded)；
+            启动失败、超时或 worker 异常退出时返回 None
+        """
+        with self._lock:
+            if not self.start():
+                return None
+
+            self._request_id += 1
+            request = {"id": self._request_id, "nodes": node_ids, "args": args or []}
+            try:
+                self.process.stdin.write(json.dumps(request, ensure_ascii=False) + "\n")
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                logger.error(f"Pytest worker pipe closed: {e}")
+                self._kill()
+                return None
+
+            deadline = time.time() + timeout
+            while True:
+                response = self._next_message(deadline)
+                if response is None:
+                    logger.error(f"Pytest worker timed out or exited (request {self._request_id})")
+                    self._kill()
+                    return None
+                if response.get("id") == self._request_id:
+                    break
+
+            if response.get("reloaded"):
+                logger.info(f"Pytest worker reloaded modules: {', '.join(response['reloaded'])}")
+            if response.get("error"):
+                logger.warning(f"Pytest worker error: {response['error']}")
+            return response
+
+    def close(self) -> None:
+        """通知 worker 退出并回收进程"""
+        with self._lock:
+            if not self.alive:
+                self.process = None
+                return
+            try:
+                self.process.stdin.write(json.dumps({"cmd": "exit"}) + "\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+            self._kill()
+
+    def _kill(self) -> None:
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
+            self.process = None
+
+    def _next_message(self, deadline: float) -> Optional[Dict[str, Any]]:
+        """读取下一条协议消息，超时或进程退出返回 None"""
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            try:
+                line = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if line is None:    # stdout 已关闭
+                return None
+            try:
+                return json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Pytest worker sent invalid line: {line[:200]}")
+
+    @staticmethod
+    def _read_stdout(process: subprocess.Popen, responses: "queue.Queue[Optional[str]]") -> None:
+        for line in process.stdout:
+            responses.put(line)
+        responses.put(None)
+
+    def _read_stderr(self, process: subprocess.Popen) -> None:
+        for line in process.stderr:
+            logger.info(f"[pytest-worker] {line.rstrip()}")
+            if self.on_output:
+                self.on_output(f"[worker] {line}")
+
+    def __enter__(self) -> "PytestWorker":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
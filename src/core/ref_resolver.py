@@ -0,0 +1,81 @@
+"""
+RefResolver - 本地 $ref 解析
+
+解析 Swagger/OpenAPI 文档内的 JSON Pointer 引用 ("#/components/schemas/X"、"#/definitions/X" 等):
+- lookup: 按引用查找目标 (结果缓存)
+- deref: 跟随引用链到非引用节点 (循环保护)
+- resolve: 完全展开所有引用 (结果缓存，循环引用替换为 {"$circular": 名称})
+
+输入解析、依赖分析、规范比对和 Prompt 切片共用。
+"""
+
+from typing import Optional, Dict, Any, Set, Tuple
+
+
+class RefResolver:
+    """本地 $ref 解析器 ("#/components/schemas/X"、"#/definitions/X" 等)"""
+
+    def __init__(self, root: Optional[Dict[str, Any]] = None):
+        self.root = root or {}
+        self._cache: Dict[str, Any] = {}
+        self._expanded: Dict[str, Any] = {}
+
+    def lookup(self, ref: str) -> Optional[Any]:
+        """按 JSON Pointer 查找引用目标 (不支持外部引用)"""
+        if ref in self._cache:
+            return self._cache[ref]
+        target: Any = None
+        if ref.startswith("#/"):
+            target = self.root
+            for token in ref[2:].split("/"):
+                token = token.replace("~1", "/").replace("~0", "~")
+                if isinstance(target, dict) and token in target:
+                    target = target[token]
+                else:
+                    target = None
+                    break
+        self._cache[ref] = target
+        return target
+
+    def deref(self, node: Any) -> Tuple[Any, Optional[str]]:
+        """跟随 $ref 链直到非引用节点，返回 (节点, 最后一个引用的名称)"""
+        name = None
+        seen: Set[str] = set()
+        while isinstance(node, dict) and isinstance(node.get("$ref"), str):
+            ref = node["$ref"]
+            if ref in seen:
+                break
+            seen.add(ref)
+            name = ref_name(ref)
+            target = self.lookup(ref)
+            if target is None:
+                break
+            node = target
+        return node, name
+
+    def resolve(self, node: Any) -> Any:
+        """完全展开所有 $ref (结果缓存；循环引用替换为 {"$circular": 名称})"""
+        return self._resolve(node, ())
+
+    def _resolve(self, node: Any, stack: Tuple[str, ...]) -> Any:
+        if isinstance(node, list):
+            return [self._resolve(item, stack) for item in node]
+        if not isinstance(node, dict):
+            return node
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            if ref in stack:
+                return {"$circular": ref_name(ref)}
+            if ref in self._expanded:
+                return self._expanded[ref]
+            target = self.lookup(ref)
+            if target is None:
+                return dict(node)
+            expanded = self._resolve(target, stack + (ref,))
+            self._expanded[ref] = expanded
+            return expanded
+        return {key: self._resolve(value, stack) for key, value in node.items()}
+
+
+def ref_name(ref: str) -> str:
+    return ref.rsplit("/", 1)[-1]
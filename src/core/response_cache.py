@@ -0,0 +1,390 @@
+"""
+ResponseCache - LLM 响应缓存
+
+对同一份 Swagger / 同一环境重复执行时，规划和生成阶段的 Prompt 完全相同，
+命中缓存即可跳过 CLI 调用 (省去数分钟和费用)。
+
+- 缓存键: sha256(阶段 + 允许的工具 + 规范化后的 Prompt + 会话中上一轮的缓存键)
+  规范化会把输出目录替换为占位符，并屏蔽 Prompt 中的时间戳，使不同批次的输出目录可以共享缓存
+- 缓存值: 最终 CLIResult + CLI 在输出目录中写入/修改的文件清单 (内容按 sha256 去重存储)
+  命中时将这些文件恢复到当前输出目录
+- 淘汰: TTL 过期 + 按最近访问时间的 LRU (条目数 / 总字节数上限)
+
+目录结构:
+    <cache_dir>/entries/<key>.json   条目 (结果 + 文件清单)，mtime 即最近访问时间
+    <cache_dir>/blobs/<sha256>       文件内容
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Optional, List, Dict, Any, Tuple, Iterable
+
+from ..models import CLIResult
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+OUTPUT_DIR_PLACEHOLDER = "<OUTPUT_DIR>"
+# Prompt 中的时间戳 (模板 {timestamp})，不参与缓存键
+TIMESTAMP_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}[ T_]\d{2}:?\d{2}:?\d{2}')
+# 快照时跳过的目录
+SKIP_DIRS = {".cache", "__pycache__", ".pytest_cache"}
+# 默认只缓存与被测环境无关的阶段 (自愈依赖实时测试结果，不缓存)
+DEFAULT_PHASES = ("planning", "planning_business", "generation")
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    restored_files: int = 0
+    saved_cost_usd: float = 0.0         # 命中所节省的费用 (原调用的 cost)
+    saved_seconds: float = 0.0          # 命中所节省的 CLI 执行时间
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total * 100 if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = f"{self.hit_rate:.1f}%"
+        data["saved_cost_usd"] = round(self.saved_cost_usd, 4)
+        data["saved_seconds"] = round(self.saved_seconds, 1)
+        return data
+
+
+@dataclass
+class CachedResponse:
+    """一次命中的缓存内容"""
+    key: str
+    result: CLIResult
+    files: List[str] = field(default_factory=list)    # 已恢复的文件 (相对输出目录)
+
+
+class ResponseCache:
+    """基于内容寻址的 LLM 响应缓存 (线程安全)
+
+    使用方式:
+        cache = ResponseCache("output/.cache/llm")
+        key = cache.make_key(prompt, tools, "planning", output_dir)
+        hit = cache.get(key, output_dir)
+        if hit is None:
+            before = cache.snapshot(output_dir)
+            result = adapter.execute(prompt)
+            cache.put(key, result, output_dir, before, phase="planning")
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 200,
+        max_bytes: int = 512 * 1024 * 1024,
+        phases: Iterable[str] = DEFAULT_PHASES
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / "entries"
+        self.blobs_dir = self.cache_dir / "blobs"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.phases = set(phases)
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def accepts(self, phase: str) -> bool:
+        """该阶段是否使用缓存"""
+        return bool(phase) and phase in self.phases
+
+    # ---------- 缓存键 ----------
+
+    @staticmethod
+    def normalize_prompt(prompt: str, output_dir: Optional[str] = None) -> str:
+        """规范化 Prompt: 输出目录替换为占位符、屏蔽时间戳、统一换行和行尾空白"""
+        text = prompt.replace("\r\n", "\n")
+        for variant in _dir_variants(output_dir):
+            text = text.replace(variant, OUTPUT_DIR_PLACEHOLDER)
+        text = TIMESTAMP_PATTERN.sub("<TIMESTAMP>", text)
+        return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+    def make_key(
+        self,
+        prompt: str,
+        allowed_tools: List[str],
+        phase: str,
+        output_dir: Optional[str] = None,
+        parent_key: str = ""
+    ) -> str:
+        """计算缓存键
+
+        parent_key 为同一会话上一轮的缓存键: 会话模式下相同的 Prompt
+        在不同上下文中可能得到不同结果，因此上下文链也参与计算。
+        """
+        digest = hashlib.sha256()
+        header = json.dumps({
+            "v": CACHE_VERSION,
+            "phase": phase,
+            "tools": sorted(allowed_tools or []),
+            "parent": parent_key
+        }, sort_keys=True)
+        digest.update(header.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(self.normalize_prompt(prompt, output_dir).encode("utf-8"))
+        return digest.hexdigest()
+
+    # ---------- 读写 ----------
+
+    def get(self, key: str, output_dir: Optional[str] = None) -> Optional[CachedResponse]:
+        """查找缓存，命中时将文件恢复到 output_dir"""
+        entry_path = self._entry_path(key)
+        with self._lock:
+            entry = self._load_entry(entry_path)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if self.ttl_seconds and time.time() - entry.get("created", 0) > self.ttl_seconds:
+                self._remove_entry(entry_path)
+                self.stats.misses += 1
+                self.stats.evictions += 1
+                return None
+
+            try:
+                files = self._restore_files(entry.get("files", []), output_dir) if output_dir else []
+            except OSError as e:
+                # 文件缺失视为未命中，由调用方重新执行
+                logger.warning(f"Failed to restore cached artifacts for {key[:12]}: {e}")
+                self._remove_entry(entry_path)
+                self.stats.misses += 1
+                return None
+
+            # 记录访问时间 (LRU)
+            try:
+                os.utime(entry_path)
+            except OSError:
+                pass
+
+            result_data = entry["result"]
+            result = CLIResult(**result_data)
+            self.stats.hits += 1
+            self.stats.restored_files += len(files)
+            self.stats.saved_cost_usd += result.cost_usd
+            self.stats.saved_seconds += result.execution_time
+            return CachedResponse(key=key, result=result, files=files)
+
+    def put(
+        self,
+        key: str,
+        result: CLIResult,
+        output_dir: Optional[str] = None,
+        before: Optional[Dict[str, Tuple[int, int]]] = None,
+        phase: str = ""
+    ) -> None:
+        """保存结果及 CLI 写入的文件 (只缓存成功的调用)"""
+        if not result.success:
+            return
+
+        with self._lock:
+            try:
+                files = []
+                if output_dir:
+                    files = self._store_files(output_dir, before or {})
+                entry = {
+                    "key": key,
+                    "phase": phase,
+                    "created": time.time(),
+                    "result": {
+                        "success": result.success,
+                        "output": result.output,
+                        "parsed_output": result.parsed_output,
+                        "error": result.error,
+                        "exit_code": result.exit_code,
+                        "execution_time": result.execution_time,
+                        "session_id": result.session_id,
+                        "cost_usd": result.cost_usd
+                    },
+                    "files": files
+                }
+                self.entries_dir.mkdir(parents=True, exist_ok=True)
+                _atomic_write(self._entry_path(key), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+                self.stats.stores += 1
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Failed to store response cache entry: {e}")
+                return
+            self._prune()
+
+    def snapshot(self, output_dir: str) -> Dict[str, Tuple[int, int]]:
+        """输出目录文件快照: 相对路径 -> (mtime_ns, size)"""
+        root = Path(output_dir)
+        result: Dict[str, Tuple[int, int]] = {}
+        if not root.is_dir():
+            return result
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                result[os.path.relpath(path, root)] = (st.st_mtime_ns, st.st_size)
+        return result
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            for directory in (self.entries_dir, self.blobs_dir):
+                if not directory.is_dir():
+                    continue
+                for path in directory.iterdir():
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+    # ---------- 文件清单 ----------
+
+    def _store_files(self, output_dir: str, before: Dict[str, Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """保存相对快照新增或修改的文件"""
+        root = Path(output_dir)
+        variants = [v.encode("utf-8") for v in _dir_variants(output_dir)]
+        files = []
+        for rel, stamp in sorted(self.snapshot(output_dir).items()):
+            if before.get(rel) == stamp:
+                continue
+            data = (root / rel).read_bytes()
+            templated = False
+            if variants and _is_text(data):
+                for variant in variants:
+                    if variant in data:
+                        data = data.replace(variant, OUTPUT_DIR_PLACEHOLDER.encode("utf-8"))
+                        templated = True
+            blob = hashlib.sha256(data).hexdigest()
+            blob_path = self.blobs_dir / blob
+            if not blob_path.exists():
+                self.blobs_dir.mkdir(parents=True, exist_ok=True)
+                _atomic_write(blob_path, data)
+            files.append({"path": rel, "blob": blob, "size": len(data), "templated": templated})
+        return files
+
+    def _restore_files(self, files: List[Dict[str, Any]], output_dir: str) -> List[str]:
+        root = Path(output_dir)
+        target = os.path.abspath(output_dir).encode("utf-8")
+        restored = []
+        for item in files:
+            rel = item["path"]
+            if os.path.isabs(rel) or ".." in Path(rel).parts:
+                logger.warning(f"Skipped unsafe cached path: {rel}")
+                continue
+            data = (self.blobs_dir / item["blob"]).read_bytes()
+            if item.get("templated"):
+                data = data.replace(OUTPUT_DIR_PLACEHOLDER.encode("utf-8"), target)
+            path = root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            restored.append(rel)
+        return restored
+
+    # ---------- 淘汰 ----------
+
+    def _prune(self) -> None:
+        """淘汰过期条目，再按 LRU 淘汰到条目数/字节数上限以内，最后清理无引用的文件"""
+        if not self.entries_dir.is_dir():
+            return
+        now = time.time()
+        entries = []
+        for path in self.entries_dir.glob("*.json"):
+            entry = self._load_entry(path)
+            if entry is None:
+                continue
+            try:
+                accessed = path.stat().st_mtime
+            except OSError:
+                continue
+            if self.ttl_seconds and now - entry.get("created", 0) > self.ttl_seconds:
+                self._remove_entry(path)
+                self.stats.evictions += 1
+                continue
+            size = sum(f.get("size", 0) for f in entry.get("files", []))
+            entries.append((accessed, path, size, entry))
+
+        # 最近访问的在前
+        entries.sort(key=lambda e: e[0], reverse=True)
+        kept, total = [], 0
+        for accessed, path, size, entry in entries:
+            if len(kept) >= self.max_entries or (kept and total + size > self.max_bytes):
+                self._remove_entry(path)
+                self.stats.evictions += 1
+                continue
+            kept.append(entry)
+            total += size
+
+        live = {f["blob"] for entry in kept for f in entry.get("files", [])}
+        if self.blobs_dir.is_dir():
+            for blob in self.blobs_dir.iterdir():
+                if blob.name not in live:
+                    try:
+                        blob.unlink()
+                    except OSError:
+                        pass
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / f"{key}.json"
+
+    @staticmethod
+    def _load_entry(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Corrupted cache entry {path.name}: {e}")
+            return None
+
+    @staticmethod
+    def _remove_entry(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _dir_variants(output_dir: Optional[str]) -> List[str]:
+    """输出目录的各种写法 (原样 / 绝对路径)，长的在前避免部分替换"""
+    if not output_dir:
+        return []
+    variants = {output_dir.rstrip("/\\"), os.path.abspath(output_dir)}
+    # "." 之类过短的写法会误替换普通文本
+    return sorted((v for v in variants if len(v) > 2), key=len, reverse=True)
+
+
+def _is_text(data: bytes) -> bool:
+    if b"\0" in data[:8192]:
+        return False
+    try:
+        data.decode("utf-8")
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """先写临时文件再替换，避免并发读取到不完整内容"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def default_cache_dir(output_dir: str) -> str:
+    """默认缓存目录: 输出根目录下的 .cache/llm (多次执行的时间戳目录共享)"""
+    return str(Path(output_dir).resolve().parent / ".cache" / "llm")
@@ -15,9 +15,14 @@ from ..models import (
     TestCaseResult, JudgeResult, TestStatus,
     ErrorType, HealingType, TestMode
 )
+from .failure_cluster import FailureCluster
 
 logger = logging.getLogger(__name__)
 
+# 按主机聚合的簇 (连接错误、鉴权/网关类状态码) 达到该规模 (且占全部用例的比例不低于 ENVIRONMENT_RATIO) 时视为环境级故障
+ENVIRONMENT_MIN_FAILURES = 3
+ENVIRONMENT_RATIO = 0.5
+
 
 class ResultJudge:
     """结果仲裁器
@@ -116,6 +121,37 @@ class ResultJudge:
             error_detail=f"未知错误: {result.error_info.message}"
         )
 
+    def judge_cluster(self, cluster: FailureCluster, total_tests: int = 0) -> JudgeResult:
+        """判定失败簇: 用代表用例判定，结果适用于整个簇
+
+        环境级故障 (连接失败、Token 失效、网关不可用) 直接判定为环境问题，不再逐个分析。
+        """
+        if self.is_environment_failure(cluster, total_tests):
+            return JudgeResult(
+                verdict=TestStatus.ERROR,
+                need_healing=False,
+                error_detail=f"环境级故障 ({cluster.size}/{total_tests or cluster.size} 个用例): {cluster.label}"
+            )
+        if cluster.error_type == ErrorType.CONNECTION and cluster.representative.status != TestStatus.TIMEOUT:
+            # 用例执行中抛出的连接异常会被报告为断言失败，按簇的错误类型判定为环境问题
+            judge_result = JudgeResult(
+                verdict=TestStatus.ERROR,
+                need_healing=False,
+                error_detail="连接错误，可能是环境问题"
+            )
+        else:
+            judge_result = self.judge(cluster.representative)
+        if cluster.size > 1:
+            judge_result.error_detail = f"{judge_result.error_detail} (同类失败 {cluster.size} 个)"
+        return judge_result
+
+    @staticmethod
+    def is_environment_failure(cluster: FailureCluster, total_tests: int = 0) -> bool:
+        """按主机聚合的簇覆盖了大部分用例 -> 环境不可用"""
+        if not cluster.host_wide or cluster.size < ENVIRONMENT_MIN_FAILURES:
+            return False
+        return not total_tests or cluster.size >= total_tests * ENVIRONMENT_RATIO
+
     def _judge_assertion_failure(self, result: TestCaseResult) -> JudgeResult:
         """判定断言失败
 
@@ -181,7 +217,7 @@ class ResultJudge:
 
         if healing_success:
             result.healed = True
-            # 自愈成功后需要重新运行测试
+            # 自愈成功后由 WorkflowEngine 的增量验证阶段重跑该用例确认
 
         return result
 
@@ -0,0 +1,374 @@
+"""
+RuleFixer - 自愈前的确定性规则修复
+
+很多失败是机械性的 (缺少 import、fixture 名称拼错、对空响应体调用 .json()、URL 多了结尾斜杠)，
+不需要调用 LLM。规则修复器按 ErrorInfo 和 traceback 匹配，直接改写测试文件；
+由调用方重跑该用例验证，未修复的改动会被撤销，仍失败的用例再交给 LLM 自愈。
+
+自定义修复器: 继承 RuleFixer，实现 match/apply，再 registry.register(MyFixer())。
+"""
+
+import ast
+import difflib
+import logging
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Iterable, Tuple
+
+from ..models import ErrorInfo
+from .preflight import KNOWN_MODULES, SkeletonNames, load_skeleton, import_insert_line
+
+logger = logging.getLogger(__name__)
+
+# 本次运行没有 LLM 自愈调用时，按该值估算每个用例的 LLM 自愈耗时 (秒)
+ESTIMATED_LLM_HEAL_SECONDS = 60.0
+
+NAME_ERROR_PATTERN = re.compile(r"NameError: name '(\w+)' is not defined")
+FIXTURE_ERROR_PATTERN = re.compile(r"fixture '(\w+)' not found")
+AVAILABLE_FIXTURES_PATTERN = re.compile(r"available fixtures:\s*([^\n]+)")
+JSON_ERROR_PATTERN = re.compile(r"JSONDecodeError|Expecting value: line 1 column 1")
+JSON_CALL_PATTERN = re.compile(r"\b([A-Za-z_][\w.]*)\.json\(\)")
+STATUS_PATTERN = re.compile(r"\b(30[1278]|404|405)\b")
+TRAILING_SLASH_PATTERN = re.compile(r"((?:/[\w\-.{}]+)+)/(?=[\"'])")
+PLACEHOLDER_PATTERN = re.compile(r"\{[^}/]*\}")
+
+
+def normalize_path(path: str) -> str:
+    """路径占位符归一化 ("/users/{user_id}" -> "/users/{}")"""
+    return PLACEHOLDER_PATTERN.sub("{}", path.rstrip("/") or "/")
+
+
+@dataclass
+class FixContext:
+    """规则修复器的输入"""
+    error_info: ErrorInfo
+    file_path: Path
+    source: str
+    text: str                                   # 错误消息 + traceback
+    line: Optional[int] = None                  # 测试文件中出错的行 (1-based)
+    function_range: Optional[Tuple[int, int]] = None   # 出错函数的行范围 (含装饰器)
+    skeleton: SkeletonNames = field(default_factory=SkeletonNames)
+    spec_paths: Set[str] = field(default_factory=set)  # 规范中的路径 (已归一化)
+
+    @property
+    def lines(self) -> List[str]:
+        return self.source.split("\n")
+
+
+class RuleFixer(ABC):
+    """规则修复器基类 (未实现 match/apply 的子类无法实例化)"""
+    name = ""
+    description = ""
+
+    @abstractmethod
+    def match(self, ctx: FixContext) -> bool:
+        """错误是否属于本修复器处理的类型"""
+
+    @abstractmethod
+    def apply(self, ctx: FixContext) -> Optional[str]:
+        """返回修复后的源码，无法修复时返回 None"""
+
+
+class MissingImportFixer(RuleFixer):
+    """NameError: 常用模块或骨架 conftest 中的名称未导入"""
+    name = "missing_import"
+    description = "补充缺失的 import"
+
+    def match(self, ctx: FixContext) -> bool:
+        return self._missing(ctx) is not None
+
+    def apply(self, ctx: FixContext) -> Optional[str]:
+        name = self._missing(ctx)
+        if name in KNOWN_MODULES:
+            statement = f"import {name}"
+        elif name in ctx.skeleton.exports:
+            statement = f"from conftest import {name}"
+        else:
+            return None
+        tree = ast.parse(ctx.source)
+        lines = ctx.lines
+        at = import_insert_line(tree)
+        lines[at:at] = [statement]
+        return "\n".join(lines)
+
+    @staticmethod
+    def _missing(ctx: FixContext) -> Optional[str]:
+        match = NAME_ERROR_PATTERN.search(ctx.text)
+        if match and (match.group(1) in KNOWN_MODULES or match.group(1) in ctx.skeleton.exports):
+            return match.group(1)
+        return None
+
+
+class FixtureNameFixer(RuleFixer):
+    """fixture 'xxx' not found: 在该测试函数内改为最接近的可用 fixture"""
+    name = "fixture_name"
+    description = "修正拼错的 fixture 名称"
+
+    def match(self, ctx: FixContext) -> bool:
+        return ctx.function_range is not None and FIXTURE_ERROR_PATTERN.search(ctx.text) is not None
+
+    def apply(self, ctx: FixContext) -> Optional[str]:
+        wrong = FIXTURE_ERROR_PATTERN.search(ctx.text).group(1)
+        listed = AVAILABLE_FIXTURES_PATTERN.search(ctx.text)
+        available = [n.strip() for n in listed.group(1).split(",")] if listed else []
+        candidates = [n for n in set(available) | ctx.skeleton.fixtures if n and not n.startswith("_")]
+        close = difflib.get_close_matches(wrong, sorted(candidates), n=1, cutoff=0.6)
+        if not close:
+            return None
+        start, end = ctx.function_range
+        lines = ctx.lines
+        pattern = re.compile(rf"\b{re.escape(wrong)}\b")
+        for i in range(start - 1, min(end, len(lines))):
+            lines[i] = pattern.sub(close[0], lines[i])
+        return "\n".join(lines)
+
+
+class EmptyJsonBodyFixer(RuleFixer):
+    """对空响应体 (如 204) 调用 .json(): 改为有内容时才解析
+
+    traceback 中能定位到出错行时只改该行，否则改出错函数内所有未加保护的 .json() 调用。
+    """
+    name = "empty_json_body"
+    description = "空响应体不解析 JSON"
+
+    def match(self, ctx: FixContext) -> bool:
+        return JSON_ERROR_PATTERN.search(ctx.text) is not None and bool(self._targets(ctx))
+
+    def apply(self, ctx: FixContext) -> Optional[str]:
+        lines = ctx.lines
+        for i in self._targets(ctx):
+            lines[i] = JSON_CALL_PATTERN.sub(
+                lambda m: f"({m.group(1)}.json() if {m.group(1)}.content else {{}})", lines[i]
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _targets(ctx: FixContext) -> List[int]:
+        lines = ctx.lines
+
+        def unguarded(i: int) -> bool:
+            return JSON_CALL_PATTERN.search(lines[i]) is not None and ".content else" not in lines[i]
+
+        # 同一文件的其他修复可能使行号偏移，出错行不是 .json() 调用时按函数范围查找
+        if ctx.line is not None and 0 < ctx.line <= len(lines) and unguarded(ctx.line - 1):
+            return [ctx.line - 1]
+        if ctx.function_range is None:
+            return []
+        start, end = ctx.function_range
+        return [i for i in range(start - 1, min(end, len(lines))) if unguarded(i)]
+
+
+class TrailingSlashFixer(RuleFixer):
+    """404/405/重定向且 URL 多了结尾斜杠: 去掉斜杠 (去掉后的路径须在规范中存在)"""
+    name = "trailing_slash"
+    description = "去掉 URL 结尾斜杠"
+
+    def match(self, ctx: FixContext) -> bool:
+        return (
+            ctx.function_range is not None and STATUS_PATTERN.search(ctx.text) is not None
+            and bool(self._targets(ctx))
+        )
+
+    def apply(self, ctx: FixContext) -> Optional[str]:
+        lines = ctx.lines
+        for i in self._targets(ctx):
+            lines[i] = TRAILING_SLASH_PATTERN.sub(
+                lambda m: m.group(1) if self._known(ctx, m.group(1)) else m.group(0), lines[i]
+            )
+        return "\n".join(lines)
+
+    def _targets(self, ctx: FixContext) -> List[int]:
+        start, end = ctx.function_range
+        lines = ctx.lines
+        return [
+            i for i in range(start - 1, min(end, len(lines)))
+            if any(self._known(ctx, m.group(1)) for m in TRAILING_SLASH_PATTERN.finditer(lines[i]))
+        ]
+
+    @staticmethod
+    def _known(ctx: FixContext, path: str) -> bool:
+        if not ctx.spec_paths:
+            return True
+        path = normalize_path(path)
+        return any(p == path or p.endswith(path) for p in ctx.spec_paths)
+
+
+DEFAULT_FIXERS = [MissingImportFixer, FixtureNameFixer, EmptyJsonBodyFixer, TrailingSlashFixer]
+
+
+@dataclass
+class FixerStats:
+    """单个修复器的统计"""
+    name: str
+    matched: int = 0        # 匹配到的失败数
+    applied: int = 0        # 改写了文件的次数
+    fixed: int = 0          # 改写后用例通过的次数
+    reverted: int = 0       # 改写无效被撤销的次数
+    duration: float = 0.0   # 本地修复 + 重跑耗时
+
+    @property
+    def fix_rate(self) -> float:
+        return self.fixed / self.applied if self.applied else 0.0
+
+    def to_dict(self, llm_seconds_per_case: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "matched": self.matched,
+            "applied": self.applied,
+            "fixed": self.fixed,
+            "reverted": self.reverted,
+            "fix_rate": round(self.fix_rate, 3),
+            "duration": round(self.duration, 2),
+            "time_saved": round(max(0.0, self.fixed * llm_seconds_per_case - self.duration), 1)
+        }
+
+
+@dataclass
+class FixAttempt:
+    """一次规则修复 (用于验证失败时撤销)"""
+    fixer: str
+    file_path: Path
+    original: str
+    patched: str
+    started: float = 0.0
+
+
+class RuleFixerRegistry:
+    """规则修复器注册表
+
+    使用方式:
+        registry = RuleFixerRegistry(tests_dir, spec_paths=[...])
+        attempt = registry.try_fix(error_info)
+        if attempt: ...重跑用例... registry.record(attempt, fixed=passed)
+    """
+
+    def __init__(
+        self,
+        tests_dir: str,
+        fixers: Optional[Iterable[RuleFixer]] = None,
+        spec_paths: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            tests_dir: 测试目录 (包含骨架 conftest.py)
+            fixers: 修复器实例，按顺序尝试 (默认: DEFAULT_FIXERS)
+            spec_paths: 规范中的接口路径，用于限定 URL 类修复
+        """
+        self.tests_dir = Path(tests_dir)
+        self.fixers: List[RuleFixer] = list(fixers) if fixers is not None else [cls() for cls in DEFAULT_FIXERS]
+        self.spec_paths = {normalize_path(p) for p in spec_paths or []}
+        self.stats: Dict[str, FixerStats] = {f.name: FixerStats(f.name) for f in self.fixers}
+        self._skeleton: Optional[SkeletonNames] = None
+        self._lock = threading.Lock()
+
+    def register(self, fixer: RuleFixer) -> None:
+        """追加修复器 (同名修复器会被替换)"""
+        self.fixers = [f for f in self.fixers if f.name != fixer.name] + [fixer]
+        self.stats.setdefault(fixer.name, FixerStats(fixer.name))
+
+    def try_fix(self, error_info: ErrorInfo) -> Optional[FixAttempt]:
+        """依次尝试修复器，第一个产生有效改写的修复器生效 (文件已写入)"""
+        ctx = self._context(error_info)
+        if ctx is None:
+            return None
+        for fixer in self.fixers:
+            start = time.time()
+            try:
+                if not fixer.match(ctx):
+                    continue
+                self.stats[fixer.name].matched += 1
+                patched = fixer.apply(ctx)
+            except Exception as e:
+                logger.warning(f"Rule fixer {fixer.name} failed on {ctx.file_path.name}: {e}")
+                continue
+            finally:
+                self.stats[fixer.name].duration += time.time() - start
+            if not patched or patched == ctx.source:
+                continue
+            try:
+                ast.parse(patched)
+            except SyntaxError:
+                logger.warning(f"Rule fixer {fixer.name} produced invalid code for {ctx.file_path.name}")
+                continue
+            ctx.file_path.write_text(patched, encoding="utf-8")
+            self.stats[fixer.name].applied += 1
+            return FixAttempt(fixer.name, ctx.file_path, ctx.source, patched, started=time.time())
+        return None
+
+    def record(self, attempt: FixAttempt, fixed: bool, keep: bool = False) -> None:
+        """记录验证结果；未修复且不保留时撤销改写
+
+        Args:
+            fixed: 重跑后用例是否通过
+            keep: 未通过但原错误已消失 (改写有进展)，保留改写
+        """
+        stats = self.stats[attempt.fixer]
+        stats.duration += time.time() - attempt.started
+        if fixed:
+            stats.fixed += 1
+        elif not keep:
+            attempt.file_path.write_text(attempt.original, encoding="utf-8")
+            stats.reverted += 1
+
+    def to_dict(self, llm_seconds_per_case: Optional[float] = None) -> Dict[str, Any]:
+        """修复率与节省时间统计 (节省时间 = 修复数 × LLM 单用例自愈耗时 - 本地耗时)"""
+        estimated = llm_seconds_per_case is None
+        per_case = ESTIMATED_LLM_HEAL_SECONDS if estimated else llm_seconds_per_case
+        fixers = [s.to_dict(per_case) for s in self.stats.values()]
+        return {
+            "fixers": fixers,
+            "fixed": sum(s.fixed for s in self.stats.values()),
+            "llm_seconds_per_case": round(per_case, 1),
+            "llm_seconds_estimated": estimated,
+            "time_saved": round(sum(f["time_saved"] for f in fixers), 1)
+        }
+
+    # ---------- 内部方法 ----------
+
+    def _context(self, error_info: ErrorInfo) -> Optional[FixContext]:
+        path = Path(error_info.file)
+        if not path.is_absolute():
+            path = self.tests_dir / path
+        if not path.is_file():
+            return None
+        source = path.read_text(encoding="utf-8")
+        text = f"{error_info.message}\n{error_info.traceback}"
+        with self._lock:
+            if self._skeleton is None:
+                self._skeleton = load_skeleton(str(self.tests_dir))
+        return FixContext(
+            error_info=error_info,
+            file_path=path,
+            source=source,
+            text=text,
+            line=error_info.line or self._error_line(path.name, text),
+            function_range=self._function_range(source, error_info.function),
+            skeleton=self._skeleton,
+            spec_paths=self.spec_paths
+        )
+
+    @staticmethod
+    def _error_line(file_name: str, text: str) -> Optional[int]:
+        """traceback 中该测试文件最内层的行号"""
+        lines = re.findall(rf"(?:^|[\s/\\]){re.escape(file_name)}:(\d+)", text, re.MULTILINE)
+        return int(lines[-1]) if lines else None
+
+    @staticmethod
+    def _function_range(source: str, function: str) -> Optional[Tuple[int, int]]:
+        """测试函数的行范围 (含装饰器)；参数化用例名 test_x[a] 按 test_x 查找"""
+        name = (function or "").split("[", 1)[0]
+        if not name:
+            return None
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            return None
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name:
+                first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                return first, node.end_lineno
+        return None
@@ -10,6 +10,8 @@ SkeletonWriter - 本地生成测试骨架文件
 from pathlib import Path
 from typing import Optional
 
+from ..utils.http_headers import clean_header_value
+
 
 CONFTEXT_TEMPLATE = """\"\"\"Pytest 基础配置与通用 fixture\"\"\"
 import pytest
@@ -133,7 +135,7 @@ class SkeletonWriter:
 
         if not conftest_path.exists():
             # 清理 auth_token 中的非 ASCII 字符（避免 HTTP 头 latin-1 编码错误）
-            clean_token = ''.join(c for c in (self.auth_token or '') if ord(c) < 128)
+            clean_token = clean_header_value(self.auth_token)
             conftest_path.write_text(
                 CONFTEXT_TEMPLATE.format(
                     base_url=self.base_url,
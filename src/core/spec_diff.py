@@ -0,0 +1,299 @@
+"""
+SpecDiff - Swagger 差异与增量规划
+
+负责:
+- 为每个接口计算指纹 (方法、路径、参数、请求体/响应 Schema，$ref 展开后计算)
+- 与上次运行保存的指纹 (endpoint_fingerprints.json) 对比，得到新增/变更/删除/未变更接口
+- 沿用上次运行中未变更接口的 testcases.md 章节和测试函数
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+from ..models import SwaggerSpec
+from .ref_resolver import RefResolver
+from .spec_slicer import endpoint_key
+from .plan_chunker import CASE_ROW_PATTERN, split_testcase_sections
+from .test_id_index import TestIdIndex
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FILE = "endpoint_fingerprints.json"
+FINGERPRINT_VERSION = 1
+
+# 只影响文档、不影响接口契约的字段 (不参与指纹计算)
+DOC_KEYS = {"summary", "description", "externalDocs", "operationId", "tags"}
+# 骨架文件由 SkeletonWriter 按本次配置重新生成，不沿用
+SKELETON_FILES = {"conftest.py", "pytest.ini", "requirements.txt"}
+SKIP_DIRS = {"__pycache__", ".pytest_cache"}
+
+PATH_PARAM_PATTERN = re.compile(r"\{[^}/]+\}")
+
+
+def endpoint_identity(key: str) -> str:
+    """接口身份: 路径参数名归一化 ("GET /orders/{orderId}" -> "GET /orders/{}")
+
+    参数改名的接口视为"变更"而不是"删除 + 新增"。
+    """
+    method, _, path = key.partition(" ")
+    path = PATH_PARAM_PATTERN.sub("{}", path.rstrip("/") or "/")
+    return f"{method.upper()} {path}"
+
+
+def _strip_docs(node: Any, in_properties: bool = False) -> Any:
+    """去掉说明性字段 (properties 下的同名字段是业务字段，保留)"""
+    if isinstance(node, list):
+        return [_strip_docs(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    result = {}
+    for key, value in node.items():
+        if not in_properties and (key in DOC_KEYS or key.startswith("x-")):
+            continue
+        result[key] = _strip_docs(value, in_properties=(key == "properties" and not in_properties))
+    return result
+
+
+def fingerprint_endpoint(endpoint: Dict[str, Any], resolver: Optional[RefResolver] = None) -> str:
+    """计算接口指纹
+
+    $ref 展开后计算，被引用的 Schema 变化也会反映到引用它的接口上。
+    """
+    resolve = resolver.resolve if resolver else (lambda node: node)
+    parameters = [_strip_docs(resolve(p)) for p in endpoint.get("parameters") or []]
+    parameters.sort(key=lambda p: (str(p.get("in", "")), str(p.get("name", ""))) if isinstance(p, dict) else ("", ""))
+    material = {
+        "method": endpoint.get("method", "").upper(),
+        "path": endpoint.get("path", ""),
+        "parameters": parameters,
+        "requestBody": _strip_docs(resolve(endpoint.get("requestBody") or {})),
+        "responses": _strip_docs(resolve(endpoint.get("responses") or {}))
+    }
+    text = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class SpecFingerprints:
+    """规范指纹: 接口身份 -> {"key": "METHOD /path", "hash": 指纹}"""
+    endpoints: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    title: str = ""
+    created_at: str = ""
+
+    @classmethod
+    def from_swagger(cls, swagger: SwaggerSpec) -> "SpecFingerprints":
+        resolver = RefResolver(swagger.components)
+        endpoints: Dict[str, Dict[str, str]] = {}
+        for ep in swagger.endpoints:
+            key = endpoint_key(ep)
+            identity = endpoint_identity(key)
+            if identity in endpoints:
+                logger.warning(f"Duplicate endpoint identity {identity} ({key}), keeping the first")
+                continue
+            endpoints[identity] = {"key": key, "hash": fingerprint_endpoint(ep, resolver)}
+        return cls(endpoints=endpoints, title=swagger.title, created_at=datetime.now().isoformat())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": FINGERPRINT_VERSION,
+            "title": self.title,
+            "created_at": self.created_at,
+            "endpoints": self.endpoints
+        }
+
+    def save(self, output_dir: str) -> str:
+        path = Path(output_dir) / FINGERPRINT_FILE
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return str(path)
+
+    @classmethod
+    def load(cls, output_dir: str) -> Optional["SpecFingerprints"]:
+        """读取运行目录中的指纹文件，不存在或版本不符时返回 None"""
+        path = Path(output_dir) / FINGERPRINT_FILE
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load fingerprints {path}: {e}")
+            return None
+        if data.get("version") != FINGERPRINT_VERSION:
+            return None
+        return cls(
+            endpoints=data.get("endpoints", {}),
+            title=data.get("title", ""),
+            created_at=data.get("created_at", "")
+        )
+
+
+@dataclass
+class SpecDiff:
+    """两次运行之间的接口差异 (均为 "METHOD /path"，removed 为上次的写法)"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def delta(self) -> List[str]:
+        """需要重新规划和生成的接口"""
+        return self.added + self.changed
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"接口差异: 新增 {len(self.added)}, 变更 {len(self.changed)}, "
+            f"删除 {len(self.removed)}, 未变更 {len(self.unchanged)}"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "unchanged": len(self.unchanged)
+        }
+
+
+def diff_fingerprints(old: SpecFingerprints, new: SpecFingerprints) -> SpecDiff:
+    """对比指纹 (结果按本次规范中的接口顺序)"""
+    diff = SpecDiff()
+    for identity, item in new.endpoints.items():
+        previous = old.endpoints.get(identity)
+        if previous is None:
+            diff.added.append(item["key"])
+        elif previous.get("hash") != item["hash"] or previous.get("key") != item["key"]:
+            diff.changed.append(item["key"])
+        else:
+            diff.unchanged.append(item["key"])
+    diff.removed = [item["key"] for identity, item in old.endpoints.items() if identity not in new.endpoints]
+    return diff
+
+
+def find_baseline(output_dir: str) -> Optional[str]:
+    """在输出根目录下查找最近一次完成的运行 (有指纹文件和 testcases.md)，不包括当前目录"""
+    current = Path(output_dir).resolve()
+    root = current.parent
+    if not root.is_dir():
+        return None
+    candidates = []
+    for child in root.iterdir():
+        if not child.is_dir() or child.resolve() == current:
+            continue
+        marker = child / FINGERPRINT_FILE
+        if marker.exists() and (child / "testcases.md").exists():
+            candidates.append((marker.stat().st_mtime, child.name, child))
+    if not candidates:
+        return None
+    return str(max(candidates)[2])
+
+
+@dataclass
+class CarryOver:
+    """沿用上次运行的结果"""
+    baseline_dir: str
+    sections: List[Tuple[str, str]] = field(default_factory=list)   # 未变更接口的用例章节
+    kept_ids: Set[str] = field(default_factory=set)                 # 沿用的用例 ID
+    dropped_ids: Set[str] = field(default_factory=set)              # 变更/删除接口的旧用例 ID
+    files: int = 0                                                  # 沿用的测试文件数
+    functions_removed: int = 0                                      # 从沿用文件中移除的旧测试函数数
+    regenerate: Dict[str, str] = field(default_factory=dict)        # 需重新生成的沿用用例: ID -> 接口
+
+    def summary(self) -> str:
+        text = (
+            f"沿用 {len(self.sections)} 个接口的 {len(self.kept_ids)} 个用例、{self.files} 个测试文件"
+            f" (移除旧测试函数 {self.functions_removed} 个)"
+        )
+        if self.regenerate:
+            text += f", 需重新生成 {len(self.regenerate)} 个"
+        return text
+
+
+def carry_over_testcases(baseline_dir: str, diff: SpecDiff) -> CarryOver:
+    """从上次的 testcases.md 中取出未变更接口的章节 (保留原用例 ID)"""
+    content = (Path(baseline_dir) / "testcases.md").read_text(encoding="utf-8")
+    _, sections = split_testcase_sections(content)
+    unchanged = {endpoint_identity(key) for key in diff.unchanged}
+    result = CarryOver(baseline_dir=baseline_dir)
+    for key, section in sections:
+        ids = set(CASE_ROW_PATTERN.findall(section))
+        if endpoint_identity(key) in unchanged:
+            result.sections.append((key, section))
+            result.kept_ids |= ids
+        else:
+            result.dropped_ids |= ids
+    return result
+
+
+def carry_over_tests(carry: CarryOver, output_dir: str, index: Optional[TestIdIndex] = None) -> CarryOver:
+    """复制上次的测试目录，删除变更/删除接口对应的测试函数
+
+    删除后无法通过语法检查的文件不沿用，其中保留的用例记入 carry.regenerate 由生成阶段重新生成。
+    """
+    src_dir = Path(carry.baseline_dir) / "tests"
+    dst_dir = Path(output_dir) / "tests"
+    if not src_dir.is_dir():
+        return carry
+    index = index or TestIdIndex()
+    api_of = {cid: key for key, section in carry.sections for cid in CASE_ROW_PATTERN.findall(section)}
+
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            src = Path(dirpath) / name
+            rel = src.relative_to(src_dir)
+            if str(rel) in SKELETON_FILES:
+                continue
+            dst = dst_dir / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if not (name.startswith("test_") and name.endswith(".py")):
+                shutil.copy2(src, dst)
+                continue
+
+            functions = index.functions(src)
+            stale = [f for f in functions if f.testcase_id in carry.dropped_ids]
+            if not stale:
+                shutil.copy2(src, dst)
+                carry.files += 1
+                continue
+            if all(f in stale for f in functions if f.name.startswith("test")):
+                carry.functions_removed += len(stale)
+                continue
+
+            source = _remove_functions(src.read_text(encoding="utf-8"), stale)
+            try:
+                ast.parse(source)
+            except SyntaxError:
+                logger.warning(f"Cannot carry over {rel} after removing stale tests, regenerating its cases")
+                for f in functions:
+                    if f.testcase_id in carry.kept_ids and f.testcase_id in api_of:
+                        carry.regenerate[f.testcase_id] = api_of[f.testcase_id]
+                continue
+            dst.write_text(source, encoding="utf-8")
+            carry.files += 1
+            carry.functions_removed += len(stale)
+    return carry
+
+
+def _remove_functions(source: str, functions: List[Any]) -> str:
+    """按行号删除函数 (含装饰器及紧邻其上的注释行)"""
+    lines = source.splitlines(keepends=True)
+    drop: Set[int] = set()
+    for f in functions:
+        start = f.first_lineno - 1
+        while start > 0 and lines[start - 1].strip().startswith("#"):
+            start -= 1
+        drop.update(range(start, f.end_lineno))
+    return "".join(line for i, line in enumerate(lines) if i not in drop)
@@ -0,0 +1,193 @@
+"""
+SpecLoader - Swagger/OpenAPI 文档加载与解析缓存
+
+大型规范 (数十 MB 的 YAML) 的解析耗时主要在 YAML 解析本身:
+- YAML 优先使用 libyaml 的 CSafeLoader (PyYAML 未编译 libyaml 时回退到纯 Python 的 SafeLoader)
+- 解析缓存: InputParser 规范化后的结果 (基本信息、接口列表、components) 按文件内容 sha256 缓存，
+  同一文件再次加载时跳过 YAML/JSON 解析和规范化。条目使用 marshal 格式 (只含 dict/list/str 等基本类型，
+  加载速度约为 json 的 2 倍；格式随 Python 版本变化，缓存键包含解释器版本)，加载期间暂停 GC
+- 结构共享: 规范化时内容相同的 schema/参数/响应子树合并为同一对象，字符串去重 (StructureSharer)，
+  marshal 保留对象引用，命中缓存时同样共享
+
+目录结构:
+    <cache_dir>/<sha256>.bin        规范化结果，mtime 即最近访问时间
+"""
+
+import gc
+import hashlib
+import logging
+import marshal
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from .response_cache import _atomic_write
+
+logger = logging.getLogger(__name__)
+
+# 规范化逻辑或条目格式变化时递增，使旧条目失效
+SPEC_CACHE_VERSION = 2
+
+YAML_SUFFIXES = (".yaml", ".yml")
+
+
+class StructureSharer:
+    """结构共享 (hash-consing): 内容相同的 dict/list 子树返回同一个对象，相同的字符串只保留一份
+
+    生成的规范中每个接口都内联相同的响应包装、分页参数和基础类型 schema ({"type": "string"} 等)，
+    共享后内存占用随不同结构的数量而不是接口数增长。结果只读，调用方不得修改。
+
+    使用方式:
+        sharer = StructureSharer()
+        endpoint["responses"] = sharer.share(details.get("responses", {}))
+    """
+
+    def __init__(self):
+        self._pool: Dict[Any, Any] = {}         # 结构签名 -> 共享对象
+        self._strings: Dict[str, str] = {}
+        self._seen: Dict[int, Tuple[Any, Any]] = {}     # id(输入节点) -> (输入节点, 共享对象)，已处理的子树不再遍历
+
+    def string(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def share(self, node: Any) -> Any:
+        if isinstance(node, str):
+            return self.string(node)
+        if not isinstance(node, (dict, list)):
+            return node
+        seen = self._seen.get(id(node))
+        if seen is not None:
+            return seen[1]
+
+        if isinstance(node, dict):
+            items = [(self.string(k) if isinstance(k, str) else k, self.share(v)) for k, v in node.items()]
+            signature = ("d",) + tuple((k, self._signature(v)) for k, v in items)
+        else:
+            items = [self.share(v) for v in node]
+            signature = ("l",) + tuple(self._signature(v) for v in items)
+
+        shared = self._pool.get(signature)
+        if shared is None:
+            shared = dict(items) if isinstance(node, dict) else items
+            self._pool[signature] = shared
+        # 同时持有输入节点，保证其 id 在共享器存活期间不被复用
+        self._seen[id(node)] = (node, shared)
+        return shared
+
+    @staticmethod
+    def _signature(value: Any) -> Any:
+        # 子节点已共享: 容器按对象身份，标量按 (类型, 值) 区分 True / 1 / 1.0
+        if isinstance(value, (dict, list)):
+            return id(value)
+        return type(value), value
+
+
+def yaml_loader():
+    """可用的最快安全 Loader (CSafeLoader 比 SafeLoader 快约一个数量级)"""
+    import yaml
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(content: str) -> Any:
+    import yaml
+    return yaml.load(content, Loader=yaml_loader())
+
+
+class SpecParseCache:
+    """规范解析缓存 (线程安全，多个进程共享目录时依赖原子写入)
+
+    使用方式:
+        cache = SpecParseCache("output/.cache/spec")
+        key = cache.key(data, ".yaml")
+        normalized = cache.load(key)
+        if normalized is None:
+            normalized = parse_and_normalize(data)
+            cache.store(key, normalized)
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 20):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: bytes, suffix: str = ".json") -> str:
+        """缓存键: 版本 + 解释器版本 + 解析方式 + 内容哈希"""
+        kind = "yaml" if suffix.lower() in YAML_SUFFIXES else "json"
+        python = "%d.%d" % sys.version_info[:2]
+        digest = hashlib.sha256(f"v{SPEC_CACHE_VERSION}:py{python}:{kind}:".encode("utf-8"))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        # 数十万个 dict/list 连续分配会反复触发 GC 扫描，加载期间暂停
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            entry = marshal.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, TypeError) as e:
+            logger.debug(f"Corrupted spec cache entry {path.name}: {e}")
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not isinstance(entry, dict) or entry.get("cache_version") != SPEC_CACHE_VERSION:
+            return None
+        try:
+            path.touch()
+        except OSError:
+            pass
+        return entry
+
+    def store(self, key: str, normalized: Dict[str, Any]) -> None:
+        entry = dict(normalized, cache_version=SPEC_CACHE_VERSION)
+        try:
+            with self._lock:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                try:
+                    data = marshal.dumps(entry)
+                except ValueError:
+                    # YAML 中的日期等 marshal 不支持的类型: 转为与 JSON 规范一致的字符串
+                    data = marshal.dumps(_plain(entry))
+                _atomic_write(self._path(key), data)
+                self._prune()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to write spec cache: {e}")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def _prune(self) -> None:
+        """按最近访问时间保留 max_entries 个条目"""
+        entries = []
+        for path in self.cache_dir.glob("*.bin"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort(key=lambda e: e[0], reverse=True)
+        for _, path in entries[self.max_entries:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _plain(node: Any) -> Any:
+    """转换为 marshal 支持的基本类型 (date/datetime 等转为 ISO 字符串)"""
+    if isinstance(node, dict):
+        return {str(k): _plain(v) for k, v in node.items()}
+    if isinstance(node, (list, tuple)):
+        return [_plain(v) for v in node]
+    if node is None or isinstance(node, (str, int, float, bool)):
+        return node
+    return node.isoformat() if hasattr(node, "isoformat") else str(node)
+
+
+def default_spec_cache_dir(output_dir: str) -> str:
+    """默认缓存目录: 输出根目录下的 .cache/spec (多次执行、多个 Web 任务共享)"""
+    return str(Path(output_dir).resolve().parent / ".cache" / "spec")
@@ -0,0 +1,442 @@
+"""
+SpecSlicer - Swagger 切片
+
+规划/生成 Prompt 原先内嵌完整的 raw_content，上千接口的规范会产生数 MB 的 Prompt。
+切片器将规范转换为紧凑的接口视图，并只选择当前阶段/分块需要的接口和 Schema:
+
+- $ref 解析: 使用 RefResolver (ref_resolver.py)
+- 接口视图: 参数 / 请求体 Schema / 响应码，一个接口几行
+- Schema 区: 被选中接口引用的具名 Schema (递归收集，每个只输出一次)
+- 选择: 按接口或资源选择，可借助 DependencyAnalysisResult 自动带上依赖的提供者接口
+- 统计: 每个 Prompt 的字节数 / 估算 token 数及节省比例
+
+使用方式:
+    slicer = SpecSlicer(context.swagger)
+    spec_slice = slicer.slice("generation", resources=["orders"], analysis=context.dependency_analysis)
+    prompt = template.format(swagger_content=spec_slice.text)
+    logger.info(spec_slice.stats.summary())
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
+
+from ..models import SwaggerSpec
+from .ref_resolver import RefResolver, ref_name
+
+logger = logging.getLogger(__name__)
+
+# 内联 (匿名) Schema 的最大展开深度
+MAX_INLINE_DEPTH = 3
+# 单个 Schema 最多列出的属性数
+MAX_PROPERTIES = 60
+# 枚举最多列出的取值数
+MAX_ENUM_VALUES = 12
+# 描述截断长度 (接口 / 具名 Schema 属性)
+MAX_DESCRIPTION = 60
+MAX_PROPERTY_DESCRIPTION = 24
+
+
+def endpoint_key(endpoint: Dict[str, Any]) -> str:
+    """接口唯一标识: "METHOD /path" """
+    return f"{endpoint.get('method', '').upper()} {endpoint.get('path', '')}"
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数: CJK 字符按 1 个，其余按 4 个字符 1 个"""
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class SliceStats:
+    """切片统计"""
+    phase: str
+    endpoints_total: int
+    endpoints_selected: int
+    schemas_selected: int
+    original_bytes: int
+    sliced_bytes: int
+    original_tokens: int
+    sliced_tokens: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.sliced_bytes
+
+    @property
+    def saved_ratio(self) -> float:
+        if not self.original_bytes:
+            return 0.0
+        return self.saved_bytes / self.original_bytes * 100
+
+    def summary(self) -> str:
+        return (
+            f"Swagger 切片[{self.phase}]: 接口 {self.endpoints_selected}/{self.endpoints_total}, "
+            f"Schema {self.schemas_selected}, "
+            f"{self.original_bytes / 1024:.1f} KB → {self.sliced_bytes / 1024:.1f} KB "
+            f"(节省 {self.saved_ratio:.0f}%), "
+            f"~{self.original_tokens} → ~{self.sliced_tokens} tokens"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "phase": self.phase,
+            "endpoints_total": self.endpoints_total,
+            "endpoints_selected": self.endpoints_selected,
+            "schemas_selected": self.schemas_selected,
+            "original_bytes": self.original_bytes,
+            "sliced_bytes": self.sliced_bytes,
+            "original_tokens": self.original_tokens,
+            "sliced_tokens": self.sliced_tokens,
+            "saved_ratio": round(self.saved_ratio, 1)
+        }
+
+
+@dataclass
+class SpecSlice:
+    """一次切片的结果"""
+    text: str
+    endpoints: List[str] = field(default_factory=list)     # 选中的接口 ("METHOD /path")
+    schemas: List[str] = field(default_factory=list)       # 输出的具名 Schema
+    stats: Optional[SliceStats] = None
+
+
+class SpecSlicer:
+    """Swagger 切片器
+
+    接口视图和 Schema 渲染结果会缓存，同一规范多次切片 (不同阶段 / 分块) 只计算一次。
+    """
+
+    def __init__(self, swagger: SwaggerSpec):
+        self.swagger = swagger
+        self.resolver = RefResolver(swagger.components)
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        for ep in swagger.endpoints:
+            self._endpoints.setdefault(endpoint_key(ep), ep)
+        self._views: Dict[str, Tuple[str, Set[str]]] = {}     # 接口 -> (视图文本, 直接引用的 Schema)
+        self._schema_text: Dict[str, Tuple[str, Set[str]]] = {}  # Schema -> (文本, 引用的 Schema)
+        self._original_bytes: Optional[int] = None
+        self._original_tokens: Optional[int] = None
+
+    @property
+    def endpoint_keys(self) -> List[str]:
+        return list(self._endpoints)
+
+    # ---------- 选择 ----------
+
+    def select(
+        self,
+        endpoints: Optional[Iterable[Any]] = None,
+        resources: Optional[Iterable[str]] = None,
+        analysis: Optional[Any] = None,
+        with_dependencies: bool = True
+    ) -> List[str]:
+        """选择接口
+
+        Args:
+            endpoints: 接口 dict / EndpointRef / "METHOD /path"
+            resources: 资源名 (DependencyAnalysisResult.resources 的键)
+            analysis: 依赖分析结果；with_dependencies 时追加被选接口依赖的提供者接口
+            均为空时选择全部接口
+
+        Returns:
+            按规范中原始顺序排列的接口标识
+        """
+        if endpoints is None and resources is None:
+            return list(self._endpoints)
+
+        selected: Set[str] = set()
+        for ep in endpoints or []:
+            key = _key_of(ep)
+            if key in self._endpoints:
+                selected.add(key)
+
+        if resources and analysis is not None:
+            for name in resources:
+                res = analysis.resources.get(name)
+                if res is None:
+                    continue
+                for ref in res.endpoints:
+                    key = _key_of(ref)
+                    if key in self._endpoints:
+                        selected.add(key)
+
+        if with_dependencies and analysis is not None:
+            extra: Set[str] = set()
+            for dep in analysis.dependencies:
+                if _key_of(dep.consumer) in selected:
+                    extra.update(_key_of(p) for p in dep.producers)
+            selected.update(k for k in extra if k in self._endpoints)
+
+        return [key for key in self._endpoints if key in selected]
+
+    # ---------- 切片 ----------
+
+    def slice(
+        self,
+        phase: str,
+        endpoints: Optional[Iterable[Any]] = None,
+        resources: Optional[Iterable[str]] = None,
+        analysis: Optional[Any] = None,
+        with_dependencies: bool = True
+    ) -> SpecSlice:
+        """生成切片文本及统计 (参数同 select)"""
+        keys = self.select(endpoints, resources, analysis, with_dependencies)
+
+        blocks = []
+        direct: Set[str] = set()
+        for key in keys:
+            text, refs = self._view(key)
+            blocks.append(text)
+            direct.update(refs)
+        schemas = self._collect_schemas(direct)
+
+        header = f"API: {self.swagger.title} v{self.swagger.version}"
+        if self.swagger.base_path:
+            header += f" (basePath: {self.swagger.base_path})"
+        lines = [
+            header,
+            f"接口 {len(keys)}/{len(self._endpoints)} 个 (紧凑视图: `*` 必填, `Name` 见下方 Schemas)",
+            ""
+        ]
+        lines.append("\n\n".join(blocks))
+        if schemas:
+            lines.append("")
+            lines.append("#### Schemas")
+            lines.extend(self._schema_text[name][0] for name in schemas)
+        text = "\n".join(lines)
+
+        stats = SliceStats(
+            phase=phase,
+            endpoints_total=len(self._endpoints),
+            endpoints_selected=len(keys),
+            schemas_selected=len(schemas),
+            original_bytes=self.original_bytes,
+            sliced_bytes=len(text.encode("utf-8")),
+            original_tokens=self.original_tokens,
+            sliced_tokens=estimate_tokens(text)
+        )
+        return SpecSlice(text=text, endpoints=keys, schemas=schemas, stats=stats)
+
+    @property
+    def original_bytes(self) -> int:
+        if self._original_bytes is None:
+            self._original_bytes = len(self.swagger.raw_text.encode("utf-8"))
+        return self._original_bytes
+
+    @property
+    def original_tokens(self) -> int:
+        if self._original_tokens is None:
+            self._original_tokens = estimate_tokens(self.swagger.raw_text)
+        return self._original_tokens
+
+    # ---------- 接口视图 ----------
+
+    def _view(self, key: str) -> Tuple[str, Set[str]]:
+        cached = self._views.get(key)
+        if cached is not None:
+            return cached
+
+        ep = self._endpoints[key]
+        refs: Set[str] = set()
+        title = f"### {key}"
+        op_id = ep.get("operationId")
+        # InputParser 对缺失的 operationId 填充 "method_path"，不输出
+        if op_id and op_id.lower() != f"{ep.get('method', '')}_{ep.get('path', '')}".lower():
+            title += f" [{op_id}]"
+        summary = _short(ep.get("summary") or ep.get("description") or "")
+        if summary:
+            title += f" {summary}"
+        lines = [title]
+
+        tags = ep.get("tags") or []
+        if tags:
+            lines.append(f"tags: {', '.join(str(t) for t in tags)}")
+
+        params = []
+        for param in ep.get("parameters") or []:
+            param, _ = self.resolver.deref(param)
+            if not isinstance(param, dict) or param.get("in") == "body":
+                continue
+            schema = param.get("schema", param)
+            mark = "*" if param.get("required") else ""
+            params.append(f"{param.get('in', 'query')} {param.get('name', '')}{mark} {self._type(schema, refs, 0)}")
+        if params:
+            lines.append("params: " + "; ".join(params))
+
+        body = ep.get("requestBody")
+        if body:
+            body_line = self._body(body, refs)
+            if body_line:
+                lines.append(body_line)
+
+        responses = []
+        for code, response in (ep.get("responses") or {}).items():
+            response, _ = self.resolver.deref(response)
+            if not isinstance(response, dict):
+                responses.append(str(code))
+                continue
+            schema = _response_schema(response)
+            desc = _short(response.get("description", ""), 30)
+            part = str(code)
+            if schema is not None:
+                part += f" {self._type(schema, refs, 0)}"
+            elif desc:
+                part += f" {desc}"
+            responses.append(part)
+        if responses:
+            lines.append("responses: " + "; ".join(responses))
+
+        result = ("\n".join(lines), refs)
+        self._views[key] = result
+        return result
+
+    def _body(self, body: Dict[str, Any], refs: Set[str]) -> str:
+        body, _ = self.resolver.deref(body)
+        if not isinstance(body, dict):
+            return ""
+        mark = "*" if body.get("required") else ""
+        if "schema" in body:
+            # Swagger 2.x body 参数
+            return f"body{mark}: {self._type(body['schema'], refs, 0)}"
+        content = body.get("content") or {}
+        for media_type, media in content.items():
+            if isinstance(media, dict) and "schema" in media:
+                return f"body{mark} ({media_type}): {self._type(media['schema'], refs, 0)}"
+        return ""
+
+    # ---------- Schema ----------
+
+    def _type(self, schema: Any, refs: Set[str], depth: int) -> str:
+        """Schema 的紧凑类型表示，具名 Schema 只输出名称并记录到 refs"""
+        if not isinstance(schema, dict):
+            return "any"
+        ref = schema.get("$ref")
+        if isinstance(ref, str):
+            name = ref_name(ref)
+            if self.resolver.lookup(ref) is not None:
+                refs.add(ref)
+            return name
+
+        for combinator in ("allOf", "oneOf", "anyOf"):
+            if combinator in schema and isinstance(schema[combinator], list):
+                sep = " & " if combinator == "allOf" else " | "
+                parts = [self._type(s, refs, depth) for s in schema[combinator]]
+                return "(" + sep.join(parts) + ")"
+
+        schema_type = schema.get("type")
+        if schema_type == "array" or "items" in schema:
+            return f"[{self._type(schema.get('items', {}), refs, depth)}]"
+        if schema_type == "object" or "properties" in schema:
+            props = schema.get("properties") or {}
+            if not props:
+                extra = schema.get("additionalProperties")
+                if isinstance(extra, dict):
+                    return f"map<{self._type(extra, refs, depth)}>"
+                return "object"
+            if depth >= MAX_INLINE_DEPTH:
+                return "object{...}"
+            return self._properties(schema, refs, depth + 1)
+
+        text = str(schema_type or "any")
+        if schema.get("format"):
+            text += f"({schema['format']})"
+        constraints = _constraints(schema)
+        if constraints:
+            text += f"<{constraints}>"
+        return text
+
+    def _properties(
+        self,
+        schema: Dict[str, Any],
+        refs: Set[str],
+        depth: int,
+        with_description: bool = False
+    ) -> str:
+        required = set(schema.get("required") or [])
+        parts = []
+        items = list((schema.get("properties") or {}).items())
+        for name, prop in items[:MAX_PROPERTIES]:
+            mark = "*" if name in required else ""
+            part = f"{name}{mark}: {self._type(prop, refs, depth)}"
+            if with_description and isinstance(prop, dict) and prop.get("description"):
+                part += f' "{_short(prop["description"], MAX_PROPERTY_DESCRIPTION)}"'
+            parts.append(part)
+        if len(items) > MAX_PROPERTIES:
+            parts.append(f"... +{len(items) - MAX_PROPERTIES}")
+        return "{" + ", ".join(parts) + "}"
+
+    def _collect_schemas(self, direct: Set[str]) -> List[str]:
+        """递归收集被引用的具名 Schema (按名称排序)，返回引用路径列表"""
+        seen: Set[str] = set()
+        pending = list(direct)
+        while pending:
+            ref = pending.pop()
+            if ref in seen:
+                continue
+            seen.add(ref)
+            _, nested = self._schema(ref)
+            pending.extend(nested - seen)
+        return sorted(seen, key=lambda r: (ref_name(r), r))
+
+    def _schema(self, ref: str) -> Tuple[str, Set[str]]:
+        cached = self._schema_text.get(ref)
+        if cached is not None:
+            return cached
+        target = self.resolver.lookup(ref)
+        refs: Set[str] = set()
+        if isinstance(target, dict) and ("properties" in target or target.get("type") == "object"):
+            body = self._properties(target, refs, 1, with_description=True) if target.get("properties") else "object"
+        else:
+            body = self._type(target, refs, 0)
+        line = f"- {ref_name(ref)}: {body}"
+        desc = _short(target.get("description", "")) if isinstance(target, dict) else ""
+        if desc:
+            line += f"  # {desc}"
+        result = (line, refs)
+        self._schema_text[ref] = result
+        return result
+
+
+def _key_of(item: Any) -> str:
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        return endpoint_key(item)
+    return f"{getattr(item, 'method', '').upper()} {getattr(item, 'path', '')}"
+
+
+def _response_schema(response: Dict[str, Any]) -> Optional[Any]:
+    if "schema" in response:
+        return response["schema"]
+    for media in (response.get("content") or {}).values():
+        if isinstance(media, dict) and "schema" in media:
+            return media["schema"]
+    return None
+
+
+def _constraints(schema: Dict[str, Any]) -> str:
+    """枚举、长度、范围、格式约束 (边界用例需要)"""
+    parts = []
+    enum = schema.get("enum")
+    if isinstance(enum, list) and enum:
+        values = "|".join(json.dumps(v, ensure_ascii=False) for v in enum[:MAX_ENUM_VALUES])
+        if len(enum) > MAX_ENUM_VALUES:
+            values += "|..."
+        parts.append(f"enum {values}")
+    for low, high, label in (("minLength", "maxLength", "len"), ("minimum", "maximum", "range"),
+                             ("minItems", "maxItems", "items")):
+        if low in schema or high in schema:
+            parts.append(f"{label} {schema.get(low, '')}..{schema.get(high, '')}")
+    if schema.get("pattern"):
+        parts.append(f"pattern {schema['pattern']}")
+    if "default" in schema:
+        parts.append(f"default {json.dumps(schema['default'], ensure_ascii=False, default=str)}")
+    return ", ".join(parts)
+
+
+def _short(text: Any, limit: int = MAX_DESCRIPTION) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
@@ -0,0 +1,79 @@
+"""
+Stream IO - 子进程流式输出的辅助工具
+
+包含:
+- LineFramer: 在 bytearray 上做增量行切分，避免字符串反复拼接/切分
+- NdjsonTranscript: 将原始事件行追加写入磁盘 (可选的完整记录)
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional, List
+
+logger = logging.getLogger(__name__)
+
+
+class LineFramer:
+    """增量行切分器
+
+    使用方式:
+        framer = LineFramer()
+        for line in framer.feed(os.read(fd, 65536)):
+            ...
+        tail = framer.flush()   # EOF 时取出最后不完整的一行
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """追加数据，返回所有完整行 (不含换行符)"""
+        if not data:
+            return []
+        has_newline = b"\n" in data
+        self._buffer += data
+        if not has_newline:
+            return []
+
+        end = self._buffer.rfind(b"\n")
+        lines = bytes(self._buffer[:end]).split(b"\n")
+        del self._buffer[:end + 1]
+        return lines
+
+    def flush(self) -> Optional[bytes]:
+        """取出剩余的不完整行"""
+        if not self._buffer:
+            return None
+        rest = bytes(self._buffer)
+        self._buffer.clear()
+        return rest
+
+    @property
+    def pending(self) -> int:
+        """缓冲区中尚未成行的字节数"""
+        return len(self._buffer)
+
+
+class NdjsonTranscript:
+    """NDJSON 记录文件 (追加写，多个适配器可共享同一路径)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 无缓冲追加 (O_APPEND): 每行一次 write，多个实例并发写入时行不会交错
+        self._file = open(self.path, "ab", buffering=0)
+
+    def write(self, line: bytes) -> None:
+        self._file.write(line.rstrip(b"\r\n") + b"\n")
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+        except Exception as e:
+            logger.debug(f"Failed to close transcript {self.path}: {e}")
+
+    def __enter__(self) -> "NdjsonTranscript":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
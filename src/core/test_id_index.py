@@ -0,0 +1,218 @@
+"""
+TestIdIndex - 测试函数索引
+
+负责:
+- 每个测试文件只用 ast 解析一次，建立 函数/方法 -> (用例 ID, 行号范围) 的映射
+- 按 文件路径 + mtime/size 缓存，文件被自愈修改后自动重建
+- 缓存 JUnit classname -> 文件路径 的解析结果，避免每个用例重复探测文件
+
+由 PytestRunner (用例 ID 提取) 和 PromptBuilder (自愈 Prompt 中的函数位置) 共享同一实例。
+"""
+
+import ast
+import os
+import re
+import stat
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 用例 ID 注释: # TestCase: TC-001
+TESTCASE_PATTERN = re.compile(r'#\s*TestCase:\s*(TC-\d+)')
+# 语法错误时的回退扫描
+DEF_PATTERN = re.compile(r'^\s*(?:async\s+)?def\s+(\w+)\s*\(')
+# 注释允许出现在 def (或第一个装饰器) 上方的最大行数
+COMMENT_WINDOW = 4
+
+
+@dataclass
+class TestFunctionInfo:
+    """测试函数信息"""
+    qualname: str                   # TestOrderAPI.test_create / test_create
+    testcase_id: Optional[str]      # TC-XXX
+    lineno: int                     # def 所在行 (1-based)
+    end_lineno: int                 # 函数最后一行
+    first_lineno: int               # 第一个装饰器所在行 (无装饰器时等于 lineno)
+
+    @property
+    def name(self) -> str:
+        return self.qualname.rsplit(".", 1)[-1]
+
+
+@dataclass
+class _FileIndex:
+    """单个文件的索引"""
+    stamp: Tuple[int, int]                      # (mtime_ns, size)
+    by_qualname: Dict[str, TestFunctionInfo]
+    by_name: Dict[str, TestFunctionInfo]        # 同名方法取第一个
+
+
+class TestIdIndex:
+    """测试函数索引 (线程安全)
+
+    使用方式:
+        index = TestIdIndex()
+        index.testcase_id("tests/test_order_api.py", "TestOrderAPI::test_create")
+        index.line_range("tests/test_order_api.py", "test_create")
+    """
+
+    def __init__(self):
+        self._files: Dict[str, _FileIndex] = {}
+        self._classnames: Dict[Tuple[str, str], Tuple[str, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, file_path, function_name: str) -> Optional[TestFunctionInfo]:
+        """查找测试函数
+
+        Args:
+            file_path: 测试文件路径
+            function_name: test_x / Class::test_x / Class.test_x，可带参数化后缀 [..]
+        """
+        index = self._get(file_path)
+        if index is None:
+            return None
+
+        name = function_name.split("[", 1)[0].replace("::", ".")
+        info = index.by_qualname.get(name)
+        if info is None:
+            info = index.by_name.get(name.rsplit(".", 1)[-1])
+        return info
+
+    def testcase_id(self, file_path, function_name: str) -> Optional[str]:
+        """获取用例 ID (# TestCase 注释)"""
+        info = self.lookup(file_path, function_name)
+        return info.testcase_id if info else None
+
+    def line_range(self, file_path, function_name: str) -> Optional[Tuple[int, int]]:
+        """获取函数行号范围 (含装饰器)"""
+        info = self.lookup(file_path, function_name)
+        return (info.first_lineno, info.end_lineno) if info else None
+
+    def functions(self, file_path) -> List[TestFunctionInfo]:
+        """文件中的所有函数 (按行号排序)"""
+        index = self._get(file_path)
+        if index is None:
+            return []
+        return sorted(index.by_qualname.values(), key=lambda f: f.lineno)
+
+    def resolve_classname(self, classname: str, test_dir: Path) -> Tuple[Optional[str], List[str]]:
+        """将 JUnit classname 拆分为 (文件路径, 类名列表)
+
+        classname 相对 pytest rootdir: pytest.ini 位于测试目录时为 test_order_api.TestOrderAPI，
+        否则带目录前缀 tests.test_order_api.TestOrderAPI，因此同时尝试测试目录及其父目录。
+        """
+        key = (classname, str(test_dir))
+        cached = self._classnames.get(key)
+        if cached is not None and Path(cached[0]).exists():
+            return cached[0], list(cached[1])
+
+        parts = classname.split('.')
+        for base in (test_dir, test_dir.parent):
+            for i in range(len(parts)):
+                full_path = base / ('/'.join(parts[:i + 1]) + '.py')
+                if full_path.exists():
+                    resolved = (str(full_path), parts[i + 1:])
+                    with self._lock:
+                        self._classnames[key] = resolved
+                    return resolved[0], list(resolved[1])
+
+        # 未找到不缓存: 文件可能稍后才生成
+        return None, []
+
+    def invalidate(self, file_path=None) -> None:
+        """清除缓存 (不指定文件则全部清除)"""
+        with self._lock:
+            if file_path is None:
+                self._files.clear()
+                self._classnames.clear()
+            else:
+                self._files.pop(os.fspath(file_path), None)
+
+    def _get(self, file_path) -> Optional[_FileIndex]:
+        key = os.fspath(file_path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        path = Path(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+        index = self._files.get(key)
+        if index is not None and index.stamp == stamp:
+            return index
+
+        try:
+            source = path.read_text(encoding='utf-8')
+        except Exception as e:
+            logger.warning(f"Failed to read test file {path}: {e}")
+            return None
+
+        index = self._build(source, stamp, path)
+        with self._lock:
+            self._files[key] = index
+        return index
+
+    def _build(self, source: str, stamp: Tuple[int, int], path: Path) -> _FileIndex:
+        lines = source.split('\n')
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            # 语法自愈的文件无法解析，回退到逐行扫描 (仅模块级名称)
+            logger.debug(f"AST parse failed for {path}, falling back to line scan: {e}")
+            functions = self._scan_lines(lines)
+        else:
+            functions = []
+            self._walk(tree.body, "", lines, functions)
+
+        by_qualname: Dict[str, TestFunctionInfo] = {}
+        by_name: Dict[str, TestFunctionInfo] = {}
+        for info in functions:
+            by_qualname.setdefault(info.qualname, info)
+            by_name.setdefault(info.name, info)
+        return _FileIndex(stamp=stamp, by_qualname=by_qualname, by_name=by_name)
+
+    def _walk(self, body, prefix: str, lines: List[str], out: List[TestFunctionInfo]) -> None:
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                self._walk(node.body, f"{prefix}{node.name}.", lines, out)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                first = min([d.lineno for d in node.decorator_list] + [node.lineno])
+                out.append(TestFunctionInfo(
+                    qualname=prefix + node.name,
+                    testcase_id=self._find_comment(lines, node.lineno, first),
+                    lineno=node.lineno,
+                    end_lineno=getattr(node, "end_lineno", None) or node.lineno,
+                    first_lineno=first
+                ))
+
+    def _scan_lines(self, lines: List[str]) -> List[TestFunctionInfo]:
+        functions: List[TestFunctionInfo] = []
+        for i, line in enumerate(lines):
+            match = DEF_PATTERN.match(line)
+            if not match:
+                continue
+            if functions:
+                functions[-1].end_lineno = i
+            functions.append(TestFunctionInfo(
+                qualname=match.group(1),
+                testcase_id=self._find_comment(lines, i + 1, i + 1),
+                lineno=i + 1,
+                end_lineno=len(lines),
+                first_lineno=i + 1
+            ))
+        return functions
+
+    @staticmethod
+    def _find_comment(lines: List[str], def_lineno: int, first_lineno: int) -> Optional[str]:
+        """从 def 行向上查找 # TestCase 注释，范围覆盖装饰器及其上方 COMMENT_WINDOW 行"""
+        for j in range(def_lineno - 2, max(first_lineno - 2 - COMMENT_WINDOW, -1), -1):
+            match = TESTCASE_PATTERN.search(lines[j])
+            if match:
+                return match.group(1)
+        return None
@@ -0,0 +1,177 @@
+"""
+TestScheduler - 并行测试调度器
+
+负责:
+- 收集测试文件并根据其访问的接口分组
+- 同一资源的测试文件归入同一组，组内按依赖拓扑顺序排列 (保持生产者/消费者顺序)
+- 将相互独立的组分配到 N 个 worker，按用例数做负载均衡
+"""
+
+import re
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Tuple
+
+from ..models.dependency import DependencyAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+# 统计测试函数数量，用作负载权重
+TEST_FUNC_PATTERN = re.compile(r'^\s*(?:async\s+)?def\s+test_\w*\s*\(', re.MULTILINE)
+
+
+@dataclass
+class TestGroup:
+    """调度分组: 组内文件必须串行执行"""
+    files: List[str] = field(default_factory=list)      # 相对测试目录的文件路径 (已排序)
+    resources: List[str] = field(default_factory=list)  # 涉及的资源名
+    weight: int = 0                                     # 测试函数数量
+    order: int = 0                                      # 组内最早接口在拓扑序中的位置
+
+    def to_dict(self):
+        return {
+            "files": self.files,
+            "resources": self.resources,
+            "weight": self.weight,
+            "order": self.order
+        }
+
+
+class TestScheduler:
+    """并行测试调度器
+
+    使用 DependencyAnalysisResult.sorted_endpoints 判断每个测试文件访问的接口:
+    - 访问相同资源的文件合并为一组，组内按最早接口的拓扑位置排序
+    - 没有依赖分析结果时，每个文件独立成组
+    """
+
+    def __init__(self, analysis: Optional[DependencyAnalysisResult] = None):
+        self.analysis = analysis
+
+    def collect_files(self, test_dir: Path) -> List[Path]:
+        """收集测试文件 (与 pytest 默认发现规则一致)"""
+        files = set(test_dir.rglob("test_*.py")) | set(test_dir.rglob("*_test.py"))
+        return sorted(files)
+
+    def plan(self, test_dir: Path, workers: int) -> List[List[str]]:
+        """生成每个 worker 的执行文件列表
+
+        Returns:
+            List[List[str]]: 每个 worker 按顺序执行的文件 (相对 test_dir)，空 worker 会被省略
+        """
+        files = self.collect_files(test_dir)
+        groups = self.group(test_dir, files)
+        return self.assign(groups, workers)
+
+    def group(self, test_dir: Path, files: List[Path]) -> List[TestGroup]:
+        """按资源对测试文件分组"""
+        endpoint_index = self._build_endpoint_index()
+
+        # 文件 -> (涉及资源, 最早接口位置, 权重)
+        file_info: Dict[str, Tuple[List[str], int, int]] = {}
+        for path in files:
+            rel = str(path.relative_to(test_dir))
+            try:
+                content = path.read_text(encoding="utf-8")
+            except Exception as e:
+                logger.warning(f"Failed to read test file {path}: {e}")
+                content = ""
+
+            resources: List[str] = []
+            first_pos = len(endpoint_index)
+            for literal, pos, resource in endpoint_index:
+                if literal in content:
+                    if resource not in resources:
+                        resources.append(resource)
+                    first_pos = min(first_pos, pos)
+
+            weight = max(len(TEST_FUNC_PATTERN.findall(content)), 1)
+            file_info[rel] = (resources, first_pos, weight)
+
+        # 并查集: 共享资源的文件合并
+        parent: Dict[str, str] = {rel: rel for rel in file_info}
+
+        def find(x: str) -> str:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        owner: Dict[str, str] = {}
+        for rel, (resources, _, _) in file_info.items():
+            for res in resources:
+                if res in owner:
+                    parent[find(rel)] = find(owner[res])
+                else:
+                    owner[res] = rel
+
+        buckets: Dict[str, List[str]] = {}
+        for rel in file_info:
+            buckets.setdefault(find(rel), []).append(rel)
+
+        groups: List[TestGroup] = []
+        for members in buckets.values():
+            # 组内按最早接口的拓扑位置排序，相同位置按文件名
+            members.sort(key=lambda r: (file_info[r][1], r))
+            resources: List[str] = []
+            for rel in members:
+                for res in file_info[rel][0]:
+                    if res not in resources:
+                        resources.append(res)
+            groups.append(TestGroup(
+                files=members,
+                resources=resources,
+                weight=sum(file_info[r][2] for r in members),
+                order=file_info[members[0]][1]
+            ))
+
+        groups.sort(key=lambda g: (g.order, g.files[0]))
+        logger.info(f"Test scheduler: {len(files)} files -> {len(groups)} groups")
+        return groups
+
+    def assign(self, groups: List[TestGroup], workers: int) -> List[List[str]]:
+        """最长任务优先 (LPT) 分配分组到 worker"""
+        workers = max(1, workers)
+        loads = [0] * workers
+        assigned: List[List[TestGroup]] = [[] for _ in range(workers)]
+
+        for g in sorted(groups, key=lambda g: (-g.weight, g.order, g.files[0])):
+            idx = loads.index(min(loads))
+            assigned[idx].append(g)
+            loads[idx] += g.weight
+
+        shards: List[List[str]] = []
+        for worker_groups in assigned:
+            if not worker_groups:
+                continue
+            # worker 内部仍按拓扑顺序执行各组
+            worker_groups.sort(key=lambda g: (g.order, g.files[0]))
+            shards.append([f for g in worker_groups for f in g.files])
+        return shards
+
+    def _build_endpoint_index(self) -> List[Tuple[str, int, str]]:
+        """构建 (路径静态前缀, 拓扑位置, 资源名) 列表
+
+        测试代码中 URL 一般写作 f"{base_url}/v1/orders/{order_id}"，
+        因此使用路径中第一个参数之前的静态部分做匹配。
+        """
+        if not self.analysis or not self.analysis.sorted_endpoints:
+            return []
+
+        # (method, path) -> 资源名
+        resource_of: Dict[Tuple[str, str], str] = {}
+        for name, res in self.analysis.resources.items():
+            for ep in res.endpoints:
+                resource_of[(ep.method.upper(), ep.path)] = name
+
+        index: List[Tuple[str, int, str]] = []
+        for pos, ep in enumerate(self.analysis.sorted_endpoints):
+            path = ep.get("path", "")
+            method = ep.get("method", "").upper()
+            literal = path.split("{", 1)[0].rstrip("/")
+            if len(literal) < 2:
+                continue
+            resource = resource_of.get((method, path), literal)
+            index.append((literal, pos, resource))
+        return index
@@ -10,21 +10,39 @@ WorkflowEngine - 工作流引擎
 
 import logging
 import json
+import re
+import threading
 import time
 from pathlib import Path
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any, Callable
+from typing import Optional, List, Dict, Any, Callable, Tuple
 
 from ..models import (
     TaskContext, FinalReport, BugReport, TestCaseDoc,
-    TestCaseResult, TestStatus, HealingType, BugSeverity, TestMode
+    TestCaseResult, TestStatus, HealingType, BugSeverity, TestMode,
+    JudgeResult, PytestResult, ErrorInfo
 )
 from .cli_adapter import CLIAdapter, CLISession, CLIConfig, ExecutionMode
+from .async_cli_adapter import AsyncCLIAdapter
+from .response_cache import ResponseCache, default_cache_dir
+from .analysis_cache import AnalysisCache, default_analysis_cache_dir
 from .prompt_builder import PromptBuilder
 from .pytest_runner import PytestRunner, PytestConfig
 from .result_judge import ResultJudge
+from .test_id_index import TestIdIndex
+from .healing_scheduler import HealingScheduler, HealingBatch
+from .plan_chunker import PlanChunker, PlanChunk, MergeStats
+from .generation_scheduler import GenerationScheduler, GenerationUnit
+from .preflight import PreflightValidator
+from .rule_fixer import RuleFixerRegistry
+from .failure_cluster import FailureClusterer, FailureCluster
+from .health_probe import HealthProbe, HealthReport, HEALTHY, DEGRADED, select_smoke_nodes
+from .spec_diff import (
+    SpecFingerprints, SpecDiff, diff_fingerprints, find_baseline,
+    carry_over_testcases, carry_over_tests
+)
 from .dependency_analyzer import DependencyAnalyzer
 from .dependency_explorer import DependencyExplorer
 from .skeleton_writer import SkeletonWriter
@@ -33,6 +51,9 @@ from .report_generator import BusinessReportGenerator
 
 logger = logging.getLogger(__name__)
 
+# 同一用例连续规则修复的次数上限 (每次改写后原错误消失才继续)
+MAX_RULE_FIXES = 3
+
 
 class WorkflowState(Enum):
     """工作流状态"""
@@ -53,7 +74,35 @@ class WorkflowConfig:
     max_healing_attempts: int = 3       # 最大自愈次数
     cli_timeout: int = 1200             # CLI 调用超时 (20分钟)
     test_timeout: int = 45              # 单个测试用例超时
+    test_workers: int = 1               # 并行执行测试的 worker 数 (1 = 串行)
+    healing_concurrency: int = 1        # 并发自愈批次数 (1 = 串行，使用主会话)
+    verify_healed: bool = True          # 自愈后仅重跑已修复的用例进行验证
+    warm_pytest_worker: bool = True     # 增量验证使用常驻 pytest worker (省去进程启动)
+    async_cli: bool = False             # 使用 asyncio 实现的 CLI 适配器 (同步接口不变)
+    response_cache: bool = True         # 规划/生成阶段使用 LLM 响应缓存
+    cache_dir: Optional[str] = None     # 缓存目录 (默认: 输出根目录/.cache/llm)
+    analysis_cache: bool = True         # 按规范哈希复用依赖分析结果 (跨运行 / Web 任务共享)
+    analysis_cache_dir: Optional[str] = None  # 依赖分析缓存目录 (默认: 输出根目录/.cache/analysis)
+    slice_swagger: bool = True          # Prompt 中使用 Swagger 切片 (紧凑接口视图) 代替原文
+    plan_chunk_size: int = 40           # 接口数超过该值时按资源分块并发规划 (0 = 不分块，仅接口测试模式)
+    plan_concurrency: int = 3           # 并发规划的分块数
+    plan_chunk_retries: int = 1         # 单个分块失败后的重试次数 (只重试该分块)
+    generation_concurrency: int = 4     # 并行生成的测试文件数 (1 = 单次调用生成全部文件，仅接口测试模式)
+    generation_unit_size: int = 8       # 每个测试文件最多包含的接口数
+    generation_retries: int = 1         # 单个文件生成失败后的重试次数 (只重试该文件)
+    health_check: bool = True           # 执行前并发探测少量 GET 接口: 不可达/鉴权失败时跳过执行，部分异常时只跑冒烟子集
+    health_timeout: float = 3.0         # 健康探测单个请求超时 (秒)
+    health_sample_size: int = 8         # 健康探测的接口数
+    cluster_failures: bool = True       # 按失败签名聚类，每类只判定/自愈一个代表用例
+    rule_fixers: bool = True            # 自愈前先尝试本地规则修复 (缺少 import、fixture 名称等)，修复并重跑通过则不调用 LLM
+    preflight: bool = True              # 执行前本地静态预检 (语法/import/fixture/用例 ID)，剩余问题合并为一次修复调用
+    incremental: bool = False           # 增量模式: 只规划/生成相对上次运行新增或变更的接口 (仅接口测试模式)
+    baseline_dir: Optional[str] = None  # 增量模式的基线运行目录 (默认: 输出根目录下最近一次完成的运行)
     enable_exploration: bool = False    # 是否启用依赖探测（默认关闭）
+    exploration_concurrency: int = 8    # 依赖探测并发请求数
+    exploration_budget: float = 30.0    # 依赖探测全局时间预算 (秒)
+    exploration_depth: int = 3          # 依赖探测最大层级 (用已提取的 ID 填充路径参数逐层探测)
+    exploration_max_requests: int = 500 # 依赖探测请求总数上限
     cancel_event: Optional[Any] = None  # 取消信号（由外部传入 threading.Event）
     on_state_change: Optional[Callable[[WorkflowState, str], None]] = None
     on_log: Optional[Callable[[str, str, str], None]] = None  # (level, phase, message)
@@ -90,25 +139,49 @@ class WorkflowEngine:
             working_dir=str(Path(context.output_dir).parent.parent),  # 项目根目录
             on_output=lambda msg: self._log("info", "cli", msg),  # 实时进度回调
             on_todo_update=self.config.on_todo_update,  # Todo 进度回调
-            cancel_event=self.config.cancel_event
+            cancel_event=self.config.cancel_event,
+            artifact_dir=context.output_dir  # 缓存命中时恢复 CLI 写入的文件
         )
-        self.cli_adapter = CLIAdapter(cli_config)
+        self.response_cache: Optional[ResponseCache] = None
+        if self.config.response_cache:
+            self.response_cache = ResponseCache(
+                self.config.cache_dir or default_cache_dir(context.output_dir)
+            )
+        adapter_cls = AsyncCLIAdapter if self.config.async_cli else CLIAdapter
+        self.cli_adapter = adapter_cls(cli_config, cache=self.response_cache)
         self.cli_session = CLISession(self.cli_adapter)
-        self.prompt_builder = PromptBuilder()
+        # 测试函数索引由执行器和自愈 Prompt 共享 (每个文件只解析一次)
+        self.test_index = TestIdIndex()
+        self.prompt_builder = PromptBuilder(
+            test_index=self.test_index,
+            slice_swagger=self.config.slice_swagger
+        )
         self.pytest_runner = PytestRunner(
             PytestConfig(
                 timeout=self.config.test_timeout,
+                workers=self.config.test_workers,
+                warm_worker=self.config.warm_pytest_worker,
                 on_output=lambda line: self._log("info", "pytest", line.rstrip())
-            )
+            ),
+            test_index=self.test_index
         )
         self.result_judge = ResultJudge(
             context.test_mode,
             self.config.max_healing_attempts
         )
         self.dependency_analyzer = DependencyAnalyzer()
-        # 探测仅做快速 GET 提取，限制超时/数量，避免拖慢流程
+        self.analysis_cache: Optional[AnalysisCache] = None
+        if self.config.analysis_cache:
+            self.analysis_cache = AnalysisCache(
+                self.config.analysis_cache_dir or default_analysis_cache_dir(context.output_dir)
+            )
+        # 探测仅做快速 GET 提取，限制单请求超时和全局时间预算，避免拖慢流程
         self.dependency_explorer = DependencyExplorer(
-            timeout=min(self.config.test_timeout, 5)
+            timeout=min(self.config.test_timeout, 5),
+            concurrency=self.config.exploration_concurrency,
+            time_budget=self.config.exploration_budget,
+            max_depth=self.config.exploration_depth,
+            max_requests=self.config.exploration_max_requests
         )
         self.skeleton_writer = SkeletonWriter(
             base_url=context.config.base_url,
@@ -119,17 +192,43 @@ class WorkflowEngine:
         # 运行时数据
         self.test_results: List[TestCaseResult] = []
         self.bugs: List[BugReport] = []
+        self._lock = threading.Lock()
         self.start_time: Optional[float] = None
         # 测试用例解析器和映射表
         self.testcase_parser = TestCaseParser()
         self.testcase_map: Dict[str, ParsedTestCase] = {}
+        # 接口指纹 (交付时保存，供下次增量运行对比) 及增量模式状态
+        self.spec_fingerprints: Optional[SpecFingerprints] = None
+        self.spec_diff: Optional[SpecDiff] = None
+        self.incremental_targets: Optional[Tuple[List[str], List[str]]] = None  # (接口, 用例 ID)
+        # 分文件生成统计 (每个文件的耗时、尝试次数)
+        self.generation_stats: Dict[str, Any] = {}
+        # 执行前静态预检结果
+        self.preflight_stats: Dict[str, Any] = {}
+        # 规则修复器 (执行阶段创建) 及 LLM 自愈耗时统计，用于估算规则修复节省的时间
+        self.rule_fixers: Optional[RuleFixerRegistry] = None
+        # 执行前环境健康检查结果
+        self.health_report: Optional[HealthReport] = None
+        # 失败聚类: 代表用例 -> 同簇其他用例，以及初始执行的聚类统计
+        self.failure_clusterer = FailureClusterer()
+        self._cluster_members: Dict[int, List[TestCaseResult]] = {}
+        self._cluster_summary: Dict[str, Any] = {}
+        self.cluster_stats: Dict[str, Any] = {}
+        self._llm_heal_seconds = 0.0
+        self._llm_heal_cases = 0
+        # 各阶段耗时 (秒) 及依赖分析缓存情况
+        self.timings: Dict[str, Any] = {}
         # 业务报告生成器
         self.report_generator = BusinessReportGenerator()
 
 
+    def _is_cancelled(self) -> bool:
+        """是否收到取消信号"""
+        return bool(self.config.cancel_event and getattr(self.config.cancel_event, "is_set", lambda: False)())
+
     def _check_cancel(self) -> None:
         """若收到取消信号则中断"""
-        if self.config.cancel_event and getattr(self.config.cancel_event, "is_set", lambda: False)():
+        if self._is_cancelled():
             self._set_state(WorkflowState.CANCELLED, "任务已被取消")
             raise WorkflowCancelled("任务已被取消")
 
@@ -159,24 +258,30 @@ class WorkflowEngine:
             # Phase 1: 规划
             self._check_cancel()
             self._set_state(WorkflowState.PLANNING)
-            self._phase_planning()
+            self._timed("planning", self._phase_planning)
 
             # Phase 2: 生成
             self._check_cancel()
             self._set_state(WorkflowState.GENERATING)
-            self._phase_generation()
+            self._timed("generation", self._phase_generation)
+            if self.config.preflight:
+                self._check_cancel()
+                self._timed("preflight", self._phase_preflight)
 
             # Phase 3: 执行 + 自愈
             self._check_cancel()
             self._set_state(WorkflowState.EXECUTING)
-            self._phase_execution()
+            self._timed("execution", self._phase_execution)
 
             # Phase 4: 交付
             self._check_cancel()
             self._set_state(WorkflowState.FINALIZING)
             report = self._phase_finalization()
 
-            self._set_state(WorkflowState.COMPLETED, f"通过率: {report.pass_rate:.1f}%")
+            if self.health_report is not None and self.health_report.aborted:
+                self._set_state(WorkflowState.COMPLETED, f"环境不可用，已跳过执行: {self.health_report.reason}")
+            else:
+                self._set_state(WorkflowState.COMPLETED, f"通过率: {report.pass_rate:.1f}%")
             return report
 
         except WorkflowCancelled:
@@ -195,6 +300,15 @@ class WorkflowEngine:
 
         finally:
             self.cli_session.end()
+            self.pytest_runner.close()
+
+    def _timed(self, phase: str, func: Callable[[], Any]) -> Any:
+        """执行阶段并记录耗时"""
+        start = time.time()
+        try:
+            return func()
+        finally:
+            self.timings.setdefault("phases", {})[phase] = round(time.time() - start, 2)
 
     def _phase_planning(self) -> None:
         """Phase 1: 规划"""
@@ -222,8 +336,17 @@ class WorkflowEngine:
 
         # 静态依赖分析 (接口测试模式和业务测试模式都需要)
         self._log("info", "planning", "执行静态依赖分析...")
-        analysis = self.dependency_analyzer.analyze(self.context.swagger)
-        analysis.save(str(output_path))
+        if self.analysis_cache:
+            analysis, cache_stats = self.analysis_cache.analyze(
+                self.dependency_analyzer, self.context.swagger, str(output_path)
+            )
+            self._log("info", "planning", cache_stats.summary())
+            self.timings["dependency_analysis"] = cache_stats.to_dict()
+        else:
+            start = time.time()
+            analysis = self.dependency_analyzer.analyze(self.context.swagger)
+            analysis.save(str(output_path))
+            self.timings["dependency_analysis"] = {"cache": "disabled", "seconds": round(time.time() - start, 3)}
         self.context.dependency_analysis = analysis
 
         # 可选依赖探测（默认关闭）
@@ -234,14 +357,37 @@ class WorkflowEngine:
             self.context.exploration_data = exploration
             self._log(
                 "info", "planning",
-                f"探测完成，提取字段: {len(exploration.extracted_values)}"
+                f"探测完成: {len(exploration.steps)} 个接口 (最大层级 {exploration.depth}), "
+                f"{exploration.request_count} 次请求, 真实 ID {len(exploration.extracted_resources)} 类 "
+                f"({exploration.duration:.1f}s)"
             )
+            if exploration.budget_exhausted:
+                self._log("warning", "planning", "探测超出时间预算或请求数上限，部分接口未探测")
+
+        self.spec_fingerprints = SpecFingerprints.from_swagger(self.context.swagger)
+
+        # 增量模式: 只规划新增/变更的接口，沿用其余接口的用例和测试代码
+        if self.config.incremental:
+            if current_mode != TestMode.INTERFACE:
+                self._log("warning", "planning", "增量模式仅支持接口测试模式，执行完整规划")
+            elif self._plan_incremental(output_path):
+                return
+
+        # 接口较多时按资源分块并发规划，再在本地合并
+        chunk_size = self.config.plan_chunk_size
+        if (current_mode == TestMode.INTERFACE and chunk_size > 0
+                and len(self.context.swagger.endpoints) > chunk_size):
+            self._plan_in_chunks(output_path)
+            return
 
         # 构建 Prompt (根据测试模式自动选择)
         prompt_pkg = self.prompt_builder.build_plan_prompt(self.context)
+        if prompt_pkg.slice_stats:
+            self._log("info", "planning", prompt_pkg.slice_stats.summary())
 
         # 更新 CLI 权限
         self.cli_adapter.config.allowed_tools = prompt_pkg.allowed_tools
+        self.cli_adapter.config.phase = prompt_pkg.phase
 
         # 调用 CLI
         if current_mode in (TestMode.BUSINESS, TestMode.COMPLETE):
@@ -269,6 +415,119 @@ class WorkflowEngine:
 
         self._log("info", "planning", f"规划完成，用例文档已生成")
 
+    def _plan_incremental(self, output_path: Path) -> bool:
+        """增量规划: 与基线运行的接口指纹对比，只规划新增/变更的接口
+
+        Returns:
+            是否已完成规划 (无可用基线时返回 False，由调用方执行完整规划)
+        """
+        baseline = self.config.baseline_dir or find_baseline(self.context.output_dir)
+        previous = SpecFingerprints.load(baseline) if baseline else None
+        if previous is None or not (Path(baseline) / "testcases.md").exists():
+            self._log("warning", "planning", "增量模式: 未找到可用的上次运行结果，执行完整规划")
+            return False
+
+        diff = diff_fingerprints(previous, self.spec_fingerprints)
+        self.spec_diff = diff
+        self._log("info", "planning", f"增量模式: 基线 {baseline}")
+        self._log("info", "planning", diff.summary())
+
+        carry = carry_over_testcases(baseline, diff)
+        carry_over_tests(carry, self.context.output_dir, self.test_index)
+        self._log("info", "planning", carry.summary())
+
+        new_ids: List[str] = []
+        if diff.delta:
+            stats = self._plan_in_chunks(output_path, only=diff.delta, carried=carry.sections)
+            new_ids = stats.new_case_ids
+        else:
+            PlanChunker().merge([], str(output_path / "testcases.md"), carried=carry.sections)
+            self._log("info", "planning", "没有新增或变更的接口，沿用上次的用例文档")
+
+        endpoints = list(dict.fromkeys(diff.delta + list(carry.regenerate.values())))
+        self.incremental_targets = (endpoints, new_ids + sorted(carry.regenerate))
+        return True
+
+    def _plan_in_chunks(
+        self,
+        output_path: Path,
+        only: Optional[List[str]] = None,
+        carried: Optional[List[Tuple[str, str]]] = None
+    ) -> MergeStats:
+        """分块规划: 按资源划分接口，并发调用 CLI，失败分块单独重试，最后合并 testcases.md
+
+        Args:
+            only: 只规划指定接口 (增量模式)
+            carried: 沿用的上次用例章节 (增量模式)
+        """
+        chunker = PlanChunker(
+            chunk_size=self.config.plan_chunk_size or len(only or self.context.swagger.endpoints),
+            concurrency=self.config.plan_concurrency,
+            max_retries=self.config.plan_chunk_retries,
+            should_stop=self._is_cancelled
+        )
+        chunks = chunker.partition(
+            self.context.swagger,
+            self.context.dependency_analysis,
+            str(output_path / "plan_chunks"),
+            only=only
+        )
+        self._log(
+            "info", "planning",
+            f"接口 {len(only if only is not None else self.context.swagger.endpoints)} 个，分 {len(chunks)} 块规划 "
+            f"(每块最多 {chunker.chunk_size} 个，并发 {min(chunker.concurrency, len(chunks))})"
+        )
+
+        sessions: List[CLISession] = []
+        sessions_lock = threading.Lock()
+
+        def plan_chunk(chunk: PlanChunk, attempt: int) -> bool:
+            Path(chunk.output_dir).mkdir(parents=True, exist_ok=True)
+            # 上次调用成功却未生成有效文档 (结果可能已写入缓存)，重试时跳过缓存
+            skip_cache = attempt > 1 and chunk.testcases_file.exists()
+            chunk.testcases_file.unlink(missing_ok=True)
+            prompt_pkg = self.prompt_builder.build_plan_chunk_prompt(self.context, chunk, len(chunks))
+            if attempt == 1:
+                self._log("info", "planning", f"规划分块 {chunk.label}")
+                if prompt_pkg.slice_stats:
+                    self._log("info", "planning", f"[p{chunk.index}] {prompt_pkg.slice_stats.summary()}")
+            else:
+                self._log("warning", "planning", f"重试分块 {chunk.label} (第 {attempt} 次)")
+
+            # 每次尝试使用新的独立会话；分块产物只写入分块目录，缓存按分块独立记录
+            session = CLISession(self.cli_adapter.fork(f"p{chunk.index}"))
+            session.adapter.config.allowed_tools = list(prompt_pkg.allowed_tools)
+            session.adapter.config.phase = prompt_pkg.phase
+            session.adapter.config.artifact_dir = chunk.output_dir
+            if skip_cache:
+                session.adapter.cache = None
+            with sessions_lock:
+                sessions.append(session)
+
+            result = session.start(prompt_pkg.prompt)
+            if not result.success:
+                chunk.error = result.error or result.output or f"exit_code={result.exit_code}"
+            return result.success
+
+        start = time.time()
+        failed = chunker.run(chunks, plan_chunk)
+        self._check_cancel()
+
+        cost = sum(s.total_cost for s in sessions)
+        if failed:
+            for chunk in failed:
+                self._log("error", "planning", f"分块 {chunk.label} 规划失败 ({chunk.attempts} 次): {chunk.error}")
+            raise RuntimeError(f"规划阶段失败: {len(failed)}/{len(chunks)} 个分块重试后仍失败")
+
+        stats = chunker.merge(chunks, str(output_path / "testcases.md"), carried=carried)
+        retried = sum(1 for c in chunks if c.attempts > 1)
+        self._log(
+            "info", "planning",
+            f"分块规划完成，{stats.summary()} (耗时 {time.time() - start:.1f}s, "
+            f"费用 ${cost:.4f}" + (f", 重试分块 {retried} 个)" if retried else ")")
+        )
+        return stats
+
     def _fix_llm_json_syntax(self, json_text: str) -> str:
         """修复 LLM 生成的常见 JSON 语法错误
 
@@ -276,8 +535,6 @@ class WorkflowEngine:
         - JavaScript 语法如 "A".repeat(100) -> 替换为实际的重复字符串
         - 尾部多余逗号
         """
-        import re
-
         # 修复 "X".repeat(N) 语法 -> 实际的重复字符串
         # 匹配模式: "单个字符".repeat(数字)
         repeat_pattern = r'"([^"]{1,3})"\.repeat\((\d+)\)'
@@ -361,11 +618,33 @@ class WorkflowEngine:
         # 先写入固定骨架，避免模型重复生成
         self.skeleton_writer.write(self.context.output_dir)
 
+        # 增量模式只生成新规划的用例
+        testcase_ids: Optional[List[str]] = None
+        if self.incremental_targets is not None:
+            endpoints, testcase_ids = self.incremental_targets
+            if not testcase_ids:
+                self._log("info", "generation", "增量模式: 没有需要生成的用例，沿用上次的测试代码")
+                return
+            self._log("info", "generation", f"增量模式: 生成 {len(testcase_ids)} 个用例 ({len(endpoints)} 个接口)")
+
+        # 接口测试模式按资源分文件并行生成 (各文件只依赖共享骨架，互相独立)
+        if self.context.test_mode == TestMode.INTERFACE and self.config.generation_concurrency > 1:
+            self._generate_in_parallel(testcase_ids)
+            return
+
         # 构建 Prompt
-        prompt_pkg = self.prompt_builder.build_generate_prompt(self.context)
+        if testcase_ids is not None:
+            prompt_pkg = self.prompt_builder.build_incremental_generate_prompt(
+                self.context, endpoints, testcase_ids
+            )
+        else:
+            prompt_pkg = self.prompt_builder.build_generate_prompt(self.context)
+        if prompt_pkg.slice_stats:
+            self._log("info", "generation", prompt_pkg.slice_stats.summary())
 
         # 更新 CLI 权限
         self.cli_adapter.config.allowed_tools = prompt_pkg.allowed_tools
+        self.cli_adapter.config.phase = prompt_pkg.phase
 
         # 调用 CLI (继续会话)
         self._check_cancel()
@@ -379,6 +658,156 @@ class WorkflowEngine:
 
         self._log("info", "generation", "代码生成完成")
 
+    def _generate_in_parallel(self, testcase_ids: Optional[List[str]] = None) -> None:
+        """分文件并行生成: 每个文件一次独立调用 (从规划会话分叉)，ast 校验通过后放入 tests/，失败文件单独重试"""
+        output_path = Path(self.context.output_dir)
+        tests_dir = output_path / "tests"
+        scheduler = GenerationScheduler(
+            concurrency=self.config.generation_concurrency,
+            max_retries=self.config.generation_retries,
+            unit_size=self.config.generation_unit_size,
+            should_stop=self._is_cancelled
+        )
+        units = scheduler.build_units(
+            (output_path / "testcases.md").read_text(encoding="utf-8"),
+            self.context.swagger,
+            self.context.dependency_analysis,
+            str(output_path / "gen_units"),
+            str(tests_dir),
+            only_ids=testcase_ids,
+            prefix="test_incr_" if testcase_ids is not None else "test_"
+        )
+        if not units:
+            raise RuntimeError("生成阶段失败: testcases.md 中没有可生成的用例")
+        self._log(
+            "info", "generation",
+            f"分 {len(units)} 个文件并行生成 (并发 {min(scheduler.concurrency, len(units))})"
+        )
+
+        sessions: List[CLISession] = []
+        sessions_lock = threading.Lock()
+
+        def generate_unit(unit: GenerationUnit, attempt: int) -> bool:
+            prompt_pkg = self.prompt_builder.build_generate_unit_prompt(
+                self.context, unit, len(units), incremental=testcase_ids is not None
+            )
+            if attempt == 1:
+                self._log("info", "generation", f"生成 {unit.label}")
+            else:
+                self._log("warning", "generation", f"重试 {unit.label} (第 {attempt} 次): {unit.last_error}")
+
+            # 上次调用成功但文件未通过校验 (结果可能已写入缓存)，重试时跳过缓存
+            skip_cache = attempt > 1 and unit.staging_file.exists()
+            unit.staging_file.unlink(missing_ok=True)
+
+            # 从规划会话分叉 (共享规划上下文)；重试使用新的分叉
+            session = self.cli_session.fork(f"g{unit.index}")
+            session.adapter.config.allowed_tools = list(prompt_pkg.allowed_tools)
+            session.adapter.config.phase = prompt_pkg.phase
+            session.adapter.config.artifact_dir = unit.staging_dir
+            if skip_cache:
+                session.adapter.cache = None
+            with sessions_lock:
+                sessions.append(session)
+
+            result = session.send(prompt_pkg.prompt)
+            if not result.success:
+                unit.error = result.error or result.output or f"exit_code={result.exit_code}"
+            return result.success
+
+        start = time.time()
+        failed = scheduler.run(units, generate_unit, str(tests_dir))
+        self._check_cancel()
+        wall_time = time.time() - start
+
+        for unit in units:
+            status = "✓" if unit.success else "✗"
+            retry = f", {unit.attempts} 次" if unit.attempts > 1 else ""
+            self._log(
+                "info" if unit.success else "error", "generation",
+                f"{status} {unit.label}: {unit.duration:.1f}s{retry}" + (f" - {unit.error}" if unit.error else "")
+            )
+        cost = sum(s.total_cost for s in sessions)
+        serial_time = sum(u.duration for u in units)
+        self.generation_stats = {
+            "files": [u.to_dict() for u in units],
+            "wall_time": round(wall_time, 2),
+            "serial_time": round(serial_time, 2),
+            "cost_usd": round(cost, 4)
+        }
+
+        if len(failed) == len(units):
+            raise RuntimeError(f"生成阶段失败: {len(units)} 个文件均未通过校验")
+        if failed:
+            missing = sum(len(u.testcase_ids) for u in failed)
+            self._log(
+                "warning", "generation",
+                f"{len(failed)} 个文件重试后仍失败，{missing} 个用例没有测试代码"
+            )
+        self._log(
+            "info", "generation",
+            f"代码生成完成: {len(units) - len(failed)}/{len(units)} 个文件 "
+            f"(耗时 {wall_time:.1f}s，逐个累计 {serial_time:.1f}s，费用 ${cost:.4f})"
+        )
+
+    def _phase_preflight(self) -> None:
+        """执行前静态预检: 本地修复可确定的问题，剩余问题的文件合并为一次修复调用"""
+        output_path = Path(self.context.output_dir)
+        tests_dir = output_path / "tests"
+        testcases_path = output_path / "testcases.md"
+        known_ids = self.testcase_parser.parse(str(testcases_path)).keys() if testcases_path.exists() else None
+
+        validator = PreflightValidator(str(tests_dir), known_ids=known_ids or None)
+        try:
+            result = validator.run(fix=True)
+        except Exception as e:
+            # 预检只是优化: 校验器自身出错时跳过，问题交由执行阶段自愈
+            logger.exception("Preflight validation failed")
+            self._log("warning", "preflight", f"预检失败，跳过: {type(e).__name__}: {e}")
+            return
+        for check in result.files:
+            name = Path(check.path).name
+            if check.fixes:
+                self._log("info", "preflight", f"{name}: 自动修复 {'; '.join(check.fixes)}")
+            for issue in check.issues:
+                self._log("warning" if check.broken else "info", "preflight", f"{name} {issue}")
+        if result.uncovered_ids:
+            self._log("warning", "preflight", f"没有测试函数的用例: {', '.join(result.uncovered_ids[:20])}")
+        self._log("info", "preflight", result.summary())
+        self.test_index.invalidate()
+
+        broken = result.broken_files
+        llm_fixed = 0
+        if broken:
+            prompt_pkg = self.prompt_builder.build_preflight_fix_prompt(
+                [(check.path, check.blocking) for check in broken]
+            )
+            self.cli_adapter.config.allowed_tools = prompt_pkg.allowed_tools
+            self.cli_adapter.config.phase = prompt_pkg.phase
+            self._check_cancel()
+            self._log("info", "preflight", f"调用 CLI 一次性修复 {len(broken)} 个文件...")
+            cli_result = self.cli_session.send(prompt_pkg.prompt)
+            if not cli_result.success:
+                if ("任务已取消" in (cli_result.error or "")) or cli_result.exit_code == -2:
+                    raise WorkflowCancelled("任务已取消")
+                self._log("warning", "preflight", f"预检修复调用失败，交由执行阶段自愈: {cli_result.error}")
+
+            # 修复后只复检这些文件 (不再自动修复，避免覆盖模型的修改)
+            self.test_index.invalidate()
+            recheck = validator.run(fix=False, files=[check.path for check in broken])
+            remaining = recheck.broken_files
+            llm_fixed = len(broken) - len(remaining)
+            for check in remaining:
+                self._log(
+                    "warning", "preflight",
+                    f"{Path(check.path).name} 仍有 {len(check.blocking)} 个问题，交由执行阶段自愈"
+                )
+            broken = remaining
+
+        self.preflight_stats = result.to_dict()
+        self.preflight_stats["llm_fixed_files"] = llm_fixed
+        self.preflight_stats["remaining_files"] = [check.path for check in broken]
+
     def _phase_execution(self) -> None:
         """Phase 3: 执行 + 自愈"""
         test_dir = Path(self.context.output_dir) / "tests"
@@ -389,13 +818,42 @@ class WorkflowEngine:
         self.testcase_map = self.testcase_parser.parse(str(testcases_path))
         self._log("info", "execution", f"加载测试用例映射: {len(self.testcase_map)} 条")
 
+        if self.config.rule_fixers and self.rule_fixers is None:
+            self.rule_fixers = RuleFixerRegistry(
+                str(test_dir),
+                spec_paths=[ep.get("path", "") for ep in self.context.swagger.endpoints]
+            )
+
+        # 环境健康检查: 不可用时跳过执行，部分异常时只执行冒烟子集
+        targets: Optional[List[str]] = None
+        if self.config.health_check:
+            self._check_cancel()
+            health = self._check_health()
+            if health.aborted:
+                self._log("error", "execution", f"环境不可用，跳过测试执行: {health.reason}")
+                return
+            if health.status == DEGRADED:
+                targets = select_smoke_nodes(
+                    str(test_dir),
+                    testcases_path.read_text(encoding="utf-8") if testcases_path.exists() else "",
+                    skip_endpoints=health.failed_endpoints,
+                    index=self.test_index
+                ) or None
+                if targets:
+                    health.smoke_cases = len(targets)
+                    self._log("warning", "execution", f"环境降级，只执行冒烟子集: {len(targets)} 个用例")
+
         self._log("info", "execution", f"开始执行测试: {test_dir}")
+        if self.config.test_workers > 1 and not targets:
+            self._log("info", "execution", f"并行执行: {self.config.test_workers} 个 worker")
 
         # 运行 pytest
         self._check_cancel()
         pytest_result = self.pytest_runner.run(
             str(test_dir),
-            str(output_dir)
+            str(output_dir),
+            analysis=self.context.dependency_analysis,
+            targets=targets
         )
 
         self._log(
@@ -403,23 +861,83 @@ class WorkflowEngine:
             f"初始执行完成: 通过 {pytest_result.passed}/{pytest_result.total}"
         )
 
-        # 处理失败的用例
+        # 处理失败的用例: 先尝试本地规则修复，再逐个判定，最后将需要自愈的用例分批修复
         failed_results = pytest_result.get_failed_results()
+        if self.rule_fixers is not None:
+            failed_results = self._apply_rule_fixers(failed_results)
 
-        for result in failed_results:
-            self._handle_failed_test(result, test_dir, output_dir)
+        heal_items = self._judge_failures(failed_results, pytest_result.total)
+        self.cluster_stats = self._cluster_summary
 
-        # 合并结果
+        # 合并结果 (后续自愈与验证原地更新这些对象)
         self.test_results = pytest_result.test_results
 
-    def _handle_failed_test(
+        if heal_items:
+            self._heal_failed_tests(heal_items)
+            if self.config.verify_healed:
+                self._verify_healed_tests(
+                    self._with_cluster_members([r for r, _ in heal_items if r.healed]),
+                    test_dir,
+                    output_dir
+                )
+
+    def _judge_failures(
         self,
-        result: TestCaseResult,
-        test_dir: Path,
-        output_dir: Path
-    ) -> None:
-        """处理失败的测试用例"""
-        judge_result = self.result_judge.judge(result)
+        results: List[TestCaseResult],
+        total_tests: int
+    ) -> List[Tuple[TestCaseResult, JudgeResult]]:
+        """按失败签名聚类后逐簇判定，返回需要自愈的代表用例
+
+        每个簇只判定/自愈代表用例: 判定为 Bug 时整簇记录，自愈后整簇参与验证。
+        环境级故障 (服务不可用、Token 失效等) 时立即停止: 不再逐簇判定，跳过本轮全部自愈。
+        """
+        clusters = self.failure_clusterer.cluster(
+            results,
+            group=self.config.cluster_failures,
+            endpoints={testcase_id: case.api for testcase_id, case in (self.testcase_map or {}).items()}
+        )
+        grouped = [c for c in clusters if c.size > 1]
+        if grouped:
+            self._log(
+                "info", "execution",
+                f"失败聚类: {len(results)} 个失败用例归为 {len(clusters)} 类 "
+                f"(合并 {sum(c.size - 1 for c in grouped)} 个同类失败)"
+            )
+        environment = [c for c in clusters if self.result_judge.is_environment_failure(c, total_tests)]
+        self._cluster_summary = {
+            "failures": len(results),
+            "clusters": [c.to_dict() for c in grouped],
+            "representatives": len(clusters),
+            "environment_failure": bool(environment)
+        }
+
+        if environment:
+            # 环境问题与单个测试文件无关，自愈任何文件都无法修复
+            for cluster in environment:
+                self._log("error", "execution", self.result_judge.judge_cluster(cluster, total_tests).error_detail)
+            self._log("error", "execution", f"检测到环境级故障，停止自愈 ({len(results)} 个失败用例)")
+            return []
+
+        heal_items: List[Tuple[TestCaseResult, JudgeResult]] = []
+        for cluster in clusters:
+            judge_result = self._handle_failed_cluster(cluster, total_tests)
+            if judge_result is not None:
+                heal_items.append((cluster.representative, judge_result))
+                self._cluster_members[id(cluster.representative)] = cluster.members
+        return heal_items
+
+    def _handle_failed_cluster(
+        self,
+        cluster: FailureCluster,
+        total_tests: int
+    ) -> Optional[JudgeResult]:
+        """判定失败簇 (以代表用例为准)
+
+        Returns:
+            需要自愈时返回判定结果，否则返回 None
+        """
+        judge_result = self.result_judge.judge_cluster(cluster, total_tests)
+        result = cluster.representative
 
         # 使用解析器获取丰富的展示标签
         label = self.testcase_parser.get_label(result.testcase_id, self.testcase_map)
@@ -431,46 +949,265 @@ class WorkflowEngine:
         if not judge_result.need_healing:
             # 不需要自愈
             if judge_result.is_bug:
-                self._record_bug(result, judge_result.error_detail)
-            return
+                for member in cluster.results:
+                    self._record_bug(member, judge_result.error_detail)
+            return None
 
-        # 需要自愈
-        self._set_state(WorkflowState.HEALING)
+        return judge_result
 
-        if judge_result.healing_type == HealingType.SYNTAX:
-            self._heal_syntax(result)
-        elif judge_result.healing_type == HealingType.LOGIC:
-            self._heal_logic(result)
+    def _with_cluster_members(self, results: List[TestCaseResult]) -> List[TestCaseResult]:
+        """已自愈的代表用例加上同簇的其他用例 (一起验证，修复对整簇生效时同类用例直接通过)"""
+        pending = []
+        for result in results:
+            pending.append(result)
+            pending.extend(self._cluster_members.pop(id(result), []))
+        return pending
 
-    def _heal_syntax(self, result: TestCaseResult) -> None:
-        """语法自愈"""
-        self._log("info", "healing", f"触发语法自愈: {result.testcase_id}")
+    def _heal_failed_tests(self, items: List[Tuple[TestCaseResult, JudgeResult]]) -> None:
+        """按 (文件, 自愈类型) 分批自愈，独立批次可并发执行"""
+        self._set_state(WorkflowState.HEALING, f"{len(items)} 个用例待自愈")
 
-        if result.error_info is None:
-            return
+        scheduler = HealingScheduler(
+            concurrency=self.config.healing_concurrency,
+            session_factory=self.cli_session.fork,
+            should_stop=self._is_cancelled
+        )
+        batches = scheduler.build_batches(items)
+        self._log(
+            "info", "healing",
+            f"自愈批次: {len(batches)} 个 ({len(items)} 个用例, 并发 {scheduler.concurrency})"
+        )
+
+        start = time.time()
+        done = scheduler.run(batches, self._heal_batch, self.cli_session)
+
+        # 汇总分叉会话的费用
+        for session in scheduler.sessions:
+            self.cli_session.total_cost += session.total_cost
+
+        self._log(
+            "info", "healing",
+            f"自愈结束: 完成 {len(done)}/{len(batches)} 个批次, 总耗时 {time.time() - start:.1f}s"
+        )
+        self._check_cancel()
+
+    def _check_health(self) -> HealthReport:
+        """并发探测少量 GET 接口，测量延迟和鉴权状态"""
+        probe = HealthProbe(
+            timeout=self.config.health_timeout,
+            sample_size=self.config.health_sample_size
+        )
+        health = probe.check(self.context.config, self.context.swagger, self.context.dependency_analysis)
+        self.health_report = health
+        level = "info" if health.status == HEALTHY else ("error" if health.aborted else "warning")
+        self._log(level, "execution", health.summary())
+        return health
+
+    def _apply_rule_fixers(self, results: List[TestCaseResult]) -> List[TestCaseResult]:
+        """规则修复: 命中的用例本地改写后立即重跑 (常驻 worker)，返回仍失败的用例"""
+        test_dir = Path(self.context.output_dir) / "tests"
+        output_dir = Path(self.context.output_dir) / "reports"
+        remaining: List[TestCaseResult] = []
+
+        for result in results:
+            self._check_cancel()
+            if result.error_info is None or not result.node_id \
+                    or result.status not in (TestStatus.FAIL, TestStatus.ERROR):
+                remaining.append(result)
+                continue
+
+            for _ in range(MAX_RULE_FIXES):
+                attempt = self.rule_fixers.try_fix(result.error_info)
+                if attempt is None:
+                    break
+                fresh = self.pytest_runner.run_nodes([result.node_id], str(test_dir), str(output_dir))
+                fresh_result = next((r for r in fresh.test_results if r.node_id == result.node_id), None)
+                if fresh_result is not None and fresh_result.passed:
+                    self.rule_fixers.record(attempt, fixed=True)
+                    result.status = fresh_result.status
+                    result.duration = fresh_result.duration
+                    result.error_info = None
+                    result.healing_attempts += 1
+                    result.healed = True
+                    self._log("info", "healing", f"规则修复 [{attempt.fixer}]: {result.testcase_id} 已通过")
+                    break
+                # 原错误已消失 (改写有进展) 则保留改写，继续尝试其他规则
+                progressed = fresh_result is not None and fresh_result.error_info is not None \
+                    and self._error_signature(fresh_result.error_info) != self._error_signature(result.error_info)
+                self.rule_fixers.record(attempt, fixed=False, keep=progressed)
+                if not progressed:
+                    break
+                result.status = fresh_result.status
+                result.duration = fresh_result.duration
+                result.error_info = fresh_result.error_info
+
+            if not result.passed:
+                remaining.append(result)
+
+        fixed = len(results) - len(remaining)
+        if fixed:
+            self._log("info", "healing", f"规则修复通过 {fixed}/{len(results)} 个用例，其余交由判定与 LLM 自愈")
+        return remaining
+
+    @staticmethod
+    def _error_signature(error_info: ErrorInfo) -> str:
+        """错误摘要 (用于判断规则改写后原错误是否消失)"""
+        return (error_info.message or "").strip().split("\n", 1)[0]
+
+    def _verify_healed_tests(
+        self,
+        pending: List[TestCaseResult],
+        test_dir: Path,
+        output_dir: Path
+    ) -> None:
+        """增量验证: 只重跑已自愈的用例，仍失败则再次自愈，最多 max_healing_attempts 轮
+
+        每轮所有待验证节点在一次 pytest 调用中执行，结果原地合并到 self.test_results。
+        """
+        for round_no in range(1, self.config.max_healing_attempts + 1):
+            pending = [r for r in pending if r.node_id]
+            if not pending:
+                return
+
+            self._check_cancel()
+            self._set_state(WorkflowState.EXECUTING, f"验证 {len(pending)} 个已自愈用例")
+            verify_result = self.pytest_runner.run_nodes(
+                [r.node_id for r in pending],
+                str(test_dir),
+                str(output_dir)
+            )
+            self._merge_verified_results(pending, verify_result)
+
+            still_failed = [r for r in pending if not r.passed]
+            if self.rule_fixers is not None:
+                still_failed = self._apply_rule_fixers(still_failed)
+            self._log(
+                "info", "execution",
+                f"第 {round_no} 轮验证: 通过 {len(pending) - len(still_failed)}/{len(pending)}, "
+                f"耗时 {verify_result.duration:.1f}s"
+            )
+
+            heal_items = self._judge_failures(still_failed, len(self.test_results))
+            if not heal_items:
+                return
+
+            self._heal_failed_tests(heal_items)
+            pending = self._with_cluster_members([r for r, _ in heal_items if r.healed])
+
+    def _merge_verified_results(
+        self,
+        pending: List[TestCaseResult],
+        verify_result: PytestResult
+    ) -> None:
+        """按 node_id 将验证结果合并到原有用例结果"""
+        fresh_by_node = {r.node_id: r for r in verify_result.test_results if r.node_id}
+
+        for result in pending:
+            fresh = fresh_by_node.get(result.node_id)
+            if fresh is None:
+                # 未产出结果 (如模块导入失败导致收集出错)，保留原错误信息
+                self._log("warning", "execution", f"验证未返回结果: {result.node_id}")
+                result.status = TestStatus.ERROR
+                result.healed = False
+                continue
+
+            result.status = fresh.status
+            result.duration = fresh.duration
+            result.error_info = fresh.error_info
+            if result.testcase_id == "UNKNOWN":
+                result.testcase_id = fresh.testcase_id
+            # 只有验证通过才算自愈成功
+            result.healed = fresh.passed
+
+    def _heal_batch(self, batch: HealingBatch, session: CLISession) -> bool:
+        """执行单个自愈批次并输出耗时"""
+        start = time.time()
+        if batch.healing_type == HealingType.SYNTAX:
+            success = self._heal_syntax(batch, session)
+        else:
+            success = self._heal_logic(batch, session)
+        with self._lock:
+            self._llm_heal_seconds += time.time() - start
+            self._llm_heal_cases += len(batch.results)
+        self._log(
+            "info", "healing",
+            f"批次完成: {batch.label} {'成功' if success else '失败'}, 耗时 {time.time() - start:.1f}s"
+        )
+        return success
+
+    def _heal_syntax(self, batch: HealingBatch, session: CLISession) -> bool:
+        """语法自愈 (同一文件的多个错误合并为一次调用)"""
+        results = [r for r in batch.results if r.error_info is not None]
+        if not results:
+            return False
+
+        ids = ", ".join(r.testcase_id for r in results)
+        self._log("info", "healing", f"触发语法自愈: {ids}")
 
         # 构建自愈 Prompt
-        prompt_pkg = self.prompt_builder.build_heal_syntax_prompt(result.error_info)
-        self.cli_adapter.config.allowed_tools = prompt_pkg.allowed_tools
+        prompt_pkg = self.prompt_builder.build_heal_batch_syntax_prompt(
+            batch.file_path,
+            [r.error_info for r in results]
+        )
+        session.adapter.config.allowed_tools = prompt_pkg.allowed_tools
+        session.adapter.config.phase = prompt_pkg.phase
 
         # 调用 CLI 修复
-        cli_result = self.cli_session.send(prompt_pkg.prompt)
+        cli_result = session.send(prompt_pkg.prompt)
 
         if cli_result.success:
-            result.healing_attempts += 1
-            result.healed = True
-            self._log("info", "healing", f"语法修复完成: {result.testcase_id}")
-        else:
-            self._log("error", "healing", f"语法修复失败: {cli_result.error}")
+            for result in results:
+                result.healing_attempts += 1
+                result.healed = True
+            self._log("info", "healing", f"语法修复完成: {ids}")
+            return True
 
-    def _heal_logic(self, result: TestCaseResult) -> None:
-        """逻辑自愈"""
-        self._log("info", "healing", f"触发逻辑自愈: {result.testcase_id}")
+        self._log("error", "healing", f"语法修复失败: {cli_result.error}")
+        return False
 
-        if result.error_info is None:
-            return
+    def _heal_logic(self, batch: HealingBatch, session: CLISession) -> bool:
+        """逻辑自愈 (同一文件的多个断言失败合并为一次调用)"""
+        results = [r for r in batch.results if r.error_info is not None]
+        if not results:
+            return False
 
-        # 构建业务规则内容（优先使用 PRD，其次用 requirements）
+        ids = ", ".join(r.testcase_id for r in results)
+        self._log("info", "healing", f"触发逻辑自愈: {ids}")
+
+        # 构建自愈 Prompt
+        prompt_pkg = self.prompt_builder.build_heal_batch_logic_prompt(
+            batch.file_path,
+            [r.error_info for r in results],
+            self._build_business_context()
+        )
+        session.adapter.config.allowed_tools = prompt_pkg.allowed_tools
+        session.adapter.config.phase = prompt_pkg.phase
+
+        # 调用 CLI 判定
+        cli_result = session.send(prompt_pkg.prompt)
+
+        if not (cli_result.success and cli_result.output):
+            self._log("error", "healing", f"逻辑自愈失败: {cli_result.error}")
+            return False
+
+        # 解析 CLI 响应判断每个用例是 Bug 还是代码问题
+        bugs = self._parse_batch_logic_result(cli_result.output, results)
+        for result in results:
+            if id(result) in bugs:
+                self._record_bug(result, bugs[id(result)])
+                members = self._cluster_members.pop(id(result), [])
+                for member in members:
+                    self._record_bug(member, bugs[id(result)])
+                suffix = f" (同类 {len(members)} 个)" if members else ""
+                self._log("info", "healing", f"判定为真 Bug: {result.testcase_id}{suffix}")
+            else:
+                result.healing_attempts += 1
+                result.healed = True
+                self._log("info", "healing", f"断言已修正: {result.testcase_id}")
+        return True
+
+    def _build_business_context(self) -> str:
+        """构建业务规则内容（优先使用 PRD，其次用 requirements）"""
         business_context = ""
         if getattr(self.context, "business_rules", None) and self.context.business_rules:
             # 使用 Phase 1 提取的结构化规则
@@ -488,28 +1225,7 @@ class WorkflowEngine:
         elif self.context.requirements:
             # 兼容旧版
             business_context = self.context.requirements
-
-        # 构建自愈 Prompt
-        prompt_pkg = self.prompt_builder.build_heal_logic_prompt(
-            result.error_info,
-            business_context
-        )
-        self.cli_adapter.config.allowed_tools = prompt_pkg.allowed_tools
-
-        # 调用 CLI 判定
-        cli_result = self.cli_session.send(prompt_pkg.prompt)
-
-        if cli_result.success and cli_result.output:
-            # 解析 CLI 响应判断是 Bug 还是代码问题
-            is_bug = self._parse_logic_healing_result(cli_result.output)
-
-            if is_bug:
-                self._record_bug(result, cli_result.output)
-                self._log("info", "healing", f"判定为真 Bug: {result.testcase_id}")
-            else:
-                result.healing_attempts += 1
-                result.healed = True
-                self._log("info", "healing", f"断言已修正: {result.testcase_id}")
+        return business_context
 
     def _parse_logic_healing_result(self, output: str) -> bool:
         """解析逻辑自愈结果，判断是否为 Bug"""
@@ -523,8 +1239,48 @@ class WorkflowEngine:
             pass
         return False
 
+    def _parse_batch_logic_result(
+        self,
+        output: str,
+        results: List[TestCaseResult]
+    ) -> Dict[int, str]:
+        """解析批量逻辑自愈结果
+
+        Returns:
+            判定为 Bug 的用例: id(result) -> Bug 详情
+        """
+        if len(results) == 1:
+            if self._parse_logic_healing_result(output):
+                return {id(results[0]): output}
+            return {}
+
+        verdicts: List[Dict[str, Any]] = []
+        candidates = re.findall(r'```(?:json)?\s*(\[.*?\])\s*```', output, re.DOTALL)
+        if not candidates and "[" in output and "]" in output:
+            candidates = [output[output.index("["):output.rindex("]") + 1]]
+        for text in candidates:
+            try:
+                data = json.loads(self._fix_llm_json_syntax(text))
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, list):
+                verdicts.extend(v for v in data if isinstance(v, dict))
+
+        bugs: Dict[int, str] = {}
+        for verdict in verdicts:
+            if "BUG" not in str(verdict.get("verdict", "")).upper():
+                continue
+            function = str(verdict.get("function", "")).split("[", 1)[0]
+            testcase_id = verdict.get("testcase_id")
+            for result in results:
+                if result.function_name.split("[", 1)[0] == function or (
+                    testcase_id and result.testcase_id == testcase_id
+                ):
+                    bugs[id(result)] = json.dumps(verdict, ensure_ascii=False)
+        return bugs
+
     def _record_bug(self, result: TestCaseResult, detail: str) -> None:
-        """记录 Bug"""
+        """记录 Bug (自愈可能并发执行，需加锁)"""
         bug = BugReport(
             testcase_id=result.testcase_id,
             api=f"{result.function_name} in {result.file_path}",
@@ -534,7 +1290,8 @@ class WorkflowEngine:
             severity=BugSeverity.MEDIUM,
             root_cause=detail
         )
-        self.bugs.append(bug)
+        with self._lock:
+            self.bugs.append(bug)
 
     def _phase_finalization(self) -> FinalReport:
         """Phase 4: 交付"""
@@ -567,6 +1324,29 @@ class WorkflowEngine:
             bug_report_file=f"{self.context.output_dir}/bug_report.json"
         )
 
+        # LLM 响应缓存统计
+        report.timings = self.timings
+        if self.response_cache:
+            report.llm_cache = self.response_cache.stats.to_dict()
+            self._log(
+                "info", "finalization",
+                f"响应缓存: 命中 {report.llm_cache['hits']} / 未命中 {report.llm_cache['misses']}"
+            )
+
+        # 保存接口指纹，供下次增量运行对比
+        if self.spec_fingerprints is not None:
+            self.spec_fingerprints.save(self.context.output_dir)
+        if self.spec_diff is not None:
+            report.spec_diff = self.spec_diff.to_dict()
+        report.generation = self.generation_stats
+        report.preflight = self.preflight_stats
+        report.failure_clusters = self.cluster_stats
+        if self.health_report is not None:
+            report.health = self.health_report.to_dict()
+        if self.rule_fixers is not None:
+            per_case = self._llm_heal_seconds / self._llm_heal_cases if self._llm_heal_cases else None
+            report.rule_fixers = self.rule_fixers.to_dict(per_case)
+
         # 关联测试用例设计与执行结果
         self._populate_test_cases(report)
 
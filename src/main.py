@@ -83,7 +83,7 @@ def print_report(report: FinalReport) -> None:
   发现Bug: {report.bugs_found}
   自愈成功: {report.healed_count}
   总耗时: {report.total_duration:.1f}s
-
+{_format_cache_stats(report)}{_format_health(report)}
 [bold]输出文件:[/bold]
   用例文档: {report.testcases_file}
   HTML报告: {report.report_html}
@@ -93,6 +93,28 @@ def print_report(report: FinalReport) -> None:
     console.print(Panel(summary, title="执行报告", border_style=status_color))
 
 
+def _format_cache_stats(report: FinalReport) -> str:
+    """响应缓存统计行 (未启用缓存时为空)"""
+    stats = report.llm_cache
+    if not stats:
+        return ""
+    return (f"  响应缓存: 命中 {stats['hits']} / 未命中 {stats['misses']}"
+            f" (节省 ${stats['saved_cost_usd']:.2f}, {stats['saved_seconds']:.0f}s)\n")
+
+
+def _format_health(report: FinalReport) -> str:
+    """环境健康检查行 (未检查或环境正常时为空)"""
+    health = report.health
+    if not health or health.get("status") == "healthy":
+        return ""
+    line = f"  环境状态: [yellow]{health['status']}[/yellow] {health.get('reason', '')}"
+    if health.get("aborted"):
+        line += " (已跳过执行)"
+    elif health.get("smoke_cases"):
+        line += f" (只执行冒烟子集 {health['smoke_cases']} 个)"
+    return line + "\n"
+
+
 def on_state_change(state: WorkflowState, message: str) -> None:
     """状态变更回调"""
     state_icons = {
@@ -182,6 +204,54 @@ def main() -> int:
         default=3,
         help="最大自愈尝试次数 (默认: 3)"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=1,
+        help="并行执行测试的 worker 数 (默认: 1，即串行)"
+    )
+    parser.add_argument(
+        "--plan-chunk-size",
+        type=int,
+        default=40,
+        help="接口数超过该值时按资源分块并发规划 (默认: 40，0 表示不分块)"
+    )
+    parser.add_argument(
+        "--plan-workers",
+        type=int,
+        default=3,
+        help="并发规划的分块数 (默认: 3)"
+    )
+    parser.add_argument(
+        "--gen-workers",
+        type=int,
+        default=4,
+        help="并行生成的测试文件数 (默认: 4，1 表示单次调用生成全部文件)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量模式: 只规划/生成相对上次运行新增或变更的接口，沿用其余接口的用例和测试代码"
+    )
+    parser.add_argument(
+        "--baseline",
+        help="增量模式的基线运行目录 (默认: 输出目录下最近一次完成的运行)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="禁用 LLM 响应缓存 (默认对规划/生成阶段启用，缓存位于 <输出目录>/.cache/llm)"
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="跳过执行前的本地静态预检 (语法/import/fixture/用例 ID)"
+    )
+    parser.add_argument(
+        "--no-health-check",
+        action="store_true",
+        help="跳过执行前的环境健康检查 (默认目标不可达或鉴权失败时跳过执行)"
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -221,6 +291,15 @@ def main() -> int:
         workflow_config = WorkflowConfig(
             max_healing_attempts=args.max_healing,
             test_timeout=args.timeout,
+            test_workers=args.workers,
+            response_cache=not args.no_cache,
+            plan_chunk_size=args.plan_chunk_size,
+            plan_concurrency=args.plan_workers,
+            generation_concurrency=args.gen_workers,
+            incremental=args.incremental,
+            baseline_dir=args.baseline,
+            preflight=not args.no_preflight,
+            health_check=not args.no_health_check,
             on_state_change=on_state_change,
             on_log=on_log
         )
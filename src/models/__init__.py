@@ -1,5 +1,5 @@
 # Data models
-from .context import TaskContext, EnvConfig, SwaggerSpec, TestMode
+from .context import TaskContext, EnvConfig, SwaggerSpec, Endpoint, TestMode
 from .result import (
     CLIResult, PytestResult, TestCaseResult, ErrorInfo, JudgeResult,
     TestStatus, ErrorType, HealingType
@@ -11,7 +11,7 @@ from .load_test import (
 
 __all__ = [
     # Context
-    "TaskContext", "EnvConfig", "SwaggerSpec", "TestMode",
+    "TaskContext", "EnvConfig", "SwaggerSpec", "Endpoint", "TestMode",
     # Result
     "CLIResult", "PytestResult", "TestCaseResult", "ErrorInfo", "JudgeResult",
     "TestStatus", "ErrorType", "HealingType",
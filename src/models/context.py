@@ -4,8 +4,12 @@ TaskContext - 任务上下文模型
 存储整个测试任务的输入和状态信息
 """
 
+import json
+import sys
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator
 from enum import Enum
 
 
@@ -36,19 +40,97 @@ class EnvConfig:
         }
 
 
+class Endpoint(Mapping):
+    """解析后的单个接口定义 (__slots__，只读)
+
+    大规范中每个接口一个实例且随 Web 任务长期驻留，slots 实例约为同内容 dict 的 40%。
+    按 Mapping 访问 (ep.get("path") / ep["parameters"])，与原先的 dict 表示兼容；
+    requestBody 缺失时与 dict 一样不出现在键中。序列化 (JSON/缓存) 时使用 to_dict()。
+    """
+    __slots__ = (
+        "path", "method", "operationId", "summary", "description",
+        "tags", "parameters", "requestBody", "responses"
+    )
+
+    def __init__(
+        self,
+        path: str,
+        method: str,
+        operationId: str = "",
+        summary: str = "",
+        description: str = "",
+        tags: Optional[List[Any]] = None,
+        parameters: Optional[List[Any]] = None,
+        requestBody: Optional[Dict[str, Any]] = None,
+        responses: Optional[Dict[str, Any]] = None
+    ):
+        self.path = sys.intern(path)
+        self.method = sys.intern(method.upper())
+        self.operationId = operationId
+        self.summary = summary
+        self.description = description
+        self.tags = tags if tags is not None else []
+        self.parameters = parameters if parameters is not None else []
+        self.requestBody = requestBody
+        self.responses = responses if responses is not None else {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Endpoint":
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__ or (key == "requestBody" and self.requestBody is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self.__slots__ if key != "requestBody" or self.requestBody is not None)
+
+    def __len__(self) -> int:
+        return len(self.__slots__) - (self.requestBody is None)
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.method} {self.path})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self)
+
+
 @dataclass
 class SwaggerSpec:
     """解析后的Swagger规范"""
-    raw_content: str              # 原始JSON内容
+    raw_content: str = ""         # 原始JSON内容 (文件/dict 输入时为空，见 raw_text)
     title: str = ""               # API标题
     version: str = ""             # API版本
     base_path: str = ""           # 基础路径
-    endpoints: List[Dict] = field(default_factory=list)  # 端点列表
+    endpoints: List[Endpoint] = field(default_factory=list)  # 端点列表 (也接受同结构的 dict)
+    # $ref 可引用的顶层定义 (components / definitions / parameters / responses)，用于解析 $ref
+    components: Dict[str, Any] = field(default_factory=dict)
+    source_path: Optional[str] = None   # 规范文件路径 (原文按需读取，不常驻内存)
+    document: Optional[Dict[str, Any]] = field(default=None, repr=False)  # dict 输入的原始文档
 
     @property
     def endpoint_count(self) -> int:
         return len(self.endpoints)
 
+    @property
+    def raw_text(self) -> str:
+        """规范原文: raw_content 为空时从 source_path 读取或由 document 序列化 (不缓存)"""
+        if self.raw_content:
+            return self.raw_content
+        if self.source_path:
+            try:
+                return Path(self.source_path).read_text(encoding="utf-8")
+            except OSError:
+                pass
+        if self.document is not None:
+            return json.dumps(self.document, ensure_ascii=False)
+        return ""
+
 
 @dataclass
 class TaskContext:
@@ -2,11 +2,17 @@
 依赖分析模型
 
 用于描述接口资源、字段及依赖关系，便于在 Prompt 和报告中复用。
+
+大规范 (数千接口) 下这些对象数以万计，且随 Web 任务长期驻留内存:
+- 模型使用 __slots__ (无实例 __dict__)
+- 路径、方法、字段名等重复字符串驻留 (sys.intern)
+- 接口以 EndpointRef.index (在 swagger.endpoints 中的序号) 作为整数标识
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import List, Dict, Any, Optional
 import json
+import sys
 
 
 ID_HINTS = ("id", "pk", "key", "code", "uuid", "no", "num")
@@ -30,14 +36,34 @@ def _normalize_id(name: str) -> str:
     return lname[0].lower() + lname[1:]
 
 
+def _slotted(cls):
+    """将 dataclass 重建为 __slots__ 版本 (即 Python 3.10+ 的 dataclass(slots=True)，兼容 3.8)"""
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+@_slotted
 @dataclass
 class FieldRef:
-    """接口字段引用"""
+    """接口字段引用 (只读，内容相同的字段可共享同一实例)"""
     name: str
     location: str               # path/query/body
     required: bool = False
     description: str = ""
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
+        self.location = _intern(self.location)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "name": self.name,
@@ -53,12 +79,18 @@ class FieldRef:
         return None
 
 
+@_slotted
 @dataclass
 class EndpointRef:
-    """接口引用"""
+    """接口引用 (每个接口一个实例，资源和依赖关系中共享)"""
     path: str
     method: str
     summary: str = ""
+    index: int = field(default=-1, compare=False)     # 在 swagger.endpoints 中的序号，-1 表示未知
+
+    def __post_init__(self):
+        self.path = _intern(self.path)
+        self.method = _intern(self.method)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -68,6 +100,7 @@ class EndpointRef:
         }
 
 
+@_slotted
 @dataclass
 class ResourceInfo:
     """资源信息"""
@@ -83,16 +116,21 @@ class ResourceInfo:
         }
 
 
+@_slotted
 @dataclass
 class DependencyLink:
     """依赖关系"""
     consumer: EndpointRef                   # 依赖者
     field: FieldRef                         # 依赖字段
-    producers: List[EndpointRef] = field(default_factory=list)  # 可能提供者
+    producers: List[EndpointRef] = field(default_factory=list)  # 可能提供者 (同一 ID 的依赖共享同一列表)
     normalized_id: Optional[str] = None
     confidence: str = "中"
     reason: str = ""
 
+    def __post_init__(self):
+        self.normalized_id = _intern(self.normalized_id)
+        self.reason = _intern(self.reason)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "consumer": self.consumer.to_dict(),
@@ -110,8 +148,18 @@ class DependencyAnalysisResult:
     resources: Dict[str, ResourceInfo] = field(default_factory=dict)
     dependencies: List[DependencyLink] = field(default_factory=list)
     sorted_endpoints: List[Dict[str, Any]] = field(default_factory=list)  # 拓扑排序后的接口列表
+    layers: List[List[str]] = field(default_factory=list)   # 拓扑层级 ("METHOD /path")，同层接口之间无依赖，可并行执行
+    cycles: List[List[str]] = field(default_factory=list)   # 循环依赖 (节点数 > 1 的强连通分量)，排序时已按方法优先级断开
     generated_by: str = "static-analyzer"
 
+    def layer_of(self, method: str, path: str) -> Optional[int]:
+        """接口所在的拓扑层级 (未参与排序时为 None)"""
+        target = f"{method.upper()} {path}"
+        for index, layer in enumerate(self.layers):
+            if target in layer:
+                return index
+        return None
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "generated_by": self.generated_by,
@@ -120,7 +168,9 @@ class DependencyAnalysisResult:
             "endpoint_count": len(self.sorted_endpoints),
             "resources": {k: v.to_dict() for k, v in self.resources.items()},
             "dependencies": [d.to_dict() for d in self.dependencies],
-            "sorted_endpoints": self.sorted_endpoints
+            "sorted_endpoints": [dict(ep) for ep in self.sorted_endpoints],
+            "layers": self.layers,
+            "cycles": self.cycles
         }
 
     def save(self, output_dir: str) -> str:
@@ -146,6 +196,11 @@ class DependencyAnalysisResult:
             if len(self.sorted_endpoints) > limit:
                 lines.append(f"   ... 共 {len(self.sorted_endpoints)} 个接口")
 
+        if self.cycles:
+            lines.append("### 循环依赖")
+            for cycle in self.cycles[:limit]:
+                lines.append(f"- {' ↔ '.join(cycle[:5])}" + (f" 等 {len(cycle)} 个接口" if len(cycle) > 5 else ""))
+
         if self.resources:
             lines.append("### 资源与主键")
             for name, res in list(self.resources.items())[:limit]:
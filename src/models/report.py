@@ -105,6 +105,30 @@ class FinalReport:
     bug_report_file: str = ""       # bug_report.json
     business_report: str = ""       # business_report.html (业务级报告)
 
+    # 耗时分解: 各阶段耗时 (phases) 和依赖分析缓存情况 (dependency_analysis)
+    timings: Dict[str, Any] = field(default_factory=dict)
+
+    # LLM 响应缓存统计 (未启用缓存时为空)
+    llm_cache: Dict[str, Any] = field(default_factory=dict)
+
+    # 增量模式的接口差异 (非增量运行时为空)
+    spec_diff: Dict[str, Any] = field(default_factory=dict)
+
+    # 分文件并行生成统计 (每个文件的耗时和尝试次数，单次生成时为空)
+    generation: Dict[str, Any] = field(default_factory=dict)
+
+    # 执行前静态预检结果 (自动修复数、待修复文件；未启用预检时为空)
+    preflight: Dict[str, Any] = field(default_factory=dict)
+
+    # 规则修复器统计 (每个修复器的修复率和节省的 LLM 时间)
+    rule_fixers: Dict[str, Any] = field(default_factory=dict)
+
+    # 初始执行的失败聚类 (同类失败只判定/自愈代表用例)
+    failure_clusters: Dict[str, Any] = field(default_factory=dict)
+
+    # 执行前环境健康检查 (状态、各接口延迟；aborted 为 True 时未执行测试)
+    health: Dict[str, Any] = field(default_factory=dict)
+
     @property
     def pass_rate(self) -> float:
         """通过率"""
@@ -114,8 +138,8 @@ class FinalReport:
 
     @property
     def success(self) -> bool:
-        """是否全部通过"""
-        return self.failed == 0
+        """是否全部通过 (环境不可用而跳过执行时为 False)"""
+        return self.failed == 0 and not self.health.get("aborted", False)
 
     def get_summary(self) -> Dict[str, Any]:
         """获取摘要信息"""
@@ -143,7 +167,15 @@ class FinalReport:
                 "report_xml": self.report_xml,
                 "bug_report_file": self.bug_report_file,
                 "business_report": self.business_report
-            }
+            },
+            "timings": self.timings,
+            "llm_cache": self.llm_cache,
+            "spec_diff": self.spec_diff,
+            "generation": self.generation,
+            "preflight": self.preflight,
+            "rule_fixers": self.rule_fixers,
+            "failure_clusters": self.failure_clusters,
+            "health": self.health
         }
 
     def to_json(self) -> str:
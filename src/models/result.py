@@ -47,6 +47,7 @@ class CLIResult:
     execution_time: float = 0.0
     session_id: Optional[str] = None
     cost_usd: float = 0.0
+    cached: bool = False            # 是否来自响应缓存 (未实际调用 CLI)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -56,7 +57,8 @@ class CLIResult:
             "exit_code": self.exit_code,
             "execution_time": self.execution_time,
             "session_id": self.session_id,
-            "cost_usd": self.cost_usd
+            "cost_usd": self.cost_usd,
+            "cached": self.cached
         }
 
 
@@ -107,6 +109,7 @@ class TestCaseResult:
     error_info: Optional[ErrorInfo] = None
     healing_attempts: int = 0       # 自愈尝试次数
     healed: bool = False            # 是否自愈成功
+    node_id: str = ""               # pytest 节点 ID (path::Class::test_xxx)，用于增量重跑
 
     @property
     def passed(self) -> bool:
@@ -121,7 +124,8 @@ class TestCaseResult:
             "duration": self.duration,
             "error_info": self.error_info.to_dict() if self.error_info else None,
             "healing_attempts": self.healing_attempts,
-            "healed": self.healed
+            "healed": self.healed,
+            "node_id": self.node_id
         }
 
 
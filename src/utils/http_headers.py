@@ -0,0 +1,8 @@
+"""HTTP 请求头工具"""
+
+from typing import Optional
+
+
+def clean_header_value(value: Optional[str]) -> str:
+    """去掉非 ASCII 字符 (requests 按 latin-1 编码请求头，中文等字符会抛出 UnicodeEncodeError)"""
+    return "".join(c for c in (value or "") if ord(c) < 128)
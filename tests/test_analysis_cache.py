@@ -0,0 +1,38 @@
+"""AnalysisCache: 部分复用未变更接口的字段"""
+
+from src.core.analysis_cache import AnalysisCache, PARTIAL
+from src.core.dependency_analyzer import DependencyAnalyzer
+from src import models
+
+
+def _swagger(order_summary):
+    return models.SwaggerSpec(raw_content="{}", title="shop", endpoints=[
+        {"path": "/users", "method": "POST", "summary": "新建用户", "requestBody": {"content": {
+            "application/json": {"schema": {"required": ["name"], "properties": {"name": {"type": "string"}}}}
+        }}},
+        {"path": "/users/{userId}", "method": "GET", "summary": "用户详情",
+         "parameters": [{"name": "userId", "in": "path", "required": True}]},
+        {"path": "/orders", "method": "POST", "summary": order_summary,
+         "parameters": [{"name": "userId", "in": "query", "required": True, "description": "下单用户"}]},
+    ])
+
+
+def test_partial_reuse_matches_fresh_analysis(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    cache.analyze(DependencyAnalyzer(), _swagger("下单"))
+
+    swagger = _swagger("创建订单")
+    analysis, stats = cache.analyze(DependencyAnalyzer(), swagger)
+    fresh = DependencyAnalyzer().analyze(swagger)
+
+    assert stats.status == PARTIAL
+    assert (stats.reused_endpoints, stats.analyzed_endpoints) == (2, 1)
+    assert analysis.to_dict() == fresh.to_dict()
+
+
+def test_field_ref_shares_identical_fields():
+    analyzer = DependencyAnalyzer()
+
+    first = analyzer.field_ref("userId", "path", True)
+    assert analyzer.field_ref(**first.to_dict()) is first
+    assert analyzer.field_ref("userId", "query") is not first
@@ -0,0 +1,13 @@
+"""DependencyExplorer: 路径参数填充"""
+
+from src.core.dependency_explorer import DependencyExplorer
+from src.models.dependency import DependencyAnalysisResult, ResourceInfo
+
+
+def test_fill_path_quotes_reserved_characters():
+    resource = ResourceInfo(name="files", primary_keys=["id"])
+    analysis = DependencyAnalysisResult(resources={"files": resource})
+
+    filled = DependencyExplorer()._fill_path("/files/{id}", resource, analysis, {"files": ["a/b?c#d 1"]}, {})
+
+    assert filled == "/files/a%2Fb%3Fc%23d%201"
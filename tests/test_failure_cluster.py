@@ -0,0 +1,99 @@
+"""FailureClusterer: 失败信息中没有 URL 时按用例所属接口区分簇；环境级故障簇直接停止自愈"""
+
+from src.core.failure_cluster import FailureClusterer
+from src.core.result_judge import ResultJudge
+from src.core.workflow_engine import WorkflowEngine
+from src import models
+
+
+def _assert_500(testcase_id, function, file="test_api.py"):
+    return models.TestCaseResult(
+        testcase_id=testcase_id,
+        function_name=function,
+        file_path=file,
+        status=models.TestStatus.FAIL,
+        error_info=models.ErrorInfo(
+            error_type=models.ErrorType.ASSERTION,
+            file=file,
+            function=function,
+            testcase_id=testcase_id,
+            message="AssertionError: assert 500 == 200",
+            traceback="E       AssertionError: assert 500 == 200",
+        ),
+    )
+
+
+def test_assertions_without_url_split_by_testcase_endpoint():
+    results = [
+        _assert_500("TC-001", "test_list_users"),
+        _assert_500("TC-002", "test_create_order"),
+        _assert_500("TC-003", "test_list_users_paged"),
+    ]
+    endpoints = {"TC-001": "GET /users", "TC-002": "POST /orders", "TC-003": "GET /users"}
+
+    clusters = FailureClusterer().cluster(results, endpoints=endpoints)
+
+    assert [[r.testcase_id for r in c.results] for c in clusters] == [["TC-001", "TC-003"], ["TC-002"]]
+    assert [c.endpoint for c in clusters] == ["GET /users", "POST /orders"]
+
+
+def test_assertions_without_url_fall_back_to_test_file():
+    results = [
+        _assert_500("TC-001", "test_list_users", file="test_user_api.py"),
+        _assert_500("TC-002", "test_create_order", file="test_order_api.py"),
+    ]
+
+    clusters = FailureClusterer().cluster(results)
+
+    assert len(clusters) == 2
+
+
+def test_environment_status_still_groups_across_endpoints():
+    results = [_assert_500("TC-001", "test_list_users"), _assert_500("TC-002", "test_create_order")]
+    for result in results:
+        result.error_info.message = result.error_info.traceback = "E       AssertionError: assert 401 == 200"
+
+    clusters = FailureClusterer().cluster(results, endpoints={"TC-001": "GET /users", "TC-002": "POST /orders"})
+
+    assert len(clusters) == 1
+
+
+def _unauthorized(testcase_id, function, file):
+    result = _assert_500(testcase_id, function, file)
+    result.error_info.message = result.error_info.traceback = (
+        "E       AssertionError: assert 401 == 200 (http://api.local/v1/users)"
+    )
+    return result
+
+
+def test_host_wide_status_cluster_is_environment_failure():
+    results = [
+        _unauthorized("TC-001", "test_list_users", "test_user_api.py"),
+        _unauthorized("TC-002", "test_create_order", "test_order_api.py"),
+        _unauthorized("TC-003", "test_list_goods", "test_goods_api.py"),
+    ]
+
+    clusters = FailureClusterer().cluster(results)
+
+    assert len(clusters) == 1 and clusters[0].host_wide
+    assert ResultJudge.is_environment_failure(clusters[0], total_tests=4)
+    assert not ResultJudge.is_environment_failure(clusters[0], total_tests=10)
+
+
+def test_environment_failure_stops_healing(tmp_path):
+    engine = WorkflowEngine(models.TaskContext(
+        swagger=models.SwaggerSpec(raw_content="{}"),
+        config=models.EnvConfig(base_url="http://api.local"),
+        output_dir=str(tmp_path / "output")
+    ))
+    assertion = _assert_500("TC-004", "test_delete_order", "test_order_api.py")
+    results = [
+        _unauthorized("TC-001", "test_list_users", "test_user_api.py"),
+        _unauthorized("TC-002", "test_create_order", "test_order_api.py"),
+        _unauthorized("TC-003", "test_list_goods", "test_goods_api.py"),
+        assertion,
+    ]
+
+    assert engine._judge_failures(results, total_tests=4) == []
+    assert engine._cluster_summary["environment_failure"]
+    assert not assertion.healed
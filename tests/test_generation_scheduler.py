@@ -0,0 +1,20 @@
+"""GenerationScheduler: 重试时的失败原因"""
+
+from src.core.generation_scheduler import GenerationScheduler, GenerationUnit
+
+
+def test_retry_does_not_keep_previous_error(tmp_path):
+    unit = GenerationUnit(index=1, name="users", file_name="test_users.py", staging_dir=str(tmp_path / "staging"))
+    seen = []
+
+    def gen_fn(unit, attempt):
+        seen.append(unit.last_error)
+        if attempt == 1:
+            unit.error = "连接中断"
+        return False
+
+    failed = GenerationScheduler(max_retries=1).run([unit], gen_fn, str(tmp_path))
+
+    assert failed == [unit]
+    assert seen == ["", "连接中断"]
+    assert unit.error == "CLI 调用失败"
@@ -0,0 +1,54 @@
+"""HealthProbe: 请求头中的非 ASCII Token 与意外异常不会中断健康检查"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.core.health_probe import HealthProbe, HEALTHY, DOWN
+from src import models
+
+
+@pytest.fixture
+def server():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            received.append(self.headers.get("authorization"))
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}", received
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_non_ascii_token_is_cleaned(server):
+    base_url, received = server
+    report = HealthProbe(timeout=5).check(models.EnvConfig(base_url=base_url, auth_token="Bearer 令牌abc"))
+
+    assert report.status == HEALTHY
+    assert received == ["Bearer abc"]
+
+
+def test_unexpected_probe_exception_is_recorded(server, monkeypatch):
+    base_url, _ = server
+
+    def broken(*args, **kwargs):
+        raise ValueError("bad header")
+
+    monkeypatch.setattr("src.core.health_probe.requests.get", broken)
+    report = HealthProbe(timeout=5).check(models.EnvConfig(base_url=base_url))
+
+    assert report.status == DOWN
+    assert report.probes[0].error == "ValueError: bad header"
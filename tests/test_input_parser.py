@@ -0,0 +1,39 @@
+"""InputParser: 接口定义为 slots 的 Endpoint，与 dict 表示兼容"""
+
+import json
+from pathlib import Path
+
+from src.core.input_parser import InputParser
+from src import models
+
+SPEC = str(Path(__file__).parent / "configTestSwagger.json")
+
+
+def test_endpoints_are_slotted_mappings(tmp_path):
+    swagger = InputParser(spec_cache=False).parse(SPEC, "http://localhost").swagger
+
+    ep = swagger.endpoints[0]
+    assert isinstance(ep, models.Endpoint)
+    assert not hasattr(ep, "__dict__")
+    assert ep.get("path") == ep["path"] == ep.path
+    assert ep == ep.to_dict()
+    assert json.loads(json.dumps(ep.to_dict())) == dict(ep)
+
+
+def test_endpoint_without_request_body_matches_dict():
+    ep = models.Endpoint(path="/users", method="get", summary="用户列表")
+
+    assert ep.method == "GET"
+    assert "requestBody" not in ep
+    assert ep.get("requestBody") is None
+    assert list(ep) == ["path", "method", "operationId", "summary", "description", "tags", "parameters", "responses"]
+    assert models.Endpoint.from_dict(ep.to_dict()) == ep
+
+
+def test_parse_cache_hit_restores_endpoints(tmp_path):
+    parser = InputParser(spec_cache_dir=str(tmp_path / "cache"))
+    cold = parser.parse(SPEC, "http://localhost").swagger
+    warm = parser.parse(SPEC, "http://localhost").swagger
+
+    assert all(isinstance(ep, models.Endpoint) for ep in warm.endpoints)
+    assert [ep.to_dict() for ep in warm.endpoints] == [ep.to_dict() for ep in cold.endpoints]
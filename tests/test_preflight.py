@@ -0,0 +1,62 @@
+"""PreflightValidator: 名称收集"""
+
+import ast
+import importlib
+import sys
+
+import pytest
+
+from src.core import preflight
+
+SOURCE = """
+import json
+from pathlib import Path as P
+
+
+def test_a(value, *args, **kwargs):
+    global counter
+    result = [item for item in value]
+    try:
+        pass
+    except ValueError as err:
+        pass
+"""
+
+MATCH_SOURCE = """
+def test_match(command):
+    match command:
+        case {"action": action, **extra}:
+            pass
+        case [first, *rest]:
+            pass
+        case str() as text:
+            pass
+"""
+
+
+def test_defined_names():
+    names, star_import = preflight.PreflightValidator._defined_names(ast.parse(SOURCE))
+
+    assert {"json", "P", "test_a", "value", "args", "kwargs", "counter", "result", "item", "err"} <= names
+    assert "print" in names
+    assert not star_import
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="match 语句需要 Python 3.10+")
+def test_defined_names_match_patterns():
+    names, _ = preflight.PreflightValidator._defined_names(ast.parse(MATCH_SOURCE))
+
+    assert {"action", "extra", "first", "rest", "text"} <= names
+
+
+def test_defined_names_without_match_nodes(monkeypatch):
+    """模拟 Python 3.8/3.9: ast 中没有 Match* 节点"""
+    for name in ("MatchAs", "MatchStar", "MatchMapping"):
+        monkeypatch.delattr(ast, name, raising=False)
+    module = importlib.reload(preflight)
+    try:
+        names, _ = module.PreflightValidator._defined_names(ast.parse(SOURCE))
+        assert {"json", "test_a", "err"} <= names
+    finally:
+        monkeypatch.undo()
+        importlib.reload(preflight)
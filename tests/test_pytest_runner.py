@@ -0,0 +1,45 @@
+"""PytestRunner 增量验证: 部分文件收集失败时其余节点仍然执行"""
+
+import pytest
+
+from src.core.pytest_runner import PytestRunner, PytestConfig
+from src import models
+
+
+@pytest.fixture
+def tests_dir(tmp_path):
+    tests = tmp_path / "tests"
+    tests.mkdir()
+    (tests / "test_a.py").write_text("def test_a():\n    assert True\n")
+    (tests / "test_b.py").write_text("import missing_module_for_verify\n\n\ndef test_b():\n    assert True\n")
+    (tests / "test_c.py").write_text("def test_c():\n    assert 500 == 200\n")
+    return tests
+
+
+@pytest.mark.parametrize("warm_worker", [False, True], ids=["subprocess", "warm"])
+def test_run_nodes_continues_after_collection_error(tests_dir, warm_worker):
+    runner = PytestRunner(PytestConfig(warm_worker=warm_worker, verbose=False))
+    nodes = [f"{tests_dir}/test_a.py::test_a", f"{tests_dir}/test_b.py::test_b", f"{tests_dir}/test_c.py::test_c"]
+    try:
+        result = runner.run_nodes(nodes, str(tests_dir), str(tests_dir.parent / "output"))
+    finally:
+        runner.close()
+
+    statuses = {r.node_id: r.status for r in result.test_results}
+    assert statuses == {
+        nodes[0]: models.TestStatus.PASS,
+        nodes[1]: models.TestStatus.ERROR,
+        nodes[2]: models.TestStatus.FAIL,
+    }
+    assert (result.total, result.passed, result.failed, result.errors) == (3, 1, 1, 1)
+
+
+@pytest.mark.parametrize("codes, expected", [
+    ([0, 5, 1], 1),
+    ([5, 1, -1], 1),
+    ([0, 5], 5),
+    ([0, 0], 0),
+    ([0, -1], -1),
+])
+def test_merge_exit_codes_keeps_test_failures(codes, expected):
+    assert PytestRunner._merge_exit_codes(codes) == expected
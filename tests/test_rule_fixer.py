@@ -0,0 +1,34 @@
+"""RuleFixer: 自定义修复器接口"""
+
+from typing import Optional
+
+import pytest
+
+from src.core.rule_fixer import RuleFixer, RuleFixerRegistry, FixContext, DEFAULT_FIXERS
+
+
+def test_incomplete_fixer_fails_on_creation():
+    class MatchOnly(RuleFixer):
+        name = "match_only"
+
+        def match(self, ctx: FixContext) -> bool:
+            return True
+
+    with pytest.raises(TypeError):
+        MatchOnly()
+
+
+def test_custom_fixer_registers(tmp_path):
+    class NoopFixer(RuleFixer):
+        name = "noop"
+
+        def match(self, ctx: FixContext) -> bool:
+            return False
+
+        def apply(self, ctx: FixContext) -> Optional[str]:
+            return None
+
+    registry = RuleFixerRegistry(str(tmp_path))
+    registry.register(NoopFixer())
+
+    assert [f.name for f in registry.fixers] == [cls.name for cls in DEFAULT_FIXERS] + ["noop"]
@@ -0,0 +1,140 @@
+"""DependencyAnalyzer._topological_sort 性质测试
+
+随机生成的依赖图 (含重复接口、大小写混用的方法) 上与原先的 Kahn 实现 (列表队列，每轮重新排序) 对比:
+- 无环图: 排序结果与原实现完全一致，且生产者所在层级小于消费者
+- 有环图: 每个接口恰好输出一次
+"""
+
+import random
+from collections import defaultdict
+from typing import Any, Dict, List, Set, Tuple
+
+import pytest
+
+from src.core.dependency_analyzer import DependencyAnalyzer, METHOD_PRIORITY
+from src.models.dependency import DependencyLink, EndpointRef, FieldRef
+
+METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD", "TRACE"]
+SEEDS = range(200)
+
+
+# ---------- 原先的实现 (参照) ----------
+
+def _key(ep: Dict[str, Any]) -> Tuple[str, str]:
+    return ep.get("path", ""), ep.get("method", "").upper()
+
+
+def reference_graph(endpoints, dependencies):
+    graph: Dict[Tuple[str, str], List[Tuple[str, str]]] = defaultdict(list)
+    in_degree: Dict[Tuple[str, str], int] = defaultdict(int)
+    for ep in endpoints:
+        in_degree[_key(ep)] = 0
+    for dep in dependencies:
+        consumer_key = (dep.consumer.path, dep.consumer.method.upper())
+        for producer in dep.producers:
+            producer_key = (producer.path, producer.method.upper())
+            if producer_key == consumer_key:
+                continue
+            if consumer_key not in graph[producer_key]:
+                graph[producer_key].append(consumer_key)
+                in_degree[consumer_key] += 1
+    return graph, in_degree
+
+
+def reference_sort(endpoints, dependencies) -> List[Dict[str, Any]]:
+    if not endpoints:
+        return []
+    graph, in_degree = reference_graph(endpoints, dependencies)
+    ep_map = {_key(ep): ep for ep in endpoints}
+
+    def priority(ep):
+        return METHOD_PRIORITY.get(ep.get("method", "").upper(), 99)
+
+    queue = [ep for ep in endpoints if in_degree.get(_key(ep), 0) == 0]
+    queue.sort(key=priority)
+    sorted_endpoints: List[Dict[str, Any]] = []
+    visited: Set[Tuple[str, str]] = set()
+    while queue:
+        ep = queue.pop(0)
+        key = _key(ep)
+        if key in visited:
+            continue
+        visited.add(key)
+        sorted_endpoints.append(ep)
+        for neighbor_key in graph.get(key, []):
+            if neighbor_key in visited:
+                continue
+            in_degree[neighbor_key] -= 1
+            if in_degree[neighbor_key] == 0 and ep_map.get(neighbor_key):
+                queue.append(ep_map[neighbor_key])
+        queue.sort(key=priority)
+
+    remaining = [ep for ep in endpoints if _key(ep) not in visited]
+    remaining.sort(key=priority)
+    sorted_endpoints.extend(remaining)
+    return sorted_endpoints
+
+
+# ---------- 随机依赖图 ----------
+
+def random_graph(seed: int, cyclic: bool):
+    """返回 (接口列表, 依赖列表, 边集合)。无环时边只从拓扑序靠前的接口指向靠后的接口"""
+    rng = random.Random(seed)
+    count = rng.randint(1, 30)
+    keys = list(dict.fromkeys(
+        (f"/res{rng.randrange(count)}" + ("/{id}" if rng.random() < 0.5 else ""), rng.choice(METHODS))
+        for _ in range(count)
+    ))
+
+    def variant(key):
+        path, method = key
+        method = "".join(c.lower() if rng.random() < 0.5 else c for c in method)
+        return {"path": path, "method": method, "summary": f"{method} {path}"}
+
+    endpoints = [variant(k) for k in keys]
+    # 重复接口 (方法大小写可能不同)
+    endpoints += [variant(rng.choice(keys)) for _ in range(rng.randint(0, len(keys) // 3))]
+    rng.shuffle(endpoints)
+
+    rank = {k: i for i, k in enumerate(rng.sample(keys, len(keys)))}
+    edges = set()
+    dependencies = []
+    for consumer in keys:
+        candidates = [k for k in keys if rank[k] < rank[consumer]]
+        if cyclic:
+            candidates = [k for k in keys if k != consumer]
+        producers = rng.sample(candidates, min(len(candidates), rng.randint(0, 3)))
+        if not producers:
+            continue
+        edges.update((p, consumer) for p in producers)
+        dependencies.append(DependencyLink(
+            consumer=EndpointRef(path=consumer[0], method=rng.choice([consumer[1], consumer[1].lower()])),
+            field=FieldRef(name="id", location="path"),
+            producers=[EndpointRef(path=p, method=m.lower() if rng.random() < 0.5 else m) for p, m in producers]
+        ))
+    return endpoints, dependencies, edges
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_acyclic_matches_reference_and_layers(seed):
+    endpoints, dependencies, edges = random_graph(seed, cyclic=False)
+
+    result, layers, cycles = DependencyAnalyzer()._topological_sort(endpoints, dependencies)
+
+    assert [id(ep) for ep in result] == [id(ep) for ep in reference_sort(endpoints, dependencies)]
+    assert cycles == []
+    layer_of = {name: i for i, layer in enumerate(layers) for name in layer}
+    assert len(layer_of) == len({_key(ep) for ep in endpoints})
+    for (p_path, p_method), (c_path, c_method) in edges:
+        assert layer_of[f"{p_method} {p_path}"] < layer_of[f"{c_method} {c_path}"]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cyclic_outputs_each_endpoint_once(seed):
+    endpoints, dependencies, _ = random_graph(seed, cyclic=True)
+
+    result, layers, _ = DependencyAnalyzer()._topological_sort(endpoints, dependencies)
+
+    keys = [_key(ep) for ep in result]
+    assert sorted(keys) == sorted({_key(ep) for ep in endpoints})
+    assert sorted(name for layer in layers for name in layer) == sorted(f"{m} {p}" for p, m in keys)